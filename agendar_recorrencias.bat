@@ -0,0 +1,51 @@
+@echo off
+chcp 65001 >nul
+echo ========================================
+echo 🔁 AGENDADOR DE TRANSAÇÕES RECORRENTES
+echo ========================================
+echo.
+
+echo Este script criará uma tarefa agendada no Windows
+echo para lançar as transações recorrentes diariamente.
+echo.
+
+set /p HORA="Digite a hora da execução diária (0-23): "
+set /p MINUTO="Digite o minuto (0-59): "
+
+echo.
+echo Criando tarefa agendada...
+echo.
+
+REM Obtém o diretório atual
+set CURRENT_DIR=%cd%
+
+REM Cria tarefa agendada
+schtasks /create /tn "Recorrencias_Gestao_Financeira" /tr "%CURRENT_DIR%\executar_recorrencias.bat" /sc daily /st %HORA%:%MINUTO% /f
+
+if %ERRORLEVEL% EQU 0 (
+    echo.
+    echo ========================================
+    echo ✅ TAREFA CRIADA COM SUCESSO!
+    echo ========================================
+    echo.
+    echo 📅 As recorrências serão lançadas diariamente às %HORA%:%MINUTO%
+    echo    Se o computador ficar desligado, a próxima execução lança os dias pendentes.
+    echo.
+    echo Para gerenciar a tarefa:
+    echo - Abra o "Agendador de Tarefas" do Windows
+    echo - Procure por "Recorrencias_Gestao_Financeira"
+    echo.
+    echo Para remover a tarefa:
+    echo   schtasks /delete /tn "Recorrencias_Gestao_Financeira" /f
+    echo.
+) else (
+    echo.
+    echo ========================================
+    echo ❌ ERRO AO CRIAR TAREFA
+    echo ========================================
+    echo.
+    echo Execute este arquivo como Administrador!
+    echo.
+)
+
+pause
@@ -0,0 +1,304 @@
+"""
+Gastos Fora do Padrão
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Processo em lote que marca, por usuário e categoria de despesa:
+
+- meses cujo total ficou muito acima do habitual: mediana e MAD (desvio
+  absoluto mediano) dos totais dos `janela` meses anteriores em que houve
+  gasto na categoria;
+- transações muito acima do valor típico da categoria: mediana e MAD dos
+  valores das transações da categoria nos `janela` meses anteriores.
+
+Um valor é marcado quando passa de mediana + LIMIAR * escala, com
+escala = max(1,4826 * MAD, 10% da mediana) (a fração da mediana evita que
+gastos sempre iguais marquem qualquer centavo a mais). Os resultados vão
+para anomalias_gastos e a página de relatórios só lê a tabela.
+
+Incremental: resumo_mensal.atualizado_em muda a cada transação incluída
+ou excluída, então só os usuários com meses alterados desde a última
+execução são reprocessados, do mês alterado mais antigo até o mês atual
+(os meses seguintes usam o alterado na janela). A marca da execução fica
+em controle_processamento.
+
+Uso (executado por executar_recorrencias.bat, depois das recorrências):
+    python anomalias.py --executar
+    python anomalias.py --executar --completo
+"""
+
+import logging
+import os
+import sys
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+import periodos
+
+JANELA_MESES = 12
+LIMIAR = 3.5
+MIN_MESES = 3
+MIN_TRANSACOES = 5
+PROCESSO = 'anomalias'
+
+logger = logging.getLogger('anomalias')
+
+
+# ============== ESTATÍSTICAS ==============
+
+def mediana_por_grupo(grupos, valores, quantidade):
+    """
+    Mediana e contagem de `valores` por grupo (0..quantidade-1), com uma ordenação.
+    Inteiros não negativos (centavos) são ordenados numa única chave grupo|valor,
+    bem mais rápido que o lexsort usado para os demais tipos.
+    """
+    contagem = np.bincount(grupos, minlength=quantidade)
+    inteiros = valores.dtype.kind in 'iu' and len(valores) > 0 and valores.min() >= 0
+    bits = int(valores.max()).bit_length() if inteiros else 0
+    if inteiros and bits + int(quantidade).bit_length() < 63:
+        chave = np.sort((grupos.astype(np.int64) << bits) | valores.astype(np.int64))
+        ordenados = chave & ((1 << bits) - 1)
+    else:
+        ordenados = valores[np.lexsort((valores, grupos))]
+    inicio = np.cumsum(contagem) - contagem
+    mediana = np.full(quantidade, np.nan)
+    com_valores = contagem > 0
+    baixo = inicio[com_valores] + (contagem[com_valores] - 1) // 2
+    alto = inicio[com_valores] + contagem[com_valores] // 2
+    mediana[com_valores] = (ordenados[baixo] + ordenados[alto]) / 2
+    return mediana, contagem
+
+
+def _limite(mediana, mad):
+    escala = np.maximum(1.4826 * mad, 0.1 * np.abs(mediana))
+    return mediana + LIMIAR * escala, escala
+
+
+def meses_fora_do_padrao(meses, categorias, centavos, quantidade, avaliados, janela=JANELA_MESES):
+    """
+    Totais mensais acima do habitual. `meses` é relativo ao início dos dados
+    (os `janela` meses antes do primeiro avaliado); avaliados = número de meses
+    avaliados após a janela.
+    Retorna (categoria, índice do mês avaliado, total, mediana, limite, pontuação) em arrays.
+    """
+    totais = np.bincount(categorias * (janela + avaliados) + meses, weights=centavos,
+                         minlength=quantidade * (janela + avaliados)).reshape(quantidade, -1)
+    # Janelas (categorias x meses avaliados x janela) só com os meses em que houve gasto
+    janelas = sliding_window_view(totais, janela, axis=1)[:, :avaliados].astype(float)
+    janelas[janelas <= 0] = np.nan
+    com_gasto = np.count_nonzero(~np.isnan(janelas), axis=-1)
+    suficiente = com_gasto >= MIN_MESES
+
+    mediana = np.full((quantidade, avaliados), np.nan)
+    mad = np.full((quantidade, avaliados), np.nan)
+    if suficiente.any():
+        mediana[suficiente] = np.nanmedian(janelas[suficiente], axis=-1)
+        mad[suficiente] = np.nanmedian(np.abs(janelas[suficiente] - mediana[suficiente][:, None]), axis=-1)
+    limite, escala = _limite(mediana, mad)
+
+    atuais = totais[:, janela:]
+    with np.errstate(invalid='ignore'):
+        marcados = suficiente & (atuais > limite)
+    categoria, mes = np.nonzero(marcados)
+    pontuacao = (atuais - mediana)[marcados] / escala[marcados]
+    return categoria, mes, atuais[marcados], mediana[marcados], limite[marcados], pontuacao
+
+
+def transacoes_fora_do_padrao(meses, categorias, centavos, quantidade, avaliados, janela=JANELA_MESES):
+    """
+    Transações acima do valor típico da categoria nos `janela` meses anteriores.
+    Cada transação entra na janela dos meses avaliados seguintes (até `janela`),
+    e as medianas de todos os pares (categoria, mês avaliado) saem de uma vez.
+    Retorna (posição da transação, índice do mês avaliado, mediana, limite, pontuação).
+    """
+    grupos_total = quantidade * avaliados
+    # Expansão transação x deslocamento: a transação do mês t compõe a janela dos meses t+1..t+janela
+    deslocamento = np.arange(1, janela + 1)
+    destino = meses[:, None] + deslocamento - janela
+    valido = (destino >= 0) & (destino < avaliados)
+    linhas = np.nonzero(valido)[0]
+    grupos = categorias[linhas] * avaliados + destino[valido]
+    valores = centavos[linhas]
+
+    mediana, contagem = mediana_por_grupo(grupos, valores, grupos_total)
+    # Desvios dobrados continuam inteiros (a mediana pode terminar em meio centavo)
+    desvios = np.abs(2 * valores - (2 * mediana[grupos]).astype(np.int64))
+    mad, _ = mediana_por_grupo(grupos, desvios, grupos_total)
+    mad /= 2
+    limite, escala = _limite(mediana, mad)
+
+    avaliadas = np.nonzero(meses >= janela)[0]
+    grupo = categorias[avaliadas] * avaliados + meses[avaliadas] - janela
+    with np.errstate(invalid='ignore'):
+        marcadas = (contagem[grupo] >= MIN_TRANSACOES) & (centavos[avaliadas] > limite[grupo])
+    posicoes = avaliadas[marcadas]
+    grupo = grupo[marcadas]
+    pontuacao = (centavos[posicoes] - mediana[grupo]) / escala[grupo]
+    return posicoes, meses[posicoes] - janela, mediana[grupo], limite[grupo], pontuacao
+
+
+# ============== PROCESSAMENTO POR USUÁRIO ==============
+
+def _mes_indice(data):
+    return data.year * 12 + data.month - 1
+
+
+def _mes_data(indice):
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def _reais(centavos):
+    return (Decimal(int(round(centavos))) / 100).quantize(Decimal('0.01'))
+
+
+def analisar_usuario(cursor, usuario_id, desde, hoje, janela=JANELA_MESES):
+    """Linhas de anomalias_gastos do usuário para os meses de `desde` até o mês de `hoje`"""
+    primeiro = _mes_indice(desde)
+    avaliados = _mes_indice(hoje) - primeiro + 1
+    inicio_dados = _mes_data(primeiro - janela)
+    periodo = periodos.Periodo(inicio_dados, periodos.adicionar_meses(hoje, 1))
+    trecho, params = periodo.filtro('data')
+    cursor.execute(f'''
+        SELECT id, TIMESTAMPDIFF(MONTH, %s, data), categoria, CAST(valor * 100 AS SIGNED)
+        FROM transacoes
+        WHERE usuario_id = %s AND tipo = 'despesa' AND {trecho}
+    ''', (inicio_dados, usuario_id) + params)
+    linhas = cursor.fetchall()
+    if not linhas:
+        return []
+
+    ids, meses, nomes, centavos = zip(*linhas)
+    codigos = {}
+    categorias = np.fromiter((codigos.setdefault(c or 'Outros', len(codigos)) for c in nomes),
+                             dtype=np.int64, count=len(linhas))
+    nomes_categorias = list(codigos)
+    meses = np.array(meses, dtype=np.int64)
+    centavos = np.array(centavos, dtype=np.int64)
+
+    resultado = []
+    for c, m, total, mediana, limite, pontuacao in zip(
+            *meses_fora_do_padrao(meses, categorias, centavos, len(codigos), avaliados, janela)):
+        resultado.append((usuario_id, _mes_data(primeiro + int(m)), nomes_categorias[c], None,
+                          _reais(total), _reais(mediana), _reais(limite), round(float(pontuacao), 2)))
+    for posicao, m, mediana, limite, pontuacao in zip(
+            *transacoes_fora_do_padrao(meses, categorias, centavos, len(codigos), avaliados, janela)):
+        resultado.append((usuario_id, _mes_data(primeiro + int(m)), nomes_categorias[categorias[posicao]],
+                          ids[posicao], _reais(centavos[posicao]), _reais(mediana), _reais(limite),
+                          round(float(pontuacao), 2)))
+    return resultado
+
+
+# ============== PROCESSO EM LOTE ==============
+
+def usuarios_alterados(cursor, marca):
+    """{usuario_id: mês alterado mais antigo} desde a marca (todos se marca for None)"""
+    if marca is None:
+        cursor.execute('SELECT usuario_id, MIN(mes) FROM resumo_mensal GROUP BY usuario_id')
+    else:
+        cursor.execute('''
+            SELECT usuario_id, MIN(mes) FROM resumo_mensal
+            WHERE atualizado_em >= %s
+            GROUP BY usuario_id
+        ''', (marca,))
+    return dict(cursor.fetchall())
+
+
+def executar(conn, hoje=None, completo=False, janela=JANELA_MESES):
+    """
+    Reprocessa os usuários com meses alterados desde a última execução (um
+    commit por usuário) e grava a nova marca no final. Se algo falhar, a marca
+    não avança e a próxima execução refaz o trabalho (o reprocessamento é
+    idempotente). Retorna {'usuarios': [...], 'anomalias': n}.
+    """
+    hoje = hoje or date.today()
+    cursor = conn.cursor()
+    try:
+        # Marca lida antes das alterações: o que mudar durante a execução entra na próxima
+        cursor.execute('SELECT NOW()')
+        inicio = cursor.fetchone()[0]
+        marca = None
+        if not completo:
+            cursor.execute('SELECT marca FROM controle_processamento WHERE processo = %s', (PROCESSO,))
+            linha = cursor.fetchone()
+            marca = linha[0] if linha else None
+
+        resultado = {'usuarios': [], 'anomalias': 0}
+        for usuario_id, desde in sorted(usuarios_alterados(cursor, marca).items()):
+            desde = _mes_data(_mes_indice(min(desde, hoje)))
+            linhas = analisar_usuario(cursor, usuario_id, desde, hoje, janela)
+            cursor.execute('DELETE FROM anomalias_gastos WHERE usuario_id = %s AND mes >= %s',
+                           (usuario_id, desde))
+            if linhas:
+                cursor.executemany('''
+                    INSERT INTO anomalias_gastos
+                        (usuario_id, mes, categoria, transacao_id, valor, mediana, limite, pontuacao)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                ''', linhas)
+            conn.commit()
+            resultado['usuarios'].append(usuario_id)
+            resultado['anomalias'] += len(linhas)
+
+        cursor.execute('''
+            INSERT INTO controle_processamento (processo, marca) VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE marca = VALUES(marca)
+        ''', (PROCESSO, inicio))
+        conn.commit()
+        return resultado
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+if __name__ == '__main__':
+    import argparse
+    import mysql.connector
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    from cache import criar_cache
+    from config import DB_CONFIG
+
+    parser = argparse.ArgumentParser(description='Detecção de gastos fora do padrão')
+    parser.add_argument('--executar', action='store_true', help='Processa os meses alterados')
+    parser.add_argument('--completo', action='store_true', help='Reprocessa todos os usuários')
+    args = parser.parse_args()
+    if not args.executar:
+        parser.print_help()
+        sys.exit(0)
+
+    os.makedirs('logs', exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(os.path.join('logs', 'anomalias.log'), encoding='utf-8'),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    try:
+        resultado = executar(conn, completo=args.completo)
+    except Exception:
+        logger.exception('Erro ao processar anomalias')
+        sys.exit(1)
+    finally:
+        conn.close()
+
+    # Com CACHE_BACKEND=redis os relatórios são atualizados na hora; o cache em
+    # memória é do processo do app e não é alcançado daqui
+    cache = criar_cache()
+    if cache.compartilhado:
+        for usuario_id in resultado['usuarios']:
+            cache.invalidate(usuario_id, 'relatorios')
+    elif resultado['usuarios']:
+        logger.warning('Cache das páginas não compartilhado (CACHE_BACKEND=memoria): os relatórios de '
+                       '%d usuário(s) mostram as anomalias quando o cache expirar (CACHE_TTL=%ds)',
+                       len(resultado['usuarios']), cache.ttl)
+
+    logger.info('Concluído: %d usuário(s) reprocessado(s), %d anomalia(s)',
+                len(resultado['usuarios']), resultado['anomalias'])
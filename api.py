@@ -0,0 +1,210 @@
+"""
+API JSON (v1)
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Blueprint com os dados das páginas em /api/v1/..., para o frontend e o
+aplicativo móvel buscarem só o que precisam. Usa as mesmas consultas
+(consultas.py, previsao.py) e as mesmas entradas do cache de views das
+páginas (app.extensions['view_cache']), então página e API não consultam
+o banco duas vezes.
+
+Respostas:
+- JSON compacto; valores monetários como string decimal ('1234.50'),
+  datas em ISO (AAAA-MM-DD)
+- ETag (hash do corpo) com If-None-Match: 304 sem corpo quando nada mudou
+- compressão (gzip/brotli) pelo middleware de cache_http.py
+- sem sessão, 401 em JSON (em vez do redirecionamento para /login)
+
+Endpoints (somente leitura):
+    GET /api/v1/dashboard
+    GET /api/v1/transacoes?inicio=&fim=&tipo=&categoria=&apos=&antes=&limite=
+    GET /api/v1/metas
+    GET /api/v1/relatorios?periodo=&referencia=&de=&ate=&tipo=&categoria=
+    GET /api/v1/relatorios/previsao?meses=1..24
+"""
+
+import hashlib
+import json
+from datetime import date
+from decimal import Decimal
+from functools import wraps
+
+from flask import Blueprint, Response, current_app, jsonify, request, session
+
+import consultas
+import periodos
+import previsao
+from cache_http import etag_confere
+from db_pool import get_db
+
+api_v1 = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+# Campos de transação expostos (as linhas do banco podem trazer outros)
+CAMPOS_TRANSACAO = ('id', 'tipo', 'valor', 'descricao', 'categoria', 'data')
+
+
+# ============== RESPOSTAS (ETAG) ==============
+
+def _serializar(valor):
+    """Tipos que o json não conhece: Decimal vira string, datas viram ISO"""
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if isinstance(valor, date):
+        return valor.isoformat()
+    raise TypeError(f'Tipo não serializável: {type(valor).__name__}')
+
+
+def resposta_json(dados):
+    """
+    Resposta JSON com ETag: o hash do corpo sem compressão (o middleware de
+    compressão acrescenta o sufixo da codificação). Se o cliente já tem essa
+    versão, em qualquer codificação, responde 304 sem corpo.
+    """
+    corpo = json.dumps(dados, default=_serializar, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    etag = hashlib.blake2b(corpo, digest_size=16).hexdigest()
+
+    tag = etag_confere(etag)
+    if tag is not None:
+        resposta = Response(status=304)
+        resposta.set_etag(tag)
+    else:
+        resposta = Response(corpo, mimetype='application/json')
+        resposta.set_etag(etag)
+
+    # Dados por usuário: o navegador guarda, mas sempre revalida com o ETag
+    resposta.headers['Cache-Control'] = 'private, no-cache'
+    resposta.vary.update(('Accept-Encoding', 'Cookie'))
+    return resposta
+
+
+def erro(mensagem, status=400):
+    return jsonify({'erro': mensagem}), status
+
+
+def login_obrigatorio(f):
+    """Como o login_required do app, mas responde 401 em JSON"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            return erro('Autenticação necessária', 401)
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def _view_cache():
+    return current_app.extensions['view_cache']
+
+
+def _transacao(linha):
+    return {campo: linha[campo] for campo in CAMPOS_TRANSACAO}
+
+
+# ============== ENDPOINTS ==============
+# As variantes de cache são as mesmas das rotas de página em app.py
+
+@api_v1.route('/dashboard')
+@login_obrigatorio
+def dashboard():
+    """Saldo, receitas/despesas do mês atual e últimas transações"""
+    usuario_id = session['user_id']
+    hoje = date.today()
+    dados = _view_cache().get_or_load(
+        usuario_id, 'dashboard',
+        lambda: consultas.dados_dashboard(get_db().cursor(dictionary=True), usuario_id, hoje),
+        variante=hoje.strftime('%Y-%m')
+    )
+    return resposta_json({
+        'saldo': dados['saldo'],
+        'mes_atual': dados['mes_atual'],
+        'ultimas_transacoes': [_transacao(t) for t in dados['transacoes']],
+    })
+
+
+@api_v1.route('/transacoes')
+@login_obrigatorio
+def transacoes():
+    """Histórico paginado por keyset (mesmos filtros de /transacoes)"""
+    try:
+        filtros = consultas.normalizar_filtros(
+            request.args.get('inicio'), request.args.get('fim'),
+            request.args.get('categoria'), request.args.get('tipo')
+        )
+        apos = consultas.ler_chave(request.args['apos']) if request.args.get('apos') else None
+        antes = consultas.ler_chave(request.args['antes']) if request.args.get('antes') else None
+        limite = min(max(int(request.args.get('limite', 50)), 1), 200)
+    except ValueError as e:
+        return erro(str(e))
+
+    pagina = consultas.pagina_transacoes(get_db().cursor(dictionary=True), session['user_id'],
+                                         filtros, apos, antes, limite)
+    return resposta_json({
+        'transacoes': [_transacao(t) for t in pagina['transacoes']],
+        'proxima': pagina['proxima'],
+        'anterior': pagina['anterior'],
+        'filtros': filtros,
+        'limite': limite,
+    })
+
+
+@api_v1.route('/metas')
+@login_obrigatorio
+def metas():
+    """Metas com progresso, estatísticas e metas com prazo próximo"""
+    usuario_id = session['user_id']
+    hoje = date.today()
+    dados = _view_cache().get_or_load(
+        usuario_id, 'metas',
+        lambda: consultas.dados_metas(get_db().cursor(dictionary=True), usuario_id, hoje),
+        variante=hoje.isoformat()
+    )
+    return resposta_json(dados)
+
+
+@api_v1.route('/relatorios')
+@login_obrigatorio
+def relatorios():
+    """
+    Relatório do período com comparações. A evolução mensal vem pivotada
+    (`serie_mensal`: meses × receita/despesa), pronta para o gráfico.
+    """
+    usuario_id = session['user_id']
+    hoje = date.today()
+    filtros = consultas.filtros_relatorio(request.args)
+    try:
+        periodo = periodos.periodo_relatorio(filtros['periodo'], filtros['referencia'],
+                                             filtros['de'], filtros['ate'], hoje)
+    except ValueError as e:
+        return erro(str(e))
+
+    dados = _view_cache().get_or_load(
+        usuario_id, 'relatorios',
+        lambda: consultas.dados_relatorios(get_db().cursor(dictionary=True), usuario_id, periodo, hoje),
+        variante=f"{periodo.inicio:%Y-%m}:{periodo.fim:%Y-%m}:{hoje:%Y-%m}"
+    )
+    relatorio = consultas.montar_relatorio(dados['linhas'], periodo, filtros['tipo'], filtros['categoria'])
+    return resposta_json({
+        'periodo': {'de': f'{periodo.inicio:%Y-%m}',
+                    'ate': f'{periodos.adicionar_meses(periodo.fim, -1):%Y-%m}'},
+        'filtros': filtros,
+        'rotulos': relatorio['rotulos'],
+        'totais': relatorio['totais'],
+        'por_categoria': relatorio['por_categoria'],
+        'serie_mensal': relatorio['serie_mensal'],
+        'categorias': relatorio['categorias'],
+        'gastos_fora_do_padrao': dados['gastos_fora_do_padrao'],
+    })
+
+
+@api_v1.route('/relatorios/previsao')
+@login_obrigatorio
+def previsao_saldo():
+    """Saldo projetado dia a dia: ?meses=1..24"""
+    usuario_id = session['user_id']
+    hoje = date.today()
+    meses = min(max(request.args.get('meses', 6, type=int), 1), previsao.MAX_MESES)
+    dados = _view_cache().get_or_load(
+        usuario_id, 'previsao',
+        lambda: previsao.previsao_usuario(get_db().cursor(), usuario_id, hoje, meses),
+        variante=f'{hoje.isoformat()}:{meses}'
+    )
+    return resposta_json(dados)
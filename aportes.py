@@ -0,0 +1,87 @@
+"""
+Aportes em Metas
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Cada aporte é aplicado por um UPDATE condicional que soma o valor e, se o
+alvo for atingido, marca a meta como concluída no mesmo comando. O
+incremento é feito pelo banco (valor_atual = valor_atual + %s) e a linha
+fica travada até o commit, então aportes simultâneos não se perdem.
+Todo aporte aplicado fica registrado em aportes_meta (extrato da meta).
+
+Aportes frequentes (ex.: arredondamentos automáticos) podem ir em lote:
+um UPDATE por meta com a soma, uma leitura dos saldos e um executemany no
+extrato. O commit fica com quem chama, como em resumo.py.
+"""
+
+from collections import namedtuple
+from decimal import Decimal
+
+Aporte = namedtuple('Aporte', ['meta_id', 'valor', 'origem'], defaults=['manual'])
+ResultadoAporte = namedtuple('ResultadoAporte', ['meta_id', 'total', 'saldo', 'concluida'])
+
+# No MySQL as atribuições do SET são avaliadas da esquerda para a direita:
+# status e data_conclusao já enxergam o valor_atual e o status novos
+SQL_APLICAR = '''
+    UPDATE metas
+    SET valor_atual = valor_atual + %s,
+        status = IF(valor_atual >= valor_alvo, 'concluida', status),
+        data_conclusao = IF(status = 'concluida', CURRENT_TIMESTAMP, data_conclusao)
+    WHERE id = %s AND usuario_id = %s AND status = 'ativa'
+'''
+
+
+def registrar_aportes(cursor, usuario_id, aportes):
+    """
+    Aplica os aportes (sequência de Aporte) nas metas ativas do usuário.
+    Metas inexistentes, de outro usuário ou não ativas são ignoradas.
+    Todos os aportes de uma meta no lote são aplicados juntos, mesmo que
+    um dos primeiros já atinja o alvo.
+    Retorna {meta_id: ResultadoAporte} das metas atualizadas.
+    """
+    por_meta = {}
+    for aporte in aportes:
+        valor = Decimal(str(aporte.valor))
+        por_meta.setdefault(int(aporte.meta_id), []).append(aporte._replace(valor=valor))
+
+    # Ordem fixa de travas: lotes simultâneos do mesmo usuário não entram em deadlock
+    aplicadas = {}
+    for meta_id in sorted(por_meta):
+        total = sum((a.valor for a in por_meta[meta_id]), Decimal(0))
+        cursor.execute(SQL_APLICAR, (total, meta_id, usuario_id))
+        if cursor.rowcount:
+            aplicadas[meta_id] = total
+    if not aplicadas:
+        return {}
+
+    marcadores = ', '.join(['%s'] * len(aplicadas))
+    cursor.execute(f'''
+        SELECT id, valor_atual, valor_alvo, status
+        FROM metas
+        WHERE id IN ({marcadores})
+    ''', tuple(aplicadas))
+
+    resultados = {}
+    extrato = []
+    for meta_id, saldo_final, valor_alvo, status in cursor.fetchall():
+        concluida = status == 'concluida'
+        saldo = saldo_final - aplicadas[meta_id]
+        marcou = False
+        for aporte in por_meta[meta_id]:
+            saldo += aporte.valor
+            # O aporte que fez a meta atingir o alvo fica marcado no extrato
+            concluiu = concluida and not marcou and saldo >= valor_alvo
+            marcou = marcou or concluiu
+            extrato.append((meta_id, usuario_id, aporte.valor, aporte.origem, saldo, concluiu))
+        resultados[meta_id] = ResultadoAporte(meta_id, aplicadas[meta_id], saldo_final, concluida)
+
+    cursor.executemany('''
+        INSERT INTO aportes_meta (meta_id, usuario_id, valor, origem, saldo_apos, concluiu)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    ''', extrato)
+    return resultados
+
+
+def registrar_aporte(cursor, usuario_id, meta_id, valor, origem='manual'):
+    """Aplica um aporte; retorna ResultadoAporte ou None se a meta não estiver ativa"""
+    return registrar_aportes(cursor, usuario_id, [Aporte(meta_id, valor, origem)]).get(int(meta_id))
+
@@ -1,37 +1,75 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, abort
+from flask import Flask, render_template, request, redirect, url_for, session, flash, abort, jsonify
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
 import mysql.connector
 from functools import wraps
 import os
 from dotenv import load_dotenv
-import io
-import pandas as pd
-from fpdf import FPDF
-from flask import send_file
+from flask import Response, stream_with_context, send_from_directory
+from db_pool import ConnectionPool, init_app, get_db
+from config import DB_CONFIG
+import resumo
+import consultas
+import periodos
+import exportacao
+import validacao
+import importacao
+import busca
+import aportes
+import recorrencias
+import previsao
+from cache import criar_cache, VIEWS_TRANSACOES, VIEWS_METAS
+import templates_cache
+from api import api_v1
+import cache_http
+from fila_exportacao import (criar_fila, iniciar_trabalhadores, gerar_conteudo,
+                             LimiteExportacoesError, FORMATOS, CONCLUIDO)
 
 # Carrega variáveis de ambiente
 load_dotenv()
 
 app = Flask(__name__)
 app.secret_key = os.getenv('SECRET_KEY', 'fallback-key-only-for-dev')
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('IMPORTACAO_MAX_MB', 20)) * 1024 * 1024
 
-# Configuração do Banco de Dados (agora com variáveis de ambiente)
-DB_CONFIG = {
-    'host': os.getenv('DB_HOST', 'localhost'),
-    'user': os.getenv('DB_USER', 'root'),
-    'password': os.getenv('DB_PASSWORD', ''),
-    'database': os.getenv('DB_NAME', 'gestao_financeira')
-}
-
-def get_db_connection():
-    """Cria conexão com o banco de dados"""
+def _abrir_conexao():
+    """Abre uma conexão nova com o banco de dados (usada pelo pool)"""
     try:
         return mysql.connector.connect(**DB_CONFIG)
     except mysql.connector.Error as e:
         print(f"Erro ao conectar ao banco: {e}")
         raise
 
+# Pool de conexões compartilhado pelas requisições
+db_pool = ConnectionPool(
+    _abrir_conexao,
+    max_size=int(os.getenv('DB_POOL_SIZE', 10)),
+    timeout=float(os.getenv('DB_POOL_TIMEOUT', 5)),
+    max_lifetime=float(os.getenv('DB_POOL_MAX_LIFETIME', 3600)),
+    ping_interval=float(os.getenv('DB_POOL_PING_INTERVAL', 30))
+)
+init_app(app, db_pool)
+
+# Cache de leitura das páginas, por usuário e view (compartilhado com a API)
+view_cache = criar_cache()
+app.extensions['view_cache'] = view_cache
+
+# Bytecode dos templates em disco (compartilhado pelos workers) e {% cache_usuario %}
+templates_cache.configurar(app)
+
+# API JSON versionada (/api/v1/...), ver api.py
+app.register_blueprint(api_v1)
+
+# 304 nas páginas sem mudança (marca de alteração do usuário) e compressão
+cache_http.init_app(app, view_cache)
+
+# Exportações: em fila (processadas pelos trabalhadores) ou direto na requisição
+fila_exportacao = criar_fila()
+EXPORTACAO_EM_FILA = os.getenv('EXPORTACAO_MODO', 'fila') == 'fila'
+
+# Busca textual: índice FULLTEXT do MySQL ou índice em memória (sem FULLTEXT)
+BUSCA_EM_MEMORIA = os.getenv('BUSCA_BACKEND', 'fulltext') == 'memoria'
+
 # ============== FUNÇÃO HELPER PARA CORES ==============
 
 def get_cor_clara(cor_hex, brilho=32):
@@ -105,7 +143,6 @@ def index():
 def registro():
     """Página de registro de novos usuários"""
     if request.method == 'POST':
-        conn = None
         try:
             nome = request.form.get('nome', '').strip()
             email = request.form.get('email', '').strip().lower()
@@ -128,7 +165,7 @@ def registro():
             if modo not in ['simples', 'avancado']:
                 modo = 'simples'
             
-            conn = get_db_connection()
+            conn = get_db()
             cursor = conn.cursor()
             
             # Verifica se email já existe
@@ -151,11 +188,6 @@ def registro():
         except Exception as e:
             flash(f'Erro ao criar conta: {str(e)}', 'danger')
             return redirect(url_for('registro'))
-            
-        finally:
-            if conn and conn.is_connected():
-                cursor.close()
-                conn.close()
     
     return render_template('registro.html')
 
@@ -163,7 +195,6 @@ def registro():
 def login():
     """Página de login"""
     if request.method == 'POST':
-        conn = None
         try:
             email = request.form.get('email', '').strip().lower()
             senha = request.form.get('senha', '')
@@ -172,7 +203,7 @@ def login():
                 flash('Preencha email e senha!', 'danger')
                 return redirect(url_for('login'))
             
-            conn = get_db_connection()
+            conn = get_db()
             cursor = conn.cursor(dictionary=True)
             cursor.execute('SELECT * FROM usuarios WHERE email = %s', (email,))
             usuario = cursor.fetchone()
@@ -181,6 +212,7 @@ def login():
                 session['user_id'] = usuario['id']
                 session['user_nome'] = usuario['nome']
                 session['user_modo'] = usuario['modo_interface']
+                view_cache.nova_marca(usuario['id'])
                 flash(f'Bem-vindo(a), {usuario["nome"]}!', 'success')
                 return redirect(url_for('dashboard'))
             else:
@@ -188,11 +220,6 @@ def login():
                 
         except Exception as e:
             flash(f'Erro ao fazer login: {str(e)}', 'danger')
-            
-        finally:
-            if conn and conn.is_connected():
-                cursor.close()
-                conn.close()
     
     return render_template('login.html')
 
@@ -208,65 +235,28 @@ def logout():
 @login_required
 def dashboard():
     """Dashboard principal - mostra resumo financeiro"""
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Busca saldo total
-        cursor.execute('''
-            SELECT 
-                COALESCE(SUM(CASE WHEN tipo = 'receita' THEN valor ELSE -valor END), 0) as saldo
-            FROM transacoes 
-            WHERE usuario_id = %s
-        ''', (session['user_id'],))
-        saldo_data = cursor.fetchone()
-        saldo = saldo_data['saldo']
-        
-        # Busca receitas e despesas do mês atual
-        cursor.execute('''
-            SELECT 
-                tipo,
-                SUM(valor) as total
-            FROM transacoes 
-            WHERE usuario_id = %s 
-            AND MONTH(data) = MONTH(CURRENT_DATE())
-            AND YEAR(data) = YEAR(CURRENT_DATE())
-            GROUP BY tipo
-        ''', (session['user_id'],))
-        
-        mes_atual = {'receitas': 0, 'despesas': 0}
-        for row in cursor.fetchall():
-            if row['tipo'] == 'receita':
-                mes_atual['receitas'] = row['total']
-            else:
-                mes_atual['despesas'] = row['total']
-        
-        # Busca últimas transações
-        cursor.execute('''
-            SELECT * FROM transacoes 
-            WHERE usuario_id = %s 
-            ORDER BY data DESC, id DESC 
-            LIMIT 10
-        ''', (session['user_id'],))
-        ultimas_transacoes = cursor.fetchall()
+        usuario_id = session['user_id']
+        hoje = datetime.now().date()
+        
+        # Saldo, mês atual e últimas transações (em cache por usuário)
+        dados = view_cache.get_or_load(
+            usuario_id, 'dashboard',
+            lambda: consultas.dados_dashboard(get_db().cursor(dictionary=True), usuario_id, hoje),
+            variante=hoje.strftime('%Y-%m')
+        )
         
         modo = session.get('user_modo', 'simples')
         template = 'dashboard_simples.html' if modo == 'simples' else 'dashboard_avancado.html'
         
         return render_template(template, 
-                             saldo=saldo, 
-                             mes_atual=mes_atual,
-                             transacoes=ultimas_transacoes)
+                             saldo=dados['saldo'], 
+                             mes_atual=dados['mes_atual'],
+                             transacoes=dados['transacoes'])
         
     except Exception as e:
         flash(f'Erro ao carregar dashboard: {str(e)}', 'danger')
         return redirect(url_for('index'))
-        
-    finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
 
 # ============== TRANSAÇÕES ==============
 @app.route('/adicionar-transacao', methods=['GET', 'POST'])
@@ -274,71 +264,56 @@ def dashboard():
 def adicionar_transacao():
     """Adiciona nova transação"""
     if request.method == 'POST':
-        conn = None
         try:
-            # Validações
-            tipo = request.form.get('tipo')
-            if tipo not in ['receita', 'despesa']:
-                flash('Tipo de transação inválido!', 'danger')
-                return redirect(url_for('adicionar_transacao'))
-            
+            # Validações (mesmas regras da importação de extratos)
             try:
-                valor = float(request.form.get('valor', 0))
-            except ValueError:
-                flash('Valor inválido!', 'danger')
-                return redirect(url_for('adicionar_transacao'))
-            
-            if valor <= 0:
-                flash('Valor deve ser maior que zero!', 'danger')
+                tipo, valor, descricao, categoria, _ = validacao.validar_transacao(
+                    request.form.get('tipo'),
+                    request.form.get('valor', 0),
+                    request.form.get('descricao'),
+                    request.form.get('categoria')
+                )
+                data_str = request.form.get('data')
+                data = validacao.ler_data(data_str) if data_str else datetime.now().date()
+            except validacao.ErroValidacao as e:
+                flash(str(e), 'danger')
                 return redirect(url_for('adicionar_transacao'))
             
-            descricao = request.form.get('descricao', '').strip()
-            if not descricao or len(descricao) < 3:
-                flash('Descrição deve ter pelo menos 3 caracteres!', 'danger')
+            frequencia = request.form.get('repetir') or None
+            if frequencia and frequencia not in recorrencias.FREQUENCIAS:
+                flash('Frequência inválida!', 'danger')
                 return redirect(url_for('adicionar_transacao'))
             
-            if len(descricao) > 200:
-                flash('Descrição muito longa (máximo 200 caracteres)!', 'danger')
-                return redirect(url_for('adicionar_transacao'))
-            
-            categoria = request.form.get('categoria', 'Outros').strip()
-            if not categoria:
-                categoria = 'Outros'
-            
-            data_str = request.form.get('data')
-            if not data_str:
+            # Não permite datas futuras
+            if data > datetime.now().date():
+                flash('Data não pode ser futura!', 'warning')
                 data = datetime.now().date()
-            else:
-                try:
-                    data = datetime.strptime(data_str, '%Y-%m-%d').date()
-                    # Não permite datas futuras
-                    if data > datetime.now().date():
-                        flash('Data não pode ser futura!', 'warning')
-                        data = datetime.now().date()
-                except ValueError:
-                    flash('Data inválida!', 'danger')
-                    return redirect(url_for('adicionar_transacao'))
             
-            conn = get_db_connection()
+            conn = get_db()
             cursor = conn.cursor()
+            # A transação é a primeira ocorrência da regra; as próximas ficam com o agendador
+            recorrencia_id = None
+            if frequencia:
+                recorrencia_id = recorrencias.criar_recorrencia(
+                    cursor, session['user_id'], tipo, valor, descricao, categoria, frequencia, data)
             cursor.execute('''
-                INSERT INTO transacoes (usuario_id, tipo, valor, descricao, categoria, data)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            ''', (session['user_id'], tipo, valor, descricao, categoria, data))
+                INSERT INTO transacoes (usuario_id, tipo, valor, descricao, categoria, data, recorrencia_id)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ''', (session['user_id'], tipo, valor, descricao, categoria, data, recorrencia_id))
+            resumo.aplicar_transacao(cursor, session['user_id'], tipo, valor, data, categoria)
             conn.commit()
+            view_cache.invalidate(session['user_id'], *VIEWS_TRANSACOES)
             
             mensagem = 'Receita' if tipo == 'receita' else 'Despesa'
-            flash(f'{mensagem} adicionada com sucesso!', 'success')
+            if frequencia:
+                flash(f'{mensagem} adicionada com sucesso! As próximas serão lançadas automaticamente.', 'success')
+            else:
+                flash(f'{mensagem} adicionada com sucesso!', 'success')
             return redirect(url_for('dashboard'))
             
         except Exception as e:
             flash(f'Erro ao adicionar transação: {str(e)}', 'danger')
             return redirect(url_for('adicionar_transacao'))
-            
-        finally:
-            if conn and conn.is_connected():
-                cursor.close()
-                conn.close()
     
     # GET request
     modo = session.get('user_modo', 'simples')
@@ -350,42 +325,183 @@ def adicionar_transacao():
 @login_required
 def excluir_transacao(id):
     """Exclui uma transação"""
-    conn = None
     try:
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor()
         
-        # Verifica se a transação pertence ao usuário
-        cursor.execute('SELECT id FROM transacoes WHERE id = %s AND usuario_id = %s', 
+        # Verifica se a transação pertence ao usuário (e trava a linha até o commit)
+        cursor.execute('SELECT tipo, valor, data, categoria FROM transacoes WHERE id = %s AND usuario_id = %s FOR UPDATE', 
                       (id, session['user_id']))
         
-        if not cursor.fetchone():
+        transacao = cursor.fetchone()
+        if not transacao:
             flash('Transação não encontrada!', 'danger')
             return redirect(url_for('dashboard'))
         
+        tipo, valor, data, categoria = transacao
         cursor.execute('DELETE FROM transacoes WHERE id = %s AND usuario_id = %s', 
                       (id, session['user_id']))
+        resumo.aplicar_transacao(cursor, session['user_id'], tipo, valor, data, categoria, sinal=-1)
         conn.commit()
+        view_cache.invalidate(session['user_id'], *VIEWS_TRANSACOES)
         
         flash('Transação excluída com sucesso!', 'success')
         
     except Exception as e:
         flash(f'Erro ao excluir transação: {str(e)}', 'danger')
-        
-    finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
     
     return redirect(url_for('dashboard'))
 
+# ============== TRANSAÇÕES RECORRENTES ==============
+@app.route('/recorrencias')
+@login_required
+def transacoes_recorrentes():
+    """Regras de transações recorrentes do usuário"""
+    try:
+        regras = recorrencias.listar_recorrencias(get_db().cursor(dictionary=True), session['user_id'])
+        return render_template('recorrencias.html', regras=regras)
+    except Exception as e:
+        flash(f'Erro ao carregar recorrências: {str(e)}', 'danger')
+        return redirect(url_for('dashboard'))
+
+@app.route('/encerrar-recorrencia/<int:id>', methods=['POST'])
+@login_required
+def encerrar_recorrencia(id):
+    """Para de lançar as próximas ocorrências (as já lançadas continuam)"""
+    try:
+        conn = get_db()
+        if recorrencias.encerrar_recorrencia(conn.cursor(), session['user_id'], id):
+            conn.commit()
+            view_cache.invalidate(session['user_id'], 'previsao')
+            flash('Recorrência encerrada!', 'success')
+        else:
+            flash('Recorrência não encontrada!', 'danger')
+    except Exception as e:
+        flash(f'Erro ao encerrar recorrência: {str(e)}', 'danger')
+    
+    return redirect(url_for('transacoes_recorrentes'))
+
+# ============== HISTÓRICO DE TRANSAÇÕES ==============
+
+def filtros_da_requisicao():
+    """
+    Filtros opcionais da query string (histórico e exportações):
+    ?inicio=AAAA-MM-DD&fim=AAAA-MM-DD&tipo=receita|despesa&categoria=...
+    Sem eles, considera todo o histórico.
+    """
+    return consultas.normalizar_filtros(
+        request.args.get('inicio'), request.args.get('fim'),
+        request.args.get('categoria'), request.args.get('tipo')
+    )
+
+@app.route('/transacoes')
+@login_required
+def transacoes():
+    """
+    Histórico completo, paginado por keyset (HTML ou ?formato=json).
+    Com ?q=palavras, busca em descrição e categoria (ver busca.py).
+    """
+    como_json = request.args.get('formato') == 'json'
+    try:
+        filtros = filtros_da_requisicao()
+        apos = consultas.ler_chave(request.args['apos']) if request.args.get('apos') else None
+        antes = consultas.ler_chave(request.args['antes']) if request.args.get('antes') else None
+        limite = min(max(int(request.args.get('limite', 50)), 1), 200)
+    except ValueError as e:
+        if como_json:
+            return jsonify({'erro': str(e)}), 400
+        flash(f'Filtro inválido: {str(e)}', 'warning')
+        return redirect(url_for('transacoes'))
+
+    consulta = (request.args.get('q') or '').strip()
+    cursor = get_db().cursor(dictionary=True)
+    try:
+        if consulta:
+            pagina = buscar_transacoes(cursor, consulta, filtros, int(request.args.get('pagina', 1)), limite)
+        else:
+            pagina = consultas.pagina_transacoes(cursor, session['user_id'], filtros, apos, antes, limite)
+    except ValueError as e:
+        if como_json:
+            return jsonify({'erro': str(e)}), 400
+        flash(str(e), 'warning')
+        return redirect(url_for('transacoes', **filtros))
+
+    if como_json:
+        return jsonify({
+            'transacoes': [
+                {
+                    'id': t['id'],
+                    'tipo': t['tipo'],
+                    'valor': str(t['valor']),
+                    'descricao': t['descricao'],
+                    'categoria': t['categoria'],
+                    'data': t['data'].isoformat(),
+                    **({'relevancia': round(float(t['relevancia']), 4)} if consulta else {}),
+                }
+                for t in pagina['transacoes']
+            ],
+            'proxima': pagina['proxima'],
+            'anterior': pagina['anterior'],
+            'filtros': filtros,
+            'limite': limite,
+            **({'q': consulta, 'termos': pagina['termos']} if consulta else {}),
+        })
+
+    return render_template('transacoes.html', pagina=pagina, filtros=filtros, limite=limite, consulta=consulta)
+
+def buscar_transacoes(cursor, consulta, filtros, pagina, limite):
+    """Busca textual (?q=), paginada por número de página e ordenada por relevância"""
+    usuario_id = session['user_id']
+    indice = None
+    if BUSCA_EM_MEMORIA:
+        # O índice do usuário fica no cache e é refeito após qualquer escrita
+        indice = view_cache.get_or_load(
+            usuario_id, 'busca',
+            lambda: busca.IndiceInvertido.do_banco(get_db().cursor(dictionary=True), usuario_id)
+        )
+    return busca.buscar_transacoes(cursor, usuario_id, consulta, filtros, pagina, limite, indice)
+
+# ============== IMPORTAÇÃO DE EXTRATOS ==============
+
+@app.route('/importar', methods=['GET', 'POST'])
+@login_required
+def importar_extrato():
+    """Importa lançamentos de um extrato CSV ou OFX"""
+    relatorio = None
+    if request.method == 'POST':
+        arquivo = request.files.get('arquivo')
+        if not arquivo or not arquivo.filename:
+            flash('Selecione um arquivo CSV ou OFX!', 'danger')
+            return redirect(url_for('importar_extrato'))
+        
+        try:
+            relatorio = importacao.importar(
+                get_db(),
+                session['user_id'],
+                importacao.ler_extrato(arquivo.stream, arquivo.filename)
+            )
+        except importacao.ErroImportacao as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('importar_extrato'))
+        
+        if relatorio.importadas:
+            view_cache.invalidate(session['user_id'], *VIEWS_TRANSACOES)
+        
+        if relatorio.falha:
+            flash(f'Importação interrompida: {relatorio.falha}', 'danger')
+        elif relatorio.importadas:
+            flash(f'{relatorio.importadas} transação(ões) importada(s) com sucesso!', 'success')
+        else:
+            flash('Nenhuma transação nova foi importada.', 'info')
+    
+    return render_template('importar.html', relatorio=relatorio)
+
 # ============== CONFIGURAÇÕES ==============
 @app.route('/configuracoes', methods=['GET', 'POST'])
 @login_required
 def configuracoes():
     """Página de configurações do usuário"""
     if request.method == 'POST':
-        conn = None
         try:
             novo_modo = request.form.get('modo')
             
@@ -393,23 +509,19 @@ def configuracoes():
                 flash('Modo inválido!', 'danger')
                 return redirect(url_for('configuracoes'))
             
-            conn = get_db_connection()
+            conn = get_db()
             cursor = conn.cursor()
             cursor.execute('UPDATE usuarios SET modo_interface = %s WHERE id = %s',
                           (novo_modo, session['user_id']))
             conn.commit()
             
             session['user_modo'] = novo_modo
+            view_cache.nova_marca(session['user_id'])
             flash('Modo de interface atualizado!', 'success')
             return redirect(url_for('dashboard'))
             
         except Exception as e:
             flash(f'Erro ao atualizar configurações: {str(e)}', 'danger')
-            
-        finally:
-            if conn and conn.is_connected():
-                cursor.close()
-                conn.close()
     
     return render_template('configuracoes.html')
 
@@ -422,168 +534,87 @@ def relatorios():
         flash('Esta funcionalidade está disponível apenas no modo avançado.', 'info')
         return redirect(url_for('dashboard'))
     
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Despesas por categoria
-        cursor.execute('''
-            SELECT categoria, SUM(valor) as total
-            FROM transacoes
-            WHERE usuario_id = %s AND tipo = 'despesa'
-            GROUP BY categoria
-            ORDER BY total DESC
-        ''', (session['user_id'],))
-        despesas_categoria = cursor.fetchall()
-        
-        # Evolução mensal
-        cursor.execute('''
-            SELECT 
-                DATE_FORMAT(data, '%Y-%m') as mes,
-                tipo,
-                SUM(valor) as total
-            FROM transacoes
-            WHERE usuario_id = %s
-            GROUP BY mes, tipo
-            ORDER BY mes DESC
-            LIMIT 12
-        ''', (session['user_id'],))
-        evolucao_mensal = cursor.fetchall()
-        
-        return render_template('relatorios.html', 
-                             despesas_categoria=despesas_categoria,
-                             evolucao_mensal=evolucao_mensal)
+        usuario_id = session['user_id']
+        hoje = datetime.now().date()
+
+        filtros = consultas.filtros_relatorio(request.args)
+        try:
+            periodo = periodos.periodo_relatorio(filtros['periodo'], filtros['referencia'],
+                                                 filtros['de'], filtros['ate'], hoje)
+        except ValueError as e:
+            flash(str(e), 'warning')
+            filtros['periodo'] = 'mes'
+            periodo = periodos.mes_atual(hoje)
+
+        # Linhas do resumo por categoria em cache por usuário e período;
+        # tipo e categoria são aplicados em Python sobre as mesmas linhas
+        dados = view_cache.get_or_load(
+            usuario_id, 'relatorios',
+            lambda: consultas.dados_relatorios(get_db().cursor(dictionary=True), usuario_id, periodo, hoje),
+            variante=f"{periodo.inicio:%Y-%m}:{periodo.fim:%Y-%m}:{hoje:%Y-%m}"
+        )
+        relatorio = consultas.montar_relatorio(dados['linhas'], periodo, filtros['tipo'], filtros['categoria'])
+
+        return render_template('relatorios.html',
+                             filtros=filtros,
+                             periodo=periodo,
+                             gastos_fora_do_padrao=dados['gastos_fora_do_padrao'],
+                             **relatorio)
         
     except Exception as e:
         flash(f'Erro ao carregar relatórios: {str(e)}', 'danger')
         return redirect(url_for('dashboard'))
-        
-    finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+
+@app.route('/relatorios/previsao')
+@login_required
+def previsao_saldo():
+    """Saldo projetado dia a dia (JSON): ?meses=1..24"""
+    usuario_id = session['user_id']
+    hoje = datetime.now().date()
+    meses = min(max(request.args.get('meses', 6, type=int), 1), previsao.MAX_MESES)
+    
+    dados = view_cache.get_or_load(
+        usuario_id, 'previsao',
+        lambda: previsao.previsao_usuario(get_db().cursor(), usuario_id, hoje, meses),
+        variante=f'{hoje.isoformat()}:{meses}'
+    )
+    return jsonify(dados)
 
 # ============== METAS FINANCEIRAS (PRINCIPAL) ==============
 @app.route('/metas')
 @login_required
 def metas():
     """Página de metas financeiras"""
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Busca todas as metas do usuário com cálculos
-        cursor.execute('''
-            SELECT 
-                id,
-                titulo,
-                descricao,
-                categoria,
-                valor_alvo,
-                valor_atual,
-                (valor_alvo - valor_atual) AS valor_faltante,
-                CASE 
-                    WHEN valor_alvo > 0 THEN 
-                        GREATEST(LEAST((valor_atual / valor_alvo * 100), 100), 0)
-                    ELSE 0 
-                END AS progresso,
-                status,
-                data_inicio,
-                data_limite,
-                data_conclusao,
-                cor,
-                CASE
-                    WHEN status = 'ativa'
-                         AND data_limite IS NOT NULL
-                         AND data_limite < CURRENT_DATE
-                    THEN 1
-                    ELSE 0
-                END AS atrasada,
-                CASE 
-                    WHEN data_limite IS NOT NULL THEN
-                        DATEDIFF(data_limite, CURRENT_DATE)
-                    ELSE NULL
-                END AS dias_restantes
-            FROM metas
-            WHERE usuario_id = %s
-            ORDER BY
-                FIELD(status, 'ativa', 'concluida', 'cancelada'),
-                data_limite IS NULL,
-                data_limite ASC
-        ''', (session['user_id'],))
-        metas_lista = cursor.fetchall()
-        
-        # Busca estatísticas gerais
-        cursor.execute('''
-            SELECT
-                COUNT(*) AS total_metas,
-                SUM(CASE WHEN status = 'ativa' THEN 1 ELSE 0 END) AS metas_ativas,
-                SUM(CASE WHEN status = 'concluida' THEN 1 ELSE 0 END) AS metas_concluidas,
-                COALESCE(SUM(valor_atual), 0) AS total_economizado,
-                COALESCE(SUM(CASE WHEN status = 'ativa' THEN valor_alvo ELSE 0 END), 0) AS total_objetivo
-            FROM metas
-            WHERE usuario_id = %s
-        ''', (session['user_id'],))
-        stat = cursor.fetchone()
-        
-        estatisticas = {
-            'total_metas': int(stat['total_metas'] or 0),
-            'metas_ativas': int(stat['metas_ativas'] or 0),
-            'metas_concluidas': int(stat['metas_concluidas'] or 0),
-            'total_economizado': float(stat['total_economizado'] or 0),
-            'total_objetivo': float(stat['total_objetivo'] or 0),
-        }
-        
-        if estatisticas['total_objetivo'] > 0:
-            estatisticas['progresso_geral'] = (
-                estatisticas['total_economizado'] / estatisticas['total_objetivo'] * 100
-            )
-        else:
-            estatisticas['progresso_geral'] = 0.0
-        
-        # Metas com prazo próximo (7 dias)
-        cursor.execute('''
-            SELECT id, titulo, data_limite,
-                   DATEDIFF(data_limite, CURRENT_DATE) as dias_restantes
-            FROM metas
-            WHERE usuario_id = %s
-              AND status = 'ativa'
-              AND data_limite IS NOT NULL
-              AND data_limite BETWEEN CURRENT_DATE AND DATE_ADD(CURRENT_DATE, INTERVAL 7 DAY)
-            ORDER BY data_limite ASC
-        ''', (session['user_id'],))
-        metas_proximas = cursor.fetchall()
-        
-        today = datetime.now().strftime('%Y-%m-%d')
+        usuario_id = session['user_id']
+        hoje = datetime.now().date()
+        
+        # Dados da página (em cache por usuário; invalidado pelas rotas de metas)
+        dados = view_cache.get_or_load(
+            usuario_id, 'metas',
+            lambda: consultas.dados_metas(get_db().cursor(dictionary=True), usuario_id, hoje),
+            variante=hoje.isoformat()
+        )
         
-        # === CORREÇÃO: SELECIONA O TEMPLATE DINAMICAMENTE ===
-        modo = session.get('user_modo', 'simples')
-        template_name = 'metas_simples.html' if modo == 'simples' else 'metas_avancado.html'
+        today = hoje.strftime('%Y-%m-%d')
         
         return render_template(
-            template_name,
-            metas=metas_lista,
-            estatisticas=estatisticas,
-            metas_proximas=metas_proximas,
+            'metas.html',
+            metas=dados['metas'],
+            estatisticas=dados['estatisticas'],
+            metas_proximas=dados['metas_proximas'],
             today=today
         )
         
     except Exception as e:
         flash(f'Erro ao carregar metas: {str(e)}', 'danger')
         return redirect(url_for('dashboard'))
-        
-    finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
 
 @app.route('/adicionar-meta', methods=['POST'])
 @login_required
 def adicionar_meta():
     """Adiciona nova meta"""
-    conn = None
     try:
         titulo = request.form.get('titulo', '').strip()
         descricao = request.form.get('descricao', '').strip()
@@ -629,23 +660,19 @@ def adicionar_meta():
                 flash('Data limite inválida!', 'danger')
                 return redirect(url_for('metas'))
         
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor()
         cursor.execute('''
             INSERT INTO metas (usuario_id, titulo, descricao, valor_alvo, categoria, data_inicio, data_limite, cor)
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
         ''', (session['user_id'], titulo, descricao, valor_alvo, categoria, data_inicio, data_limite, cor))
         conn.commit()
+        view_cache.invalidate(session['user_id'], *VIEWS_METAS)
         
         flash('Meta criada com sucesso!', 'success')
         
     except Exception as e:
         flash(f'Erro ao criar meta: {str(e)}', 'danger')
-        
-    finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
     
     return redirect(url_for('metas'))
 
@@ -653,7 +680,6 @@ def adicionar_meta():
 @login_required
 def adicionar_valor_meta():
     """Adiciona valor a uma meta"""
-    conn = None
     try:
         meta_id = request.form.get('meta_id')
         valor_str = request.form.get('valor')
@@ -663,58 +689,35 @@ def adicionar_valor_meta():
             return redirect(url_for('metas'))
         
         try:
-            valor = float(valor_str)
+            meta_id = int(meta_id)
         except ValueError:
-            flash('Valor inválido!', 'danger')
+            flash('Dados inválidos!', 'danger')
             return redirect(url_for('metas'))
         
-        if valor <= 0:
-            flash('Valor deve ser maior que zero!', 'danger')
+        try:
+            valor = validacao.validar_valor(valor_str)
+        except validacao.ErroValidacao as e:
+            flash(str(e), 'danger')
             return redirect(url_for('metas'))
         
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Verifica se a meta pertence ao usuário e está ativa
-        cursor.execute('''
-            SELECT valor_atual, valor_alvo FROM metas 
-            WHERE id = %s AND usuario_id = %s AND status = 'ativa'
-        ''', (meta_id, session['user_id']))
-        
-        meta = cursor.fetchone()
-        if not meta:
+        # Soma e conclusão em um único UPDATE condicional, mais o registro no extrato
+        conn = get_db()
+        resultado = aportes.registrar_aporte(conn.cursor(), session['user_id'], meta_id, valor)
+        if resultado is None:
+            conn.rollback()
             flash('Meta não encontrada ou não está ativa!', 'danger')
             return redirect(url_for('metas'))
         
-        novo_valor = float(meta['valor_atual']) + valor
-        
-        # Atualiza o valor atual
-        cursor.execute('''
-            UPDATE metas 
-            SET valor_atual = %s 
-            WHERE id = %s AND usuario_id = %s
-        ''', (novo_valor, meta_id, session['user_id']))
         conn.commit()
+        view_cache.invalidate(session['user_id'], *VIEWS_METAS)
         
-        # Verifica se a meta foi concluída
-        if novo_valor >= float(meta['valor_alvo']):
-            cursor.execute('''
-                UPDATE metas 
-                SET status = 'concluida', data_conclusao = CURRENT_TIMESTAMP 
-                WHERE id = %s AND usuario_id = %s
-            ''', (meta_id, session['user_id']))
-            conn.commit()
+        if resultado.concluida:
             flash('Parabéns! Meta concluída! 🎉', 'success')
         else:
             flash('Valor adicionado à meta com sucesso!', 'success')
         
     except Exception as e:
         flash(f'Erro ao adicionar valor: {str(e)}', 'danger')
-        
-    finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
     
     return redirect(url_for('metas'))
 
@@ -722,9 +725,8 @@ def adicionar_valor_meta():
 @login_required
 def concluir_meta(id):
     """Marca uma meta como concluída"""
-    conn = None
     try:
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor()
         
         # Verifica se a meta pertence ao usuário
@@ -741,16 +743,12 @@ def concluir_meta(id):
             WHERE id = %s AND usuario_id = %s
         ''', (id, session['user_id']))
         conn.commit()
+        view_cache.invalidate(session['user_id'], *VIEWS_METAS)
         
         flash('Meta marcada como concluída!', 'success')
         
     except Exception as e:
         flash(f'Erro ao concluir meta: {str(e)}', 'danger')
-        
-    finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
     
     return redirect(url_for('metas'))
 
@@ -758,7 +756,6 @@ def concluir_meta(id):
 @login_required
 def editar_meta():
     """Edita uma meta existente"""
-    conn = None
     try:
         meta_id = request.form.get('meta_id')
         titulo = request.form.get('titulo', '').strip()
@@ -791,7 +788,7 @@ def editar_meta():
                 flash('Data limite inválida!', 'danger')
                 return redirect(url_for('metas'))
         
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor()
         
         # Verifica se a meta pertence ao usuário
@@ -808,16 +805,12 @@ def editar_meta():
             WHERE id = %s AND usuario_id = %s
         ''', (titulo, descricao, valor_alvo, categoria, data_limite, cor, meta_id, session['user_id']))
         conn.commit()
+        view_cache.invalidate(session['user_id'], *VIEWS_METAS)
         
         flash('Meta atualizada com sucesso!', 'success')
         
     except Exception as e:
         flash(f'Erro ao editar meta: {str(e)}', 'danger')
-        
-    finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
     
     return redirect(url_for('metas'))
 
@@ -825,9 +818,8 @@ def editar_meta():
 @login_required
 def excluir_meta(id):
     """Exclui uma meta"""
-    conn = None
     try:
-        conn = get_db_connection()
+        conn = get_db()
         cursor = conn.cursor()
         
         # Verifica se a meta pertence ao usuário
@@ -841,16 +833,12 @@ def excluir_meta(id):
         cursor.execute('DELETE FROM metas WHERE id = %s AND usuario_id = %s', 
                       (id, session['user_id']))
         conn.commit()
+        view_cache.invalidate(session['user_id'], *VIEWS_METAS)
         
         flash('Meta excluída com sucesso!', 'success')
         
     except Exception as e:
         flash(f'Erro ao excluir meta: {str(e)}', 'danger')
-        
-    finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
     
     return redirect(url_for('metas'))
 
@@ -921,24 +909,36 @@ def dev_test_metas():
     
     today = hoje.strftime('%Y-%m-%d')
     
-    # Seleciona o template com base no modo do usuário
-    modo = session.get('user_modo', 'simples')
-    template_name = 'metas_simples.html' if modo == 'simples' else 'metas_avancado.html'
-
     return render_template(
-        template_name,  # Usa a variável dinâmica
+        'metas.html',
         metas=metas_mock,          # CORRIGIDO: Usa os dados mock
         estatisticas=estatisticas_mock, # CORRIGIDO
         metas_proximas=metas_proximas_mock, # CORRIGIDO
         today=today
     )
 
+@app.route('/dev/stats')
+def dev_stats():
+    """
+    Estatísticas do pool de conexões e do cache (hits/misses por view).
+    Disponível SOMENTE quando app.debug == True.
+    """
+    if not app.debug:
+        abort(404)
+    return jsonify({'pool': db_pool.stats(), 'cache': view_cache.stats()})
+
 # ============== TRATAMENTO DE ERROS ==============
 @app.errorhandler(404)
 def page_not_found(e):
     """Página não encontrada"""
     return render_template('index.html'), 404
 
+@app.errorhandler(413)
+def arquivo_muito_grande(e):
+    """Upload acima de MAX_CONTENT_LENGTH"""
+    flash(f'Arquivo muito grande (máximo {app.config["MAX_CONTENT_LENGTH"] // (1024 * 1024)} MB).', 'danger')
+    return redirect(url_for('importar_extrato'))
+
 @app.errorhandler(500)
 def internal_error(e):
     """Erro interno do servidor"""
@@ -947,129 +947,103 @@ def internal_error(e):
 
 # ============== EXPORTAÇÃO ==============
 
-@app.route('/exportar/excel')
-@login_required
-def exportar_excel():
-    conn = None
-    cursor = None
+def enfileirar_exportacao(formato):
+    """Registra a exportação na fila; o arquivo é gerado pelos trabalhadores"""
     try:
-        conn = get_db_connection()
-        # Busca todas as transações do usuário
-        query = """
-            SELECT tipo, categoria, descricao, valor, data 
-            FROM transacoes 
-            WHERE usuario_id = %s 
-            ORDER BY data DESC
-        """
-        # Usamos pandas para ler direto do SQL, muito mais fácil
-        df = pd.read_sql(query, conn, params=(session['user_id'],))
-        
-        # Formata a coluna de data
-        df['data'] = pd.to_datetime(df['data']).dt.strftime('%d/%m/%Y')
-        
-        # Cria um buffer de memória (arquivo virtual)
-        output = io.BytesIO()
-        
-        # Escreve o Excel nesse buffer
-        # Requer 'openpyxl' instalado
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Transacoes')
-            
-        output.seek(0)
-        
-        return send_file(
-            output,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=f'extrato_{datetime.now().strftime("%Y%m%d")}.xlsx'
+        fila_exportacao.enfileirar(session['user_id'], formato, filtros_da_requisicao())
+    except ValueError as e:
+        flash(f'Filtro de exportação inválido: {str(e)}', 'warning')
+        return redirect(url_for('relatorios'))
+    except LimiteExportacoesError as e:
+        flash(str(e), 'warning')
+        return redirect(url_for('exportacoes'))
+
+    flash('Exportação adicionada à fila. O arquivo ficará disponível nesta página.', 'info')
+    return redirect(url_for('exportacoes'))
+
+def exportar_direto(formato):
+    """Gera o arquivo dentro da requisição, em streaming (EXPORTACAO_MODO=direto)"""
+    info = FORMATOS[formato]
+    try:
+        # Executa a consulta antes de iniciar a resposta, para que erros de
+        # banco ainda possam ser tratados com redirect
+        where, params = consultas.filtro_transacoes(session['user_id'], filtros_da_requisicao())
+        cursor = exportacao.abrir_cursor_transacoes(get_db(), where, params)
+        conteudo = gerar_conteudo(formato, exportacao.iterar_lotes(cursor))
+        
+        return Response(
+            stream_with_context(conteudo),
+            mimetype=info.mimetype,
+            headers={
+                'Content-Disposition': f'attachment; filename={info.prefixo}_{datetime.now().strftime("%Y%m%d")}.{info.extensao}'
+            }
         )
 
     except Exception as e:
-        print(f"Erro export Excel: {e}")
-        flash(f'Erro ao exportar Excel: {str(e)}', 'danger')
+        print(f"Erro export {info.nome}: {e}")
+        flash(f'Erro ao exportar {info.nome}: {str(e)}', 'danger')
         return redirect(url_for('dashboard'))
-        
-    finally:
-        if conn and conn.is_connected():
-            conn.close()
+
+@app.route('/exportar/excel')
+@login_required
+def exportar_excel():
+    if EXPORTACAO_EM_FILA:
+        return enfileirar_exportacao('excel')
+    return exportar_direto('excel')
 
 @app.route('/exportar/pdf')
 @login_required
 def exportar_pdf():
-    conn = None
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        cursor.execute("""
-            SELECT tipo, categoria, descricao, valor, data 
-            FROM transacoes 
-            WHERE usuario_id = %s 
-            ORDER BY data DESC
-        """, (session['user_id'],))
-        transacoes = cursor.fetchall()
-        
-        # Criação do PDF usando FPDF
-        class PDF(FPDF):
-            def header(self):
-                self.set_font('Arial', 'B', 15)
-                self.cell(0, 10, 'Relatório Financeiro', 0, 1, 'C')
-                self.ln(5)
-                
-            def footer(self):
-                self.set_y(-15)
-                self.set_font('Arial', 'I', 8)
-                self.cell(0, 10, f'Página {self.page_no()}', 0, 0, 'C')
+    if EXPORTACAO_EM_FILA:
+        return enfileirar_exportacao('pdf')
+    return exportar_direto('pdf')
 
-        pdf = PDF()
-        pdf.add_page()
-        pdf.set_font("Arial", size=10)
-        
-        # Cabeçalho da Tabela
-        pdf.set_fill_color(200, 220, 255)
-        pdf.set_font("Arial", 'B', 10)
-        pdf.cell(30, 10, "Data", 1, 0, 'C', True)
-        pdf.cell(30, 10, "Tipo", 1, 0, 'C', True)
-        pdf.cell(40, 10, "Categoria", 1, 0, 'C', True)
-        pdf.cell(60, 10, "Descrição", 1, 0, 'C', True)
-        pdf.cell(30, 10, "Valor", 1, 1, 'C', True)
-        
-        # Linhas da Tabela
-        pdf.set_font("Arial", size=9)
-        for t in transacoes:
-            data_fmt = t['data'].strftime('%d/%m/%Y')
-            valor_fmt = f"R$ {t['valor']:.2f}"
-            
-            # Ajuste simples de cor para Receita/Despesa
-            pdf.set_text_color(0, 0, 0)
-            if t['tipo'] == 'despesa':
-                pdf.set_text_color(180, 0, 0) # Vermelho escuro
-            elif t['tipo'] == 'receita':
-                pdf.set_text_color(0, 100, 0) # Verde escuro
-                
-            pdf.cell(30, 10, data_fmt, 1, 0, 'C')
-            pdf.cell(30, 10, t['tipo'].capitalize(), 1, 0, 'C')
-            pdf.cell(40, 10, t['categoria'][:20], 1, 0, 'L') # Limita caracteres
-            pdf.cell(60, 10, t['descricao'][:30], 1, 0, 'L') # Limita caracteres
-            pdf.cell(30, 10, valor_fmt, 1, 1, 'R')
-            
-        # Saída
-        return send_file(
-            io.BytesIO(pdf.output(dest='S').encode('latin-1', 'replace')),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f'relatorio_{datetime.now().strftime("%Y%m%d")}.pdf'
-        )
+@app.route('/exportacoes')
+@login_required
+def exportacoes():
+    """Exportações solicitadas pelo usuário e seus arquivos"""
+    tarefas = fila_exportacao.listar(session['user_id'])
+    return render_template('exportacoes.html', tarefas=tarefas, formatos=FORMATOS)
 
-    except Exception as e:
-        print(f"Erro export PDF: {e}")
-        flash(f'Erro ao exportar PDF: {str(e)}', 'danger')
-        return redirect(url_for('dashboard'))
-        
-    finally:
-        if conn and conn.is_connected():
-            conn.close()
+@app.route('/exportacoes/<tarefa_id>/status')
+@login_required
+def status_exportacao(tarefa_id):
+    tarefa = fila_exportacao.obter(tarefa_id, session['user_id'])
+    if tarefa is None:
+        abort(404)
+    
+    resposta = {'id': tarefa['id'], 'formato': tarefa['formato'], 'status': tarefa['status']}
+    if tarefa['status'] == CONCLUIDO:
+        resposta['tamanho'] = tarefa['tamanho']
+        resposta['download'] = url_for('baixar_exportacao', tarefa_id=tarefa['id'])
+    elif tarefa['erro']:
+        resposta['erro'] = tarefa['erro']
+    return jsonify(resposta)
+
+@app.route('/exportacoes/<tarefa_id>/download')
+@login_required
+def baixar_exportacao(tarefa_id):
+    tarefa = fila_exportacao.obter(tarefa_id, session['user_id'])
+    if tarefa is None or tarefa['status'] != CONCLUIDO:
+        abort(404)
+    
+    info = FORMATOS[tarefa['formato']]
+    return send_from_directory(
+        os.path.abspath(fila_exportacao.diretorio),
+        tarefa['arquivo'],
+        mimetype=info.mimetype,
+        as_attachment=True,
+        download_name=f'{info.prefixo}_{tarefa["criado_em"].strftime("%Y%m%d")}.{info.extensao}'
+    )
             
 if __name__ == '__main__':
+    debug = os.getenv('FLASK_DEBUG', 'False') == 'True'
+    
+    # No servidor de desenvolvimento os trabalhadores da fila sobem junto com o app
+    # (com o reloader, apenas no processo filho). Em produção use:
+    #     python fila_exportacao.py --workers N
+    if EXPORTACAO_EM_FILA and (not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+        iniciar_trabalhadores(fila_exportacao, int(os.getenv('EXPORTACAO_WORKERS', 2)))
+    
     # Para habilitar a rota de testes use FLASK_DEBUG=True no .env ou no ambiente
-    app.run(debug=os.getenv('FLASK_DEBUG', 'False') == 'True')
\ No newline at end of file
+    app.run(debug=debug)
\ No newline at end of file
@@ -5,7 +5,12 @@ Projeto: Gestão Financeira - Simplifica Finanças
 Funcionalidades:
 - Backup completo do banco de dados MySQL
 - Backup de arquivos do projeto
-- Compactação automática (ZIP)
+- Compactação automática (ZIP), em streaming: a saída do mysqldump e os
+  arquivos do projeto vão direto para o ZIP, sem diretório temporário
+- Dump paralelo por tabela e faixa de ids (--jobs N, ver dump_paralelo.py)
+- Backups incrementais e diferenciais (--tipo, ver backup_incremental.py)
+- Repositório deduplicado por pedaços (BACKUP_REPOSITORIO, ver repositorio_backup.py)
+- Manifesto de integridade e verificação (--verify, ver verificacao_backup.py)
 - Rotação de backups (mantém últimos N backups)
 - Limpeza automática de backups antigos
 - Logs detalhados
@@ -14,14 +19,23 @@ Funcionalidades:
 
 import os
 import sys
+import time
+import fnmatch
 import shutil
 import subprocess
+import tempfile
 from datetime import datetime, timedelta
+from decimal import Decimal
 from pathlib import Path
 import zipfile
 import logging
 from dotenv import load_dotenv
 
+import backup_incremental
+import dump_paralelo
+import repositorio_backup
+import verificacao_backup
+
 # Carrega variáveis de ambiente
 load_dotenv()
 
@@ -45,8 +59,50 @@ BACKUP_CONFIG = {
     'DB_USER': os.getenv('DB_USER', 'root'),
     'DB_PASSWORD': os.getenv('DB_PASSWORD', ''),
     'DB_NAME': os.getenv('DB_NAME', 'gestao_financeira'),
+    
+    # Conexões do dump paralelo (1 = um único mysqldump)
+    'JOBS': int(os.getenv('BACKUP_JOBS', 1)),
+    
+    # Faixa de ids de cada parte no dump paralelo
+    'LINHAS_POR_PARTE': int(os.getenv('BACKUP_LINHAS_POR_PARTE', 200000)),
+    
+    # Tipo padrão: completo, incremental ou diferencial
+    'TIPO': os.getenv('BACKUP_TIPO', 'completo'),
+    
+    # Snapshots em repositório deduplicado (backups/pedacos/) em vez de ZIPs
+    'REPOSITORIO': os.getenv('BACKUP_REPOSITORIO', 'false').lower() == 'true',
+    
+    # Banco de rascunho da verificação profunda (apagado e recriado a cada uso)
+    'DB_VERIFICACAO': os.getenv('BACKUP_DB_VERIFICACAO',
+                                os.getenv('DB_NAME', 'gestao_financeira') + '_verificacao'),
 }
 
+# Arquivos e diretórios do projeto incluídos no backup (se BACKUP_FILES)
+ITENS_PROJETO = [
+    'app.py',
+    'templates',
+    'static',
+    '.env',
+    'requirements.txt',
+    'database_schema.sql',
+    'README.md',
+]
+
+# Diretórios/arquivos a ignorar dentro dos diretórios do projeto
+IGNORAR_PROJETO = [
+    '__pycache__',
+    '*.pyc',
+    '.git',
+    '.venv',
+    'venv',
+    'backups',
+    'logs',
+    '*.log'
+]
+
+# Tamanho dos blocos copiados do mysqldump para o ZIP
+TAMANHO_BLOCO = 1024 * 1024
+
 # Configuração de logs
 LOG_DIR = 'logs'
 os.makedirs(LOG_DIR, exist_ok=True)
@@ -68,104 +124,171 @@ logger = logging.getLogger(__name__)
 class BackupManager:
     """Gerenciador de backups do sistema"""
     
-    def __init__(self):
+    def __init__(self, jobs=None, tipo=None, repositorio=None):
+        self.jobs = jobs or BACKUP_CONFIG['JOBS']
+        self.tipo = tipo or BACKUP_CONFIG['TIPO']
+        if self.tipo not in backup_incremental.TIPOS:
+            raise ValueError(f"Tipo de backup inválido: {self.tipo}")
+        self.repositorio = BACKUP_CONFIG['REPOSITORIO'] if repositorio is None else repositorio
         self.backup_dir = Path(BACKUP_CONFIG['BACKUP_DIR'])
         self.backup_dir.mkdir(exist_ok=True)
         
         self.timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         self.backup_name = f"backup_{self.timestamp}"
+        extensao = repositorio_backup.EXTENSAO if self.repositorio else '.zip'
+        
+        # O ZIP (ou snapshot) é escrito com outro nome e renomeado só no final:
+        # um backup interrompido nunca aparece na listagem nem conta na rotação
+        self.zip_path = self.backup_dir / f"{self.backup_name}{extensao}"
+        self.partial_path = self.backup_dir / f"{self.backup_name}{extensao}.parcial"
         
-        # Diretórios temporários
-        self.temp_dir = self.backup_dir / 'temp' / self.backup_name
-        self.temp_dir.mkdir(parents=True, exist_ok=True)
+        # Preenchidos durante o backup, para o manifesto
+        self.mysqldump = None
+        self.esquema = None
+        self.colunas_soma = {}
+    
+    def abrir_destino(self):
+        """
+        ZIP ou, com repositório, snapshot com a mesma interface de escrita;
+        envolvido pelo registro de tamanho/SHA-256/linhas do manifesto
+        """
+        if self.repositorio:
+            destino = repositorio_backup.GravadorSnapshot(
+                self.partial_path, repositorio_backup.repositorio_de(self.partial_path))
+        else:
+            destino = zipfile.ZipFile(self.partial_path, 'w', zipfile.ZIP_DEFLATED)
+        return verificacao_backup.RegistroIntegridade(destino)
     
     def executar_backup_completo(self):
-        """Executa backup completo (banco + arquivos)"""
+        """Executa o backup (banco + arquivos) do tipo `self.tipo`"""
         logger.info("=" * 70)
         logger.info("🔐 INICIANDO BACKUP AUTOMÁTICO")
         logger.info("=" * 70)
         logger.info(f"📅 Data/Hora: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
         logger.info(f"📂 Destino: {self.backup_dir.absolute()}")
+        
+        pai = None
+        if self.tipo != 'completo':
+            pai = backup_incremental.escolher_pai(self.backups_existentes(), self.tipo)
+            if pai is None:
+                logger.warning(f"⚠ Nenhum backup com estado para base do {self.tipo}: fazendo backup completo")
+                self.tipo = 'completo'
+        logger.info(f"🧩 Tipo: {self.tipo}" + (f" (base: {pai.name})" if pai else ""))
         logger.info("")
         
+        inicio = time.perf_counter()
+        
         try:
-            # 1. Backup do Banco de Dados
-            db_backup_ok = self.backup_database()
-            
-            # 2. Backup de Arquivos (se habilitado)
-            files_backup_ok = True
-            if BACKUP_CONFIG['BACKUP_FILES']:
-                files_backup_ok = self.backup_files()
-            
-            # 3. Compactar tudo
-            if db_backup_ok and files_backup_ok:
-                zip_path = self.compress_backup()
+            with self.abrir_destino() as zipf:
+                # 1. Backup do Banco de Dados (direto para o ZIP)
+                if self.tipo == 'completo':
+                    estado, binlog = self.estado_banco()
+                    zipf.colunas_soma = self.colunas_soma
+                    db_backup_ok = self.backup_database(zipf)
+                else:
+                    db_backup_ok, estado, binlog = self.backup_database_incremental(zipf, pai)
                 
-                # 4. Limpar backups antigos
-                self.cleanup_old_backups()
+                # 2. Backup de Arquivos (se habilitado)
+                files_backup_ok = True
+                if db_backup_ok and BACKUP_CONFIG['BACKUP_FILES']:
+                    files_backup_ok = self.backup_files(zipf)
                 
-                # 5. Remover diretório temporário
-                shutil.rmtree(self.temp_dir.parent)
-                
-                logger.info("")
-                logger.info("=" * 70)
-                logger.info("✅ BACKUP CONCLUÍDO COM SUCESSO!")
-                logger.info("=" * 70)
-                logger.info(f"📦 Arquivo: {zip_path.name}")
-                logger.info(f"💾 Tamanho: {self.get_file_size(zip_path)}")
-                logger.info("")
-                
-                return True
-            else:
+                # 3. Estado para o próximo incremental e manifesto (tipo, base,
+                #    binlog, integridade dos membros), o último membro
+                if db_backup_ok and files_backup_ok:
+                    backup_incremental.gravar_estado(zipf, estado)
+                    backup_incremental.gravar_manifesto(zipf, {
+                        **backup_incremental.manifesto(self.zip_path.name, self.tipo, pai, binlog, estado),
+                        **zipf.integridade(mysqldump=self.mysqldump, esquema=self.esquema),
+                    })
+            
+            if not (db_backup_ok and files_backup_ok):
                 raise Exception("Falha em uma ou mais etapas do backup")
+            
+            # 4. Publica o ZIP completo
+            self.partial_path.replace(self.zip_path)
+            logger.info(f"   ✓ Arquivo criado: {self.zip_path.name}")
+            if self.repositorio:
+                stats = zipf.estatisticas
+                logger.info(f"   🧱 {self.format_size(stats['bytes_logicos'])} em {stats['pedacos']} pedaços; "
+                            f"{stats['pedacos_novos']} novos, {self.format_size(stats['bytes_novos'])} gravados")
+            
+            # 5. Limpar backups antigos
+            self.cleanup_old_backups()
+            
+            logger.info("")
+            logger.info("=" * 70)
+            logger.info("✅ BACKUP CONCLUÍDO COM SUCESSO!")
+            logger.info("=" * 70)
+            logger.info(f"📦 Arquivo: {self.zip_path.name}")
+            logger.info(f"💾 Tamanho (bytes escritos): "
+                        f"{self.format_size(zipf.estatisticas['bytes_novos']) if self.repositorio else self.get_file_size(self.zip_path)}")
+            logger.info(f"⏱️ Tempo: {time.perf_counter() - inicio:.2f} s")
+            logger.info("")
+            
+            return True
                 
         except Exception as e:
             logger.error(f"❌ ERRO NO BACKUP: {str(e)}")
-            # Limpa arquivos temporários em caso de erro
-            if self.temp_dir.parent.exists():
-                shutil.rmtree(self.temp_dir.parent)
+            # Remove o ZIP incompleto em caso de erro
+            self.partial_path.unlink(missing_ok=True)
             return False
     
-    def backup_database(self):
-        """Realiza backup do banco de dados MySQL"""
-        logger.info("📊 Iniciando backup do banco de dados...")
+    def comando_mysqldump(self, *opcoes):
+        """Comando do mysqldump (saída SQL no stdout); `opcoes` extras antes do nome do banco"""
+        return [
+            'mysqldump',
+            f'--host={BACKUP_CONFIG["DB_HOST"]}',
+            f'--user={BACKUP_CONFIG["DB_USER"]}',
+            f'--password={BACKUP_CONFIG["DB_PASSWORD"]}',
+            '--single-transaction',
+            '--routines',
+            '--triggers',
+            '--events',
+            *opcoes,
+            BACKUP_CONFIG['DB_NAME']
+        ]
+    
+    def backup_database(self, zipf):
+        """
+        Realiza backup do banco de dados MySQL: o stdout do mysqldump é
+        copiado em blocos binários direto para o membro <banco>.sql do ZIP.
+        Com jobs > 1, usa o dump paralelo.
+        """
+        if self.jobs > 1:
+            return self.backup_database_paralelo(zipf)
         
+        logger.info("📊 Iniciando backup do banco de dados...")
+        return self.mysqldump_para_zip(zipf, f"{BACKUP_CONFIG['DB_NAME']}.sql", self.comando_mysqldump())
+    
+    def mysqldump_para_zip(self, zipf, membro, cmd):
+        """Executa o mysqldump gravando o stdout no membro `membro` do ZIP"""
         try:
-            # Nome do arquivo de dump
-            dump_file = self.temp_dir / f"{BACKUP_CONFIG['DB_NAME']}.sql"
-            
-            # Comando mysqldump
-            cmd = [
-                'mysqldump',
-                f'--host={BACKUP_CONFIG["DB_HOST"]}',
-                f'--user={BACKUP_CONFIG["DB_USER"]}',
-                f'--password={BACKUP_CONFIG["DB_PASSWORD"]}',
-                '--single-transaction',
-                '--routines',
-                '--triggers',
-                '--events',
-                BACKUP_CONFIG['DB_NAME']
-            ]
-            
-            # Executa o dump
-            with open(dump_file, 'w', encoding='utf-8') as f:
-                result = subprocess.run(
-                    cmd,
-                    stdout=f,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
+            # stderr vai para um arquivo temporário: lido só no final, não
+            # trava o mysqldump se ele escrever muitos avisos
+            with tempfile.TemporaryFile() as erros:
+                processo = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=erros)
+                try:
+                    with zipf.open(membro, 'w', force_zip64=True) as destino:
+                        shutil.copyfileobj(processo.stdout, destino, TAMANHO_BLOCO)
+                finally:
+                    processo.stdout.close()
+                    returncode = processo.wait()
+                erros.seek(0)
+                stderr = erros.read().decode('utf-8', errors='replace')
+            self.mysqldump = {'codigo_saida': returncode, 'avisos': stderr.strip()}
             
-            if result.returncode != 0:
-                logger.error(f"Erro no mysqldump: {result.stderr}")
+            if returncode != 0:
+                logger.error(f"Erro no mysqldump: {stderr}")
                 return False
             
-            # Verifica se o arquivo foi criado
-            if dump_file.exists() and dump_file.stat().st_size > 0:
-                logger.info(f"   ✓ Banco exportado: {self.get_file_size(dump_file)}")
+            # Verifica se o dump tem conteúdo
+            tamanho = zipf.getinfo(membro).file_size
+            if tamanho > 0:
+                logger.info(f"   ✓ Banco exportado: {self.format_size(tamanho)}")
                 return True
             else:
-                logger.error("   ✗ Arquivo de dump vazio ou não criado")
+                logger.error("   ✗ Dump vazio")
                 return False
                 
         except FileNotFoundError:
@@ -178,60 +301,112 @@ class BackupManager:
             logger.error(f"   ✗ Erro ao fazer backup do banco: {str(e)}")
             return False
     
-    def backup_files(self):
-        """Realiza backup dos arquivos do projeto"""
-        logger.info("📁 Iniciando backup de arquivos...")
+    def backup_database_paralelo(self, zipf):
+        """
+        Dump paralelo: esquema pelo mysqldump --no-data e dados por tabela e
+        faixa de ids em `jobs` conexões no mesmo snapshot (dump_paralelo.py)
+        """
+        logger.info(f"📊 Iniciando backup paralelo do banco de dados ({self.jobs} conexões)...")
+        
+        if not self.mysqldump_para_zip(zipf, dump_paralelo.MEMBRO_ESQUEMA, self.comando_mysqldump('--no-data')):
+            return False
         
         try:
-            # Arquivos e diretórios para incluir no backup
-            items_to_backup = [
-                'app.py',
-                'templates',
-                'static',
-                '.env',
-                'requirements.txt',
-                'database_schema.sql',
-                'README.md',
-            ]
-            
-            # Diretórios/arquivos a ignorar
-            ignore_patterns = [
-                '__pycache__',
-                '*.pyc',
-                '.git',
-                '.venv',
-                'venv',
-                'backups',
-                'logs',
-                '*.log'
-            ]
+            # O repositório comprime os pedaços: as partes vão sem compressão para deduplicar
+            stats = dump_paralelo.dump_paralelo(
+                conectar_banco, zipf, self.jobs, BACKUP_CONFIG['LINHAS_POR_PARTE'],
+                comprimido=not self.repositorio,
+                somar=dict.fromkeys(self.colunas_soma, verificacao_backup.COLUNA_SOMA))
+            zipf.linhas.update(stats['tabelas'])
+            zipf.somas.update(stats['somas'])
+            if self.repositorio:
+                compressao = "sem compressão (comprimidas nos pedaços do repositório)"
+            else:
+                compressao = (f"{self.format_size(stats['bytes_comprimidos'])} comprimidos "
+                              f"({dump_paralelo.extensao()})")
+            logger.info(f"   ✓ {stats['linhas']} linhas em {stats['partes']} partes: "
+                        f"{self.format_size(stats['bytes_sql'])} de SQL, {compressao}")
+            return True
             
-            files_dir = self.temp_dir / 'projeto'
-            files_dir.mkdir(exist_ok=True)
+        except Exception as e:
+            logger.error(f"   ✗ Erro no dump paralelo: {str(e)}")
+            return False
+    
+    def estado_banco(self):
+        """
+        Estado das tabelas incrementais e posição do binlog, lidos antes do
+        dump completo; (None, None) se o banco não puder ser lido. Linhas
+        gravadas entre a leitura e o dump voltam no próximo incremental
+        (REPLACE/DELETE), sem erro.
+        """
+        try:
+            conexao, binlog = backup_incremental.abrir_leitura(conectar_banco)
+            try:
+                cursor = conexao.cursor()
+                self.esquema = verificacao_backup.versao_esquema(cursor)
+                self.colunas_soma = verificacao_backup.colunas_soma(cursor)
+                estado = backup_incremental.estado_tabelas(cursor)
+            finally:
+                conexao.close()
+            logger.info(f"   ✓ Estado para incrementais: " +
+                        ", ".join(f"{nome} até id {tabela['max_id']}" for nome, tabela in estado.items()))
+            return estado, binlog
+        except Exception as e:
+            logger.warning(f"   ⚠ Estado do banco não registrado ({e}): o próximo incremental será completo")
+            return None, None
+    
+    def backup_database_incremental(self, zipf, pai):
+        """
+        Mudanças desde o backup `pai` (backup_incremental.py) no membro
+        <banco>.incremental.sql; retorna (ok, estado, binlog)
+        """
+        logger.info(f"📊 Iniciando backup {self.tipo} do banco de dados...")
+        
+        try:
+            estado_pai = backup_incremental.ler_estado(pai)
+            conexao, binlog = backup_incremental.abrir_leitura(conectar_banco)
+            try:
+                cursor = conexao.cursor()
+                self.esquema = verificacao_backup.versao_esquema(cursor)
+                zipf.colunas_soma = verificacao_backup.colunas_soma(cursor)
+                with zipf.open(f"{BACKUP_CONFIG['DB_NAME']}.incremental.sql", 'w', force_zip64=True) as destino:
+                    estado, stats = backup_incremental.gravar_incremental(
+                        cursor, destino, estado_pai, BACKUP_CONFIG['LINHAS_POR_PARTE'])
+                # Somas no mesmo snapshot: o que a cadeia restaurada até aqui deve ter
+                for tabela in zipf.colunas_soma:
+                    zipf.somas[tabela] = dump_paralelo.soma_parte(
+                        cursor, dump_paralelo.Parte(tabela, None, 1, None, None), verificacao_backup.COLUNA_SOMA)
+            finally:
+                conexao.close()
+            zipf.linhas.update(stats['tabelas'])
+            logger.info(f"   ✓ {stats['novas']} linhas novas, {stats['tardias']} tardias, "
+                        f"{stats['excluidas']} excluídas, "
+                        f"{stats['copiadas']} copiadas ({stats['tabelas_copiadas']} tabelas pequenas): "
+                        f"{self.format_size(stats['bytes_sql'])} de SQL")
+            return True, estado, binlog
             
+        except Exception as e:
+            logger.error(f"   ✗ Erro no backup {self.tipo}: {str(e)}")
+            return False, None, None
+    
+    def backup_files(self, zipf):
+        """Realiza backup dos arquivos do projeto (lidos da origem direto para o ZIP)"""
+        logger.info("📁 Iniciando backup de arquivos...")
+        
+        try:
             copied_count = 0
             
-            for item in items_to_backup:
+            for item in ITENS_PROJETO:
                 source = Path(item)
                 
                 if not source.exists():
                     logger.warning(f"   ⚠ Item não encontrado: {item}")
                     continue
                 
-                dest = files_dir / item
-                
                 try:
-                    if source.is_file():
-                        dest.parent.mkdir(parents=True, exist_ok=True)
-                        shutil.copy2(source, dest)
-                        copied_count += 1
-                    elif source.is_dir():
-                        shutil.copytree(
-                            source, 
-                            dest,
-                            ignore=shutil.ignore_patterns(*ignore_patterns)
-                        )
-                        copied_count += 1
+                    for arquivo in self.arquivos_projeto(source):
+                        zipf.write(arquivo, f"projeto/{arquivo.as_posix()}")
+                    copied_count += 1
                         
                 except Exception as e:
                     logger.warning(f"   ⚠ Erro ao copiar {item}: {str(e)}")
@@ -243,63 +418,73 @@ class BackupManager:
             logger.error(f"   ✗ Erro ao fazer backup de arquivos: {str(e)}")
             return False
     
-    def compress_backup(self):
-        """Compacta o backup em arquivo ZIP"""
-        logger.info("📦 Compactando backup...")
+    @staticmethod
+    def arquivos_projeto(source):
+        """Arquivos de um item do projeto, sem os que casam com IGNORAR_PROJETO"""
+        def ignorado(nome):
+            return any(fnmatch.fnmatch(nome, padrao) for padrao in IGNORAR_PROJETO)
         
-        try:
-            zip_path = self.backup_dir / f"{self.backup_name}.zip"
-            
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                # Adiciona todos os arquivos do diretório temporário
-                for file_path in self.temp_dir.rglob('*'):
-                    if file_path.is_file():
-                        arcname = file_path.relative_to(self.temp_dir)
-                        zipf.write(file_path, arcname)
-            
-            logger.info(f"   ✓ Arquivo criado: {zip_path.name}")
-            return zip_path
-            
-        except Exception as e:
-            logger.error(f"   ✗ Erro ao compactar: {str(e)}")
-            raise
+        if source.is_file():
+            yield source
+            return
+        for raiz, dirs, arquivos in os.walk(source):
+            dirs[:] = sorted(d for d in dirs if not ignorado(d))
+            for nome in sorted(arquivos):
+                if not ignorado(nome):
+                    yield Path(raiz) / nome
+    
+    def backups_existentes(self):
+        """Backups publicados, do mais novo ao mais antigo"""
+        return sorted(
+            [*self.backup_dir.glob('backup_*.zip'), *self.backup_dir.glob(f'backup_*{repositorio_backup.EXTENSAO}')],
+            key=lambda x: x.stat().st_mtime,
+            reverse=True
+        )
     
     def cleanup_old_backups(self):
         """Remove backups antigos baseado na política de retenção"""
         logger.info("🧹 Limpando backups antigos...")
         
         try:
-            # Lista todos os backups
-            backups = sorted(
-                self.backup_dir.glob('backup_*.zip'),
-                key=lambda x: x.stat().st_mtime,
-                reverse=True
-            )
+            backups = self.backups_existentes()
+            remover = {}
             
             # Critério 1: Manter apenas os últimos N backups
-            if len(backups) > BACKUP_CONFIG['MAX_BACKUPS']:
-                for old_backup in backups[BACKUP_CONFIG['MAX_BACKUPS']:]:
-                    try:
-                        old_backup.unlink()
-                        logger.info(f"   ✓ Removido (limite): {old_backup.name}")
-                    except Exception as e:
-                        logger.warning(f"   ⚠ Erro ao remover {old_backup.name}: {e}")
+            for old_backup in backups[BACKUP_CONFIG['MAX_BACKUPS']:]:
+                remover[old_backup] = 'limite'
             
             # Critério 2: Remover backups mais antigos que RETENTION_DAYS
             cutoff_date = datetime.now() - timedelta(days=BACKUP_CONFIG['RETENTION_DAYS'])
             
-            for backup in self.backup_dir.glob('backup_*.zip'):
+            for backup in backups:
                 backup_time = datetime.fromtimestamp(backup.stat().st_mtime)
                 
                 if backup_time < cutoff_date:
-                    try:
-                        backup.unlink()
-                        logger.info(f"   ✓ Removido (expirado): {backup.name}")
-                    except Exception as e:
-                        logger.warning(f"   ⚠ Erro ao remover {backup.name}: {e}")
+                    remover.setdefault(backup, 'expirado')
+            
+            # Bases de incrementais mantidos não podem sair
+            necessarios = backup_incremental.dependencias(b for b in backups if b not in remover)
+            
+            for backup, motivo in remover.items():
+                if backup in necessarios:
+                    logger.info(f"   ↺ Mantido (base de incremental): {backup.name}")
+                    continue
+                try:
+                    backup.unlink()
+                    logger.info(f"   ✓ Removido ({motivo}): {backup.name}")
+                except Exception as e:
+                    logger.warning(f"   ⚠ Erro ao remover {backup.name}: {e}")
+            
+            # Pedaços do repositório que nenhum snapshot restante usa
+            repositorio = repositorio_backup.repositorio_de(self.zip_path)
+            if repositorio.pasta.exists():
+                snapshots = [b for b in self.backups_existentes() if b.suffix == repositorio_backup.EXTENSAO]
+                removidos, liberados = repositorio.coletar(snapshots)
+                if removidos:
+                    logger.info(f"   ✓ Pedaços sem referência removidos: {removidos} ({self.format_size(liberados)})")
             
             # Conta backups restantes
-            remaining = len(list(self.backup_dir.glob('backup_*.zip')))
+            remaining = len(self.backups_existentes())
             logger.info(f"   ✓ Backups mantidos: {remaining}")
             
         except Exception as e:
@@ -311,11 +496,7 @@ class BackupManager:
         logger.info("📋 BACKUPS DISPONÍVEIS")
         logger.info("=" * 70)
         
-        backups = sorted(
-            self.backup_dir.glob('backup_*.zip'),
-            key=lambda x: x.stat().st_mtime,
-            reverse=True
-        )
+        backups = self.backups_existentes()
         
         if not backups:
             logger.info("Nenhum backup encontrado.")
@@ -331,7 +512,16 @@ class BackupManager:
             
             logger.info(f"{i}. {backup.name}")
             logger.info(f"   📅 Data: {mod_time.strftime('%d/%m/%Y %H:%M:%S')}")
-            logger.info(f"   💾 Tamanho: {self.get_file_size(backup)}")
+            if backup.suffix == repositorio_backup.EXTENSAO:
+                snapshot = repositorio_backup.ler_snapshot(backup)
+                size = snapshot['bytes_novos']
+                logger.info(f"   💾 Tamanho: {self.format_size(snapshot['bytes_logicos'])} "
+                            f"({self.format_size(size)} novos no repositório)")
+            else:
+                logger.info(f"   💾 Tamanho: {self.get_file_size(backup)}")
+            manifesto = backup_incremental.ler_manifesto(backup)
+            if manifesto and manifesto['tipo'] != 'completo':
+                logger.info(f"   🧩 Tipo: {manifesto['tipo']} (base: {manifesto['pai']})")
             logger.info("")
         
         logger.info(f"Total: {len(backups)} backup(s) | {self.format_size(total_size)}")
@@ -355,6 +545,55 @@ class BackupManager:
 
 # ============== FUNÇÕES UTILITÁRIAS ==============
 
+def conectar_banco():
+    """Conexão com o banco do backup (usada pelo dump paralelo)"""
+    import mysql.connector
+    return mysql.connector.connect(
+        host=BACKUP_CONFIG['DB_HOST'],
+        user=BACKUP_CONFIG['DB_USER'],
+        password=BACKUP_CONFIG['DB_PASSWORD'],
+        database=BACKUP_CONFIG['DB_NAME']
+    )
+
+
+def executar_com_entrada(cmd, entrada):
+    """Executa cmd copiando `entrada` (arquivo binário) para o stdin em blocos; (returncode, stderr)"""
+    with tempfile.TemporaryFile() as erros, entrada:
+        processo = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=erros)
+        try:
+            shutil.copyfileobj(entrada, processo.stdin, TAMANHO_BLOCO)
+        except BrokenPipeError:
+            pass  # o processo terminou antes (erro de SQL): o returncode diz o motivo
+        finally:
+            try:
+                processo.stdin.close()
+            except BrokenPipeError:
+                pass
+        returncode = processo.wait()
+        erros.seek(0)
+        return returncode, erros.read().decode('utf-8', errors='replace')
+
+
+def comando_mysql(banco):
+    """Comando do cliente mysql lendo SQL do stdin para `banco`"""
+    return [
+        'mysql',
+        f'--host={BACKUP_CONFIG["DB_HOST"]}',
+        f'--user={BACKUP_CONFIG["DB_USER"]}',
+        f'--password={BACKUP_CONFIG["DB_PASSWORD"]}',
+        banco
+    ]
+
+
+def entrada_banco(zipf):
+    """SQL do banco de um backup como arquivo binário, ou None se não houver"""
+    # Dump do banco: .sql na raiz do ZIP (completo ou incremental) ou, no dump paralelo, banco/
+    if dump_paralelo.MEMBRO_ESQUEMA in zipf.namelist():
+        return dump_paralelo.ler_banco(zipf)
+    sql_file = [nome for nome in zipf.namelist() if nome.endswith('.sql') and '/' not in nome]
+    return zipf.open(sql_file[0]) if sql_file else None
+
+
 def restaurar_backup(backup_file):
     """Restaura um backup específico"""
     logger.info("=" * 70)
@@ -368,44 +607,30 @@ def restaurar_backup(backup_file):
             logger.error(f"❌ Backup não encontrado: {backup_file}")
             return False
         
-        # Extrai o backup
-        restore_dir = Path('restore_temp')
-        restore_dir.mkdir(exist_ok=True)
-        
-        with zipfile.ZipFile(backup_path, 'r') as zipf:
-            zipf.extractall(restore_dir)
+        # Incremental/diferencial: aplica o completo e os incrementais até ele
+        cadeia = backup_incremental.cadeia(backup_path)
+        if len(cadeia) > 1:
+            logger.info(f"🧩 Cadeia: {' → '.join(caminho.name for caminho in cadeia)}")
         
-        logger.info("✓ Backup extraído")
+        cmd = comando_mysql(BACKUP_CONFIG['DB_NAME'])
         
-        # Restaura o banco de dados
-        sql_file = list(restore_dir.glob('*.sql'))
-        
-        if sql_file:
-            logger.info("📊 Restaurando banco de dados...")
-            
-            cmd = [
-                'mysql',
-                f'--host={BACKUP_CONFIG["DB_HOST"]}',
-                f'--user={BACKUP_CONFIG["DB_USER"]}',
-                f'--password={BACKUP_CONFIG["DB_PASSWORD"]}',
-                BACKUP_CONFIG['DB_NAME']
-            ]
-            
-            with open(sql_file[0], 'r', encoding='utf-8') as f:
-                result = subprocess.run(
-                    cmd,
-                    stdin=f,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
-            
-            if result.returncode == 0:
-                logger.info("✓ Banco de dados restaurado")
-            else:
-                logger.error(f"✗ Erro: {result.stderr}")
-        
-        # Limpa diretório temporário
-        shutil.rmtree(restore_dir)
+        for caminho in cadeia:
+            with repositorio_backup.abrir_backup(caminho) as zipf:
+                entrada = entrada_banco(zipf)
+                if entrada is None:
+                    continue
+                
+                logger.info(f"📊 Restaurando banco de dados ({caminho.name})...")
+                
+                # O dump é lido do ZIP e enviado ao mysql em blocos, sem extrair
+                returncode, stderr = executar_com_entrada(cmd, entrada)
+                
+                if returncode == 0:
+                    logger.info("✓ Banco de dados restaurado")
+                else:
+                    # Um incremental sobre uma base com erro deixaria o banco inconsistente
+                    logger.error(f"✗ Erro: {stderr}")
+                    return False
         
         logger.info("=" * 70)
         logger.info("✅ RESTAURAÇÃO CONCLUÍDA")
@@ -418,6 +643,119 @@ def restaurar_backup(backup_file):
         return False
 
 
+def verificar_profundo(backup_path):
+    """
+    Restaura a cadeia do backup no banco de rascunho DB_VERIFICACAO e compara
+    as linhas de cada tabela, as somas das tabelas incrementais e a versão do
+    esquema com o manifesto; retorna a lista de divergências. O banco de
+    rascunho é apagado no final.
+    """
+    banco = BACKUP_CONFIG['DB_VERIFICACAO']
+    if banco == BACKUP_CONFIG['DB_NAME']:
+        raise ValueError("BACKUP_DB_VERIFICACAO não pode ser o banco da aplicação")
+    
+    manifesto = backup_incremental.ler_manifesto(backup_path)
+    if manifesto is None or 'linhas' not in manifesto:
+        return ["sem manifesto de integridade"]
+    
+    conexao = conectar_banco()
+    cursor = conexao.cursor()
+    try:
+        cursor.execute(f"DROP DATABASE IF EXISTS `{banco}`")
+        cursor.execute(f"CREATE DATABASE `{banco}` CHARACTER SET utf8mb4")
+        
+        for caminho in backup_incremental.cadeia(backup_path):
+            with repositorio_backup.abrir_backup(caminho) as zipf:
+                entrada = entrada_banco(zipf)
+                if entrada is None:
+                    continue
+                returncode, stderr = executar_com_entrada(comando_mysql(banco), entrada)
+            if returncode != 0:
+                return [f"{caminho.name}: restauração falhou: {stderr.strip()}"]
+        
+        cursor.execute(f"USE `{banco}`")
+        erros = []
+        esquema = verificacao_backup.versao_esquema(cursor)
+        if manifesto.get('esquema') and esquema['sha256'] != manifesto['esquema']['sha256']:
+            erros.append("versão do esquema restaurado diferente da do manifesto")
+        
+        restauradas = set()
+        for tabela in dump_paralelo.listar_tabelas(cursor):
+            restauradas.add(tabela.nome)
+            cursor.execute(f"SELECT COUNT(*) FROM `{tabela.nome}`")
+            linhas = cursor.fetchone()[0]
+            esperado = manifesto['linhas'].get(tabela.nome, 0)
+            if linhas != esperado:
+                erros.append(f"{tabela.nome}: {linhas} linhas restauradas, manifesto diz {esperado}")
+        erros += [f"{nome}: não restaurada" for nome in manifesto['linhas'] if nome not in restauradas]
+        
+        # Mesma quantidade de linhas não garante os mesmos dados (linha trocada, valor corrompido)
+        coluna = verificacao_backup.COLUNA_SOMA
+        for nome, esperado in manifesto.get('somas', {}).items():
+            if nome not in restauradas:
+                continue
+            soma = dump_paralelo.soma_parte(cursor, dump_paralelo.Parte(nome, None, 1, None, None), coluna)
+            if soma != Decimal(esperado):
+                erros.append(f"{nome}: soma de {coluna} restaurada {soma}, manifesto diz {esperado}")
+        return erros
+    
+    finally:
+        cursor.execute(f"DROP DATABASE IF EXISTS `{banco}`")
+        cursor.close()
+        conexao.close()
+
+
+def verificar_backups(nomes=None, jobs=None, profundo=False):
+    """
+    Confere os backups (todos, se `nomes` vazio) com o manifesto, em
+    paralelo; com `profundo`, também restaura cada um no banco de rascunho.
+    Retorna True se todos estiverem íntegros.
+    """
+    logger.info("=" * 70)
+    logger.info("🔎 VERIFICANDO BACKUPS")
+    logger.info("=" * 70)
+    
+    manager = BackupManager()
+    caminhos = [manager.backup_dir / nome for nome in nomes] if nomes else manager.backups_existentes()
+    ausentes = [caminho for caminho in caminhos if not caminho.exists()]
+    for caminho in ausentes:
+        logger.error(f"❌ Backup não encontrado: {caminho.name}")
+    caminhos = [caminho for caminho in caminhos if caminho.exists()]
+    
+    jobs = jobs or os.cpu_count() or 1
+    inicio = time.perf_counter()
+    resultados = verificacao_backup.verificar_backups(caminhos, jobs)
+    segundos = time.perf_counter() - inicio
+    
+    integros = not ausentes
+    for caminho, resultado in zip(caminhos, resultados):
+        erros = resultado['erros']
+        if not erros and profundo:
+            logger.info(f"   🔬 Restaurando {caminho.name} em {BACKUP_CONFIG['DB_VERIFICACAO']}...")
+            try:
+                erros = verificar_profundo(caminho)
+            except Exception as e:
+                erros = [f"verificação profunda falhou: {e}"]
+        
+        if erros:
+            integros = False
+            logger.error(f"✗ {resultado['backup']}")
+            for erro in erros:
+                logger.error(f"   - {erro}")
+        else:
+            manifesto = resultado['manifesto'] or {}
+            observacao = "" if 'membros' in manifesto else " (sem manifesto: só o CRC do ZIP)"
+            logger.info(f"✓ {resultado['backup']}: {BackupManager.format_size(resultado['bytes'])} conferidos"
+                        f"{observacao}")
+    
+    total = sum(resultado['bytes'] for resultado in resultados)
+    logger.info("")
+    logger.info(f"Total: {len(resultados)} backup(s) | {BackupManager.format_size(total)} em {segundos:.2f} s "
+                f"({BackupManager.format_size(total / max(segundos, 1e-9))}/s, {jobs} threads)")
+    logger.info("=" * 70)
+    return integros
+
+
 def menu_interativo():
     """Menu interativo para operações de backup"""
     while True:
@@ -429,6 +767,7 @@ def menu_interativo():
         print("3. 🔄 Restaurar backup")
         print("4. 🗑️  Limpar backups antigos")
         print("5. ⚙️  Configurações")
+        print("6. 🔎 Verificar backups")
         print("0. ❌ Sair")
         print("\n" + "=" * 70)
         
@@ -461,6 +800,9 @@ def menu_interativo():
                     print(f"{key}: {value}")
             print("=" * 70)
             
+        elif escolha == '6':
+            verificar_backups()
+            
         elif escolha == '0':
             print("\n👋 Até logo!")
             break
@@ -478,12 +820,20 @@ if __name__ == '__main__':
     parser.add_argument('--auto', action='store_true', help='Executa backup automaticamente')
     parser.add_argument('--list', action='store_true', help='Lista backups disponíveis')
     parser.add_argument('--restore', type=str, help='Restaura um backup específico')
+    parser.add_argument('--jobs', type=int,
+                        help='Conexões do dump paralelo (padrão BACKUP_JOBS) ou threads da verificação (padrão: CPUs)')
+    parser.add_argument('--tipo', choices=backup_incremental.TIPOS, default=BACKUP_CONFIG['TIPO'],
+                        help='completo, incremental (desde o último backup) ou diferencial (desde o último completo)')
+    parser.add_argument('--verify', nargs='*', metavar='BACKUP',
+                        help='Confere os backups indicados (ou todos) com o manifesto')
+    parser.add_argument('--profundo', action='store_true',
+                        help='Com --verify: restaura no banco de rascunho e compara linhas e esquema')
     
     args = parser.parse_args()
     
     if args.auto:
         # Modo automático (para agendamento)
-        manager = BackupManager()
+        manager = BackupManager(jobs=args.jobs, tipo=args.tipo)
         manager.executar_backup_completo()
         
     elif args.list:
@@ -495,6 +845,10 @@ if __name__ == '__main__':
         # Restaura backup
         restaurar_backup(args.restore)
         
+    elif args.verify is not None:
+        # Verifica integridade (código de saída 1 se algum backup falhar)
+        sys.exit(0 if verificar_backups(args.verify, args.jobs, args.profundo) else 1)
+        
     else:
         # Menu interativo
         menu_interativo()
\ No newline at end of file
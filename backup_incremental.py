@@ -0,0 +1,322 @@
+"""
+Backups Incrementais e Diferenciais
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Todo backup leva um manifesto (manifesto.json: tipo, backup pai, posição do
+binlog) e, quando o banco pôde ser lido, o estado das tabelas grandes
+(estado.json): o maior id e as faixas de ids existentes de transacoes,
+aportes_meta e anomalias_gastos. Essas tabelas só recebem INSERT e DELETE
+(nunca UPDATE), então as mudanças desde o backup pai são:
+
+- linhas novas: id maior que o maior id do pai;
+- linhas excluídas: ids das faixas do pai que não existem mais;
+- linhas tardias: ids até o maior id do pai fora das faixas do pai. O
+  auto-incremento reserva o id quando a linha é incluída, mas ela só fica
+  visível no commit: uma transação longa (importação em lotes,
+  recorrências) aberta durante o backup pai grava ids abaixo do maior id
+  dele.
+
+O estado guarda também uma assinatura dos ids até o maior id (quantidade,
+soma e BIT_XOR de 64 bits do MD5 de cada id, lidos só do índice primário).
+Os ids atuais até o maior id do pai são lidos apenas quando essa assinatura
+mudou. Quantidade e soma sozinhas não bastam: exclusões e linhas tardias no
+mesmo dia podem se compensar (excluir 1 e 7, commit tardio de 3 e 5). Nem
+CRC32 no lugar do MD5, por ser linear: CRC32('1') ^ CRC32('7') é igual a
+CRC32('3') ^ CRC32('5').
+
+As demais tabelas (usuários, metas, recorrências, resumos...) são pequenas
+e mudam por UPDATE (data_registro só marca a inclusão): vão inteiras em
+todo incremental.
+
+Tipos (--tipo):
+    completo     dump completo (mysqldump ou paralelo) e estado
+    incremental  mudanças desde o último backup (completo ou incremental)
+    diferencial  mudanças desde o último completo
+
+O incremental é um SQL que pode ser reaplicado sem erro: DELETE dos ids
+excluídos, REPLACE das linhas novas e, nas tabelas pequenas, DELETE + REPLACE
+de todas as linhas. A restauração aplica o completo e depois a cadeia de
+incrementais até o backup escolhido (ver restaurar_backup).
+
+A posição do binlog (lida com as tabelas travadas, junto com o snapshot) vai
+no manifesto para recuperação até um instante com mysqlbinlog; os
+incrementais não dependem dela.
+"""
+
+import json
+import zipfile
+from datetime import datetime
+
+import dump_paralelo
+import repositorio_backup
+
+TIPOS = ('completo', 'incremental', 'diferencial')
+TABELAS_INCREMENTAIS = ('transacoes', 'aportes_meta', 'anomalias_gastos')
+MANIFESTO = 'manifesto.json'
+ESTADO = 'estado.json'
+VERSAO_MANIFESTO = 1
+IDS_POR_LOTE = 10000
+
+
+# ============== FAIXAS DE IDS ==============
+
+def faixas_de_ids(ids, faixas=None):
+    """Acrescenta `ids` (crescentes) a uma lista de faixas [inicio, fim]; retorna a lista"""
+    faixas = [list(faixa) for faixa in faixas] if faixas else []
+    for i in ids:
+        if faixas and i == faixas[-1][1] + 1:
+            faixas[-1][1] = i
+        else:
+            faixas.append([i, i])
+    return faixas
+
+
+def contar_faixas(faixas):
+    return sum(fim - inicio + 1 for inicio, fim in faixas)
+
+
+def ids_removidos(antigas, atuais):
+    """ids das faixas `antigas` que não estão nas faixas `atuais`"""
+    removidos = []
+    j = 0
+    for inicio, fim in antigas:
+        while j < len(atuais) and atuais[j][1] < inicio:
+            j += 1
+        proximo = inicio
+        k = j
+        while k < len(atuais) and atuais[k][0] <= fim:
+            removidos.extend(range(proximo, min(atuais[k][0], fim + 1)))
+            proximo = max(proximo, atuais[k][1] + 1)
+            k += 1
+        removidos.extend(range(proximo, fim + 1))
+    return removidos
+
+
+def ler_ids(cursor, tabela, inicio, fim):
+    """ids de `tabela` em [inicio, fim), em ordem, lidos em lotes"""
+    cursor.execute(f'SELECT `{tabela.chave}` FROM `{tabela.nome}` '
+                   f'WHERE `{tabela.chave}` >= %s AND `{tabela.chave}` < %s ORDER BY `{tabela.chave}`',
+                   (inicio, fim))
+    while True:
+        linhas = cursor.fetchmany(IDS_POR_LOTE)
+        if not linhas:
+            return
+        for linha in linhas:
+            yield linha[0]
+
+
+def limites(cursor, tabela):
+    """(menor id, maior id) de `tabela`; (None, None) se vazia"""
+    cursor.execute(f'SELECT MIN(`{tabela.chave}`), MAX(`{tabela.chave}`) FROM `{tabela.nome}`')
+    return cursor.fetchone()
+
+
+# ============== LEITURA DO BANCO ==============
+
+def posicao_binlog(cursor):
+    """Arquivo e posição atuais do binlog, ou None (binlog desligado ou sem privilégio)"""
+    # MySQL 8.4 removeu SHOW MASTER STATUS; versões antigas não têm a forma nova
+    for sql in ('SHOW BINARY LOG STATUS', 'SHOW MASTER STATUS'):
+        try:
+            cursor.execute(sql)
+            linha = cursor.fetchone()
+        except Exception:
+            continue
+        return {'arquivo': linha[0], 'posicao': int(linha[1])} if linha else None
+    return None
+
+
+def abrir_leitura(conectar):
+    """Conexão dentro de um snapshot consistente e a posição do binlog nesse instante"""
+    binlog = []
+    conexoes, _ = dump_paralelo.abrir_snapshots(conectar, 1, lambda cursor: binlog.append(posicao_binlog(cursor)))
+    return conexoes[0], binlog[0]
+
+
+def tabelas_incrementais(cursor):
+    return [tabela for tabela in dump_paralelo.listar_tabelas(cursor)
+            if tabela.nome in TABELAS_INCREMENTAIS and tabela.chave]
+
+
+def assinatura_ids(cursor, tabela, maximo):
+    """[quantidade, soma, BIT_XOR dos 64 primeiros bits do MD5] dos ids até `maximo` (só o índice primário)"""
+    cursor.execute(f'SELECT COUNT(*), SUM(`{tabela.chave}`), '
+                   f'BIT_XOR(CAST(CONV(LEFT(MD5(`{tabela.chave}`), 16), 16, 10) AS UNSIGNED)) '
+                   f'FROM `{tabela.nome}` WHERE `{tabela.chave}` <= %s', (maximo,))
+    return [int(valor or 0) for valor in cursor.fetchone()]
+
+
+def estado_tabela(cursor, tabela):
+    menor, maior = limites(cursor, tabela)
+    if maior is None:
+        return {'max_id': 0, 'faixas': [], 'assinatura': [0, 0, 0]}
+    return {'max_id': maior, 'faixas': faixas_de_ids(ler_ids(cursor, tabela, menor, maior + 1)),
+            'assinatura': assinatura_ids(cursor, tabela, maior)}
+
+
+def estado_tabelas(cursor):
+    """Estado de um backup completo: maior id e faixas de ids de cada tabela incremental"""
+    return {tabela.nome: estado_tabela(cursor, tabela) for tabela in tabelas_incrementais(cursor)}
+
+
+# ============== INCREMENTAL ==============
+
+def gravar_incremental(cursor, destino, estado_pai, linhas_por_parte=dump_paralelo.LINHAS_POR_PARTE):
+    """
+    Grava em `destino` (arquivo binário) o SQL com as mudanças desde o
+    backup com `estado_pai`. Retorna (estado atual, estatísticas); em
+    estatísticas, tabelas tem as linhas de cada tabela depois de aplicado.
+    """
+    estado = {}
+    stats = {'novas': 0, 'excluidas': 0, 'tardias': 0, 'copiadas': 0, 'tabelas_copiadas': 0, 'bytes_sql': 0,
+             'tabelas': {}}
+
+    def escrever(dados):
+        destino.write(dados)
+        stats['bytes_sql'] += len(dados)
+
+    escrever(dump_paralelo.CABECALHO)
+    for tabela in dump_paralelo.listar_tabelas(cursor):
+        incremental = tabela.nome in TABELAS_INCREMENTAIS and tabela.chave
+        if not incremental or tabela.nome not in estado_pai:
+            # Tabela pequena (ou sem estado no pai): vai inteira
+            escrever(f'DELETE FROM `{tabela.nome}`;\n'.encode())
+            sql, linhas = dump_paralelo.sql_parte(cursor, dump_paralelo.Parte(tabela.nome, None, 1, None, None),
+                                                  comando='REPLACE')
+            escrever(sql)
+            stats['copiadas'] += linhas
+            stats['tabelas_copiadas'] += 1
+            stats['tabelas'][tabela.nome] = linhas
+            if incremental:
+                estado[tabela.nome] = estado_tabela(cursor, tabela)
+            continue
+
+        pai = estado_pai[tabela.nome]
+        maximo_pai, faixas = pai['max_id'], pai['faixas']
+
+        # Exclusões e linhas tardias: só lê os ids se a assinatura dos ids
+        # até o maior id do pai mudou
+        if assinatura_ids(cursor, tabela, maximo_pai) != pai['assinatura']:
+            atuais = faixas_de_ids(ler_ids(cursor, tabela, 0, maximo_pai + 1))
+            removidos = ids_removidos(faixas, atuais)
+            for i in range(0, len(removidos), dump_paralelo.LINHAS_POR_INSERT):
+                lote = ', '.join(map(str, removidos[i:i + dump_paralelo.LINHAS_POR_INSERT]))
+                escrever(f'DELETE FROM `{tabela.nome}` WHERE `{tabela.chave}` IN ({lote});\n'.encode())
+            stats['excluidas'] += len(removidos)
+
+            # Tardias: cada faixa só tem ids fora do pai
+            for inicio, fim in faixas_de_ids(ids_removidos(atuais, faixas)):
+                sql, linhas = dump_paralelo.sql_parte(
+                    cursor, dump_paralelo.Parte(tabela.nome, tabela.chave, 1, inicio, fim + 1), comando='REPLACE')
+                escrever(sql)
+                stats['tardias'] += linhas
+            faixas = atuais
+
+        # Linhas novas: ids acima do maior id do pai, em faixas de linhas_por_parte
+        _, maximo = limites(cursor, tabela)
+        maximo = max(maximo_pai, maximo or 0)
+        for inicio in range(maximo_pai + 1, maximo + 1, linhas_por_parte):
+            fim = min(inicio + linhas_por_parte, maximo + 1)
+            faixas = faixas_de_ids(ler_ids(cursor, tabela, inicio, fim), faixas)
+            sql, linhas = dump_paralelo.sql_parte(
+                cursor, dump_paralelo.Parte(tabela.nome, tabela.chave, 1, inicio, fim), comando='REPLACE')
+            escrever(sql)
+            stats['novas'] += linhas
+        estado[tabela.nome] = {'max_id': maximo, 'faixas': faixas,
+                               'assinatura': assinatura_ids(cursor, tabela, maximo)}
+        stats['tabelas'][tabela.nome] = contar_faixas(faixas)
+
+    return estado, stats
+
+
+# ============== MANIFESTO E CADEIA ==============
+
+def manifesto(nome, tipo, pai=None, binlog=None, estado=None, **extras):
+    """Conteúdo do manifesto.json de um backup (`pai`: Path do backup base, se incremental)"""
+    base = None
+    if pai is not None:
+        base = cadeia(pai)[0].name
+    return {
+        'versao': VERSAO_MANIFESTO,
+        'backup': nome,
+        'tipo': tipo,
+        'pai': pai.name if pai is not None else None,
+        'base': base,
+        'criado_em': datetime.now().isoformat(timespec='seconds'),
+        'binlog': binlog,
+        'estado': estado is not None,
+        **extras,
+    }
+
+
+def gravar_estado(zipf, estado):
+    if estado is not None:
+        zipf.writestr(ESTADO, json.dumps(estado, separators=(',', ':')))
+
+
+def gravar_manifesto(zipf, conteudo):
+    """Grava o manifesto; deve ser o último membro (descreve os anteriores)"""
+    zipf.writestr(MANIFESTO, json.dumps(conteudo, ensure_ascii=False, indent=2))
+
+
+def ler_membro_json(caminho, membro):
+    try:
+        with repositorio_backup.abrir_backup(caminho) as zipf:
+            return json.loads(zipf.read(membro))
+    except (KeyError, OSError, ValueError, zipfile.BadZipFile):
+        return None
+
+
+def ler_manifesto(caminho):
+    """Manifesto de um backup, ou None (backups anteriores aos incrementais não têm)"""
+    return ler_membro_json(caminho, MANIFESTO)
+
+
+def ler_estado(caminho):
+    return ler_membro_json(caminho, ESTADO)
+
+
+def cadeia(caminho):
+    """Backups a aplicar para restaurar `caminho`: o completo e os incrementais até ele, em ordem"""
+    backups = [caminho]
+    while True:
+        conteudo = ler_manifesto(backups[-1])
+        if conteudo is None or conteudo['tipo'] == 'completo':
+            return backups[::-1]
+        pai = caminho.parent / conteudo['pai']
+        if not pai.exists():
+            raise FileNotFoundError(f"{caminho.name} depende de {pai.name}, que não existe mais")
+        if pai in backups:
+            raise ValueError(f"Cadeia de backups circular em {pai.name}")
+        backups.append(pai)
+
+
+def escolher_pai(backups, tipo):
+    """
+    Base de um novo backup `tipo` entre `backups` (do mais novo ao mais
+    antigo): o mais novo com estado e cadeia íntegra (diferencial: só
+    completos). None se não houver.
+    """
+    for caminho in backups:
+        conteudo = ler_manifesto(caminho)
+        if conteudo is None or not conteudo.get('estado'):
+            continue
+        if tipo == 'diferencial' and conteudo['tipo'] != 'completo':
+            continue
+        try:
+            cadeia(caminho)
+        except (FileNotFoundError, ValueError):
+            continue
+        return caminho
+    return None
+
+
+def dependencias(backups):
+    """Backups necessários para restaurar `backups` (eles e suas bases)"""
+    necessarios = set()
+    for caminho in backups:
+        try:
+            necessarios.update(cadeia(caminho))
+        except (FileNotFoundError, ValueError):
+            necessarios.add(caminho)
+    return necessarios
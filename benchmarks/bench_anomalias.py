@@ -0,0 +1,137 @@
+"""
+Benchmark - Gastos Fora do Padrão
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Mede a análise de anomalias.py para um usuário sintético (padrão: 10
+anos de despesas com cerca de 10 lançamentos por dia, todos os meses
+avaliados, como numa execução --completo) e compara com a mesma conta
+feita em laço Python (statistics.median por categoria e mês).
+
+Com --mysql, mede uma execução completa e, em seguida, uma incremental
+sem alterações (só a consulta da marca em resumo_mensal).
+
+Uso:
+    python benchmarks/bench_anomalias.py
+    python benchmarks/bench_anomalias.py --anos 5 --por-dia 20
+    python benchmarks/bench_anomalias.py --mysql
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import anomalias
+
+CATEGORIAS = ['Alimentação', 'Moradia', 'Transporte', 'Saúde', 'Lazer', 'Educação', 'Outros']
+
+
+def arrays_sinteticos(anos, por_dia, semente=42):
+    """(meses, categorias, centavos) de despesas, com alguns picos"""
+    aleatorio = random.Random(semente)
+    meses, categorias, centavos = [], [], []
+    for mes in range(12 * anos):
+        for _ in range(aleatorio.randint(0, 2 * por_dia * 30)):
+            meses.append(mes)
+            categorias.append(aleatorio.randrange(len(CATEGORIAS)))
+            valor = aleatorio.randint(500, 30000)
+            centavos.append(valor * 20 if aleatorio.random() < 0.001 else valor)
+    return np.array(meses), np.array(categorias), np.array(centavos)
+
+
+def meses_python(meses, categorias, centavos, quantidade, avaliados, janela):
+    """Mesma marcação de meses_fora_do_padrao, em laço"""
+    totais = defaultdict(int)
+    for m, c, v in zip(meses.tolist(), categorias.tolist(), centavos.tolist()):
+        totais[c, m] += v
+    marcados = []
+    for c in range(quantidade):
+        for a in range(avaliados):
+            anteriores = [totais[c, m] for m in range(a, a + janela) if totais[c, m] > 0]
+            if len(anteriores) < anomalias.MIN_MESES:
+                continue
+            mediana = statistics.median(anteriores)
+            mad = statistics.median(abs(t - mediana) for t in anteriores)
+            escala = max(1.4826 * mad, 0.1 * abs(mediana))
+            if totais[c, a + janela] > mediana + anomalias.LIMIAR * escala:
+                marcados.append((c, a))
+    return marcados
+
+
+def transacoes_python(meses, categorias, centavos, quantidade, avaliados, janela):
+    """Mesma marcação de transacoes_fora_do_padrao, em laço"""
+    por_grupo = defaultdict(list)
+    for m, c, v in zip(meses.tolist(), categorias.tolist(), centavos.tolist()):
+        por_grupo[c, m].append(v)
+    marcadas = 0
+    for c in range(quantidade):
+        for a in range(avaliados):
+            anteriores = [v for m in range(a, a + janela) for v in por_grupo[c, m]]
+            if len(anteriores) < anomalias.MIN_TRANSACOES:
+                continue
+            mediana = statistics.median(anteriores)
+            mad = statistics.median(abs(v - mediana) for v in anteriores)
+            limite = mediana + anomalias.LIMIAR * max(1.4826 * mad, 0.1 * abs(mediana))
+            marcadas += sum(1 for v in por_grupo[c, a + janela] if v > limite)
+    return marcadas
+
+
+def cronometrar(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1000, resultado
+
+
+def executar_sintetico(args):
+    janela = anomalias.JANELA_MESES
+    meses, categorias, centavos = arrays_sinteticos(args.anos, args.por_dia)
+    quantidade = len(CATEGORIAS)
+    avaliados = 12 * args.anos - janela
+    print(f'{len(centavos)} despesas ({args.anos} anos), {avaliados} meses avaliados')
+
+    dados = (meses, categorias, centavos, quantidade, avaliados, janela)
+    ms, vetorizado = cronometrar(lambda: anomalias.meses_fora_do_padrao(*dados), args.repeticoes)
+    print(f'meses (NumPy)           | {ms:8.2f} ms  ({len(vetorizado[0])} marcados)')
+    ms, laco = cronometrar(lambda: meses_python(*dados), 1)
+    print(f'meses (laço Python)     | {ms:8.2f} ms  ({len(laco)} marcados)')
+    ms, vetorizado = cronometrar(lambda: anomalias.transacoes_fora_do_padrao(*dados), args.repeticoes)
+    print(f'transações (NumPy)      | {ms:8.2f} ms  ({len(vetorizado[0])} marcadas)')
+    ms, laco = cronometrar(lambda: transacoes_python(*dados), 1)
+    print(f'transações (laço Python)| {ms:8.2f} ms  ({laco} marcadas)')
+
+
+def executar_mysql(args):
+    import mysql.connector
+    from config import DB_CONFIG
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    try:
+        ms, resultado = cronometrar(lambda: anomalias.executar(conn, completo=True), 1)
+        print(f'execução completa       | {ms:8.2f} ms  ({len(resultado["usuarios"])} usuários, '
+              f'{resultado["anomalias"]} anomalias)')
+        ms, resultado = cronometrar(lambda: anomalias.executar(conn), 1)
+        print(f'execução incremental    | {ms:8.2f} ms  ({len(resultado["usuarios"])} usuários)')
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark da detecção de gastos fora do padrão')
+    parser.add_argument('--anos', type=int, default=10)
+    parser.add_argument('--por-dia', type=int, default=10, help='Média de despesas por dia')
+    parser.add_argument('--repeticoes', type=int, default=10)
+    parser.add_argument('--mysql', action='store_true', help='Mede execuções completa e incremental no MySQL')
+    args = parser.parse_args()
+
+    if args.mysql:
+        executar_mysql(args)
+    else:
+        executar_sintetico(args)
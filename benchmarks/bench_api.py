@@ -0,0 +1,187 @@
+"""
+Benchmark - API JSON (/api/v1) contra a página renderizada
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Mede, pelo cliente de testes do Flask, os bytes enviados e o tempo de
+resposta dos relatórios em quatro formas: a página HTML (/relatorios), o
+JSON da API, o JSON comprimido (Accept-Encoding: gzip) e a revalidação
+com If-None-Match (304 sem corpo).
+
+Sem --mysql, o banco é simulado com linhas de resumo_categoria para N
+categorias ao longo de 24 meses (o tempo medido é o do Flask, Jinja e
+serialização). Com --mysql, cria um usuário de teste com transações no
+banco de config.py, reconstrói os resumos e mede as mesmas rotas com o
+cache de views frio (invalidado antes de cada requisição) e quente; o
+usuário é removido no final.
+
+Uso:
+    python benchmarks/bench_api.py
+    python benchmarks/bench_api.py --categorias 5 20 60 --periodo ano
+    python benchmarks/bench_api.py --mysql --transacoes 10000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import api
+import periodos
+import resumo
+from app import app, view_cache
+
+MESES_HISTORICO = 24
+
+
+def tempos_ms(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def medir(cliente, usuario_id, consulta, repeticoes, frio=False):
+    """[(forma, bytes, ms)] para a página, o JSON, o JSON com gzip e o 304"""
+    def pedir(url, **kwargs):
+        if frio:
+            view_cache.invalidate(usuario_id, 'relatorios')
+        return cliente.get(url, **kwargs)
+
+    pagina = '/relatorios' + consulta
+    url_api = '/api/v1/relatorios' + consulta
+    etag = cliente.get(url_api).headers['ETag']
+    formas = [
+        ('página HTML', pagina, {}),
+        ('API JSON', url_api, {}),
+        ('API JSON + gzip', url_api, {'headers': {'Accept-Encoding': 'gzip'}}),
+        ('API 304 (If-None-Match)', url_api, {'headers': {'If-None-Match': etag}}),
+    ]
+    resultado = []
+    for nome, url, kwargs in formas:
+        tamanho = len(pedir(url, **kwargs).get_data())
+        resultado.append((nome, tamanho, tempos_ms(lambda: pedir(url, **kwargs), repeticoes)))
+    return resultado
+
+
+def imprimir(titulo, resultado):
+    print(titulo)
+    base = resultado[0][1]
+    for nome, tamanho, ms in resultado:
+        print(f'    {nome:<24} {tamanho:>8} bytes ({tamanho / base:6.1%}) | {ms:7.2f} ms')
+
+
+def cliente_logado(usuario_id):
+    app.config['TESTING'] = True
+    # Em sistemas com nomes sensíveis a maiúsculas, a pasta é Templates/
+    pasta = os.path.join(app.root_path, 'Templates')
+    if not os.path.isdir(os.path.join(app.root_path, app.template_folder)) and os.path.isdir(pasta):
+        app.template_folder = pasta
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao['user_id'] = usuario_id
+        sessao['user_nome'] = 'Usuario Bench'
+        sessao['user_modo'] = 'avancado'
+    return cliente
+
+
+# ============== SIMULADO ==============
+
+class CursorSimulado:
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.sql = ''
+
+    def execute(self, sql, params=()):
+        self.sql = sql
+
+    def fetchall(self):
+        return self.linhas if 'resumo_categoria' in self.sql else []
+
+
+class BancoSimulado:
+    def __init__(self, linhas):
+        self.linhas = linhas
+
+    def cursor(self, **kwargs):
+        return CursorSimulado(self.linhas)
+
+
+def executar_simulado(args):
+    import app as aplicacao
+
+    hoje = date.today()
+    consulta = f'?periodo={args.periodo}'
+    for quantidade in args.categorias:
+        linhas = [
+            {'mes': periodos.adicionar_meses(hoje, -i), 'tipo': 'despesa', 'categoria': f'Categoria {c:02d}',
+             'total': Decimal(100 + 7 * i + c) + Decimal('0.45'), 'quantidade': 1 + c % 5}
+            for i in range(MESES_HISTORICO) for c in range(quantidade)
+        ] + [
+            {'mes': periodos.adicionar_meses(hoje, -i), 'tipo': 'receita', 'categoria': 'Salário',
+             'total': Decimal('5000.00'), 'quantidade': 1}
+            for i in range(MESES_HISTORICO)
+        ]
+        banco = BancoSimulado(linhas)
+        usuario_id = quantidade  # um usuário por cenário: o cache de views não mistura os dados
+        with mock.patch.object(api, 'get_db', lambda: banco), mock.patch.object(aplicacao, 'get_db', lambda: banco):
+            resultado = medir(cliente_logado(usuario_id), usuario_id, consulta, args.repeticoes)
+        imprimir(f'Simulado: {quantidade} categorias, {MESES_HISTORICO} meses, período={args.periodo}', resultado)
+
+
+# ============== MYSQL ==============
+
+def executar_mysql(args):
+    import mysql.connector
+    from config import DB_CONFIG
+    from bench_relatorios import transacoes_sinteticas
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    hoje = date.today()
+    consulta = f'?periodo={args.periodo}'
+    for quantidade in args.transacoes:
+        cursor.execute('INSERT INTO usuarios (nome, email, senha) VALUES (%s, %s, %s)',
+                       ('Usuario Bench', f'bench_api_{os.getpid()}_{quantidade}@teste.com', 'x'))
+        usuario_id = cursor.lastrowid
+        try:
+            cursor.executemany(
+                'INSERT INTO transacoes (usuario_id, tipo, valor, descricao, categoria, data) '
+                'VALUES (%s, %s, %s, %s, %s, %s)',
+                [(usuario_id, t, v, 'Bench', c, d) for t, v, c, d in
+                 transacoes_sinteticas(quantidade, 2, hoje)])
+            resumo.reconstruir_resumos(cursor, usuario_id)
+            conn.commit()
+
+            cliente = cliente_logado(usuario_id)
+            imprimir(f'MySQL: {quantidade} transações, cache frio',
+                     medir(cliente, usuario_id, consulta, args.repeticoes, frio=True))
+            imprimir(f'MySQL: {quantidade} transações, cache quente',
+                     medir(cliente, usuario_id, consulta, args.repeticoes))
+        finally:
+            cursor.execute('DELETE FROM usuarios WHERE id = %s', (usuario_id,))
+            conn.commit()
+    cursor.close()
+    conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark da API JSON contra a página renderizada')
+    parser.add_argument('--categorias', type=int, nargs='+', default=[5, 20, 60])
+    parser.add_argument('--transacoes', type=int, nargs='+', default=[10000])
+    parser.add_argument('--periodo', choices=periodos.TIPOS_PERIODO[:3], default='mes')
+    parser.add_argument('--repeticoes', type=int, default=50)
+    parser.add_argument('--mysql', action='store_true', help='Mede as rotas com o MySQL de config.py')
+    args = parser.parse_args()
+
+    if args.mysql:
+        executar_mysql(args)
+    else:
+        executar_simulado(args)
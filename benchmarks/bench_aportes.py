@@ -0,0 +1,233 @@
+"""
+Benchmark - Aportes em Metas
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Compara o caminho antigo de adicionar_valor_meta (SELECT, cálculo em
+Python, UPDATE com o valor absoluto, commit e, se concluiu, outro UPDATE e
+outro commit) com aportes.registrar_aporte (UPDATE condicional + extrato,
+um commit) e com aportes.registrar_aportes em lotes (arredondamentos).
+
+Várias threads fazem aportes de R$ 1,00 na mesma meta. O relatório mostra
+aportes perdidos, idas ao banco por aporte e vazão.
+
+Sem --mysql, usa um banco simulado com latência fixa por ida ao banco
+(--latencia-ms) e trava de linha mantida até o commit, como no InnoDB.
+Com --mysql, roda no banco de config.py com um usuário de teste que é
+removido no final.
+
+Uso:
+    python benchmarks/bench_aportes.py
+    python benchmarks/bench_aportes.py --threads 8 --aportes 50 --lote 25
+    python benchmarks/bench_aportes.py --mysql
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import aportes
+from aportes import Aporte
+
+UM = Decimal('1.00')
+
+
+# ============== CAMINHO ANTIGO ==============
+
+def aporte_antigo(conn, usuario_id, meta_id, valor):
+    """Cópia do adicionar_valor_meta anterior (leitura, escrita absoluta, até dois commits)"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT valor_atual, valor_alvo FROM metas
+        WHERE id = %s AND usuario_id = %s AND status = 'ativa'
+    ''', (meta_id, usuario_id))
+    meta = cursor.fetchone()
+    if not meta:
+        return False
+    novo_valor = float(meta[0]) + float(valor)
+    cursor.execute('UPDATE metas SET valor_atual = %s WHERE id = %s AND usuario_id = %s',
+                   (novo_valor, meta_id, usuario_id))
+    conn.commit()
+    if novo_valor >= float(meta[1]):
+        cursor.execute('''
+            UPDATE metas SET status = 'concluida', data_conclusao = CURRENT_TIMESTAMP
+            WHERE id = %s AND usuario_id = %s
+        ''', (meta_id, usuario_id))
+        conn.commit()
+    return True
+
+
+# ============== BANCO SIMULADO ==============
+
+class BancoSimulado:
+    """Uma meta, latência por comando e trava de linha até o commit"""
+
+    def __init__(self, latencia, valor_alvo):
+        self.latencia = latencia
+        self.meta = {'valor_atual': Decimal(0), 'valor_alvo': valor_alvo, 'status': 'ativa'}
+        self.trava = threading.Lock()
+        self.extrato = 0
+        self.idas = 0
+        self._contador = threading.Lock()
+
+    def conectar(self):
+        return ConexaoSimulada(self)
+
+    def ida(self):
+        with self._contador:
+            self.idas += 1
+        time.sleep(self.latencia)
+
+
+class ConexaoSimulada:
+    def __init__(self, banco):
+        self.banco = banco
+        self.travada = False
+        self.rowcount = 0
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params):
+        banco = self.banco
+        banco.ida()
+        meta = banco.meta
+        comando = sql.split()[0]
+        if comando == 'UPDATE' and 'valor_atual + %s' in sql:
+            # UPDATE condicional: trava a linha até o commit
+            if not self.travada:
+                banco.trava.acquire()
+                self.travada = True
+            self.rowcount = 0
+            if meta['status'] == 'ativa':
+                meta['valor_atual'] += params[0]
+                if meta['valor_atual'] >= meta['valor_alvo']:
+                    meta['status'] = 'concluida'
+                self.rowcount = 1
+        elif comando == 'UPDATE' and 'status' in sql:
+            meta['status'] = 'concluida'
+        elif comando == 'UPDATE':
+            # Caminho antigo: grava o valor calculado a partir da leitura
+            meta['valor_atual'] = Decimal(str(params[0])).quantize(Decimal('0.01'))
+        elif len(params) == 2:
+            ativa = meta['status'] == 'ativa'
+            self.linhas = [(meta['valor_atual'], meta['valor_alvo'])] if ativa else []
+        else:
+            self.linhas = [(params[0], meta['valor_atual'], meta['valor_alvo'], meta['status'])]
+
+    def fetchone(self):
+        return self.linhas[0] if self.linhas else None
+
+    def fetchall(self):
+        return self.linhas
+
+    def executemany(self, sql, linhas):
+        self.banco.ida()
+        self.banco.extrato += len(linhas)
+
+    def commit(self):
+        self.banco.ida()
+        if self.travada:
+            self.travada = False
+            self.banco.trava.release()
+
+    def close(self):
+        pass
+
+
+# ============== EXECUÇÃO ==============
+
+def rodar(conectar, metodo, threads, por_thread, lote, usuario_id, meta_id):
+    def trabalhador():
+        conn = conectar()
+        if metodo == 'antigo':
+            for _ in range(por_thread):
+                aporte_antigo(conn, usuario_id, meta_id, UM)
+        elif metodo == 'atomico':
+            for _ in range(por_thread):
+                aportes.registrar_aporte(conn.cursor(), usuario_id, meta_id, UM, 'arredondamento')
+                conn.commit()
+        else:
+            for inicio in range(0, por_thread, lote):
+                quantidade = min(lote, por_thread - inicio)
+                aportes.registrar_aportes(conn.cursor(), usuario_id,
+                                          [Aporte(meta_id, UM, 'arredondamento')] * quantidade)
+                conn.commit()
+        conn.close()
+
+    inicio = time.perf_counter()
+    lista = [threading.Thread(target=trabalhador) for _ in range(threads)]
+    for t in lista:
+        t.start()
+    for t in lista:
+        t.join()
+    return time.perf_counter() - inicio
+
+
+def imprimir(metodo, segundos, total, aplicado, idas):
+    print(f'{metodo:<8} | {segundos:6.2f}s | {total / segundos:8.0f} aportes/s | '
+          f'perdidos {total - aplicado:>5} | {idas / total:5.2f} idas/aporte')
+
+
+def executar_simulado(args):
+    total = args.threads * args.aportes
+    print(f'Banco simulado, {args.latencia_ms} ms por ida, {args.threads} threads x {args.aportes} aportes')
+    for metodo in ('antigo', 'atomico', 'lote'):
+        # Alvo acima do total: mede só o incremento, sem a conclusão
+        banco = BancoSimulado(args.latencia_ms / 1000, Decimal(total + 1))
+        segundos = rodar(banco.conectar, metodo, args.threads, args.aportes, args.lote, 1, 1)
+        imprimir(metodo, segundos, total, int(banco.meta['valor_atual']), banco.idas)
+
+
+def executar_mysql(args):
+    import mysql.connector
+    from config import DB_CONFIG
+
+    def conectar():
+        return mysql.connector.connect(**DB_CONFIG)
+
+    total = args.threads * args.aportes
+    conn = conectar()
+    cursor = conn.cursor()
+    cursor.execute('INSERT INTO usuarios (nome, email, senha) VALUES (%s, %s, %s)',
+                   ('Usuario Bench', f'bench_aportes_{os.getpid()}@teste.com', 'x'))
+    usuario_id = cursor.lastrowid
+    conn.commit()
+    print(f'MySQL, {args.threads} threads x {args.aportes} aportes')
+    try:
+        for metodo in ('antigo', 'atomico', 'lote'):
+            cursor.execute('INSERT INTO metas (usuario_id, titulo, valor_alvo, data_inicio) '
+                           'VALUES (%s, %s, %s, %s)', (usuario_id, metodo, total + 1, date.today()))
+            meta_id = cursor.lastrowid
+            conn.commit()
+            segundos = rodar(conectar, metodo, args.threads, args.aportes, args.lote, usuario_id, meta_id)
+            cursor.execute('SELECT valor_atual FROM metas WHERE id = %s', (meta_id,))
+            aplicado = int(cursor.fetchone()[0])
+            conn.commit()
+            print(f'{metodo:<8} | {segundos:6.2f}s | {total / segundos:8.0f} aportes/s | '
+                  f'perdidos {total - aplicado:>5}')
+    finally:
+        cursor.execute('DELETE FROM usuarios WHERE id = %s', (usuario_id,))
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark dos aportes em metas')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--aportes', type=int, default=50, help='Aportes por thread')
+    parser.add_argument('--lote', type=int, default=25, help='Aportes por lote no método em lote')
+    parser.add_argument('--latencia-ms', type=float, default=0.5)
+    parser.add_argument('--mysql', action='store_true', help='Roda no MySQL de config.py')
+    args = parser.parse_args()
+
+    if args.mysql:
+        executar_mysql(args)
+    else:
+        executar_simulado(args)
@@ -0,0 +1,126 @@
+"""
+Benchmark - Backup em streaming
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Compara o pipeline anterior do backup (dump em backups/temp/, cópia do
+projeto para o mesmo diretório e compactação relendo tudo) com o atual,
+que grava a saída do mysqldump e os arquivos do projeto direto no ZIP.
+Para cada um, mede o tempo total, os bytes escritos em disco e o pico de
+uso de disco (calculados pelos tamanhos dos arquivos criados).
+
+Sem --mysql, o mysqldump é simulado por um processo que gera --mb MB de
+INSERTs. Com --mysql, usa o mysqldump de verdade com o banco do .env.
+
+Uso:
+    python benchmarks/bench_backup.py
+    python benchmarks/bench_backup.py --mb 200
+    python benchmarks/bench_backup.py --mysql
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import backup_automatico
+from backup_automatico import BackupManager, BACKUP_CONFIG, ITENS_PROJETO, IGNORAR_PROJETO
+
+DUMP_SIMULADO = """
+import sys
+linha = "INSERT INTO transacoes VALUES ({}, 1, 'despesa', 49.90, 'Compra no mercado', 'Alimentação', '2025-06-15');\\n"
+escrito, i = 0, 0
+limite = int(sys.argv[1]) * 1024 * 1024
+saida = sys.stdout.buffer
+while escrito < limite:
+    bloco = ''.join(linha.format(j) for j in range(i, i + 1000)).encode()
+    saida.write(bloco)
+    escrito += len(bloco)
+    i += 1000
+"""
+
+
+def tamanho_total(pasta):
+    return sum(p.stat().st_size for p in Path(pasta).rglob('*') if p.is_file())
+
+
+def pipeline_anterior(manager):
+    """Reproduz o backup antes do streaming; retorna (bytes escritos, pico em disco)"""
+    temp_dir = manager.backup_dir / 'temp' / manager.backup_name
+    temp_dir.mkdir(parents=True)
+    with open(temp_dir / f"{BACKUP_CONFIG['DB_NAME']}.sql", 'w', encoding='utf-8') as f:
+        subprocess.run(manager.comando_mysqldump(), stdout=f, stderr=subprocess.PIPE, text=True, check=True)
+    for item in ITENS_PROJETO:
+        origem = Path(item)
+        if origem.is_file():
+            (temp_dir / 'projeto').mkdir(exist_ok=True)
+            shutil.copy2(origem, temp_dir / 'projeto' / item)
+        elif origem.is_dir():
+            shutil.copytree(origem, temp_dir / 'projeto' / item, ignore=shutil.ignore_patterns(*IGNORAR_PROJETO))
+    with zipfile.ZipFile(manager.zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for arquivo in temp_dir.rglob('*'):
+            if arquivo.is_file():
+                zipf.write(arquivo, arquivo.relative_to(temp_dir))
+    temporarios = tamanho_total(temp_dir)
+    compactado = manager.zip_path.stat().st_size
+    shutil.rmtree(temp_dir.parent)
+    return temporarios + compactado, temporarios + compactado
+
+
+def pipeline_streaming(manager):
+    if not manager.executar_backup_completo():
+        raise RuntimeError('backup falhou (veja logs/backup.log)')
+    compactado = manager.zip_path.stat().st_size
+    return compactado, compactado
+
+
+def medir(nome, pipeline, destino):
+    manager = BackupManager()
+    manager.backup_dir = Path(destino)
+    manager.zip_path = manager.backup_dir / f'{nome}.zip'
+    manager.partial_path = manager.backup_dir / f'{nome}.zip.parcial'
+    inicio = time.perf_counter()
+    escritos, pico = pipeline(manager)
+    segundos = time.perf_counter() - inicio
+    print(f'  {nome:<10} {segundos:7.2f} s | escritos {BackupManager.format_size(escritos):>10} | '
+          f'pico em disco {BackupManager.format_size(pico):>10}')
+    manager.zip_path.unlink()
+
+
+def executar(args, comando=None):
+    destino = tempfile.mkdtemp()
+    backup_automatico.logger.disabled = True
+    # Sem limpeza de backups antigos: o destino é temporário
+    patches = [mock.patch.object(BackupManager, 'cleanup_old_backups', lambda self: None)]
+    if comando:
+        patches.append(mock.patch.object(BackupManager, 'comando_mysqldump', lambda self: comando))
+    try:
+        for patch in patches:
+            patch.start()
+        for nome, pipeline in (('anterior', pipeline_anterior), ('streaming', pipeline_streaming)):
+            medir(nome, pipeline, destino)
+    finally:
+        for patch in patches:
+            patch.stop()
+        shutil.rmtree(destino)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark do backup em streaming')
+    parser.add_argument('--mb', type=int, default=100, help='Tamanho do dump simulado (MB)')
+    parser.add_argument('--mysql', action='store_true', help='Usa o mysqldump com o banco do .env')
+    args = parser.parse_args()
+
+    if args.mysql:
+        print(f"MySQL: banco {BACKUP_CONFIG['DB_NAME']}")
+        executar(args)
+    else:
+        print(f'Simulado: dump de {args.mb} MB')
+        executar(args, [sys.executable, '-c', DUMP_SIMULADO, str(args.mb)])
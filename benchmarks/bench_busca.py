@@ -0,0 +1,163 @@
+"""
+Benchmark - Busca Textual
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Mede a latência (p50/p95) da busca em N transações sintéticas.
+Por padrão usa o índice em memória (busca.IndiceInvertido) com todas as
+linhas em um único usuário (pior caso). Com --mysql, insere as linhas no
+banco de config.py para usuários de teste criados pelo benchmark
+(--usuarios) e compara o índice FULLTEXT com o antigo LIKE '%texto%';
+os usuários de teste são removidos no final.
+
+Uso:
+    python benchmarks/bench_busca.py
+    python benchmarks/bench_busca.py --linhas 1000000 --repeticoes 50
+    python benchmarks/bench_busca.py --mysql --linhas 1000000 --usuarios 100
+"""
+
+import argparse
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import busca
+
+CONSULTAS = ['farmacia', 'mercado livre', 'posto', 'uber viagem', 'assinatura netflix', 'sal', 'xyzinexistente']
+
+_DESCRICOES = [
+    'Farmácia São João', 'Drogaria Popular', 'Mercado Livre', 'Supermercado Extra',
+    'Posto Ipiranga', 'Uber viagem', 'iFood pedido', 'Assinatura Netflix',
+    'Conta de luz', 'Aluguel apartamento', 'Padaria Pão Quente', 'Salário empresa',
+]
+_CATEGORIAS = ['Saúde', 'Alimentação', 'Transporte', 'Lazer', 'Moradia', 'Compras', 'Salário']
+
+
+def transacoes_sinteticas(quantidade, semente=42):
+    """Gera transações com descrições realistas e um sufixo variável"""
+    aleatorio = random.Random(semente)
+    inicio = date(2015, 1, 1)
+    for i in range(quantidade):
+        yield {
+            'id': i + 1,
+            'tipo': 'despesa' if i % 4 else 'receita',
+            'valor': Decimal(i % 50000) / 100,
+            'descricao': f'{aleatorio.choice(_DESCRICOES)} {aleatorio.randrange(10000)}',
+            'categoria': aleatorio.choice(_CATEGORIAS),
+            'data': inicio + timedelta(days=i % 3650),
+        }
+
+
+def pico_rss_mb():
+    # ru_maxrss em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def medir(buscar, repeticoes):
+    """Latências em ms de cada consulta: (p50, p95, resultados da primeira página)"""
+    resultado = {}
+    for consulta in CONSULTAS:
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            linhas = buscar(consulta)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        tempos.sort()
+        resultado[consulta] = (statistics.median(tempos), tempos[int(len(tempos) * 0.95) - 1], len(linhas))
+    return resultado
+
+
+def imprimir(titulo, resultado):
+    print(titulo)
+    for consulta, (p50, p95, quantidade) in resultado.items():
+        print(f'  {consulta:<22} p50 {p50:9.2f} ms | p95 {p95:9.2f} ms | {quantidade:>3} na página')
+
+
+def executar_memoria(args):
+    inicio = time.perf_counter()
+    indice = busca.IndiceInvertido(transacoes_sinteticas(args.linhas))
+    print(f'Índice em memória: {len(indice)} transações em {time.perf_counter() - inicio:.1f}s, '
+          f'pico RSS {pico_rss_mb():.0f} MB')
+
+    def buscar(consulta):
+        termos = busca.termos_consulta(consulta)
+        return indice.buscar(termos, limite=50)
+
+    imprimir('Índice em memória (1 usuário com todas as linhas):', medir(buscar, args.repeticoes))
+
+
+def executar_mysql(args):
+    import mysql.connector
+    from config import DB_CONFIG
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    usuarios = []
+    try:
+        for i in range(args.usuarios):
+            cursor.execute('INSERT INTO usuarios (nome, email, senha) VALUES (%s, %s, %s)',
+                           ('Usuario Bench', f'bench_busca_{os.getpid()}_{i}@teste.com', 'x'))
+            usuarios.append(cursor.lastrowid)
+
+        inicio = time.perf_counter()
+        lote = []
+        for t in transacoes_sinteticas(args.linhas):
+            lote.append((usuarios[t['id'] % len(usuarios)], t['tipo'], t['valor'],
+                         t['descricao'], t['categoria'], t['data']))
+            if len(lote) == 5000:
+                cursor.executemany('INSERT INTO transacoes (usuario_id, tipo, valor, descricao, categoria, data) '
+                                   'VALUES (%s, %s, %s, %s, %s, %s)', lote)
+                conn.commit()
+                lote = []
+        if lote:
+            cursor.executemany('INSERT INTO transacoes (usuario_id, tipo, valor, descricao, categoria, data) '
+                               'VALUES (%s, %s, %s, %s, %s, %s)', lote)
+            conn.commit()
+        print(f'{args.linhas} transações inseridas para {len(usuarios)} usuários '
+              f'em {time.perf_counter() - inicio:.1f}s')
+
+        consulta_cursor = conn.cursor(dictionary=True)
+        usuario_id = usuarios[0]
+
+        def buscar_fulltext(consulta):
+            return busca.buscar_transacoes(consulta_cursor, usuario_id, consulta)['transacoes']
+
+        def buscar_like(consulta):
+            condicoes = ' AND '.join(['(descricao LIKE %s OR categoria LIKE %s)'] * len(consulta.split()))
+            params = [f'%{p}%' for p in consulta.split() for _ in range(2)]
+            consulta_cursor.execute(f'''
+                SELECT id, tipo, valor, descricao, categoria, data FROM transacoes
+                WHERE usuario_id = %s AND {condicoes}
+                ORDER BY data DESC, id DESC LIMIT 51
+            ''', [usuario_id] + params)
+            return consulta_cursor.fetchall()
+
+        imprimir('MySQL FULLTEXT:', medir(buscar_fulltext, args.repeticoes))
+        imprimir("MySQL LIKE '%texto%' (sem índice):", medir(buscar_like, args.repeticoes))
+        consulta_cursor.close()
+    finally:
+        for usuario_id in usuarios:
+            cursor.execute('DELETE FROM usuarios WHERE id = %s', (usuario_id,))
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark da busca textual')
+    parser.add_argument('--linhas', type=int, default=1000000)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--mysql', action='store_true', help='Mede o FULLTEXT no MySQL de config.py')
+    parser.add_argument('--usuarios', type=int, default=100, help='Usuários de teste (apenas --mysql)')
+    args = parser.parse_args()
+
+    if args.mysql:
+        executar_mysql(args)
+    else:
+        executar_memoria(args)
@@ -0,0 +1,203 @@
+"""
+Benchmark - Cache HTTP condicional e compressão das páginas
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Mede, pelo cliente de testes do Flask, os bytes enviados e o tempo de
+resposta de dashboard, metas e relatórios em três situações: primeira
+visita sem compressão, primeira visita com Accept-Encoding (gzip, ou
+brotli se o pacote estiver instalado) e revalidação com If-None-Match
+(304 respondido antes da rota, sem consultar o banco nem renderizar).
+
+Sem --mysql, o banco é simulado (transações, metas e resumo por categoria
+sintéticos), então o tempo da primeira visita é o do Flask e do Jinja. Com
+--mysql, cria um usuário de teste com transações e metas no banco de
+config.py e mede com o cache de views frio (como na primeira visita depois
+de uma escrita); o usuário é removido no final.
+
+Uso:
+    python benchmarks/bench_cache_http.py
+    python benchmarks/bench_cache_http.py --metas 50 --categorias 40
+    python benchmarks/bench_cache_http.py --mysql --transacoes 10000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import cache_http
+import periodos
+import resumo
+from app import app, view_cache
+
+PAGINAS = ('/dashboard', '/metas', '/relatorios?periodo=trimestre')
+
+
+def tempos_ms(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def cliente_logado(usuario_id):
+    app.config['TESTING'] = True
+    # Um só processo: com o cache em memória a marca também vale para todas as
+    # requisições (no app, só o Redis libera o 304; ver cache_http.py)
+    view_cache.backend.compartilhado = True
+    # Em sistemas com nomes sensíveis a maiúsculas, a pasta é Templates/
+    pasta = os.path.join(app.root_path, 'Templates')
+    if not os.path.isdir(os.path.join(app.root_path, app.template_folder)) and os.path.isdir(pasta):
+        app.template_folder = pasta
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao['user_id'] = usuario_id
+        sessao['user_nome'] = 'Usuario Bench'
+        sessao['user_modo'] = 'avancado'
+    return cliente
+
+
+def medir(cliente, usuario_id, repeticoes):
+    """Imprime bytes e tempo de cada página: completa, comprimida e 304"""
+    codificacao = 'br' if cache_http.brotli is not None else 'gzip'
+
+    def visitar(url, **kwargs):
+        # Primeira visita depois de uma escrita: sem dados no cache de views
+        view_cache.invalidate(usuario_id, 'dashboard', 'metas', 'relatorios')
+        return cliente.get(url, **kwargs)
+
+    for url in PAGINAS:
+        formas = [
+            ('completa', len(visitar(url).data), tempos_ms(lambda: visitar(url), repeticoes)),
+            (codificacao, len(visitar(url, headers={'Accept-Encoding': codificacao}).data),
+             tempos_ms(lambda: visitar(url, headers={'Accept-Encoding': codificacao}), repeticoes)),
+        ]
+        # Revalidação sem escrita no meio: o ETag da última visita continua valendo
+        etag = cliente.get(url, headers={'Accept-Encoding': codificacao}).headers['ETag']
+        revalidar = {'headers': {'Accept-Encoding': codificacao, 'If-None-Match': etag}}
+        resposta = cliente.get(url, **revalidar)
+        assert resposta.status_code == 304, resposta.status_code
+        formas.append(('304', len(resposta.data), tempos_ms(lambda: cliente.get(url, **revalidar), repeticoes)))
+        print(f'  {url}')
+        for nome, tamanho, ms in formas:
+            print(f'    {nome:<10} {tamanho:>8} bytes ({tamanho / formas[0][1]:6.1%}) | {ms:7.2f} ms')
+
+
+# ============== SIMULADO ==============
+
+class CursorSimulado:
+    def __init__(self, dados):
+        self.dados = dados
+        self.sql = ''
+
+    def execute(self, sql, params=()):
+        self.sql = sql
+
+    def fetchall(self):
+        for tabela, linhas in self.dados.items():
+            if f'FROM {tabela}' in self.sql:
+                return linhas
+        return []
+
+    def fetchone(self):
+        return {'saldo': Decimal('1523.40'), 'receitas': Decimal('5000.00'), 'despesas': Decimal('3476.60')}
+
+
+class BancoSimulado:
+    def __init__(self, dados):
+        self.dados = dados
+
+    def cursor(self, **kwargs):
+        return CursorSimulado(self.dados)
+
+
+def dados_simulados(metas, categorias, hoje):
+    transacoes = [
+        {'id': i, 'usuario_id': 1, 'tipo': 'despesa', 'valor': Decimal('49.90') + i, 'descricao': f'Compra {i}',
+         'categoria': f'Categoria {i % categorias:02d}', 'data': hoje - timedelta(days=i), 'recorrencia_id': None}
+        for i in range(10)
+    ]
+    linhas_metas = [
+        {'id': i, 'titulo': f'Meta {i}', 'descricao': 'Economia para um objetivo', 'categoria': 'Viagem',
+         'valor_alvo': Decimal('5000.00'), 'valor_atual': Decimal(37 * i % 5000), 'status': ('ativa', 'concluida')[i % 4 == 0],
+         'data_inicio': hoje - timedelta(days=90), 'data_limite': hoje + timedelta(days=5 * i), 'data_conclusao': None,
+         'cor': '#6366F1'}
+        for i in range(metas)
+    ]
+    resumo_categoria = [
+        {'mes': periodos.adicionar_meses(hoje, -i), 'tipo': 'despesa', 'categoria': f'Categoria {c:02d}',
+         'total': Decimal(100 + 7 * i + c), 'quantidade': 1 + c % 5}
+        for i in range(24) for c in range(categorias)
+    ]
+    return {'resumo_categoria': resumo_categoria, 'metas': linhas_metas, 'transacoes': transacoes}
+
+
+def executar_simulado(args):
+    import api
+    import app as aplicacao
+
+    banco = BancoSimulado(dados_simulados(args.metas, args.categorias, date.today()))
+    print(f'Simulado: {args.metas} metas, {args.categorias} categorias, compressão: '
+          f'{"brotli" if cache_http.brotli is not None else "gzip"}')
+    with mock.patch.object(aplicacao, 'get_db', lambda: banco), mock.patch.object(api, 'get_db', lambda: banco):
+        medir(cliente_logado(1), 1, args.repeticoes)
+
+
+# ============== MYSQL ==============
+
+def executar_mysql(args):
+    import mysql.connector
+    from config import DB_CONFIG
+    from bench_relatorios import transacoes_sinteticas
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    hoje = date.today()
+    for quantidade in args.transacoes:
+        cursor.execute('INSERT INTO usuarios (nome, email, senha) VALUES (%s, %s, %s)',
+                       ('Usuario Bench', f'bench_cache_http_{os.getpid()}_{quantidade}@teste.com', 'x'))
+        usuario_id = cursor.lastrowid
+        try:
+            cursor.executemany(
+                'INSERT INTO transacoes (usuario_id, tipo, valor, descricao, categoria, data) '
+                'VALUES (%s, %s, %s, %s, %s, %s)',
+                [(usuario_id, t, v, 'Bench', c, d) for t, v, c, d in
+                 transacoes_sinteticas(quantidade, 2, hoje)])
+            cursor.executemany(
+                'INSERT INTO metas (usuario_id, titulo, valor_alvo, valor_atual, data_inicio, data_limite) '
+                'VALUES (%s, %s, %s, %s, %s, %s)',
+                [(usuario_id, f'Meta {i}', Decimal('5000.00'), Decimal(37 * i % 5000), hoje,
+                  hoje + timedelta(days=5 * i)) for i in range(args.metas)])
+            resumo.reconstruir_resumos(cursor, usuario_id)
+            conn.commit()
+
+            print(f'MySQL: {quantidade} transações, {args.metas} metas')
+            medir(cliente_logado(usuario_id), usuario_id, args.repeticoes)
+        finally:
+            cursor.execute('DELETE FROM usuarios WHERE id = %s', (usuario_id,))
+            conn.commit()
+    cursor.close()
+    conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark do cache HTTP condicional e da compressão')
+    parser.add_argument('--metas', type=int, default=20)
+    parser.add_argument('--categorias', type=int, default=15)
+    parser.add_argument('--transacoes', type=int, nargs='+', default=[10000])
+    parser.add_argument('--repeticoes', type=int, default=50)
+    parser.add_argument('--mysql', action='store_true', help='Mede as páginas com o MySQL de config.py')
+    args = parser.parse_args()
+
+    if args.mysql:
+        executar_mysql(args)
+    else:
+        executar_simulado(args)
@@ -0,0 +1,171 @@
+"""
+Benchmark - Dump paralelo do backup (--jobs)
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Mede o tempo do dump do banco para o ZIP com 1 conexão (mysqldump único)
+e com o dump paralelo (dump_paralelo.py) em 2, 4, ... conexões.
+
+Sem --mysql, as conexões são simuladas: transacoes tem --linhas linhas
+sintéticas geradas na hora, e o tempo medido é o de gerar os INSERTs e
+comprimir as partes nas threads (o lado do Python). Com --mysql, insere
+--linhas transações para um usuário de teste no banco do .env, compara o
+mysqldump com o dump paralelo e remove o usuário no final.
+
+Uso:
+    python benchmarks/bench_dump_paralelo.py
+    python benchmarks/bench_dump_paralelo.py --linhas 2000000 --jobs 1 2 4 8
+    python benchmarks/bench_dump_paralelo.py --mysql --linhas 3000000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import backup_automatico
+import dump_paralelo
+from backup_automatico import BackupManager, BACKUP_CONFIG
+
+COLUNAS = ['id', 'usuario_id', 'tipo', 'valor', 'descricao', 'categoria', 'data', 'data_registro']
+CATEGORIAS = ['Alimentação', 'Moradia', 'Transporte', 'Lazer', 'Saúde']
+
+
+def transacao(i):
+    inicio = date(2015, 1, 1)
+    return (i, 1 + i % 500, 'despesa' if i % 4 else 'receita', Decimal(i % 50000) / 100,
+            f'Transação de teste número {i}', CATEGORIAS[i % 5], inicio + timedelta(days=i % 3650),
+            datetime(2025, 1, 1) + timedelta(seconds=i))
+
+
+# ============== SIMULADO ==============
+
+class CursorSimulado:
+    """transacoes com ids 1..linhas, gerada sob demanda"""
+
+    def __init__(self, linhas):
+        self.total = linhas
+        self.resultado = iter(())
+        self.description = [(coluna,) for coluna in COLUNAS]
+
+    def execute(self, sql, params=()):
+        if 'information_schema' in sql:
+            self.resultado = iter([('transacoes', 'id', 1, 'int')])
+        elif sql.startswith('SELECT MIN'):
+            self.resultado = iter([(1, self.total)])
+        elif sql.startswith('SELECT *'):
+            self.resultado = (transacao(i) for i in range(params[0], params[1]))
+        else:
+            self.resultado = iter(())
+
+    def fetchone(self):
+        return next(self.resultado)
+
+    def fetchall(self):
+        return list(self.resultado)
+
+    def fetchmany(self, quantidade):
+        return [linha for _, linha in zip(range(quantidade), self.resultado)]
+
+    def close(self):
+        pass
+
+
+class ConexaoSimulada:
+    def __init__(self, linhas):
+        self.linhas = linhas
+
+    def cursor(self):
+        return CursorSimulado(self.linhas)
+
+    def close(self):
+        pass
+
+
+def executar_simulado(args):
+    print(f'Simulado: transacoes com {args.linhas} linhas, codec {dump_paralelo.extensao()}')
+    destino = Path(tempfile.mkdtemp())
+    try:
+        base = None
+        for jobs in [j for j in args.jobs if j > 1] or [2]:
+            for quantidade in ([1] if base is None else []) + [jobs]:
+                with zipfile.ZipFile(destino / f'{quantidade}.zip', 'w') as zipf:
+                    inicio = time.perf_counter()
+                    stats = dump_paralelo.dump_paralelo(lambda: ConexaoSimulada(args.linhas), zipf,
+                                                        quantidade, args.linhas_por_parte)
+                    segundos = time.perf_counter() - inicio
+                if base is None:
+                    base = segundos
+                print(f'  {quantidade:>2} conexões: {segundos:7.2f} s ({base / segundos:4.1f}x) | '
+                      f'{stats["linhas"] / segundos:>10,.0f} linhas/s | '
+                      f'{BackupManager.format_size(stats["bytes_sql"])} → '
+                      f'{BackupManager.format_size(stats["bytes_comprimidos"])}')
+    finally:
+        shutil.rmtree(destino)
+
+
+# ============== MYSQL ==============
+
+def executar_mysql(args):
+    conn = backup_automatico.conectar_banco()
+    cursor = conn.cursor()
+    cursor.execute('INSERT INTO usuarios (nome, email, senha) VALUES (%s, %s, %s)',
+                   ('Usuario Bench', f'bench_dump_{os.getpid()}@teste.com', 'x'))
+    usuario_id = cursor.lastrowid
+    destino = tempfile.mkdtemp()
+    backup_automatico.logger.disabled = True
+    try:
+        print(f'MySQL: inserindo {args.linhas} transações...')
+        lote = []
+        for i in range(args.linhas):
+            _, _, tipo, valor, descricao, categoria, data, _ = transacao(i)
+            lote.append((usuario_id, tipo, valor, descricao, categoria, data))
+            if len(lote) == 10000 or i == args.linhas - 1:
+                cursor.executemany('INSERT INTO transacoes (usuario_id, tipo, valor, descricao, categoria, data) '
+                                   'VALUES (%s, %s, %s, %s, %s, %s)', lote)
+                conn.commit()
+                lote = []
+
+        with mock.patch.dict(BACKUP_CONFIG, {'BACKUP_DIR': destino, 'BACKUP_FILES': False,
+                                             'LINHAS_POR_PARTE': args.linhas_por_parte}), \
+                mock.patch.object(BackupManager, 'cleanup_old_backups', lambda self: None):
+            base = None
+            for jobs in sorted(set([1] + args.jobs)):
+                manager = BackupManager(jobs=jobs)
+                inicio = time.perf_counter()
+                if not manager.executar_backup_completo():
+                    raise RuntimeError('backup falhou (veja logs/backup.log)')
+                segundos = time.perf_counter() - inicio
+                base = base or segundos
+                nome = 'mysqldump' if jobs == 1 else f'{jobs} conexões'
+                print(f'  {nome:<12} {segundos:7.2f} s ({base / segundos:4.1f}x) | '
+                      f'ZIP {manager.get_file_size(manager.zip_path)}')
+                manager.zip_path.unlink()
+    finally:
+        shutil.rmtree(destino)
+        cursor.execute('DELETE FROM usuarios WHERE id = %s', (usuario_id,))
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark do dump paralelo do backup')
+    parser.add_argument('--linhas', type=int, default=1000000)
+    parser.add_argument('--jobs', type=int, nargs='+', default=[2, 4, 8])
+    parser.add_argument('--linhas-por-parte', type=int, default=dump_paralelo.LINHAS_POR_PARTE)
+    parser.add_argument('--mysql', action='store_true', help='Usa o MySQL do .env')
+    args = parser.parse_args()
+
+    if args.mysql:
+        executar_mysql(args)
+    else:
+        executar_simulado(args)
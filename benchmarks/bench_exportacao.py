@@ -0,0 +1,96 @@
+"""
+Benchmark - Exportação Excel em Streaming
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Mede o pico de memória (RSS) e o tempo para exportar N transações
+sintéticas com exportacao.gerar_xlsx, cada tamanho em um processo
+separado. Com --comparar, mede também o método antigo
+(pandas.DataFrame + ExcelWriter em BytesIO).
+
+Uso:
+    python benchmarks/bench_exportacao.py
+    python benchmarks/bench_exportacao.py --tamanhos 1000 100000 --comparar
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import exportacao
+
+
+def linhas_sinteticas(quantidade):
+    """Gera transações falsas sem materializar a lista"""
+    inicio = date(2015, 1, 1)
+    categorias = ['Moradia', 'Alimentação', 'Saúde', 'Lazer', 'Transporte']
+    for i in range(quantidade):
+        yield ('despesa' if i % 4 else 'receita',
+               categorias[i % len(categorias)],
+               f'Transação de teste número {i}',
+               Decimal(i % 50000) / 100,
+               inicio + timedelta(days=i % 3650))
+
+
+def pico_rss_mb():
+    # ru_maxrss em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def executar_streaming(quantidade):
+    inicio = time.perf_counter()
+    total = 0
+    for pedaco in exportacao.gerar_xlsx(exportacao.COLUNAS_TRANSACOES, linhas_sinteticas(quantidade)):
+        total += len(pedaco)
+    return time.perf_counter() - inicio, total
+
+
+def executar_pandas(quantidade):
+    import io
+    import pandas as pd
+
+    inicio = time.perf_counter()
+    df = pd.DataFrame(list(linhas_sinteticas(quantidade)), columns=exportacao.COLUNAS_TRANSACOES)
+    df['data'] = pd.to_datetime(df['data']).dt.strftime('%d/%m/%Y')
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name='Transacoes')
+    return time.perf_counter() - inicio, len(output.getvalue())
+
+
+def medir(metodo, quantidade):
+    """Roda a medição em um processo novo para isolar o pico de RSS"""
+    resultado = subprocess.run(
+        [sys.executable, __file__, '--filho', metodo, str(quantidade)],
+        capture_output=True, text=True, check=True
+    )
+    return resultado.stdout.strip()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark da exportação Excel')
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--comparar', action='store_true', help='Mede também o método com pandas')
+    parser.add_argument('--filho', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.filho:
+        metodo, quantidade = args.filho[0], int(args.filho[1])
+        rss_inicial = pico_rss_mb()
+        funcao = executar_streaming if metodo == 'streaming' else executar_pandas
+        segundos, tamanho = funcao(quantidade)
+        print(f'{metodo:<10} {quantidade:>9} linhas | {segundos:7.2f}s | '
+              f'arquivo {tamanho / 1024 / 1024:7.2f} MB | '
+              f'RSS base {rss_inicial:6.1f} MB | pico {pico_rss_mb():7.1f} MB')
+        sys.exit(0)
+
+    metodos = ['streaming'] + (['pandas'] if args.comparar else [])
+    for quantidade in args.tamanhos:
+        for metodo in metodos:
+            print(medir(metodo, quantidade), flush=True)
@@ -0,0 +1,102 @@
+"""
+Benchmark - Importação de Extratos em Lotes
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Mede a vazão (linhas/s) de importacao.importar para um CSV sintético:
+leitura em streaming, validação, deduplicação e gravação em lotes.
+Por padrão usa uma conexão falsa que só conta as idas ao banco (mede o
+custo de Python); com --mysql grava de verdade no banco de config.py
+para o usuário informado em --usuario (use um usuário de teste).
+
+Uso:
+    python benchmarks/bench_importacao.py
+    python benchmarks/bench_importacao.py --linhas 100000 --lotes 1 100 2000
+    python benchmarks/bench_importacao.py --mysql --usuario 1 --linhas 10000
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import importacao
+
+
+class ConexaoContadora:
+    """Conexão falsa: nenhuma transação existente, conta execute/executemany/commit"""
+
+    def __init__(self):
+        self.idas = 0
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=()):
+        self.idas += 1
+
+    def executemany(self, sql, linhas):
+        self.idas += 1
+
+    def fetchall(self):
+        return []
+
+    def commit(self):
+        self.idas += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def csv_sintetico(quantidade):
+    """CSV no formato de banco brasileiro (';', DD/MM/AAAA, '1.234,56')"""
+    inicio = date(2015, 1, 1)
+    categorias = ['Moradia', 'Alimentação', 'Saúde', 'Lazer', 'Transporte']
+    linhas = ['Data;Histórico;Valor;Categoria']
+    for i in range(quantidade):
+        valor = f'{(i % 500000) / 100:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.')
+        linhas.append(f'{(inicio + timedelta(days=i % 3650)):%d/%m/%Y};Lançamento número {i};'
+                      f'{"-" if i % 4 else ""}{valor};{categorias[i % len(categorias)]}')
+    return '\n'.join(linhas).encode('utf-8')
+
+
+def conectar_mysql():
+    import mysql.connector
+    from config import DB_CONFIG
+    return mysql.connector.connect(**DB_CONFIG)
+
+
+def executar(conteudo, tamanho_lote, conn, usuario_id):
+    inicio = time.perf_counter()
+    relatorio = importacao.importar(conn, usuario_id,
+                                    importacao.ler_csv(io.BytesIO(conteudo)), tamanho_lote)
+    return time.perf_counter() - inicio, relatorio
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark da importação de extratos')
+    parser.add_argument('--linhas', type=int, default=100000)
+    parser.add_argument('--lotes', type=int, nargs='+', default=[1, 100, importacao.TAMANHO_LOTE])
+    parser.add_argument('--mysql', action='store_true', help='Grava no MySQL de config.py')
+    parser.add_argument('--usuario', type=int, default=1)
+    args = parser.parse_args()
+
+    conteudo = csv_sintetico(args.linhas)
+    print(f'CSV sintético: {args.linhas} linhas, {len(conteudo) / 1024 / 1024:.1f} MB')
+
+    for tamanho_lote in args.lotes:
+        conn = conectar_mysql() if args.mysql else ConexaoContadora()
+        try:
+            segundos, relatorio = executar(conteudo, tamanho_lote, conn, args.usuario)
+        finally:
+            if args.mysql:
+                conn.close()
+        idas = '' if args.mysql else f' | {conn.idas:>7} idas ao banco'
+        print(f'lote {tamanho_lote:>5} | {segundos:7.2f}s | {relatorio.lidas / segundos:9.0f} linhas/s | '
+              f'{relatorio.importadas} importadas, {relatorio.duplicadas} duplicadas{idas}', flush=True)
@@ -0,0 +1,163 @@
+"""
+Benchmark - Backups incrementais
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Compara o dump completo das tabelas com o incremental de um dia: --linhas
+transações na base e, desde ela, --novas transações incluídas e --excluidas
+excluídas. Mede o tempo e o tamanho do SQL gerado pelos dois.
+
+Sem --mysql, o banco é simulado em memória (transacoes sintética, como em
+bench_dump_paralelo.py) e o tempo é o do lado do Python. Com --mysql, insere
+as transações para um usuário de teste no banco do .env, faz um backup
+completo e um incremental reais e remove o usuário no final.
+
+Uso:
+    python benchmarks/bench_incremental.py
+    python benchmarks/bench_incremental.py --linhas 3000000 --novas 5000 --excluidas 200
+    python benchmarks/bench_incremental.py --mysql --linhas 500000
+"""
+
+import argparse
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from bisect import bisect_left
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import backup_automatico
+import backup_incremental
+import dump_paralelo
+from backup_automatico import BackupManager, BACKUP_CONFIG
+from bench_dump_paralelo import COLUNAS, transacao
+
+
+# ============== SIMULADO ==============
+
+class CursorSimulado:
+    """transacoes com os ids de `ids` (ordenados), linhas geradas sob demanda"""
+
+    def __init__(self, ids):
+        self.ids = ids
+        self.resultado = iter(())
+        self.description = [(coluna,) for coluna in COLUNAS]
+
+    def faixa(self, inicio, fim):
+        return self.ids[bisect_left(self.ids, inicio):bisect_left(self.ids, fim)]
+
+    def execute(self, sql, params=()):
+        if 'information_schema' in sql:
+            self.resultado = iter([('transacoes', 'id', 1, 'int')])
+        elif sql.startswith('SELECT MIN'):
+            self.resultado = iter([(self.ids[0], self.ids[-1])])
+        elif sql.startswith('SELECT COUNT'):
+            self.resultado = iter([(len(self.faixa(0, params[0] + 1)),)])
+        elif sql.startswith('SELECT `'):
+            self.resultado = ((i,) for i in self.faixa(*params))
+        elif sql.startswith('SELECT *'):
+            ids = self.faixa(*params) if params else self.ids
+            self.resultado = (transacao(i) for i in ids)
+        else:
+            self.resultado = iter(())
+
+    def fetchone(self):
+        return next(self.resultado)
+
+    def fetchmany(self, quantidade):
+        return [linha for _, linha in zip(range(quantidade), self.resultado)]
+
+    def fetchall(self):
+        return list(self.resultado)
+
+
+def executar_simulado(args):
+    print(f'Simulado: {args.linhas} transações, {args.novas} novas e {args.excluidas} excluídas desde a base')
+    ids = list(range(1, args.linhas + 1))
+    inicio = time.perf_counter()
+    estado = backup_incremental.estado_tabelas(CursorSimulado(ids))
+    completo_sql = 0
+    for parte in range(1, args.linhas + 1, dump_paralelo.LINHAS_POR_PARTE):
+        sql, _ = dump_paralelo.sql_parte(CursorSimulado(ids), dump_paralelo.Parte(
+            'transacoes', 'id', 1, parte, parte + dump_paralelo.LINHAS_POR_PARTE))
+        completo_sql += len(sql)
+    completo = time.perf_counter() - inicio
+
+    removidos = set(random.Random(1).sample(ids, args.excluidas))
+    ids = [i for i in ids if i not in removidos] + list(range(args.linhas + 1, args.linhas + args.novas + 1))
+    destino = io.BytesIO()
+    inicio = time.perf_counter()
+    _, stats = backup_incremental.gravar_incremental(CursorSimulado(ids), destino, estado)
+    incremental = time.perf_counter() - inicio
+
+    print(f'  completo    {completo:7.2f} s | SQL {BackupManager.format_size(completo_sql):>10}')
+    print(f'  incremental {incremental:7.2f} s | SQL {BackupManager.format_size(stats["bytes_sql"]):>10} '
+          f'({stats["novas"]} novas, {stats["excluidas"]} excluídas) | '
+          f'{completo / incremental:.0f}x mais rápido, {completo_sql / stats["bytes_sql"]:.0f}x menor')
+
+
+# ============== MYSQL ==============
+
+def executar_mysql(args):
+    conn = backup_automatico.conectar_banco()
+    cursor = conn.cursor()
+    cursor.execute('INSERT INTO usuarios (nome, email, senha) VALUES (%s, %s, %s)',
+                   ('Usuario Bench', f'bench_inc_{os.getpid()}@teste.com', 'x'))
+    usuario_id = cursor.lastrowid
+    destino = tempfile.mkdtemp()
+    backup_automatico.logger.disabled = True
+
+    def inserir(quantidade):
+        lote = []
+        for i in range(quantidade):
+            _, _, tipo, valor, descricao, categoria, data, _ = transacao(i)
+            lote.append((usuario_id, tipo, valor, descricao, categoria, data))
+            if len(lote) == 10000 or i == quantidade - 1:
+                cursor.executemany('INSERT INTO transacoes (usuario_id, tipo, valor, descricao, categoria, data) '
+                                   'VALUES (%s, %s, %s, %s, %s, %s)', lote)
+                conn.commit()
+                lote = []
+
+    try:
+        print(f'MySQL: inserindo {args.linhas} transações...')
+        inserir(args.linhas)
+        with mock.patch.dict(BACKUP_CONFIG, {'BACKUP_DIR': destino, 'BACKUP_FILES': False}), \
+                mock.patch.object(BackupManager, 'cleanup_old_backups', lambda self: None):
+            for tipo in ('completo', 'incremental'):
+                if tipo == 'incremental':
+                    inserir(args.novas)
+                    cursor.execute('DELETE FROM transacoes WHERE usuario_id = %s ORDER BY id LIMIT %s',
+                                   (usuario_id, args.excluidas))
+                    conn.commit()
+                manager = BackupManager(tipo=tipo)
+                manager.zip_path = manager.backup_dir / f'backup_{tipo}.zip'
+                manager.partial_path = manager.backup_dir / f'backup_{tipo}.zip.parcial'
+                inicio = time.perf_counter()
+                if not manager.executar_backup_completo():
+                    raise RuntimeError('backup falhou (veja logs/backup.log)')
+                print(f'  {tipo:<11} {time.perf_counter() - inicio:7.2f} s | '
+                      f'ZIP {manager.get_file_size(manager.zip_path)}')
+    finally:
+        shutil.rmtree(destino)
+        cursor.execute('DELETE FROM usuarios WHERE id = %s', (usuario_id,))
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark dos backups incrementais')
+    parser.add_argument('--linhas', type=int, default=1000000)
+    parser.add_argument('--novas', type=int, default=3000)
+    parser.add_argument('--excluidas', type=int, default=100)
+    parser.add_argument('--mysql', action='store_true', help='Usa o MySQL do .env')
+    args = parser.parse_args()
+
+    if args.mysql:
+        executar_mysql(args)
+    else:
+        executar_simulado(args)
@@ -0,0 +1,183 @@
+"""
+Benchmark - Página de Metas em Uma Consulta
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Compara consultas.dados_metas (uma leitura + cálculo em Python) com a
+versão anterior de três consultas (lista com CASE/DATEDIFF/FIELD,
+estatísticas com COUNT/SUM e metas com prazo próximo).
+
+Sem --mysql, usa um cursor falso que devolve N metas sintéticas e soma
+uma latência fixa por ida ao banco (--latencia-ms), medindo o custo do
+cálculo em Python mais as idas. Com --mysql, cria um usuário de teste
+com N metas no banco de config.py, mede as duas versões e o remove.
+
+Uso:
+    python benchmarks/bench_metas.py
+    python benchmarks/bench_metas.py --metas 20 200 2000 --latencia-ms 0.5
+    python benchmarks/bench_metas.py --mysql --metas 20 200 2000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import consultas
+
+_STATUS = ['ativa', 'ativa', 'concluida', 'cancelada']
+
+
+def metas_sinteticas(quantidade, hoje, semente=42):
+    aleatorio = random.Random(semente)
+    for i in range(quantidade):
+        alvo = Decimal(aleatorio.randrange(100, 100000))
+        yield {
+            'id': i + 1,
+            'titulo': f'Meta {i}',
+            'descricao': 'Meta sintética',
+            'categoria': 'Outros',
+            'valor_alvo': alvo,
+            'valor_atual': (alvo * Decimal(aleatorio.random())).quantize(Decimal('0.01')),
+            'status': _STATUS[i % len(_STATUS)],
+            'data_inicio': hoje - timedelta(days=365),
+            'data_limite': None if i % 10 == 0 else hoje + timedelta(days=aleatorio.randrange(-60, 365)),
+            'data_conclusao': None,
+            'cor': '#6366F1',
+        }
+
+
+def dados_metas_tres_consultas(cursor, usuario_id):
+    """Versão anterior de consultas.dados_metas (três idas ao banco)"""
+    cursor.execute('''
+        SELECT
+            id, titulo, descricao, categoria, valor_alvo, valor_atual,
+            (valor_alvo - valor_atual) AS valor_faltante,
+            CASE
+                WHEN valor_alvo > 0 THEN
+                    GREATEST(LEAST((valor_atual / valor_alvo * 100), 100), 0)
+                ELSE 0
+            END AS progresso,
+            status, data_inicio, data_limite, data_conclusao, cor,
+            CASE
+                WHEN status = 'ativa' AND data_limite IS NOT NULL AND data_limite < CURRENT_DATE
+                THEN 1 ELSE 0
+            END AS atrasada,
+            CASE
+                WHEN data_limite IS NOT NULL THEN DATEDIFF(data_limite, CURRENT_DATE)
+                ELSE NULL
+            END AS dias_restantes
+        FROM metas
+        WHERE usuario_id = %s
+        ORDER BY FIELD(status, 'ativa', 'concluida', 'cancelada'), data_limite IS NULL, data_limite ASC
+    ''', (usuario_id,))
+    metas_lista = cursor.fetchall()
+
+    cursor.execute('''
+        SELECT
+            COUNT(*) AS total_metas,
+            SUM(CASE WHEN status = 'ativa' THEN 1 ELSE 0 END) AS metas_ativas,
+            SUM(CASE WHEN status = 'concluida' THEN 1 ELSE 0 END) AS metas_concluidas,
+            COALESCE(SUM(valor_atual), 0) AS total_economizado,
+            COALESCE(SUM(CASE WHEN status = 'ativa' THEN valor_alvo ELSE 0 END), 0) AS total_objetivo
+        FROM metas
+        WHERE usuario_id = %s
+    ''', (usuario_id,))
+    cursor.fetchone()
+
+    cursor.execute('''
+        SELECT id, titulo, data_limite, DATEDIFF(data_limite, CURRENT_DATE) AS dias_restantes
+        FROM metas
+        WHERE usuario_id = %s AND status = 'ativa'
+          AND data_limite >= CURRENT_DATE AND data_limite <= CURRENT_DATE + INTERVAL 7 DAY
+        ORDER BY data_limite ASC
+    ''', (usuario_id,))
+    return metas_lista, cursor.fetchall()
+
+
+class CursorSimulado:
+    """Devolve as metas sintéticas e espera `latencia` segundos por execute()"""
+
+    def __init__(self, linhas, latencia):
+        self.linhas = linhas
+        self.latencia = latencia
+        self.idas = 0
+
+    def execute(self, sql, params=()):
+        self.idas += 1
+        time.sleep(self.latencia)
+
+    def fetchall(self):
+        return self.linhas
+
+
+def tempos_ms(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def executar_simulado(args):
+    hoje = date.today()
+    print(f'Cursor simulado, {args.latencia_ms} ms por ida ao banco '
+          f'(a versão antiga faz 3 idas e calcula no banco)')
+    for quantidade in args.metas:
+        cursor = CursorSimulado(list(metas_sinteticas(quantidade, hoje)), args.latencia_ms / 1000)
+        mediana = tempos_ms(lambda: consultas.dados_metas(cursor, 1, hoje), args.repeticoes)
+        idas = cursor.idas / args.repeticoes
+        calculo = mediana - idas * args.latencia_ms
+        print(f'{quantidade:>6} metas | 1 consulta: {mediana:7.2f} ms ({idas:.0f} ida, '
+              f'{calculo:6.2f} ms em Python) | 3 consultas: >= {3 * args.latencia_ms:5.2f} ms só de idas')
+
+
+def executar_mysql(args):
+    import mysql.connector
+    from config import DB_CONFIG
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor(dictionary=True)
+    hoje = date.today()
+    for quantidade in args.metas:
+        cursor.execute('INSERT INTO usuarios (nome, email, senha) VALUES (%s, %s, %s)',
+                       ('Usuario Bench', f'bench_metas_{os.getpid()}_{quantidade}@teste.com', 'x'))
+        usuario_id = cursor.lastrowid
+        try:
+            cursor.executemany(
+                'INSERT INTO metas (usuario_id, titulo, descricao, categoria, valor_alvo, valor_atual, '
+                'status, data_inicio, data_limite) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)',
+                [(usuario_id, m['titulo'], m['descricao'], m['categoria'], m['valor_alvo'],
+                  m['valor_atual'], m['status'], m['data_inicio'], m['data_limite'])
+                 for m in metas_sinteticas(quantidade, hoje)]
+            )
+            conn.commit()
+
+            nova = tempos_ms(lambda: consultas.dados_metas(cursor, usuario_id, hoje), args.repeticoes)
+            antiga = tempos_ms(lambda: dados_metas_tres_consultas(cursor, usuario_id), args.repeticoes)
+            print(f'{quantidade:>6} metas | 1 consulta: {nova:7.2f} ms | 3 consultas: {antiga:7.2f} ms')
+        finally:
+            cursor.execute('DELETE FROM usuarios WHERE id = %s', (usuario_id,))
+            conn.commit()
+    cursor.close()
+    conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark da página de metas')
+    parser.add_argument('--metas', type=int, nargs='+', default=[20, 200, 2000])
+    parser.add_argument('--repeticoes', type=int, default=50)
+    parser.add_argument('--latencia-ms', type=float, default=0.5, help='Latência simulada por ida ao banco')
+    parser.add_argument('--mysql', action='store_true', help='Mede as duas versões no MySQL de config.py')
+    args = parser.parse_args()
+
+    if args.mysql:
+        executar_mysql(args)
+    else:
+        executar_simulado(args)
@@ -0,0 +1,119 @@
+"""
+Benchmark - Previsão de Fluxo de Caixa
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Mede previsao.py com um histórico sintético (padrão: 10 anos com cerca
+de 10 lançamentos por dia) e algumas regras recorrentes. Relata
+separadamente a conversão das linhas do banco em arrays e o cálculo da
+previsão, e compara as médias por categoria com a mesma conta feita em
+laço Python por transação.
+
+Com --mysql, mede a previsão completa (consulta + cálculo) de um
+usuário existente.
+
+Uso:
+    python benchmarks/bench_previsao.py
+    python benchmarks/bench_previsao.py --anos 10 --por-dia 20 --meses 12
+    python benchmarks/bench_previsao.py --mysql --usuario 1
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import previsao
+from recorrencias import Regra
+
+CATEGORIAS = ['Alimentação', 'Moradia', 'Transporte', 'Saúde', 'Lazer', 'Educação', 'Salário', 'Vendas', 'Outros']
+
+
+def linhas_sinteticas(anos, por_dia, hoje, semente=42):
+    """Linhas como as de carregar_historico: (dias, centavos, recorrente, categoria)"""
+    aleatorio = random.Random(semente)
+    linhas = []
+    for dia in range(-365 * anos, 1):
+        for _ in range(aleatorio.randint(0, 2 * por_dia)):
+            categoria = aleatorio.choice(CATEGORIAS)
+            sinal = 1 if categoria in ('Salário', 'Vendas') else -1
+            linhas.append((dia, sinal * aleatorio.randint(100, 50000), 0, categoria))
+    return linhas
+
+
+def medias_python(linhas, hoje, janela):
+    """Média mensal por categoria dos últimos `janela` meses completos, em laço"""
+    atual = hoje.year * 12 + hoje.month - 1
+    totais = defaultdict(int)
+    for dias, centavos, recorrente, categoria in linhas:
+        data = hoje + timedelta(days=dias)
+        mes = data.year * 12 + data.month - 1
+        if not recorrente and atual - janela <= mes < atual:
+            totais[categoria] += centavos
+    return {categoria: total / janela for categoria, total in totais.items()}
+
+
+def cronometrar(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1000, resultado
+
+
+def executar_sintetico(args):
+    hoje = date.today()
+    linhas = linhas_sinteticas(args.anos, args.por_dia, hoje)
+    regras = [Regra(i, 1, 'despesa', Decimal('150.00'), f'Regra {i}', 'Outros',
+                    ('semanal', 'mensal', 'anual')[i % 3], hoje - timedelta(days=400 + i), None, hoje)
+              for i in range(args.regras)]
+    print(f'{len(linhas)} transações ({args.anos} anos), {args.regras} regras, {args.meses} meses de previsão')
+
+    ms, historico = cronometrar(lambda: previsao.historico_de_linhas(linhas), 3)
+    print(f'linhas -> arrays        | {ms:8.2f} ms')
+    ms, _ = cronometrar(lambda: previsao.medias_por_categoria(historico, hoje), args.repeticoes)
+    print(f'médias (NumPy)          | {ms:8.2f} ms')
+    ms, _ = cronometrar(lambda: medias_python(linhas, hoje, previsao.JANELA_MESES), 3)
+    print(f'médias (laço Python)    | {ms:8.2f} ms')
+    ms, resultado = cronometrar(lambda: previsao.prever(historico, regras, hoje, args.meses), args.repeticoes)
+    print(f'previsão completa       | {ms:8.2f} ms  ({len(resultado["saldo"])} dias)')
+
+
+def executar_mysql(args):
+    import mysql.connector
+    from config import DB_CONFIG
+
+    hoje = date.today()
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    try:
+        ms, historico = cronometrar(lambda: previsao.carregar_historico(cursor, args.usuario, hoje), args.repeticoes)
+        print(f'{len(historico.dias)} transações do usuário {args.usuario}')
+        print(f'consulta + arrays       | {ms:8.2f} ms')
+        ms, _ = cronometrar(lambda: previsao.previsao_usuario(cursor, args.usuario, hoje, args.meses),
+                            args.repeticoes)
+        print(f'previsão completa       | {ms:8.2f} ms')
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark da previsão de fluxo de caixa')
+    parser.add_argument('--anos', type=int, default=10)
+    parser.add_argument('--por-dia', type=int, default=10, help='Média de transações por dia')
+    parser.add_argument('--regras', type=int, default=30)
+    parser.add_argument('--meses', type=int, default=12)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--mysql', action='store_true', help='Mede com os dados de um usuário do MySQL')
+    parser.add_argument('--usuario', type=int, default=1)
+    args = parser.parse_args()
+
+    if args.mysql:
+        executar_mysql(args)
+    else:
+        executar_sintetico(args)
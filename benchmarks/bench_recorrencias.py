@@ -0,0 +1,207 @@
+"""
+Benchmark - Agendador de Transações Recorrentes
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Mede a recuperação de atrasos: várias regras paradas há meses são lançadas
+de uma vez. Compara um agendador ingênuo (para cada ocorrência: INSERT,
+dois upserts de resumo, UPDATE da regra e commit) com recorrencias.executar
+(lotes de regras travadas, um executemany por lote e um commit por lote).
+
+Sem --mysql, usa um banco simulado com latência fixa por ida ao banco
+(--latencia-ms). Com --mysql, roda no banco de config.py com usuários de
+teste que são removidos no final.
+
+Uso:
+    python benchmarks/bench_recorrencias.py
+    python benchmarks/bench_recorrencias.py --regras 2000 --meses 12 --lote 5000
+    python benchmarks/bench_recorrencias.py --mysql
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import recorrencias
+import resumo
+from periodos import adicionar_meses
+from recorrencias import Regra
+
+
+# ============== AGENDADOR INGÊNUO ==============
+
+def executar_ingenuo(conn, hoje):
+    """Uma ocorrência por vez, cada uma no seu commit"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, usuario_id, tipo, valor, descricao, categoria,
+               frequencia, data_inicio, data_fim, proxima_execucao
+        FROM recorrencias
+        WHERE ativa = TRUE AND proxima_execucao <= %s
+    ''', (hoje,))
+    total = 0
+    for regra in [Regra(*linha) for linha in cursor.fetchall()]:
+        numero = recorrencias.numero_ocorrencia(regra.data_inicio, regra.frequencia, regra.proxima_execucao)
+        data = recorrencias.data_ocorrencia(regra.data_inicio, regra.frequencia, numero)
+        while data <= hoje:
+            cursor.execute('''
+                INSERT INTO transacoes (usuario_id, tipo, valor, descricao, categoria, data, recorrencia_id)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ''', (regra.usuario_id, regra.tipo, regra.valor, regra.descricao, regra.categoria, data, regra.id))
+            resumo.aplicar_transacao(cursor, regra.usuario_id, regra.tipo, regra.valor, data, regra.categoria)
+            numero += 1
+            data = recorrencias.data_ocorrencia(regra.data_inicio, regra.frequencia, numero)
+            cursor.execute('UPDATE recorrencias SET proxima_execucao = %s WHERE id = %s', (data, regra.id))
+            conn.commit()
+            total += 1
+    cursor.close()
+    return total
+
+
+# ============== BANCO SIMULADO ==============
+
+class ConexaoSimulada:
+    """Regras em memória, latência fixa por comando, executemany ou commit"""
+
+    def __init__(self, regras, latencia):
+        self.regras = {r.id: r for r in regras}
+        self.latencia = latencia
+        self.idas = 0
+        self.linhas_gravadas = 0
+
+    def ida(self):
+        self.idas += 1
+        time.sleep(self.latencia)
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params):
+        self.ida()
+        if 'FROM recorrencias' in sql:
+            hoje = params[0]
+            vencidas = sorted((r for r in self.regras.values() if r.proxima_execucao <= hoje),
+                              key=lambda r: (r.proxima_execucao, r.id))
+            limite = params[1] if len(params) > 1 else None
+            self.linhas = [tuple(r) for r in vencidas[:limite]]
+        elif sql.strip().startswith('UPDATE recorrencias'):
+            proxima, regra_id = params
+            self.regras[regra_id] = self.regras[regra_id]._replace(proxima_execucao=proxima)
+        elif 'INSERT INTO transacoes' in sql:
+            self.linhas_gravadas += 1
+
+    def fetchall(self):
+        return self.linhas
+
+    def executemany(self, sql, linhas):
+        self.ida()
+        if 'INSERT INTO transacoes' in sql:
+            self.linhas_gravadas += len(linhas)
+        else:
+            for proxima, _, regra_id in linhas:
+                self.regras[regra_id] = self.regras[regra_id]._replace(proxima_execucao=proxima)
+
+    def commit(self):
+        self.ida()
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+# ============== EXECUÇÃO ==============
+
+def regras_atrasadas(quantidade, meses, hoje, usuarios):
+    """Regras mensais e semanais cuja próxima execução ficou `meses` para trás"""
+    regras = []
+    inicio = adicionar_meses(hoje, -meses)
+    for i in range(1, quantidade + 1):
+        frequencia = 'semanal' if i % 4 == 0 else 'mensal'
+        data_inicio = inicio.replace(day=1 + i % 28)
+        proxima = recorrencias.data_ocorrencia(data_inicio, frequencia, 1)
+        regras.append(Regra(i, 1 + i % usuarios, 'despesa', Decimal('10.00'), f'Regra {i}', 'Outros',
+                            frequencia, data_inicio, None, proxima))
+    return regras
+
+
+def imprimir(metodo, segundos, ocorrencias, idas):
+    print(f'{metodo:<8} | {segundos:7.2f}s | {ocorrencias / segundos:9.0f} ocorrências/s | '
+          f'{idas / max(ocorrencias, 1):5.2f} idas/ocorrência')
+
+
+def executar_simulado(args):
+    hoje = date.today()
+    print(f'Banco simulado, {args.latencia_ms} ms por ida, {args.regras} regras, {args.meses} meses de atraso')
+    for metodo in ('ingenuo', 'lotes'):
+        conn = ConexaoSimulada(regras_atrasadas(args.regras, args.meses, hoje, args.usuarios),
+                               args.latencia_ms / 1000)
+        inicio = time.perf_counter()
+        if metodo == 'ingenuo':
+            executar_ingenuo(conn, hoje)
+        else:
+            recorrencias.executar(conn, hoje, args.regras_por_lote, args.lote)
+        imprimir(metodo, time.perf_counter() - inicio, conn.linhas_gravadas, conn.idas)
+
+
+def executar_mysql(args):
+    import mysql.connector
+    from config import DB_CONFIG
+
+    hoje = date.today()
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    usuarios = []
+    for i in range(args.usuarios):
+        cursor.execute('INSERT INTO usuarios (nome, email, senha) VALUES (%s, %s, %s)',
+                       ('Usuario Bench', f'bench_recorrencias_{os.getpid()}_{i}@teste.com', 'x'))
+        usuarios.append(cursor.lastrowid)
+    conn.commit()
+    print(f'MySQL, {args.regras} regras, {args.meses} meses de atraso')
+    try:
+        for metodo in ('ingenuo', 'lotes'):
+            for regra in regras_atrasadas(args.regras, args.meses, hoje, args.usuarios):
+                recorrencias.criar_recorrencia(cursor, usuarios[regra.usuario_id - 1], regra.tipo,
+                                               regra.valor, regra.descricao, regra.categoria,
+                                               regra.frequencia, regra.data_inicio)
+            conn.commit()
+            inicio = time.perf_counter()
+            if metodo == 'ingenuo':
+                total = executar_ingenuo(conn, hoje)
+            else:
+                total = recorrencias.executar(conn, hoje, args.regras_por_lote, args.lote)['ocorrencias']
+            segundos = time.perf_counter() - inicio
+            print(f'{metodo:<8} | {segundos:7.2f}s | {total / segundos:9.0f} ocorrências/s')
+            marcadores = ', '.join(['%s'] * len(usuarios))
+            cursor.execute(f'DELETE FROM transacoes WHERE usuario_id IN ({marcadores})', usuarios)
+            cursor.execute(f'DELETE FROM recorrencias WHERE usuario_id IN ({marcadores})', usuarios)
+            conn.commit()
+    finally:
+        for usuario_id in usuarios:
+            cursor.execute('DELETE FROM usuarios WHERE id = %s', (usuario_id,))
+        conn.commit()
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark do agendador de recorrências')
+    parser.add_argument('--regras', type=int, default=500)
+    parser.add_argument('--meses', type=int, default=6, help='Meses sem executar o agendador')
+    parser.add_argument('--usuarios', type=int, default=50)
+    parser.add_argument('--lote', type=int, default=recorrencias.OCORRENCIAS_POR_LOTE,
+                        help='Ocorrências por transação')
+    parser.add_argument('--regras-por-lote', type=int, default=recorrencias.REGRAS_POR_LOTE)
+    parser.add_argument('--latencia-ms', type=float, default=0.2)
+    parser.add_argument('--mysql', action='store_true', help='Roda no MySQL de config.py')
+    args = parser.parse_args()
+
+    if args.mysql:
+        executar_mysql(args)
+    else:
+        executar_simulado(args)
@@ -0,0 +1,81 @@
+"""
+Benchmark - Relatório PDF em Streaming
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Mede a vazão (linhas/s), o tamanho do arquivo e o pico de memória (RSS)
+para gerar o relatório de N transações sintéticas com
+relatorio_pdf.gerar_pdf, cada tamanho em um processo separado.
+Com --comparar, mede também o método antigo (FPDF com fetchall).
+
+Uso:
+    python benchmarks/bench_relatorio_pdf.py
+    python benchmarks/bench_relatorio_pdf.py --tamanhos 10000 --comparar
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import relatorio_pdf
+from bench_exportacao import linhas_sinteticas, pico_rss_mb
+
+
+def executar_streaming(quantidade):
+    inicio = time.perf_counter()
+    total = 0
+    for pedaco in relatorio_pdf.gerar_pdf(relatorio_pdf.LAYOUT_TRANSACOES, linhas_sinteticas(quantidade)):
+        total += len(pedaco)
+    return time.perf_counter() - inicio, total
+
+
+def executar_fpdf(quantidade):
+    from fpdf import FPDF
+
+    inicio = time.perf_counter()
+    transacoes = list(linhas_sinteticas(quantidade))
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font('Arial', size=9)
+    for tipo, categoria, descricao, valor, data in transacoes:
+        pdf.cell(30, 10, data.strftime('%d/%m/%Y'), 1, 0, 'C')
+        pdf.cell(30, 10, tipo.capitalize(), 1, 0, 'C')
+        pdf.cell(40, 10, categoria[:20], 1, 0, 'L')
+        pdf.cell(60, 10, descricao[:30], 1, 0, 'L')
+        pdf.cell(30, 10, f'R$ {valor:.2f}', 1, 1, 'R')
+    dados = pdf.output(dest='S').encode('latin-1', 'replace')
+    return time.perf_counter() - inicio, len(dados)
+
+
+def medir(metodo, quantidade):
+    """Roda a medição em um processo novo para isolar o pico de RSS"""
+    resultado = subprocess.run(
+        [sys.executable, __file__, '--filho', metodo, str(quantidade)],
+        capture_output=True, text=True, check=True
+    )
+    return resultado.stdout.strip()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark do relatório PDF')
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--comparar', action='store_true', help='Mede também o método com FPDF')
+    parser.add_argument('--filho', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.filho:
+        metodo, quantidade = args.filho[0], int(args.filho[1])
+        funcao = executar_streaming if metodo == 'streaming' else executar_fpdf
+        segundos, tamanho = funcao(quantidade)
+        print(f'{metodo:<10} {quantidade:>9} linhas | {segundos:7.2f}s | '
+              f'{quantidade / segundos:9.0f} linhas/s | '
+              f'arquivo {tamanho / 1024 / 1024:7.2f} MB | pico {pico_rss_mb():7.1f} MB')
+        sys.exit(0)
+
+    metodos = ['streaming'] + (['fpdf'] if args.comparar else [])
+    for quantidade in args.tamanhos:
+        for metodo in metodos:
+            print(medir(metodo, quantidade), flush=True)
@@ -0,0 +1,198 @@
+"""
+Benchmark - Relatórios a partir de resumo_categoria
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Compara as consultas da página de relatórios lendo resumo_categoria (uma
+linha por mês, tipo e categoria) com a versão anterior, que agregava
+transacoes a cada requisição (despesas por categoria de todo o histórico
+e evolução mensal com DATE_FORMAT). A versão nova faz uma única consulta
+por faixas da chave primária (período, anterior, ano anterior e evolução)
+e monta as comparações em Python; o tempo medido inclui essa montagem.
+
+Sem --mysql, monta as duas tabelas em um SQLite em memória (DATE_FORMAT
+vira strftime) para históricos de tamanhos diferentes: o tempo da versão
+nova deve acompanhar o número de meses, não o de transações. Com --mysql,
+cria um usuário de teste com N transações no banco de config.py, mede as
+duas versões e o custo extra do upsert em resumo_categoria por inclusão,
+e remove o usuário.
+
+Uso:
+    python benchmarks/bench_relatorios.py
+    python benchmarks/bench_relatorios.py --transacoes 1000 10000 100000 --anos 5
+    python benchmarks/bench_relatorios.py --mysql --transacoes 1000 10000
+"""
+
+import argparse
+import os
+import random
+import re
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import consultas
+import periodos
+import resumo
+
+CATEGORIAS = ['Alimentação', 'Moradia', 'Transporte', 'Saúde', 'Lazer', 'Educação', 'Salário', 'Outros']
+
+
+def sql_antigas(usuario_id, periodo):
+    """Versão anterior: agregações direto em transacoes"""
+    where, params = periodos.filtro_usuario(usuario_id, periodo)
+    return [
+        ('''
+            SELECT categoria, SUM(valor) AS total
+            FROM transacoes
+            WHERE usuario_id = %s AND tipo = 'despesa'
+            GROUP BY categoria
+            ORDER BY total DESC
+        ''', (usuario_id,)),
+        (f'''
+            SELECT DATE_FORMAT(data, '%Y-%m') AS mes, tipo, SUM(valor) AS total
+            FROM transacoes
+            WHERE {where}
+            GROUP BY mes, tipo
+            ORDER BY mes DESC
+        ''', params),
+    ]
+
+
+def sql_novas(usuario_id, periodo):
+    intervalos = periodos.unir(consultas.periodos_relatorio(periodo).values())
+    return [consultas.sql_resumo_categoria(usuario_id, intervalos)]
+
+
+def montar(linhas, periodo):
+    consultas.montar_relatorio([
+        {'mes': date.fromisoformat(m) if isinstance(m, str) else m, 'tipo': t,
+         'categoria': c, 'total': Decimal(str(v)), 'quantidade': q}
+        for m, t, c, v, q in linhas], periodo)
+
+
+def transacoes_sinteticas(quantidade, anos, hoje, semente=42):
+    aleatorio = random.Random(semente)
+    for _ in range(quantidade):
+        categoria = aleatorio.choice(CATEGORIAS)
+        tipo = 'receita' if categoria == 'Salário' else 'despesa'
+        yield (tipo, Decimal(aleatorio.randrange(100, 50000)) / 100, categoria,
+               hoje - timedelta(days=aleatorio.randrange(365 * anos)))
+
+
+def tempos_ms(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+# ============== SQLITE ==============
+
+def para_sqlite(sql, params):
+    sql = re.sub(r"DATE_FORMAT\(([\w.]+), '%Y-%m'\)", r"strftime('%Y-%m', \1)", sql)
+    return sql.replace('%s', '?'), [p.isoformat() if isinstance(p, date) else p for p in params]
+
+
+def montar_sqlite(transacoes):
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE transacoes (id INTEGER PRIMARY KEY, usuario_id INT, tipo TEXT, '
+                 'valor REAL, categoria TEXT, data TEXT)')
+    conn.execute('CREATE INDEX idx_usuario_data_cobertura ON transacoes (usuario_id, data, tipo, categoria, valor)')
+    conn.execute('CREATE INDEX idx_usuario_tipo_categoria ON transacoes (usuario_id, tipo, categoria, valor)')
+    conn.execute('CREATE TABLE resumo_categoria (usuario_id INT, mes TEXT, tipo TEXT, categoria TEXT, '
+                 'total REAL, quantidade INT, PRIMARY KEY (usuario_id, mes, tipo, categoria)) WITHOUT ROWID')
+    conn.executemany('INSERT INTO transacoes (usuario_id, tipo, valor, categoria, data) VALUES (1, ?, ?, ?, ?)',
+                     [(t, float(v), c, d.isoformat()) for t, v, c, d in transacoes])
+    conn.execute('''
+        INSERT INTO resumo_categoria
+        SELECT usuario_id, strftime('%Y-%m-01', data), tipo, categoria, SUM(valor), COUNT(*)
+        FROM transacoes GROUP BY 1, 2, 3, 4
+    ''')
+    return conn
+
+
+def executar_sqlite(args):
+    hoje = date.today()
+    periodo = periodos.mes_atual(hoje)
+    print(f'SQLite em memória, histórico de {args.anos} anos')
+    for quantidade in args.transacoes:
+        conn = montar_sqlite(list(transacoes_sinteticas(quantidade, args.anos, hoje)))
+        linhas = conn.execute('SELECT COUNT(*) FROM resumo_categoria').fetchone()[0]
+
+        def rodar(consultas_sql):
+            for sql, params in consultas_sql:
+                linhas_resultado = conn.execute(*para_sqlite(sql, params)).fetchall()
+            return linhas_resultado
+
+        antiga = tempos_ms(lambda: rodar(sql_antigas(1, periodos.ultimos_meses(12, hoje))), args.repeticoes)
+        nova = tempos_ms(lambda: montar(rodar(sql_novas(1, periodo)), periodo), args.repeticoes)
+        print(f'{quantidade:>8} transações ({linhas:>4} linhas de resumo) | '
+              f'transacoes: {antiga:8.2f} ms | resumo_categoria: {nova:6.2f} ms')
+        conn.close()
+
+
+# ============== MYSQL ==============
+
+def executar_mysql(args):
+    import mysql.connector
+    from config import DB_CONFIG
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    hoje = date.today()
+    periodo = periodos.mes_atual(hoje)
+    for quantidade in args.transacoes:
+        cursor.execute('INSERT INTO usuarios (nome, email, senha) VALUES (%s, %s, %s)',
+                       ('Usuario Bench', f'bench_relatorios_{os.getpid()}_{quantidade}@teste.com', 'x'))
+        usuario_id = cursor.lastrowid
+        try:
+            cursor.executemany(
+                'INSERT INTO transacoes (usuario_id, tipo, valor, descricao, categoria, data) '
+                'VALUES (%s, %s, %s, %s, %s, %s)',
+                [(usuario_id, t, v, 'Bench', c, d) for t, v, c, d in
+                 transacoes_sinteticas(quantidade, args.anos, hoje)])
+            resumo.reconstruir_resumos(cursor, usuario_id)
+            conn.commit()
+
+            def rodar(consultas_sql):
+                for sql, params in consultas_sql:
+                    cursor.execute(sql, params)
+                    linhas_resultado = cursor.fetchall()
+                return linhas_resultado
+
+            antiga = tempos_ms(lambda: rodar(sql_antigas(usuario_id, periodos.ultimos_meses(12, hoje))),
+                               args.repeticoes)
+            nova = tempos_ms(lambda: montar(rodar(sql_novas(usuario_id, periodo)), periodo), args.repeticoes)
+
+            def incluir():
+                resumo.aplicar_transacao(cursor, usuario_id, 'despesa', Decimal('1.00'), hoje, 'Lazer')
+                conn.commit()
+            escrita = tempos_ms(incluir, args.repeticoes)
+            print(f'{quantidade:>8} transações | transacoes: {antiga:8.2f} ms | '
+                  f'resumo_categoria: {nova:6.2f} ms | resumos por inclusão: {escrita:5.2f} ms')
+        finally:
+            cursor.execute('DELETE FROM usuarios WHERE id = %s', (usuario_id,))
+            conn.commit()
+    cursor.close()
+    conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark da página de relatórios')
+    parser.add_argument('--transacoes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--anos', type=int, default=5)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--mysql', action='store_true', help='Mede as duas versões no MySQL de config.py')
+    args = parser.parse_args()
+
+    if args.mysql:
+        executar_mysql(args)
+    else:
+        executar_sqlite(args)
@@ -0,0 +1,128 @@
+"""
+Benchmark - Repositório de backups deduplicado
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Simula --dias backups noturnos de um dump de ~--mb MB: a cada dia entram
+--novas transações no fim e --excluidas saem do meio. Para cada backup,
+mede a vazão da gravação no repositório (cortes + SHA-256 + compressão dos
+pedaços novos) e quanto foi gravado; no final compara o repositório com a
+soma dos ZIPs independentes de antes (dump compactado com deflate).
+
+Com --mysql, faz --dias backups completos reais (mysqldump do banco do
+.env) em ZIP e no repositório, sem alterar o banco.
+
+Uso:
+    python benchmarks/bench_repositorio.py
+    python benchmarks/bench_repositorio.py --mb 200 --dias 7
+    python benchmarks/bench_repositorio.py --mysql --dias 3
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import backup_automatico
+import repositorio_backup
+from backup_automatico import BackupManager, BACKUP_CONFIG
+
+LINHA = "INSERT INTO transacoes VALUES ({}, {}, 'despesa', {}.90, 'Compra {} no mercado', 'Alimentação', '2025-06-15');\n"
+BYTES_POR_LINHA = len(LINHA.format(1000000, 100, 49, 1000000).encode())
+
+
+def gerar_dump(ids):
+    return ''.join(LINHA.format(i, 1 + i % 500, i % 100, i) for i in ids).encode()
+
+
+def tamanho_zip(dados):
+    return len(zlib.compress(dados, 6))
+
+
+# ============== SIMULADO ==============
+
+def executar_simulado(args):
+    aleatorio = random.Random(1)
+    ids = list(range(1, args.mb * 1024 * 1024 // BYTES_POR_LINHA))
+    destino = Path(tempfile.mkdtemp())
+    repositorio = repositorio_backup.repositorio_de(destino / 'x.snap')
+    print(f'Simulado: dump de {args.mb} MB, {args.dias} dias com {args.novas} novas e '
+          f'{args.excluidas} excluídas por dia')
+    logicos, zips = 0, 0
+    try:
+        for dia in range(1, args.dias + 1):
+            if dia > 1:
+                for i in aleatorio.sample(range(len(ids)), args.excluidas):
+                    ids[i] = None
+                ids = [i for i in ids if i is not None]
+                ids += range(ids[-1] + 1, ids[-1] + 1 + args.novas)
+            dump = gerar_dump(ids)
+
+            inicio = time.perf_counter()
+            with repositorio_backup.GravadorSnapshot(destino / f'backup_{dia}.snap', repositorio) as gravador:
+                with gravador.open('gestao_financeira.sql') as membro:
+                    for i in range(0, len(dump), 1024 * 1024):
+                        membro.write(dump[i:i + 1024 * 1024])
+            segundos = time.perf_counter() - inicio
+
+            stats = gravador.estatisticas
+            logicos += len(dump)
+            zips += tamanho_zip(dump)
+            print(f'  dia {dia}: {segundos:6.2f} s ({len(dump) / segundos / 2 ** 20:6.1f} MB/s) | '
+                  f'{stats["pedacos_novos"]:>5}/{stats["pedacos"]} pedaços novos, '
+                  f'{BackupManager.format_size(stats["bytes_novos"]):>10} gravados')
+
+        armazenado = repositorio.tamanho()
+        print(f'  lógico {BackupManager.format_size(logicos)} | ZIPs independentes {BackupManager.format_size(zips)} | '
+              f'repositório {BackupManager.format_size(armazenado)}')
+        print(f'  deduplicação: {logicos / armazenado:.1f}x sobre o lógico, {zips / armazenado:.1f}x sobre os ZIPs')
+    finally:
+        shutil.rmtree(destino)
+
+
+# ============== MYSQL ==============
+
+def executar_mysql(args):
+    destino = tempfile.mkdtemp()
+    backup_automatico.logger.disabled = True
+    try:
+        with mock.patch.dict(BACKUP_CONFIG, {'BACKUP_DIR': destino, 'BACKUP_FILES': True}), \
+                mock.patch.object(BackupManager, 'cleanup_old_backups', lambda self: None):
+            for repositorio in (False, True):
+                inicio = time.perf_counter()
+                for dia in range(args.dias):
+                    manager = BackupManager(repositorio=repositorio)
+                    manager.zip_path = manager.zip_path.with_name(f'backup_{dia}{manager.zip_path.suffix}')
+                    manager.partial_path = manager.zip_path.with_name(manager.zip_path.name + '.parcial')
+                    if not manager.executar_backup_completo():
+                        raise RuntimeError('backup falhou (veja logs/backup.log)')
+                segundos = time.perf_counter() - inicio
+                arquivos = [p for p in Path(destino).rglob('*') if p.is_file()]
+                total = sum(p.stat().st_size for p in arquivos
+                            if (p.suffix == '.zip') != repositorio)
+                nome = 'repositório' if repositorio else 'ZIPs'
+                print(f'  {nome:<12} {args.dias} backups em {segundos:7.2f} s | em disco {BackupManager.format_size(total)}')
+    finally:
+        shutil.rmtree(destino)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark do repositório de backups deduplicado')
+    parser.add_argument('--mb', type=int, default=100, help='Tamanho do dump simulado (MB)')
+    parser.add_argument('--dias', type=int, default=5)
+    parser.add_argument('--novas', type=int, default=3000)
+    parser.add_argument('--excluidas', type=int, default=100)
+    parser.add_argument('--mysql', action='store_true', help='Usa o mysqldump com o banco do .env')
+    args = parser.parse_args()
+
+    if args.mysql:
+        executar_mysql(args)
+    else:
+        executar_simulado(args)
@@ -0,0 +1,96 @@
+"""
+Benchmark - Templates pré-compilados e cache de fragmentos
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Mede duas coisas:
+
+1. Primeiro acesso de um worker a cada template: compilando do fonte (sem
+   bytecode) e carregando o bytecode gravado por `python templates_cache.py`.
+2. Renderização de metas e dashboard com os fragmentos (cartões das metas,
+   tabela de transações) vindos do cache, contra o Jinja renderizando tudo
+   (CACHE_FRAGMENTOS=0). Os dados vêm do cache de views nos dois casos, com
+   o banco simulado como em bench_cache_http.py.
+
+Uso:
+    python benchmarks/bench_templates.py
+    python benchmarks/bench_templates.py --metas 50 --repeticoes 200
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+import templates_cache
+from app import app
+from bench_cache_http import BancoSimulado, cliente_logado, dados_simulados, tempos_ms
+
+PASTA_TEMPLATES = os.path.join(app.root_path, 'Templates')
+PAGINAS = ('/metas', '/dashboard')
+
+
+def ambiente(pasta_bytecode):
+    """Environment novo, como o de um worker recém-iniciado"""
+    env = Environment(loader=FileSystemLoader(PASTA_TEMPLATES), extensions=[templates_cache.FragmentoUsuario],
+                      bytecode_cache=FileSystemBytecodeCache(pasta_bytecode) if pasta_bytecode else None)
+    env.globals.update(app.jinja_env.globals)
+    return env
+
+
+def medir_compilacao(repeticoes):
+    pasta = tempfile.mkdtemp()
+    try:
+        nomes = sorted(ambiente(pasta).list_templates(extensions=['html']))
+        for nome in nomes:
+            ambiente(pasta).get_template(nome)  # grava o bytecode
+
+        print(f'Primeiro acesso por template ({len(nomes)} templates):')
+        print(f'  {"template":<38} {"compilando":>10} {"bytecode":>10}')
+        totais = [0.0, 0.0]
+        for nome in nomes:
+            fonte = tempos_ms(lambda: ambiente(None).get_template(nome), repeticoes)
+            bytecode = tempos_ms(lambda: ambiente(pasta).get_template(nome), repeticoes)
+            totais[0] += fonte
+            totais[1] += bytecode
+            print(f'  {nome:<38} {fonte:8.2f}ms {bytecode:8.2f}ms')
+        print(f'  {"total":<38} {totais[0]:8.2f}ms {totais[1]:8.2f}ms ({totais[0] / totais[1]:.1f}x)')
+    finally:
+        shutil.rmtree(pasta)
+
+
+def medir_fragmentos(args):
+    banco = BancoSimulado(dados_simulados(args.metas, args.categorias, date.today()))
+    import app as aplicacao
+
+    print(f'\nRenderização com dados em cache ({args.metas} metas):')
+    with mock.patch.object(aplicacao, 'get_db', lambda: banco):
+        cliente = cliente_logado(1)
+        for url in PAGINAS:
+            tempos = {}
+            for ativos in (False, True):
+                app.jinja_env.fragmentos_ativos = ativos
+                cliente.get(url)  # aquece dados e fragmentos
+                tempos[ativos] = tempos_ms(lambda: cliente.get(url), args.repeticoes)
+            print(f'  {url:<12} sem fragmentos {tempos[False]:6.2f} ms | '
+                  f'com fragmentos {tempos[True]:6.2f} ms ({tempos[False] / tempos[True]:.1f}x)')
+    app.jinja_env.fragmentos_ativos = templates_cache.CACHE_FRAGMENTOS
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark dos templates pré-compilados e dos fragmentos')
+    parser.add_argument('--metas', type=int, default=20)
+    parser.add_argument('--categorias', type=int, default=15)
+    parser.add_argument('--repeticoes', type=int, default=50)
+    args = parser.parse_args()
+
+    medir_compilacao(max(args.repeticoes // 5, 3))
+    medir_fragmentos(args)
@@ -0,0 +1,117 @@
+"""
+Benchmark - Manifesto de integridade e verificação de backups
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Mede:
+
+1. O custo do manifesto no backup: o mesmo backup com e sem o registro de
+   tamanho/SHA-256/linhas por tabela de cada membro (e soma de valor).
+2. A vazão de --verify sobre --backups backups (releitura do ZIP em blocos,
+   descompressão e SHA-256) com 1, 2, 4... threads.
+
+Sem --mysql, o mysqldump é simulado como em bench_backup.py (--mb MB de
+INSERTs). Com --mysql, usa o mysqldump de verdade com o banco do .env.
+
+Uso:
+    python benchmarks/bench_verificacao.py
+    python benchmarks/bench_verificacao.py --mb 200 --backups 4 --jobs 1 2 4
+    python benchmarks/bench_verificacao.py --mysql
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import backup_automatico
+import verificacao_backup
+from backup_automatico import BackupManager, BACKUP_CONFIG
+from bench_backup import DUMP_SIMULADO
+
+
+class SemRegistro(verificacao_backup.RegistroIntegridade):
+    """Repassa as gravações ao ZIP sem tamanho/SHA-256/linhas: o backup de antes do manifesto"""
+
+    def open(self, nome, mode='w', force_zip64=False):
+        return self.zipf.open(nome, 'w', force_zip64=force_zip64)
+
+    def writestr(self, nome, dados):
+        self.zipf.writestr(nome, dados)
+
+    def write(self, arquivo, nome):
+        self.zipf.write(arquivo, nome)
+
+
+def sem_estado(manager):
+    """Sem banco não há estado para incrementais; a soma de valor (4ª coluna do dump simulado) é registrada"""
+    manager.colunas_soma = {'transacoes': 3}
+    return None, None
+
+
+def criar_backups(quantidade, manifesto):
+    """Cria `quantidade` backups; retorna (caminhos, segundos por backup)"""
+    caminhos, inicio = [], time.perf_counter()
+    for i in range(quantidade):
+        manager = BackupManager()
+        manager.zip_path = manager.backup_dir / f'backup_{manifesto:d}_{i}.zip'
+        manager.partial_path = manager.backup_dir / f'backup_{manifesto:d}_{i}.zip.parcial'
+        if not manifesto:
+            manager.abrir_destino = lambda: SemRegistro(
+                zipfile.ZipFile(manager.partial_path, 'w', zipfile.ZIP_DEFLATED))
+        if not manager.executar_backup_completo():
+            raise RuntimeError('backup falhou (veja logs/backup.log)')
+        caminhos.append(manager.zip_path)
+    return caminhos, (time.perf_counter() - inicio) / quantidade
+
+
+def executar(args, comando=None):
+    destino = tempfile.mkdtemp()
+    backup_automatico.logger.disabled = True
+    patches = [mock.patch.dict(BACKUP_CONFIG, {'BACKUP_DIR': destino, 'BACKUP_FILES': True}),
+               mock.patch.object(BackupManager, 'cleanup_old_backups', lambda self: None),
+               mock.patch.object(BackupManager, 'estado_banco', sem_estado)]
+    if comando:
+        patches.append(mock.patch.object(BackupManager, 'comando_mysqldump', lambda self, *opcoes: comando))
+    try:
+        for patch in patches:
+            patch.start()
+
+        _, sem = criar_backups(1, manifesto=False)
+        caminhos, com = criar_backups(args.backups, manifesto=True)
+        print(f'Backup: {sem:.2f} s sem manifesto, {com:.2f} s com manifesto ({(com / sem - 1) * 100:+.0f}%)')
+
+        print(f'Verificação de {len(caminhos)} backups:')
+        for jobs in args.jobs:
+            inicio = time.perf_counter()
+            resultados = verificacao_backup.verificar_backups(caminhos, jobs)
+            segundos = time.perf_counter() - inicio
+            if any(resultado['erros'] for resultado in resultados):
+                raise RuntimeError('verificação encontrou erros')
+            total = sum(resultado['bytes'] for resultado in resultados)
+            print(f'  {jobs:>2} threads: {segundos:6.2f} s | {total / segundos / 2 ** 20:7.1f} MB/s')
+    finally:
+        for patch in patches:
+            patch.stop()
+        shutil.rmtree(destino)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark do manifesto de integridade e da verificação')
+    parser.add_argument('--mb', type=int, default=100, help='Tamanho do dump simulado (MB)')
+    parser.add_argument('--backups', type=int, default=4)
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--mysql', action='store_true', help='Usa o mysqldump com o banco do .env')
+    args = parser.parse_args()
+
+    if args.mysql:
+        print(f"MySQL: banco {BACKUP_CONFIG['DB_NAME']}")
+        executar(args)
+    else:
+        print(f'Simulado: dump de {args.mb} MB')
+        executar(args, [sys.executable, '-c', DUMP_SIMULADO, str(args.mb)])
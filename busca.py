@@ -0,0 +1,233 @@
+"""
+Busca Textual em Transações
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Busca por palavras em descricao e categoria, sem diferenciar maiúsculas nem
+acentos ("farmacia" encontra "Farmácia"). Todas as palavras precisam
+aparecer; cada uma vale também como prefixo ("merc" encontra "Mercado").
+Resultados ordenados por relevância e, no empate, pela data mais recente.
+
+Dois backends com as mesmas regras:
+- MySQL: índice FULLTEXT ft_descricao_categoria (database_schema.sql) em
+  BOOLEAN MODE; a collation utf8mb4_unicode_ci ignora os acentos
+- IndiceInvertido: índice em memória para SQLite/testes ou bancos sem o
+  índice FULLTEXT (BUSCA_BACKEND=memoria)
+
+As palavras seguem os limites padrão do InnoDB: mínimo de 3 letras
+(innodb_ft_min_token_size) e sem as stopwords padrão.
+"""
+
+import heapq
+import math
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from datetime import date
+
+import consultas
+import periodos
+
+TAMANHO_MINIMO_TERMO = 3
+MAX_TERMOS = 10
+
+# Stopwords padrão do InnoDB (INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD)
+# com 3 letras ou mais; as menores já caem pelo tamanho mínimo
+STOPWORDS = frozenset({
+    'about', 'are', 'com', 'for', 'from', 'how', 'that', 'the', 'this',
+    'was', 'what', 'when', 'where', 'who', 'will', 'with', 'und', 'www',
+})
+
+_PALAVRA = re.compile(r'[^\W_]+')
+
+
+# ============== NORMALIZAÇÃO ==============
+
+def normalizar_texto(texto):
+    """Minúsculas e sem acentos"""
+    decomposto = unicodedata.normalize('NFKD', (texto or '').lower())
+    return ''.join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def palavras(texto):
+    """Palavras indexáveis do texto (mesmas regras do FULLTEXT)"""
+    return [p for p in _PALAVRA.findall(normalizar_texto(texto))
+            if len(p) >= TAMANHO_MINIMO_TERMO and p not in STOPWORDS]
+
+
+def termos_consulta(consulta):
+    """Termos da busca, sem repetição; ValueError se nenhum for pesquisável"""
+    termos = list(dict.fromkeys(palavras(consulta)))[:MAX_TERMOS]
+    if not termos:
+        raise ValueError(f'Digite ao menos uma palavra com {TAMANHO_MINIMO_TERMO} letras ou mais')
+    return termos
+
+
+# ============== MYSQL (FULLTEXT) ==============
+
+def expressao_fulltext(termos):
+    """'+mercado* +livre*': todas as palavras obrigatórias, como prefixo"""
+    return ' '.join(f'+{termo}*' for termo in termos)
+
+
+def sql_busca_transacoes(usuario_id, termos, filtros=None, limite=50, deslocamento=0):
+    """
+    Busca pelo índice FULLTEXT ft_descricao_categoria, com os mesmos filtros
+    do histórico. Busca limite + 1 linhas para saber se existe mais uma página.
+    """
+    where, params = consultas.filtro_transacoes(usuario_id, filtros)
+    expressao = expressao_fulltext(termos)
+    sql = f'''
+        SELECT id, tipo, valor, descricao, categoria, data,
+               MATCH(descricao, categoria) AGAINST (%s IN BOOLEAN MODE) AS relevancia
+        FROM transacoes
+        WHERE {where}
+          AND MATCH(descricao, categoria) AGAINST (%s IN BOOLEAN MODE)
+        ORDER BY relevancia DESC, data DESC, id DESC
+        LIMIT %s OFFSET %s
+    '''
+    return sql, (expressao,) + params + (expressao, limite + 1, deslocamento)
+
+
+# ============== ÍNDICE EM MEMÓRIA ==============
+
+class IndiceInvertido:
+    """
+    Índice invertido das transações de um usuário.
+    Cada palavra aponta para as posições (array de inteiros) das transações
+    em que aparece, repetidas conforme a frequência. A relevância segue a
+    fórmula do InnoDB: soma de frequência * idf² de cada termo.
+    """
+
+    CAMPOS = ('id', 'tipo', 'valor', 'descricao', 'categoria', 'data')
+
+    def __init__(self, transacoes=()):
+        self._docs = []          # tuplas na ordem de CAMPOS; None quando removida
+        self._posicoes = {}      # id da transação -> posição em _docs
+        self._postings = {}      # palavra -> array('I') de posições
+        self._vocabulario = []   # palavras ordenadas, para busca por prefixo
+        self._vocabulario_ok = True
+        for transacao in transacoes:
+            self.adicionar(transacao)
+
+    @classmethod
+    def do_banco(cls, cursor, usuario_id):
+        """Monta o índice com todas as transações do usuário (cursor dictionary)"""
+        cursor.execute('''
+            SELECT id, tipo, valor, descricao, categoria, data
+            FROM transacoes
+            WHERE usuario_id = %s
+        ''', (usuario_id,))
+        return cls(cursor.fetchall())
+
+    def __len__(self):
+        return len(self._posicoes)
+
+    def adicionar(self, transacao):
+        if transacao['id'] in self._posicoes:
+            self.remover(transacao['id'])
+        posicao = len(self._docs)
+        self._docs.append(tuple(transacao[campo] for campo in self.CAMPOS))
+        self._posicoes[transacao['id']] = posicao
+
+        for palavra in palavras(f"{transacao['descricao']} {transacao['categoria'] or ''}"):
+            lista = self._postings.get(palavra)
+            if lista is None:
+                lista = self._postings[palavra] = array('I')
+                self._vocabulario_ok = False
+            lista.append(posicao)
+
+    def remover(self, transacao_id):
+        """As posições antigas ficam nos postings e são ignoradas na busca"""
+        posicao = self._posicoes.pop(transacao_id, None)
+        if posicao is not None:
+            self._docs[posicao] = None
+
+    def _expandir(self, termo):
+        """Palavras do índice que começam com o termo"""
+        if not self._vocabulario_ok:
+            self._vocabulario = sorted(self._postings)
+            self._vocabulario_ok = True
+        vocabulario = self._vocabulario
+        indice = bisect_left(vocabulario, termo)
+        while indice < len(vocabulario) and vocabulario[indice].startswith(termo):
+            yield vocabulario[indice]
+            indice += 1
+
+    def _filtro(self, filtros):
+        """Função que testa os filtros do histórico em uma tupla de _docs"""
+        filtros = filtros or {}
+        periodo = periodos.entre_datas(
+            date.fromisoformat(filtros['inicio']) if 'inicio' in filtros else None,
+            date.fromisoformat(filtros['fim']) if 'fim' in filtros else None,
+        )
+        tipo = filtros.get('tipo')
+        categoria = filtros.get('categoria')
+
+        def passa(doc):
+            if tipo and doc[1] != tipo:
+                return False
+            if categoria and doc[4] != categoria:
+                return False
+            return periodo is None or periodo.contem(doc[5])
+
+        return passa
+
+    def buscar(self, termos, filtros=None, limite=50, deslocamento=0):
+        """Linhas (dicts como os do cursor, com 'relevancia') da página pedida"""
+        total = len(self._posicoes)
+        pontuacao = None
+        for termo in termos:
+            frequencias = Counter()
+            for palavra in self._expandir(termo):
+                frequencias.update(self._postings[palavra])
+            if not frequencias:
+                return []
+            idf = math.log10((total + 1) / len(frequencias))
+            if pontuacao is None:
+                pontuacao = {p: f * idf * idf for p, f in frequencias.items()}
+            else:
+                # Todas as palavras são obrigatórias
+                pontuacao = {p: pontuacao[p] + f * idf * idf
+                             for p, f in frequencias.items() if p in pontuacao}
+            if not pontuacao:
+                return []
+
+        passa = self._filtro(filtros)
+        candidatos = ((relevancia, self._docs[p]) for p, relevancia in pontuacao.items()
+                      if self._docs[p] is not None and passa(self._docs[p]))
+        melhores = heapq.nsmallest(
+            deslocamento + limite, candidatos,
+            key=lambda c: (-c[0], -c[1][5].toordinal(), -c[1][0])
+        )
+        return [dict(zip(self.CAMPOS, doc), relevancia=relevancia)
+                for relevancia, doc in melhores[deslocamento:]]
+
+
+# ============== BUSCA PAGINADA ==============
+
+def buscar_transacoes(cursor, usuario_id, consulta, filtros=None, pagina=1, limite=50, indice=None):
+    """
+    Página `pagina` (a partir de 1) da busca. Com `indice` usa o índice em
+    memória; sem ele, o FULLTEXT do MySQL.
+    Retorna {'transacoes', 'proxima', 'anterior', 'termos'}; 'proxima' e
+    'anterior' são números de página (None quando não há).
+    """
+    termos = termos_consulta(consulta)
+    if pagina < 1:
+        raise ValueError(f'Página inválida: {pagina}')
+    deslocamento = (pagina - 1) * limite
+
+    if indice is not None:
+        linhas = indice.buscar(termos, filtros, limite + 1, deslocamento)
+    else:
+        cursor.execute(*sql_busca_transacoes(usuario_id, termos, filtros, limite, deslocamento))
+        linhas = cursor.fetchall()
+
+    return {
+        'transacoes': linhas[:limite],
+        'proxima': pagina + 1 if len(linhas) > limite else None,
+        'anterior': pagina - 1 if pagina > 1 else None,
+        'termos': termos,
+    }
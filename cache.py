@@ -0,0 +1,247 @@
+"""
+Cache de Leitura por Usuário
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Guarda os dados já consultados das páginas (dashboard, relatórios, metas)
+por usuário e view. As rotas de escrita chamam invalidate(), que incrementa
+a versão da view do usuário; as entradas antigas deixam de ser lidas e
+expiram sozinhas (LRU/TTL). invalidate() também renova a marca de alteração
+do usuário, usada como versão dos dados no cache HTTP (cache_http.py).
+Isso funciona igual nos dois backends:
+
+- MemoryBackend: LRU com TTL dentro do processo (padrão)
+- RedisBackend: qualquer cliente compatível com redis-py (get/set/delete/incr),
+  compartilhado entre os workers do gunicorn
+
+Com o MemoryBackend cada processo tem o seu cache: invalidate() só alcança o
+worker que atendeu a escrita, e os outros workers (ou o app, quando quem
+escreve é um agendador de linha de comando) servem os dados antigos até o
+CACHE_TTL. Com mais de um worker use CACHE_BACKEND=redis (ver `compartilhado`).
+
+Configuração (.env):
+    CACHE_BACKEND=memoria | redis | nenhum
+    CACHE_TTL=300
+    CACHE_MAX_ITENS=2048
+    REDIS_URL=redis://localhost:6379/0
+"""
+
+import math
+import os
+import pickle
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+# Views cujos dados mudam com cada tipo de escrita (usado nas invalidações,
+# também pelo agendador de recorrências, que roda fora do app)
+VIEWS_TRANSACOES = ('dashboard', 'relatorios', 'busca', 'previsao')
+VIEWS_METAS = ('metas',)
+
+
+# ============== BACKENDS ==============
+
+class MemoryBackend:
+    """LRU com TTL em memória, thread-safe"""
+
+    # Só o próprio processo vê os dados e as invalidações
+    compartilhado = False
+
+    def __init__(self, max_items=2048):
+        self.max_items = max_items
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_items:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            value, expires = self._data.get(key, (0, None))
+            value += 1
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBackend:
+    """Adaptador para clientes compatíveis com redis-py (valores serializados com pickle)"""
+
+    compartilhado = True
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url):
+        import redis  # dependência opcional
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key):
+        raw = self.client.get(key)
+        return None if raw is None else pickle.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, pickle.dumps(value), ex=ttl)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def incr(self, key):
+        return int(self.client.incr(key))
+
+    def get_version(self, key):
+        raw = self.client.get(key)
+        return int(raw) if raw is not None else 0
+
+
+class NullBackend:
+    """Desliga o cache (sempre miss)"""
+
+    # Nada guardado, nada a invalidar em outro processo
+    compartilhado = True
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def incr(self, key):
+        return 0
+
+
+# ============== CACHE DE VIEWS ==============
+
+class ViewCache:
+    """Cache read-through por (usuario_id, view) com invalidação por versão"""
+
+    def __init__(self, backend, ttl=300, prefix='sf'):
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _count(self, view, campo):
+        with self._lock:
+            stats = self._stats.setdefault(view, {'hits': 0, 'misses': 0, 'invalidations': 0})
+            stats[campo] += 1
+
+    @property
+    def compartilhado(self):
+        """True se as invalidações deste processo valem para os outros (workers, agendadores)"""
+        return self.backend.compartilhado
+
+    def _version_key(self, usuario_id, view):
+        return f'{self.prefix}:versao:{view}:{usuario_id}'
+
+    def version(self, usuario_id, view):
+        """Versão atual dos dados da view do usuário"""
+        key = self._version_key(usuario_id, view)
+        if hasattr(self.backend, 'get_version'):
+            return self.backend.get_version(key)
+        return self.backend.get(key) or 0
+
+    def _key(self, usuario_id, view, variante):
+        versao = self.version(usuario_id, view)
+        return f'{self.prefix}:{view}:{usuario_id}:v{versao}:{variante}'
+
+    def get_or_load(self, usuario_id, view, loader, variante=''):
+        """
+        Retorna os dados da view do cache ou chama loader() e guarda o resultado.
+        `variante` diferencia entradas da mesma view (ex.: mês, período).
+        """
+        key = self._key(usuario_id, view, variante)
+        value = self.backend.get(key)
+        if value is not None:
+            self._count(view, 'hits')
+            return value
+
+        self._count(view, 'misses')
+        value = loader()
+        self.backend.set(key, value, self.ttl)
+        return value
+
+    def invalidate(self, usuario_id, *views):
+        """Descarta os dados em cache das views do usuário"""
+        for view in views:
+            self.backend.incr(self._version_key(usuario_id, view))
+            self._count(view, 'invalidations')
+        # Depois das versões: quem ler a marca nova já lê os dados novos
+        self.nova_marca(usuario_id)
+
+    def _marca_key(self, usuario_id):
+        return f'{self.prefix}:marca:{usuario_id}'
+
+    def marca(self, usuario_id):
+        """
+        Marca de alteração dos dados do usuário, renovada a cada invalidate():
+        (instante, token). O instante (segundos) cresce a cada renovação e vira
+        o Last-Modified; o token aleatório garante que a marca nunca repete uma
+        já entregue, mesmo se a chave expirar ou sair do LRU (ao contrário das
+        versões, que recomeçam do zero). None no NullBackend.
+        """
+        valor = self.backend.get(self._marca_key(usuario_id))
+        return valor if valor is not None else self.nova_marca(usuario_id)
+
+    def nova_marca(self, usuario_id):
+        """Renova a marca (ex.: dados da sessão mudaram sem passar pelo cache)"""
+        if isinstance(self.backend, NullBackend):
+            return None
+        key = self._marca_key(usuario_id)
+        anterior = self.backend.get(key)
+        instante = math.ceil(time.time())
+        if anterior is not None:
+            instante = max(instante, anterior[0] + 1)
+        valor = (instante, secrets.token_hex(4))
+        self.backend.set(key, valor, self.ttl)
+        return valor
+
+    def stats(self):
+        """Contadores de hit/miss/invalidação por view"""
+        with self._lock:
+            return {view: dict(valores) for view, valores in self._stats.items()}
+
+
+def criar_cache():
+    """Cria o ViewCache a partir das variáveis de ambiente"""
+    backend_nome = os.getenv('CACHE_BACKEND', 'memoria').lower()
+    ttl = int(os.getenv('CACHE_TTL', 300))
+
+    if backend_nome == 'redis':
+        backend = RedisBackend.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+    elif backend_nome == 'nenhum':
+        backend = NullBackend()
+    else:
+        backend = MemoryBackend(int(os.getenv('CACHE_MAX_ITENS', 2048)))
+
+    return ViewCache(backend, ttl=ttl)
@@ -0,0 +1,171 @@
+"""
+Cache HTTP Condicional e Compressão das Respostas
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Middleware (before_request/after_request) com duas funções:
+
+1. Páginas condicionais (dashboard, metas, relatórios): antes de executar a
+   rota, calcula o ETag a partir da marca de alteração do usuário
+   (ViewCache.marca, renovada pelas rotas de escrita via invalidate()) e do
+   que mais muda a página (usuário, modo, URL, data de hoje, versão do app).
+   Se o navegador já tem essa versão (If-None-Match, ou If-Modified-Since
+   contra o Last-Modified), responde 304 sem consultar o banco nem renderizar.
+   Páginas com mensagens flash pendentes nunca são condicionais.
+
+2. Compressão: respostas de texto (HTML, JSON, CSS, JS, CSV) a partir de
+   COMPRESSAO_MIN_BYTES saem com brotli (se o pacote opcional `brotli` estiver
+   instalado e o cliente aceitar) ou gzip. O ETag ganha o sufixo da
+   codificação (-gzip, -br), pois é outra representação; etag_confere()
+   aceita qualquer uma das variantes no If-None-Match.
+
+Só com CACHE_BACKEND=redis as páginas são condicionais: a marca precisa ser
+a mesma em todos os workers. Com o cache em memória cada worker tem a sua, e
+um worker que não atendeu a escrita responderia 304 com a página antiga. Com
+CACHE_BACKEND=nenhum não há marca. Nos dois casos a compressão continua.
+
+Configuração (.env):
+    COMPRESSAO_MIN_BYTES=1024
+    APP_VERSAO=...   (opcional; muda os ETags a cada deploy de templates)
+"""
+
+import gzip
+import hashlib
+import os
+import time
+from datetime import date, datetime, timezone
+
+from flask import Response, current_app, g, request, session
+
+try:
+    import brotli  # dependência opcional
+except ImportError:
+    brotli = None
+
+COMPRESSAO_MIN_BYTES = int(os.getenv('COMPRESSAO_MIN_BYTES', 1024))
+NIVEL_GZIP = 6
+NIVEL_BROTLI = 5
+TIPOS_COMPRIMIVEIS = {
+    'text/html', 'text/plain', 'text/css', 'text/csv', 'text/javascript',
+    'application/javascript', 'application/json', 'image/svg+xml',
+}
+CODIFICACOES = ('br', 'gzip')
+
+PAGINAS_CONDICIONAIS = ('dashboard', 'metas', 'relatorios')
+
+# Sem APP_VERSAO, cada processo novo (deploy, restart) gera ETags novos
+INICIO_APP = int(time.time())
+VERSAO_APP = os.getenv('APP_VERSAO') or str(INICIO_APP)
+
+
+def init_app(app, view_cache, paginas=PAGINAS_CONDICIONAIS):
+    """Registra o middleware; `paginas` são os endpoints GET condicionais"""
+    app.extensions['cache_http'] = {'view_cache': view_cache, 'paginas': set(paginas)}
+    app.before_request(responder_se_nao_modificado)
+    app.after_request(finalizar_resposta)
+
+
+# ============== VALIDADORES (ETAG / LAST-MODIFIED) ==============
+
+def etag_confere(etag):
+    """Tag do If-None-Match que corresponde a `etag` em qualquer codificação, ou None"""
+    for tag in (etag, *(f'{etag}-{codificacao}' for codificacao in CODIFICACOES)):
+        if request.if_none_match.contains_weak(tag):
+            return tag
+    return None
+
+
+def validadores_pagina(marca, usuario_id, hoje=None):
+    """
+    (etag, last_modified) da página atual para a marca de alteração do
+    usuário, (instante, token). O Last-Modified é o instante, mas nunca
+    anterior ao início do dia nem ao início do processo, que também mudam a página.
+    """
+    hoje = hoje or date.today()
+    chave = '|'.join(str(parte) for parte in (
+        VERSAO_APP, *marca, usuario_id, session.get('user_nome'), session.get('user_modo'),
+        request.endpoint, request.query_string.decode('latin-1'), hoje.isoformat(),
+    ))
+    etag = hashlib.blake2b(chave.encode('utf-8'), digest_size=16).hexdigest()
+    inicio_do_dia = datetime(hoje.year, hoje.month, hoje.day).timestamp()
+    modificado = datetime.fromtimestamp(max(marca[0], INICIO_APP, int(inicio_do_dia)), timezone.utc)
+    return etag, modificado
+
+
+def _privada(resposta):
+    """Dados do usuário: o navegador guarda, mas sempre revalida"""
+    resposta.headers['Cache-Control'] = 'private, no-cache'
+    resposta.vary.add('Cookie')
+    return resposta
+
+
+def responder_se_nao_modificado():
+    """before_request: 304 para páginas condicionais que o navegador já tem"""
+    config = current_app.extensions['cache_http']
+    if (request.method not in ('GET', 'HEAD') or request.endpoint not in config['paginas']
+            or 'user_id' not in session or session.get('_flashes')
+            or not config['view_cache'].compartilhado):
+        return None
+    marca = config['view_cache'].marca(session['user_id'])
+    if marca is None:
+        return None
+
+    etag, modificado = validadores_pagina(marca, session['user_id'])
+    g.validadores = (etag, modificado)
+    if request.if_none_match:
+        tag = etag_confere(etag)
+    elif request.if_modified_since and request.if_modified_since >= modificado:
+        tag = etag
+    else:
+        return None
+    if tag is None:
+        return None
+
+    resposta = Response(status=304)
+    resposta.set_etag(tag)
+    resposta.last_modified = modificado
+    return _privada(resposta)
+
+
+def finalizar_resposta(resposta):
+    """after_request: validadores nas páginas renderizadas e compressão"""
+    validadores = g.pop('validadores', None)
+    # Se a rota mexeu na sessão (ex.: flash exibido na página), a resposta não é reaproveitável
+    if validadores and resposta.status_code == 200 and not session.modified:
+        etag, modificado = validadores
+        resposta.set_etag(etag)
+        resposta.last_modified = modificado
+        _privada(resposta)
+    return comprimir(resposta)
+
+
+# ============== COMPRESSÃO ==============
+
+def codificacao_aceita():
+    """'br', 'gzip' ou None conforme o Accept-Encoding e o brotli instalado"""
+    if brotli is not None and request.accept_encodings.quality('br') > 0:
+        return 'br'
+    if request.accept_encodings.quality('gzip') > 0:
+        return 'gzip'
+    return None
+
+
+def comprimir(resposta):
+    """Comprime a resposta se o tipo, o tamanho e o cliente permitirem"""
+    if (resposta.status_code != 200 or resposta.direct_passthrough or resposta.is_streamed
+            or 'Content-Encoding' in resposta.headers or resposta.mimetype not in TIPOS_COMPRIMIVEIS):
+        return resposta
+    resposta.vary.add('Accept-Encoding')
+    codificacao = codificacao_aceita()
+    corpo = resposta.get_data()
+    if codificacao is None or len(corpo) < COMPRESSAO_MIN_BYTES:
+        return resposta
+
+    if codificacao == 'br':
+        resposta.set_data(brotli.compress(corpo, quality=NIVEL_BROTLI))
+    else:
+        resposta.set_data(gzip.compress(corpo, NIVEL_GZIP, mtime=0))
+    resposta.headers['Content-Encoding'] = codificacao
+    etag, fraco = resposta.get_etag()
+    if etag:
+        resposta.set_etag(f'{etag}-{codificacao}', fraco)
+    return resposta
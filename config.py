@@ -0,0 +1,21 @@
+"""
+Configurações compartilhadas
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Lidas das variáveis de ambiente (.env) e usadas pela aplicação e pelos
+scripts de linha de comando.
+"""
+
+import os
+from dotenv import load_dotenv
+
+# Carrega variáveis de ambiente
+load_dotenv()
+
+# Configuração do Banco de Dados
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'localhost'),
+    'user': os.getenv('DB_USER', 'root'),
+    'password': os.getenv('DB_PASSWORD', ''),
+    'database': os.getenv('DB_NAME', 'gestao_financeira')
+}
@@ -0,0 +1,422 @@
+"""
+Consultas Agregadas
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Cada consulta tem um construtor `sql_*` (retorna SQL e parâmetros) e uma
+função que a executa. Os filtros de data vêm de periodos.py e usam sempre
+intervalos semiabertos em (usuario_id, data), compatíveis com os índices de
+cobertura definidos em database_schema.sql. Os testes de plano (EXPLAIN)
+usam os mesmos construtores.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import periodos
+import resumo
+
+TIPOS_TRANSACAO = ('receita', 'despesa')
+
+
+# ============== FILTROS DE TRANSAÇÕES ==============
+
+def normalizar_filtros(inicio='', fim='', categoria='', tipo=''):
+    """
+    Valida os filtros vindos de formulários/query string (datas AAAA-MM-DD,
+    inclusivas). Retorna um dict serializável em JSON apenas com os filtros
+    preenchidos; as chaves são os próprios nomes dos parâmetros.
+    """
+    filtros = {}
+    datas = {}
+    for nome, valor in (('inicio', inicio), ('fim', fim)):
+        valor = (valor or '').strip()
+        if valor:
+            datas[nome] = date.fromisoformat(valor)
+            filtros[nome] = datas[nome].isoformat()
+    periodos.entre_datas(datas.get('inicio'), datas.get('fim'))  # valida a ordem
+
+    categoria = (categoria or '').strip()
+    if categoria:
+        filtros['categoria'] = categoria
+
+    tipo = (tipo or '').strip()
+    if tipo:
+        if tipo not in TIPOS_TRANSACAO:
+            raise ValueError(f'Tipo de transação inválido: {tipo}')
+        filtros['tipo'] = tipo
+    return filtros
+
+
+def filtro_transacoes(usuario_id, filtros=None):
+    """WHERE e parâmetros para os filtros normalizados (índice idx_usuario_data_cobertura)"""
+    filtros = filtros or {}
+    periodo = periodos.entre_datas(
+        date.fromisoformat(filtros['inicio']) if 'inicio' in filtros else None,
+        date.fromisoformat(filtros['fim']) if 'fim' in filtros else None,
+    )
+    where, params = periodos.filtro_usuario(usuario_id, periodo)
+    for campo in ('tipo', 'categoria'):
+        if filtros.get(campo):
+            where += f' AND {campo} = %s'
+            params += (filtros[campo],)
+    return where, params
+
+
+# ============== RELATÓRIOS (RESUMO POR CATEGORIA) ==============
+# Leem resumo_categoria (uma linha por mês, tipo e categoria): o custo depende
+# dos meses exibidos, não do número de transações. Os períodos são de meses
+# inteiros (periodos.periodo_relatorio).
+
+MESES_EVOLUCAO = 12
+
+
+def filtros_relatorio(args):
+    """
+    Filtros da página/API de relatórios a partir da query string (?periodo=
+    mes|trimestre|ano|personalizado&referencia=AAAA-MM&de=&ate=&tipo=&categoria=).
+    Tipo inválido vira 'despesa'; o período é validado por periodos.periodo_relatorio.
+    """
+    filtros = {
+        'periodo': args.get('periodo', 'mes'),
+        'referencia': args.get('referencia', '').strip(),
+        'de': args.get('de', '').strip(),
+        'ate': args.get('ate', '').strip(),
+        'tipo': args.get('tipo', 'despesa'),
+        'categoria': args.get('categoria', '').strip(),
+    }
+    if filtros['tipo'] not in TIPOS_TRANSACAO:
+        filtros['tipo'] = 'despesa'
+    return filtros
+
+
+def periodos_relatorio(periodo):
+    """
+    Períodos usados pela página: o escolhido, o anterior de mesmo tamanho, o
+    mesmo período do ano anterior e a janela do gráfico de evolução (o
+    período, estendido para trás até ter pelo menos MESES_EVOLUCAO meses).
+    """
+    evolucao = periodos.Periodo(
+        min(periodo.inicio, periodos.adicionar_meses(periodo.fim, -MESES_EVOLUCAO)), periodo.fim)
+    return {
+        'atual': periodo,
+        'anterior': periodos.anterior(periodo),
+        'ano_anterior': periodos.deslocar(periodo, -12),
+        'evolucao': evolucao,
+    }
+
+
+def sql_resumo_categoria(usuario_id, intervalos):
+    """
+    Linhas de resumo_categoria dos intervalos (já unidos, ver periodos.unir):
+    um range na chave primária (usuario_id, mes, ...) por intervalo, numa consulta.
+    """
+    trechos = []
+    params = (usuario_id,)
+    for intervalo in intervalos:
+        trecho, extra = intervalo.filtro('mes')
+        trechos.append(f'({trecho})')
+        params += extra
+    sql = f'''
+        SELECT mes, tipo, categoria, total, quantidade
+        FROM resumo_categoria
+        WHERE usuario_id = %s AND ({' OR '.join(trechos)})
+    '''
+    return sql, params
+
+
+def resumo_categoria(cursor, usuario_id, periodo):
+    """Linhas necessárias para montar_relatorio (atual, comparações e evolução)"""
+    intervalos = periodos.unir(periodos_relatorio(periodo).values())
+    cursor.execute(*sql_resumo_categoria(usuario_id, intervalos))
+    return cursor.fetchall()
+
+
+def _variacao(atual, base):
+    """Variação percentual (None quando não há base de comparação)"""
+    if not base:
+        return None
+    return round(float((atual - base) / abs(base) * 100), 1)
+
+
+def montar_relatorio(linhas, periodo, tipo='despesa', categoria=''):
+    """
+    Calcula a página de relatórios a partir das linhas de resumo_categoria, em
+    uma passada: totais por categoria do `tipo` no período com a comparação
+    com o período anterior e com o ano anterior, totais de receitas/despesas
+    e evolução mensal. `categoria` (opcional) restringe tudo a uma categoria.
+    A evolução também sai pivotada em `serie_mensal` (todos os meses da janela
+    em ordem crescente e uma lista de totais por tipo), pronta para gráficos.
+    """
+    faixas = periodos_relatorio(periodo)
+    comparacoes = ('atual', 'anterior', 'ano_anterior')
+    zero = Decimal('0')
+
+    por_categoria = {}
+    totais = {t: dict.fromkeys(comparacoes, zero) for t in TIPOS_TRANSACAO}
+    evolucao = {}
+    categorias = set()
+
+    for linha in linhas:
+        categorias.add(linha['categoria'])
+        if categoria and linha['categoria'] != categoria:
+            continue
+        mes = linha['mes']
+        if faixas['evolucao'].contem(mes):
+            chave = (mes.strftime('%Y-%m'), linha['tipo'])
+            evolucao[chave] = evolucao.get(chave, zero) + linha['total']
+        for comparacao in comparacoes:
+            if not faixas[comparacao].contem(mes):
+                continue
+            totais[linha['tipo']][comparacao] += linha['total']
+            if linha['tipo'] != tipo:
+                continue
+            item = por_categoria.setdefault(linha['categoria'], {
+                'categoria': linha['categoria'], 'quantidade': 0,
+                'total': zero, 'anterior': zero, 'ano_anterior': zero,
+            })
+            item['total' if comparacao == 'atual' else comparacao] += linha['total']
+            if comparacao == 'atual':
+                item['quantidade'] += linha['quantidade']
+
+    itens = sorted(por_categoria.values(), key=lambda i: (-i['total'], i['categoria']))
+    for item in itens:
+        item['variacao_anterior'] = _variacao(item['total'], item['anterior'])
+        item['variacao_ano'] = _variacao(item['total'], item['ano_anterior'])
+    for valores in totais.values():
+        valores['variacao_anterior'] = _variacao(valores['atual'], valores['anterior'])
+        valores['variacao_ano'] = _variacao(valores['atual'], valores['ano_anterior'])
+
+    meses = [mes.strftime('%Y-%m') for mes in faixas['evolucao'].meses()]
+    serie = {'meses': meses}
+    for t in TIPOS_TRANSACAO:
+        serie[t] = [evolucao.get((mes, t), zero) for mes in meses]
+
+    return {
+        'por_categoria': itens,
+        'totais': totais,
+        'evolucao_mensal': [{'mes': mes, 'tipo': t, 'total': total}
+                            for (mes, t), total in sorted(evolucao.items(), reverse=True)],
+        'serie_mensal': serie,
+        'categorias': sorted(categorias),
+        'rotulos': {nome: periodos.rotulo(faixa) for nome, faixa in faixas.items()},
+    }
+
+
+# ============== TRANSAÇÕES ==============
+
+def ultimas_transacoes(cursor, usuario_id, limite=10):
+    cursor.execute('''
+        SELECT * FROM transacoes
+        WHERE usuario_id = %s
+        ORDER BY data DESC, id DESC
+        LIMIT %s
+    ''', (usuario_id, limite))
+    return cursor.fetchall()
+
+
+def sql_gastos_fora_do_padrao(usuario_id, periodo):
+    """Anomalias já calculadas por anomalias.py (índice idx_usuario_mes)"""
+    trecho, params_periodo = periodo.filtro('a.mes')
+    sql = f'''
+        SELECT a.mes, a.categoria, a.valor, a.mediana, a.pontuacao,
+               t.descricao, t.data
+        FROM anomalias_gastos a
+        LEFT JOIN transacoes t ON t.id = a.transacao_id
+        WHERE a.usuario_id = %s AND {trecho}
+        ORDER BY a.mes DESC, a.pontuacao DESC
+    '''
+    return sql, (usuario_id,) + params_periodo
+
+
+def gastos_fora_do_padrao(cursor, usuario_id, periodo):
+    cursor.execute(*sql_gastos_fora_do_padrao(usuario_id, periodo))
+    return cursor.fetchall()
+
+
+# ============== HISTÓRICO PAGINADO (KEYSET) ==============
+
+def chave_transacao(transacao):
+    """Posição de uma transação na ordem (data DESC, id DESC), ex.: '2025-11-02_815'"""
+    return f"{transacao['data'].isoformat()}_{transacao['id']}"
+
+
+def ler_chave(chave):
+    """Converte a chave da URL em (data, id); ValueError se for inválida"""
+    data, separador, transacao_id = (chave or '').partition('_')
+    if not separador:
+        raise ValueError(f'Posição de página inválida: {chave}')
+    return date.fromisoformat(data), int(transacao_id)
+
+
+def sql_pagina_transacoes(usuario_id, filtros=None, apos=None, antes=None, limite=50):
+    """
+    Página do histórico por keyset em (data, id): em vez de OFFSET, a consulta
+    continua a partir da última linha vista, então qualquer página custa o
+    mesmo que a primeira (range scan em idx_usuario_data_cobertura, sem
+    filesort).
+    `apos` avança (mais antigas); `antes` volta (mais recentes).
+    Busca limite + 1 linhas para saber se existe mais uma página.
+    """
+    where, params = filtro_transacoes(usuario_id, filtros)
+    ordem = 'DESC'
+    if apos is not None:
+        data, transacao_id = apos
+        where += ' AND data <= %s AND (data < %s OR id < %s)'
+        params += (data, data, transacao_id)
+    elif antes is not None:
+        data, transacao_id = antes
+        where += ' AND data >= %s AND (data > %s OR id > %s)'
+        params += (data, data, transacao_id)
+        ordem = 'ASC'
+
+    sql = f'''
+        SELECT id, tipo, valor, descricao, categoria, data
+        FROM transacoes
+        WHERE {where}
+        ORDER BY data {ordem}, id {ordem}
+        LIMIT %s
+    '''
+    return sql, params + (limite + 1,)
+
+
+def pagina_transacoes(cursor, usuario_id, filtros=None, apos=None, antes=None, limite=50):
+    """
+    Retorna {'transacoes', 'proxima', 'anterior'}; 'proxima' e 'anterior'
+    são as chaves para os links de navegação (None quando não há página).
+    """
+    cursor.execute(*sql_pagina_transacoes(usuario_id, filtros, apos, antes, limite))
+    linhas = cursor.fetchall()
+    tem_mais = len(linhas) > limite
+    linhas = linhas[:limite]
+
+    if antes is not None:
+        linhas.reverse()
+        tem_proxima, tem_anterior = True, tem_mais
+    else:
+        tem_proxima, tem_anterior = tem_mais, apos is not None
+
+    return {
+        'transacoes': linhas,
+        'proxima': chave_transacao(linhas[-1]) if linhas and tem_proxima else None,
+        'anterior': chave_transacao(linhas[0]) if linhas and tem_anterior else None,
+    }
+
+
+# ============== DADOS DAS PÁGINAS ==============
+
+def dados_dashboard(cursor, usuario_id, hoje=None):
+    """Saldo, receitas/despesas do mês atual e últimas transações"""
+    saldo, mes_atual = resumo.obter_resumo_dashboard(cursor, usuario_id, hoje)
+    return {
+        'saldo': saldo,
+        'mes_atual': mes_atual,
+        'transacoes': ultimas_transacoes(cursor, usuario_id),
+    }
+
+
+def dados_relatorios(cursor, usuario_id, periodo, hoje=None):
+    """
+    Linhas de resumo_categoria do período (e das comparações) e gastos fora do
+    padrão dos últimos 3 meses. Os filtros de tipo e categoria ficam para
+    montar_relatorio, então o resultado pode ir para o cache por período.
+    """
+    return {
+        'linhas': resumo_categoria(cursor, usuario_id, periodo),
+        'gastos_fora_do_padrao': gastos_fora_do_padrao(cursor, usuario_id, periodos.ultimos_meses(3, hoje)),
+    }
+
+
+# ============== METAS ==============
+
+def sql_metas_usuario(usuario_id):
+    """Todas as metas do usuário em uma única leitura (índice idx_usuario_status)"""
+    sql = '''
+        SELECT id, titulo, descricao, categoria, valor_alvo, valor_atual,
+               status, data_inicio, data_limite, data_conclusao, cor
+        FROM metas
+        WHERE usuario_id = %s
+    '''
+    return sql, (usuario_id,)
+
+
+# Mesma ordem do antigo FIELD(status, 'ativa', 'concluida', 'cancelada')
+_ORDEM_STATUS = {'ativa': 1, 'concluida': 2, 'cancelada': 3}
+_CEM = Decimal(100)
+_ZERO = Decimal('0.0000')
+
+
+def progresso_meta(valor_atual, valor_alvo):
+    """Percentual atingido, limitado entre 0 e 100 (4 casas decimais)"""
+    if valor_alvo <= 0:
+        return _ZERO
+    return min(max(valor_atual / valor_alvo * _CEM, _ZERO), _CEM).quantize(_ZERO)
+
+
+def montar_metas(linhas, hoje=None, dias_proximas=7):
+    """
+    Calcula a página de metas a partir das linhas de sql_metas_usuario, em
+    uma passada: campos derivados de cada meta (valor_faltante, progresso,
+    atrasada, dias_restantes), estatísticas e metas com prazo próximo.
+    """
+    hoje = hoje or date.today()
+    janela = periodos.proximos_dias(dias_proximas, hoje)
+
+    metas_lista = []
+    proximas = []
+    total_metas = metas_ativas = metas_concluidas = 0
+    total_economizado = total_objetivo = Decimal(0)
+
+    for linha in linhas:
+        meta = dict(linha)
+        status = meta['status']
+        limite = meta['data_limite']
+        dias_restantes = (limite - hoje).days if limite is not None else None
+
+        valor_atual = meta['valor_atual'] or 0
+        meta['valor_faltante'] = meta['valor_alvo'] - valor_atual
+        meta['progresso'] = progresso_meta(valor_atual, meta['valor_alvo'])
+        meta['atrasada'] = int(status == 'ativa' and limite is not None and limite < hoje)
+        meta['dias_restantes'] = dias_restantes
+        metas_lista.append(meta)
+
+        total_metas += 1
+        total_economizado += valor_atual
+        if status == 'ativa':
+            metas_ativas += 1
+            total_objetivo += meta['valor_alvo']
+            if limite is not None and janela.contem(limite):
+                proximas.append({'id': meta['id'], 'titulo': meta['titulo'],
+                                 'data_limite': limite, 'dias_restantes': dias_restantes})
+        elif status == 'concluida':
+            metas_concluidas += 1
+
+    # Ativas primeiro; dentro de cada status, prazo mais próximo e sem prazo no fim
+    metas_lista.sort(key=lambda m: (_ORDEM_STATUS.get(m['status'], 0),
+                                    m['data_limite'] is None, m['data_limite'] or date.min))
+    proximas.sort(key=lambda m: m['data_limite'])
+
+    estatisticas = {
+        'total_metas': total_metas,
+        'metas_ativas': metas_ativas,
+        'metas_concluidas': metas_concluidas,
+        'total_economizado': float(total_economizado),
+        'total_objetivo': float(total_objetivo),
+    }
+    if estatisticas['total_objetivo'] > 0:
+        estatisticas['progresso_geral'] = (
+            estatisticas['total_economizado'] / estatisticas['total_objetivo'] * 100
+        )
+    else:
+        estatisticas['progresso_geral'] = 0.0
+
+    return {
+        'metas': metas_lista,
+        'estatisticas': estatisticas,
+        'metas_proximas': proximas,
+    }
+
+
+def dados_metas(cursor, usuario_id, hoje=None):
+    """Lista de metas, estatísticas e metas com prazo próximo em uma única consulta"""
+    cursor.execute(*sql_metas_usuario(usuario_id))
+    return montar_metas(cursor.fetchall(), hoje)
@@ -16,6 +16,27 @@ CREATE TABLE IF NOT EXISTS usuarios (
     INDEX idx_email (email)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Transações recorrentes: valores da transação, frequência e próxima data
+-- a lançar; o agendador (recorrencias.py) cria as ocorrências vencidas
+CREATE TABLE IF NOT EXISTS recorrencias (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    usuario_id INT NOT NULL,
+    tipo ENUM('receita', 'despesa') NOT NULL,
+    valor DECIMAL(10, 2) NOT NULL,
+    descricao VARCHAR(200) NOT NULL,
+    categoria VARCHAR(50) DEFAULT 'Outros',
+    frequencia ENUM('semanal', 'mensal', 'anual') NOT NULL,
+    data_inicio DATE NOT NULL,
+    data_fim DATE NULL,
+    proxima_execucao DATE NOT NULL,
+    ativa BOOLEAN NOT NULL DEFAULT TRUE,
+    criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE,
+    -- Regras vencidas de todos os usuários (agendador)
+    INDEX idx_ativa_proxima (ativa, proxima_execucao),
+    INDEX idx_usuario (usuario_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- Tabela de transações
 CREATE TABLE IF NOT EXISTS transacoes (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -26,10 +47,21 @@ CREATE TABLE IF NOT EXISTS transacoes (
     categoria VARCHAR(50) DEFAULT 'Outros',
     data DATE NOT NULL,
     data_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Regra que gerou a transação (NULL para lançamentos manuais)
+    recorrencia_id INT NULL,
     FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE,
-    INDEX idx_usuario_data (usuario_id, data),
+    FOREIGN KEY (recorrencia_id) REFERENCES recorrencias(id) ON DELETE SET NULL,
+    -- Uma ocorrência por regra e data: reexecuções do agendador não duplicam
+    UNIQUE KEY uk_recorrencia_data (recorrencia_id, data),
+    -- Índice de cobertura para intervalos de data por usuário (index-only scans),
+    -- também usado pela paginação e pelos filtros do histórico; os totais dos
+    -- relatórios vêm de resumo_categoria
+    INDEX idx_usuario_data_cobertura (usuario_id, data, tipo, categoria, valor),
     INDEX idx_tipo (tipo),
-    INDEX idx_categoria (categoria)
+    INDEX idx_categoria (categoria),
+    -- Busca textual em descrição e categoria (busca.py); a collation
+    -- utf8mb4_unicode_ci torna a busca insensível a acentos
+    FULLTEXT INDEX ft_descricao_categoria (descricao, categoria)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Tabela de metas financeiras (para futuras implementações)
@@ -79,6 +111,82 @@ CREATE TABLE IF NOT EXISTS metas (
     INDEX idx_data_limite (data_limite)
 );
 
+-- Extrato dos aportes em metas (um registro por aporte, ver aportes.py)
+CREATE TABLE IF NOT EXISTS aportes_meta (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    meta_id INT NOT NULL,
+    usuario_id INT NOT NULL,
+    valor DECIMAL(10, 2) NOT NULL,
+    origem VARCHAR(20) NOT NULL DEFAULT 'manual',
+    -- valor_atual da meta logo após o aporte
+    saldo_apos DECIMAL(10, 2) NOT NULL,
+    -- 1 no aporte que fez a meta atingir o alvo
+    concluiu BOOLEAN NOT NULL DEFAULT FALSE,
+    criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (meta_id) REFERENCES metas(id) ON DELETE CASCADE,
+    FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE,
+    INDEX idx_meta_id (meta_id, id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Resumo materializado: saldo acumulado por usuário
+-- Mantido por adicionar_transacao/excluir_transacao (ver resumo.py)
+CREATE TABLE IF NOT EXISTS resumo_usuario (
+    usuario_id INT PRIMARY KEY,
+    saldo DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Resumo materializado: receitas/despesas por usuário e mês (mes = primeiro dia)
+CREATE TABLE IF NOT EXISTS resumo_mensal (
+    usuario_id INT NOT NULL,
+    mes DATE NOT NULL,
+    receitas DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    despesas DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    -- Muda a cada transação incluída/excluída no mês (processos incrementais)
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (usuario_id, mes),
+    FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE,
+    INDEX idx_atualizado_em (atualizado_em)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Resumo materializado: soma e quantidade por usuário, mês, tipo e categoria
+-- (relatórios; categoria NULL em transacoes é gravada como 'Outros')
+CREATE TABLE IF NOT EXISTS resumo_categoria (
+    usuario_id INT NOT NULL,
+    mes DATE NOT NULL,
+    tipo ENUM('receita', 'despesa') NOT NULL,
+    categoria VARCHAR(50) NOT NULL,
+    total DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    quantidade INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (usuario_id, mes, tipo, categoria),
+    FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Gastos fora do padrão por categoria (gerados por anomalias.py)
+CREATE TABLE IF NOT EXISTS anomalias_gastos (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    usuario_id INT NOT NULL,
+    mes DATE NOT NULL,
+    categoria VARCHAR(50) NOT NULL,
+    -- NULL: total do mês na categoria; preenchido: uma transação
+    transacao_id INT NULL,
+    valor DECIMAL(14, 2) NOT NULL,
+    mediana DECIMAL(14, 2) NOT NULL,
+    limite DECIMAL(14, 2) NOT NULL,
+    -- Distância da mediana em unidades da escala robusta (MAD)
+    pontuacao DECIMAL(10, 2) NOT NULL,
+    FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE,
+    FOREIGN KEY (transacao_id) REFERENCES transacoes(id) ON DELETE CASCADE,
+    INDEX idx_usuario_mes (usuario_id, mes)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Marca da última execução de cada processo em lote
+CREATE TABLE IF NOT EXISTS controle_processamento (
+    processo VARCHAR(50) PRIMARY KEY,
+    marca TIMESTAMP NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- Inserir categorias padrão (opcional - dados de exemplo)
 INSERT INTO usuarios (nome, email, senha, modo_interface) VALUES
 ('Maria Silva', 'maria@email.com', 'scrypt:32768:8:1$x2KjN9wqZR5YF8nL$d5e8f9a0b1c2d3e4f5a6b7c8d9e0f1a2b3c4d5e6f7a8b9c0d1e2f3a4b5c6d7e8f9a0b1c2d3e4f5a6b7c8d9e0', 'simples'),
@@ -97,4 +205,29 @@ INSERT INTO transacoes (usuario_id, tipo, valor, descricao, categoria, data) VAL
 (2, 'despesa', 800.00, 'Fornecedor', 'Estoque', '2025-11-02'),
 (2, 'despesa', 450.00, 'Aluguel da loja', 'Moradia', '2025-11-03'),
 (2, 'receita', 2100.00, 'Vendas da semana', 'Vendas', '2025-11-05'),
-(2, 'despesa', 180.00, 'Conta de luz', 'Serviços', '2025-11-06');
\ No newline at end of file
+(2, 'despesa', 180.00, 'Conta de luz', 'Serviços', '2025-11-06');
+
+-- Popular os resumos a partir das transações de exemplo
+-- (equivalente a: python resumo.py --reconstruir)
+INSERT INTO resumo_usuario (usuario_id, saldo)
+SELECT usuario_id, SUM(CASE WHEN tipo = 'receita' THEN valor ELSE -valor END)
+FROM transacoes
+GROUP BY usuario_id;
+
+INSERT INTO resumo_mensal (usuario_id, mes, receitas, despesas)
+SELECT usuario_id,
+       DATE_SUB(data, INTERVAL DAYOFMONTH(data) - 1 DAY) AS mes,
+       SUM(CASE WHEN tipo = 'receita' THEN valor ELSE 0 END),
+       SUM(CASE WHEN tipo = 'despesa' THEN valor ELSE 0 END)
+FROM transacoes
+GROUP BY usuario_id, mes;
+
+INSERT INTO resumo_categoria (usuario_id, mes, tipo, categoria, total, quantidade)
+SELECT usuario_id,
+       DATE_SUB(data, INTERVAL DAYOFMONTH(data) - 1 DAY) AS mes,
+       tipo,
+       COALESCE(categoria, 'Outros') AS cat,
+       SUM(valor),
+       COUNT(*)
+FROM transacoes
+GROUP BY usuario_id, mes, tipo, cat;
@@ -0,0 +1,287 @@
+"""
+Pool de Conexões com o Banco de Dados
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Funcionalidades:
+- Pool limitado de conexões reutilizáveis (evita handshake a cada requisição)
+- Health check (ping) de conexões ociosas antes de entregá-las
+- Tempo máximo de vida por conexão (reciclagem)
+- Espera com timeout quando todas as conexões estão em uso
+- Estatísticas de uso (checkouts, esperas, tempo de espera, ativas/ociosas)
+- Integração com Flask: uma conexão por requisição, devolvida no teardown
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from flask import current_app, g
+
+
+class PoolTimeoutError(Exception):
+    """Nenhuma conexão ficou disponível dentro do tempo de espera"""
+
+
+class PooledConnection:
+    """
+    Proxy para uma conexão do pool.
+    Repassa todos os atributos para a conexão real; close() devolve ao pool.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._cursors = []
+        self._released = False
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def cursor(self, *args, **kwargs):
+        """Cria cursor e registra para fechamento automático na devolução"""
+        cursor = self._raw.cursor(*args, **kwargs)
+        self._cursors.append(cursor)
+        return cursor
+
+    def is_connected(self):
+        if self._released:
+            return False
+        return self._raw.is_connected()
+
+    def close(self):
+        """Devolve a conexão ao pool (não fecha a conexão real)"""
+        if not self._released:
+            self._pool.release(self)
+
+
+class ConnectionPool:
+    """Pool de conexões thread-safe com limite de tamanho"""
+
+    def __init__(self, factory, max_size=10, timeout=5.0, max_lifetime=3600.0,
+                 ping_interval=30.0):
+        """
+        factory: função sem argumentos que abre uma conexão nova
+        max_size: número máximo de conexões (ativas + ociosas)
+        timeout: segundos de espera por uma conexão livre
+        max_lifetime: segundos até a conexão ser reciclada
+        ping_interval: conexões ociosas por mais tempo que isso recebem ping
+        """
+        if max_size < 1:
+            raise ValueError('max_size deve ser pelo menos 1')
+
+        self.factory = factory
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_interval = ping_interval
+
+        self._lock = threading.Condition()
+        self._reset_state()
+
+    def _reset_state(self):
+        self._pid = os.getpid()
+        self._idle = deque()
+        self._total = 0
+        self._active = 0
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'timeouts': 0,
+            'created': 0,
+            'discarded': 0,
+        }
+
+    def _check_fork(self):
+        """Após fork (ex.: workers do gunicorn) as conexões herdadas são descartadas"""
+        if self._pid != os.getpid():
+            self._reset_state()
+
+    # ============== CHECKOUT / DEVOLUÇÃO ==============
+
+    def acquire(self, timeout=None):
+        """Obtém uma conexão do pool, esperando até `timeout` segundos"""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None
+
+        with self._lock:
+            self._check_fork()
+            while True:
+                conn = self._pop_idle()
+                if conn is not None:
+                    break
+
+                if self._total < self.max_size:
+                    # Reserva a vaga e abre a conexão fora do lock
+                    self._total += 1
+                    conn = None
+                    break
+
+                if deadline is None:
+                    deadline = time.monotonic() + timeout
+                    self._stats['waits'] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    self._stats['wait_time'] += timeout
+                    raise PoolTimeoutError(
+                        f'Nenhuma conexão disponível após {timeout:.1f}s '
+                        f'(pool com {self.max_size} conexões)'
+                    )
+                self._lock.wait(remaining)
+
+            if deadline is not None:
+                self._stats['wait_time'] += max(0.0, time.monotonic() - (deadline - timeout))
+
+        if conn is None:
+            conn = self._create()
+        elif not self._healthy(conn):
+            self._discard(conn)
+            conn = self._create()
+
+        with self._lock:
+            self._active += 1
+            self._stats['checkouts'] += 1
+
+        conn._released = False
+        return conn
+
+    def release(self, conn):
+        """Devolve a conexão ao pool, desfazendo transações pendentes"""
+        conn._released = True
+        reusable = self._reset_connection(conn)
+
+        with self._lock:
+            if conn._pool is not self or self._pid != os.getpid():
+                return
+            self._active -= 1
+            if reusable and not self._expired(conn):
+                conn.last_used = time.monotonic()
+                self._idle.append(conn)
+            else:
+                self._total -= 1
+                self._stats['discarded'] += 1
+                self._close_raw(conn)
+            self._lock.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Context manager: `with pool.connection() as conn: ...`"""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # ============== AUXILIARES ==============
+
+    def _pop_idle(self):
+        while self._idle:
+            conn = self._idle.pop()
+            if self._expired(conn):
+                self._total -= 1
+                self._stats['discarded'] += 1
+                self._close_raw(conn)
+                continue
+            return conn
+        return None
+
+    def _create(self):
+        try:
+            raw = self.factory()
+        except Exception:
+            with self._lock:
+                self._total -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            self._stats['created'] += 1
+        return PooledConnection(self, raw)
+
+    def _discard(self, conn):
+        self._close_raw(conn)
+        with self._lock:
+            self._stats['discarded'] += 1
+
+    def _expired(self, conn):
+        return (self.max_lifetime is not None
+                and time.monotonic() - conn.created_at > self.max_lifetime)
+
+    def _healthy(self, conn):
+        """Ping apenas em conexões ociosas há mais de ping_interval segundos"""
+        if time.monotonic() - conn.last_used < self.ping_interval:
+            return True
+        try:
+            conn._raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset_connection(conn):
+        try:
+            for cursor in conn._cursors:
+                cursor.close()
+            conn._cursors.clear()
+            if getattr(conn._raw, 'in_transaction', True):
+                conn._raw.rollback()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_raw(conn):
+        try:
+            conn._raw.close()
+        except Exception:
+            pass
+
+    def close_all(self):
+        """Fecha todas as conexões ociosas"""
+        with self._lock:
+            while self._idle:
+                conn = self._idle.pop()
+                self._total -= 1
+                self._close_raw(conn)
+
+    def stats(self):
+        """Retorna estatísticas de uso do pool"""
+        with self._lock:
+            dados = dict(self._stats)
+            dados['wait_time'] = round(dados['wait_time'], 6)
+            dados['active'] = self._active
+            dados['idle'] = len(self._idle)
+            dados['max_size'] = self.max_size
+            return dados
+
+
+# ============== INTEGRAÇÃO COM FLASK ==============
+
+def init_app(app, pool):
+    """Registra o pool na aplicação e devolve a conexão ao fim de cada requisição"""
+    app.extensions['db_pool'] = pool
+    app.teardown_appcontext(close_db)
+
+
+def get_db():
+    """Conexão do pool vinculada à requisição atual"""
+    if 'db' not in g:
+        g.db = current_app.extensions['db_pool'].acquire()
+    return g.db
+
+
+def close_db(exc=None):
+    """Devolve a conexão da requisição ao pool"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        conn.close()
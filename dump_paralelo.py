@@ -0,0 +1,365 @@
+"""
+Dump Paralelo do Banco (backup com --jobs N)
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Alternativa ao mysqldump único quando transacoes fica grande:
+
+1. Snapshot consistente: com FLUSH TABLES WITH READ LOCK mantido só enquanto
+   as N conexões abrem START TRANSACTION WITH CONSISTENT SNAPSHOT, todas
+   leem o banco no mesmo instante. Sem o privilégio RELOAD, as transações
+   são abertas em sequência e um aviso vai para o log (uma escrita entre
+   elas pode aparecer em uma conexão e não em outra).
+2. Partes: tabelas com chave primária inteira são divididas em faixas de
+   `linhas_por_parte` ids; as demais vão inteiras. As tabelas com mais
+   partes (transacoes) são distribuídas primeiro.
+3. Cada conexão roda em uma thread: lê a parte, gera INSERTs em lotes e
+   comprime a parte (zstd, se o pacote opcional `zstandard` estiver
+   instalado, senão gzip; os dois liberam o GIL). A compressão roda nas
+   N threads; o ZIP só guarda as partes prontas (ZIP_STORED), em
+   banco/<tabela>/<nnnnnn>.sql.zst|.sql.gz. No repositório deduplicado as
+   partes vão em .sql puro: ele corta e comprime os pedaços, e uma parte
+   comprimida antes mudaria inteira com uma única linha alterada.
+
+O esquema (tabelas, triggers, rotinas e eventos) fica com o mysqldump
+--no-data, em banco/esquema.sql (ver backup_automatico.py).
+"""
+
+import gzip
+import io
+import logging
+import queue
+import threading
+import time
+import zipfile
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+
+from mysql.connector.conversion import MySQLConverter
+
+try:
+    import zstandard  # dependência opcional
+except ImportError:
+    zstandard = None
+
+PREFIXO = 'banco/'
+MEMBRO_ESQUEMA = PREFIXO + 'esquema.sql'
+LINHAS_POR_PARTE = 200000
+LINHAS_POR_INSERT = 1000
+NIVEL_GZIP = 6
+NIVEL_ZSTD = 3
+TIPOS_INTEIROS = {'tinyint', 'smallint', 'mediumint', 'int', 'bigint'}
+
+# Cabeçalho de cada parte: a ordem de restauração das partes não importa
+CABECALHO = (b"SET NAMES utf8mb4;\n"
+             b"SET time_zone = '+00:00';\n"
+             b"SET FOREIGN_KEY_CHECKS = 0;\n"
+             b"SET UNIQUE_CHECKS = 0;\n")
+
+# Mesmo escape do mysqldump/MySQLConverter para literais de texto
+ESCAPES = str.maketrans({'\\': '\\\\', '\n': '\\n', '\r': '\\r', "'": "\\'", '"': '\\"',
+                         '\0': '\\0', '\x1a': '\\Z'})
+
+Tabela = namedtuple('Tabela', 'nome chave')
+Parte = namedtuple('Parte', 'tabela chave numero inicio fim')
+
+logger = logging.getLogger('backup_automatico')
+
+
+# ============== COMPRESSÃO ==============
+
+def extensao():
+    """Extensão das partes com o codec disponível"""
+    return 'sql.zst' if zstandard is not None else 'sql.gz'
+
+
+def comprimir(dados):
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=NIVEL_ZSTD).compress(dados)
+    # mtime=0: a mesma parte gera sempre os mesmos bytes (deduplicada no repositório)
+    return gzip.compress(dados, NIVEL_GZIP, mtime=0)
+
+
+def abrir_parte(arquivo, nome):
+    """Leitor descomprimido de uma parte (arquivo binário já aberto)"""
+    if nome.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError(f'{nome}: instale o pacote zstandard para restaurar este backup')
+        return zstandard.ZstdDecompressor().stream_reader(arquivo, closefd=True)
+    if nome.endswith('.gz'):
+        return gzip.GzipFile(fileobj=arquivo, mode='rb')
+    return arquivo
+
+
+class LeituraEncadeada(io.RawIOBase):
+    """Arquivo só de leitura com o conteúdo dos arquivos de um iterador, abertos um de cada vez"""
+
+    def __init__(self, arquivos):
+        self.arquivos = iter(arquivos)
+        self.atual = None
+
+    def readable(self):
+        return True
+
+    def readinto(self, destino):
+        while True:
+            if self.atual is None:
+                self.atual = next(self.arquivos, None)
+                if self.atual is None:
+                    return 0
+            dados = self.atual.read(len(destino))
+            if dados:
+                destino[:len(dados)] = dados
+                return len(dados)
+            self.atual.close()
+            self.atual = None
+
+    def close(self):
+        if self.atual is not None:
+            self.atual.close()
+            self.atual = None
+        super().close()
+
+
+def ler_banco(zipf):
+    """Dump de um backup paralelo como um único arquivo SQL: esquema e depois as partes"""
+    partes = sorted(nome for nome in zipf.namelist()
+                    if nome.startswith(PREFIXO) and nome != MEMBRO_ESQUEMA)
+    return LeituraEncadeada(abrir_parte(zipf.open(nome), nome) for nome in [MEMBRO_ESQUEMA] + partes)
+
+
+# ============== SNAPSHOT E PARTES ==============
+
+def abrir_snapshots(conectar, quantidade, ao_abrir=None):
+    """
+    Abre `quantidade` conexões, todas dentro de transações que enxergam o
+    mesmo snapshot. Retorna (conexoes, travado): travado=False quando não
+    foi possível usar FLUSH TABLES WITH READ LOCK. `ao_abrir(cursor)`, se
+    dado, roda na conexão coordenadora logo depois de abrir os snapshots,
+    ainda com o lock (ex.: ler a posição do binlog).
+    """
+    coordenador = conectar()
+    cursor = coordenador.cursor()
+    try:
+        cursor.execute('FLUSH TABLES WITH READ LOCK')
+        travado = True
+    except Exception as e:
+        logger.warning(f"   ⚠ Sem FLUSH TABLES WITH READ LOCK ({e}); snapshots abertos em sequência")
+        travado = False
+
+    conexoes = []
+    try:
+        for _ in range(quantidade):
+            conexao = conectar()
+            cursor_conexao = conexao.cursor()
+            cursor_conexao.execute("SET SESSION time_zone = '+00:00'")
+            cursor_conexao.execute('SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+            cursor_conexao.execute('START TRANSACTION WITH CONSISTENT SNAPSHOT')
+            cursor_conexao.close()
+            conexoes.append(conexao)
+        if ao_abrir is not None:
+            ao_abrir(cursor)
+    except Exception:
+        for conexao in conexoes:
+            conexao.close()
+        raise
+    finally:
+        if travado:
+            cursor.execute('UNLOCK TABLES')
+        cursor.close()
+        coordenador.close()
+    return conexoes, travado
+
+
+def listar_tabelas(cursor):
+    """Tabelas do banco com a chave primária usada para dividir em partes (None se não inteira)"""
+    cursor.execute("""
+        SELECT t.TABLE_NAME, MIN(k.COLUMN_NAME), COUNT(k.COLUMN_NAME), MIN(c.DATA_TYPE)
+        FROM information_schema.TABLES t
+        LEFT JOIN information_schema.KEY_COLUMN_USAGE k
+               ON k.TABLE_SCHEMA = t.TABLE_SCHEMA AND k.TABLE_NAME = t.TABLE_NAME
+              AND k.CONSTRAINT_NAME = 'PRIMARY'
+        LEFT JOIN information_schema.COLUMNS c
+               ON c.TABLE_SCHEMA = k.TABLE_SCHEMA AND c.TABLE_NAME = k.TABLE_NAME
+              AND c.COLUMN_NAME = k.COLUMN_NAME
+        WHERE t.TABLE_SCHEMA = DATABASE() AND t.TABLE_TYPE = 'BASE TABLE'
+        GROUP BY t.TABLE_NAME
+        ORDER BY t.TABLE_NAME
+    """)
+    return [Tabela(nome, coluna if quantidade == 1 and tipo in TIPOS_INTEIROS else None)
+            for nome, coluna, quantidade, tipo in cursor.fetchall()]
+
+
+def planejar_partes(cursor, tabelas, linhas_por_parte=LINHAS_POR_PARTE):
+    """Faixas [inicio, fim) de ids de cada tabela; tabelas com mais partes primeiro"""
+    por_tabela = []
+    for tabela in tabelas:
+        faixas = [(None, None)]
+        if tabela.chave:
+            cursor.execute(f'SELECT MIN(`{tabela.chave}`), MAX(`{tabela.chave}`) FROM `{tabela.nome}`')
+            menor, maior = cursor.fetchone()
+            if menor is not None:
+                faixas = [(inicio, min(inicio + linhas_por_parte, maior + 1))
+                          for inicio in range(menor, maior + 1, linhas_por_parte)]
+        por_tabela.append([Parte(tabela.nome, tabela.chave, numero, inicio, fim)
+                           for numero, (inicio, fim) in enumerate(faixas, 1)])
+    por_tabela.sort(key=len, reverse=True)
+    return [parte for partes in por_tabela for parte in partes]
+
+
+def literal_sql(valor, _conversor=MySQLConverter('utf8mb4', True)):
+    """Valor Python como literal SQL (texto); caminho rápido para os tipos das tabelas do sistema"""
+    tipo = type(valor)
+    if valor is None:
+        return 'NULL'
+    if tipo is int:
+        return str(valor)
+    if tipo is str:
+        return "'" + valor.translate(ESCAPES) + "'"
+    if tipo is Decimal or tipo is date:
+        return f"'{valor}'"
+    if tipo is datetime:
+        return f"'{valor.isoformat(' ')}'"
+    # Demais tipos (bytes, float, time, timedelta...): conversor do mysql-connector
+    return bytes(_conversor.quote(_conversor.escape(_conversor.to_mysql(valor)))).decode('utf-8', 'surrogateescape')
+
+
+def sql_parte(cursor, parte, linhas_por_insert=LINHAS_POR_INSERT, comando='INSERT'):
+    """
+    (SQL da parte com INSERTs (ou `comando`) de até `linhas_por_insert` linhas,
+    quantidade de linhas). Com chave, cada INSERT cobre uma faixa fixa de
+    `linhas_por_insert` ids: excluir uma linha só muda o INSERT dela, e os
+    seguintes saem iguais aos do backup anterior (deduplicados no repositório).
+    """
+    sql = f'SELECT * FROM `{parte.tabela}`'
+    parametros = ()
+    if parte.chave and parte.inicio is not None:
+        sql += f' WHERE `{parte.chave}` >= %s AND `{parte.chave}` < %s ORDER BY `{parte.chave}`'
+        parametros = (parte.inicio, parte.fim)
+    cursor.execute(sql, parametros)
+
+    nomes = [coluna[0] for coluna in cursor.description]
+    indice_chave = nomes.index(parte.chave) if parametros and parte.chave in nomes else None
+    colunas = ', '.join(f'`{nome}`' for nome in nomes)
+    inicio_insert = f'{comando} INTO `{parte.tabela}` ({colunas}) VALUES\n'
+
+    saida = [CABECALHO]
+    total = 0
+
+    def gravar(linhas):
+        valores = ['(' + ', '.join(map(literal_sql, linha)) + ')' for linha in linhas]
+        saida.append((inicio_insert + ',\n'.join(valores) + ';\n').encode('utf-8', 'surrogateescape'))
+
+    pendentes = []
+    while True:
+        linhas = cursor.fetchmany(linhas_por_insert)
+        if not linhas:
+            break
+        total += len(linhas)
+        if indice_chave is None:
+            gravar(linhas)
+            continue
+        # Corta onde a faixa de ids muda (id // linhas_por_insert)
+        inicio = 0
+        faixa = pendentes[0][indice_chave] // linhas_por_insert if pendentes else None
+        for i, linha in enumerate(linhas):
+            atual = linha[indice_chave] // linhas_por_insert
+            if atual != faixa:
+                if i > inicio or pendentes:
+                    gravar(pendentes + linhas[inicio:i])
+                    pendentes = []
+                inicio, faixa = i, atual
+        pendentes += linhas[inicio:]
+    if pendentes:
+        gravar(pendentes)
+    return b''.join(saida), total
+
+
+def soma_parte(cursor, parte, coluna):
+    """SUM(`coluna`) das linhas da parte (tabela inteira sem faixa), como Decimal"""
+    sql = f'SELECT COALESCE(SUM(`{coluna}`), 0) FROM `{parte.tabela}`'
+    parametros = ()
+    if parte.chave and parte.inicio is not None:
+        sql += f' WHERE `{parte.chave}` >= %s AND `{parte.chave}` < %s'
+        parametros = (parte.inicio, parte.fim)
+    cursor.execute(sql, parametros)
+    return Decimal(cursor.fetchone()[0])
+
+
+# ============== DUMP ==============
+
+def dump_paralelo(conectar, zipf, jobs, linhas_por_parte=LINHAS_POR_PARTE, comprimido=True, somar=None):
+    """
+    Grava as partes de todas as tabelas em `zipf` usando `jobs` conexões.
+    Com comprimido=False as partes vão em .sql puro (destino que comprime
+    sozinho, como o repositório deduplicado). `somar` ({tabela: coluna}):
+    soma a coluna de cada parte na conexão que a leu, no mesmo snapshot.
+    Retorna estatísticas: partes, linhas, bytes_sql, bytes_comprimidos, travado,
+    tabelas (linhas por tabela) e somas (por tabela de `somar`).
+    """
+    somar = somar or {}
+    conexoes, travado = abrir_snapshots(conectar, jobs)
+    try:
+        cursor = conexoes[0].cursor()
+        partes = planejar_partes(cursor, listar_tabelas(cursor), linhas_por_parte)
+        cursor.close()
+
+        pendentes = queue.Queue()
+        for parte in partes:
+            pendentes.put(parte)
+        # Limita as partes prontas em memória esperando o ZIP
+        prontas = queue.Queue(maxsize=2 * jobs)
+        parar = threading.Event()
+
+        def trabalhador(conexao):
+            cursor = conexao.cursor()
+            try:
+                while not parar.is_set():
+                    try:
+                        parte = pendentes.get_nowait()
+                    except queue.Empty:
+                        return
+                    sql, linhas = sql_parte(cursor, parte)
+                    soma = soma_parte(cursor, parte, somar[parte.tabela]) if parte.tabela in somar else None
+                    prontas.put((parte, comprimir(sql) if comprimido else sql, len(sql), linhas, soma))
+            except Exception as e:
+                prontas.put(e)
+            finally:
+                cursor.close()
+
+        threads = [threading.Thread(target=trabalhador, args=(conexao,), daemon=True) for conexao in conexoes]
+        for thread in threads:
+            thread.start()
+
+        sufixo = extensao() if comprimido else 'sql'
+        estatisticas = {'partes': len(partes), 'linhas': 0, 'bytes_sql': 0, 'bytes_comprimidos': 0,
+                        'travado': travado, 'tabelas': dict.fromkeys((parte.tabela for parte in partes), 0),
+                        'somas': dict.fromkeys(somar, Decimal(0))}
+        try:
+            for _ in partes:
+                item = prontas.get()
+                if isinstance(item, Exception):
+                    raise item
+                parte, dados, tamanho, linhas, soma = item
+                info = zipfile.ZipInfo(f'{PREFIXO}{parte.tabela}/{parte.numero:06d}.{sufixo}',
+                                       time.localtime()[:6])
+                info.compress_type = zipfile.ZIP_STORED
+                zipf.writestr(info, dados)
+                estatisticas['linhas'] += linhas
+                estatisticas['tabelas'][parte.tabela] += linhas
+                if soma is not None:
+                    estatisticas['somas'][parte.tabela] += soma
+                estatisticas['bytes_sql'] += tamanho
+                estatisticas['bytes_comprimidos'] += len(dados)
+        finally:
+            parar.set()
+            # Libera quem estiver bloqueado em prontas.put() depois de um erro
+            while any(thread.is_alive() for thread in threads):
+                try:
+                    prontas.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+        return estatisticas
+    finally:
+        for conexao in conexoes:
+            conexao.close()
@@ -0,0 +1,43 @@
+@echo off
+chcp 65001 >nul
+
+echo ========================================
+echo 🔁 TRANSAÇÕES RECORRENTES - Gestão Financeira
+echo ========================================
+echo.
+
+REM ---------------------------------------------------------
+REM 1. Ir para a pasta do projeto (a mesma deste arquivo)
+REM ---------------------------------------------------------
+cd /d "%~dp0"
+
+REM ---------------------------------------------------------
+REM 2. Ativar o ambiente virtual
+REM ---------------------------------------------------------
+if exist ".venv\Scripts\activate.bat" (
+    echo 🔄 Ativando ambiente virtual...
+    call ".venv\Scripts\activate.bat"
+) else (
+    echo ⚠️ Ambiente virtual NÃO encontrado!
+)
+
+echo.
+echo 📦 Lançando ocorrências vencidas...
+echo.
+
+REM ---------------------------------------------------------
+REM 3. Executar o agendador (log em logs\recorrencias.log)
+REM    Sem pause: roda sem ninguém na frente do computador
+REM ---------------------------------------------------------
+python "recorrencias.py" --executar
+
+REM ---------------------------------------------------------
+REM 4. Gastos fora do padrão (só os meses alterados desde a
+REM    última execução, log em logs\anomalias.log)
+REM ---------------------------------------------------------
+python "anomalias.py" --executar
+
+echo.
+echo ========================================
+echo ✅ PROCESSO CONCLUÍDO
+echo ========================================
@@ -0,0 +1,197 @@
+"""
+Exportação de Transações em Streaming
+Projeto: Gestão Financeira - Simplifica Finanças
+
+As linhas são lidas do MySQL com cursor não bufferizado (fetchmany em lotes)
+e escritas direto em um arquivo .xlsx gerado como stream: o ZIP é montado
+sobre um buffer write-only que é esvaziado a cada lote e enviado para a
+resposta. A memória usada fica constante, independente do tamanho do
+histórico do usuário.
+"""
+
+import re
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+# Colunas exportadas (mesma ordem do SELECT)
+COLUNAS_TRANSACOES = ['tipo', 'categoria', 'descricao', 'valor', 'data']
+
+SQL_TRANSACOES = '''
+    SELECT tipo, categoria, descricao, valor, data
+    FROM transacoes
+    WHERE {where}
+    ORDER BY data DESC, id DESC
+'''
+
+
+# ============== LEITURA EM LOTES ==============
+
+def abrir_cursor_transacoes(conn, where, params):
+    """Executa o SELECT da exportação em um cursor não bufferizado"""
+    cursor = conn.cursor(buffered=False)
+    cursor.execute(SQL_TRANSACOES.format(where=where), params)
+    return cursor
+
+
+def iterar_lotes(cursor, tamanho_lote=1000):
+    """Gera as linhas do cursor buscando `tamanho_lote` por vez"""
+    while True:
+        lote = cursor.fetchmany(tamanho_lote)
+        if not lote:
+            break
+        yield from lote
+
+
+# ============== XLSX EM STREAMING ==============
+
+class _SaidaStream:
+    """Destino write-only do ZipFile; os bytes são retirados com drenar()"""
+
+    def __init__(self):
+        self._partes = []
+        self._posicao = 0
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self._posicao
+
+    def flush(self):
+        pass
+
+    def drenar(self):
+        dados = b''.join(self._partes)
+        self._partes.clear()
+        return dados
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{nome}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# Estilos: 0 = padrão, 1 = cabeçalho em negrito, 2 = número com 2 casas
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border/></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '<xf numFmtId="4" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+# Caracteres de controle não permitidos em XML 1.0
+_INVALIDOS_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _coluna(indice):
+    """0 -> A, 1 -> B, ..."""
+    letras = ''
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _celula(ref, valor, estilo=0):
+    if valor is None:
+        return ''
+    if isinstance(valor, (int, float, Decimal)):
+        estilo = estilo or 2
+        return f'<c r="{ref}" s="{estilo}"><v>{valor}</v></c>'
+    if hasattr(valor, 'strftime'):
+        valor = valor.strftime('%d/%m/%Y')
+    texto = escape(_INVALIDOS_XML.sub('', str(valor)))
+    return f'<c r="{ref}" t="inlineStr" s="{estilo}"><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def _linha(numero, valores, refs, estilo=0):
+    celulas = ''.join(_celula(f'{ref}{numero}', valor, estilo) for ref, valor in zip(refs, valores))
+    return f'<row r="{numero}">{celulas}</row>'.encode('utf-8')
+
+
+def gerar_xlsx(colunas, linhas, nome_planilha='Transacoes', linhas_por_envio=500):
+    """
+    Gera um arquivo .xlsx em pedaços de bytes, consumindo `linhas` sob demanda.
+    Datas são escritas como texto dd/mm/aaaa; números com 2 casas decimais.
+    """
+    saida = _SaidaStream()
+    refs = [_coluna(i) for i in range(len(colunas))]
+
+    with zipfile.ZipFile(saida, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        zf.writestr('_rels/.rels', _RELS)
+        zf.writestr('xl/workbook.xml', _WORKBOOK.format(nome=escape(nome_planilha)))
+        zf.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        zf.writestr('xl/styles.xml', _STYLES)
+
+        with zf.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as planilha:
+            planilha.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b'<cols><col min="1" max="3" width="22" customWidth="1"/>'
+                b'<col min="4" max="5" width="14" customWidth="1"/></cols>'
+                b'<sheetData>'
+            )
+            planilha.write(_linha(1, colunas, refs, estilo=1))
+
+            for numero, valores in enumerate(linhas, start=2):
+                planilha.write(_linha(numero, valores, refs))
+                if numero % linhas_por_envio == 0:
+                    dados = saida.drenar()
+                    if dados:
+                        yield dados
+
+            planilha.write(b'</sheetData></worksheet>')
+
+    yield saida.drenar()
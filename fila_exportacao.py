@@ -0,0 +1,480 @@
+"""
+Fila de Exportações em Segundo Plano
+Projeto: Gestão Financeira - Simplifica Finanças
+
+As rotas de exportação apenas registram uma tarefa (usuário, formato,
+filtros) numa fila local em SQLite e respondem na hora. Um grupo de
+processos trabalhadores retira as tarefas da fila, gera o arquivo
+(Excel ou PDF, em streaming) no diretório de exportações e marca a tarefa
+como concluída; o usuário acompanha o status e baixa o arquivo pronto.
+
+- Limite de tarefas em andamento por usuário (pendentes + processando)
+- Arquivos concluídos (e tarefas com erro) são apagados após a retenção
+- Tarefas presas em 'processando' cujo trabalhador não existe mais voltam
+  para a fila, até EXPORTACAO_TENTATIVAS vezes; depois ficam com erro (uma
+  exportação que derruba o trabalhador não é repetida para sempre)
+- A manutenção (trabalhadores encerrados substituídos, recuperação e
+  retenção) roda numa thread do processo que inicia os trabalhadores, tanto
+  no app.py quanto neste script
+- Cada trabalhador reaproveita uma conexão MySQL e encerra a transação de
+  leitura (rollback) ao fim de cada tarefa, para a próxima ver dados atuais
+
+Configuração (.env):
+    EXPORTACAO_MODO=fila | direto
+    EXPORTACAO_DIR=exports
+    EXPORTACAO_FILA=exports/fila.sqlite3
+    EXPORTACAO_LIMITE_USUARIO=2
+    EXPORTACAO_RETENCAO_HORAS=24
+    EXPORTACAO_WORKERS=2
+    EXPORTACAO_TENTATIVAS=3
+
+Uso (junto com o gunicorn):
+    python fila_exportacao.py --workers 2
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+
+import consultas
+import exportacao
+import relatorio_pdf
+
+Formato = namedtuple('Formato', ['extensao', 'mimetype', 'prefixo', 'nome'])
+
+FORMATOS = {
+    'excel': Formato('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                     'extrato', 'Excel'),
+    'pdf': Formato('pdf', 'application/pdf', 'relatorio', 'PDF'),
+}
+
+PENDENTE = 'pendente'
+PROCESSANDO = 'processando'
+CONCLUIDO = 'concluido'
+ERRO = 'erro'
+
+_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS tarefas (
+        id TEXT PRIMARY KEY,
+        usuario_id INTEGER NOT NULL,
+        formato TEXT NOT NULL,
+        filtros TEXT NOT NULL DEFAULT '{}',
+        status TEXT NOT NULL DEFAULT 'pendente',
+        arquivo TEXT,
+        tamanho INTEGER,
+        erro TEXT,
+        criado_em REAL NOT NULL,
+        iniciado_em REAL,
+        concluido_em REAL,
+        pid INTEGER,
+        tentativas INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS idx_tarefas_status ON tarefas (status, criado_em);
+    CREATE INDEX IF NOT EXISTS idx_tarefas_usuario ON tarefas (usuario_id, status);
+'''
+
+
+class LimiteExportacoesError(Exception):
+    """O usuário já tem o máximo de exportações em andamento"""
+
+
+# ============== FILA (SQLITE) ==============
+
+class FilaExportacao:
+    """Fila de tarefas de exportação persistida em um arquivo SQLite"""
+
+    def __init__(self, caminho, diretorio, limite_usuario=2, retencao=24 * 3600, max_tentativas=3):
+        self.caminho = caminho
+        self.diretorio = diretorio
+        self.limite_usuario = limite_usuario
+        self.retencao = retencao
+        self.max_tentativas = max_tentativas
+        self._local = threading.local()
+
+    def __getstate__(self):
+        # Conexões SQLite não são enviadas aos processos trabalhadores (spawn no Windows)
+        estado = self.__dict__.copy()
+        del estado['_local']
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._local = threading.local()
+
+    def _conexao(self):
+        # Uma conexão por thread e por processo (a fila é usada pelo app e pelos trabalhadores)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(self.diretorio, exist_ok=True)
+            pasta = os.path.dirname(self.caminho)
+            if pasta:
+                os.makedirs(pasta, exist_ok=True)
+            conn = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transacao(self):
+        """Transação com lock de escrita desde o início (BEGIN IMMEDIATE)"""
+        conn = self._conexao()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    @staticmethod
+    def _para_dict(linha):
+        if linha is None:
+            return None
+        tarefa = dict(linha)
+        tarefa['filtros'] = json.loads(tarefa['filtros'])
+        for campo in ('criado_em', 'iniciado_em', 'concluido_em'):
+            if tarefa[campo] is not None:
+                tarefa[campo] = datetime.fromtimestamp(tarefa[campo])
+        return tarefa
+
+    def enfileirar(self, usuario_id, formato, filtros=None):
+        """Registra uma tarefa e devolve seu id; respeita o limite por usuário"""
+        if formato not in FORMATOS:
+            raise ValueError(f'Formato de exportação inválido: {formato}')
+
+        with self._transacao() as conn:
+            ativas = conn.execute(
+                'SELECT COUNT(*) FROM tarefas WHERE usuario_id = ? AND status IN (?, ?)',
+                (usuario_id, PENDENTE, PROCESSANDO)
+            ).fetchone()[0]
+            if ativas >= self.limite_usuario:
+                raise LimiteExportacoesError(
+                    f'Você já tem {ativas} exportação(ões) em andamento. '
+                    'Aguarde a conclusão para solicitar outra.'
+                )
+
+            tarefa_id = uuid.uuid4().hex
+            conn.execute(
+                'INSERT INTO tarefas (id, usuario_id, formato, filtros, status, criado_em) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (tarefa_id, usuario_id, formato, json.dumps(filtros or {}), PENDENTE, time.time())
+            )
+        return tarefa_id
+
+    def reservar(self):
+        """Retira a tarefa pendente mais antiga, marcando-a como processando"""
+        with self._transacao() as conn:
+            linha = conn.execute(
+                'SELECT * FROM tarefas WHERE status = ? ORDER BY criado_em LIMIT 1', (PENDENTE,)
+            ).fetchone()
+            if linha is None:
+                return None
+            agora = time.time()
+            conn.execute(
+                'UPDATE tarefas SET status = ?, iniciado_em = ?, pid = ?, tentativas = tentativas + 1 '
+                'WHERE id = ?',
+                (PROCESSANDO, agora, os.getpid(), linha['id'])
+            )
+        tarefa = self._para_dict(linha)
+        tarefa['status'] = PROCESSANDO
+        tarefa['iniciado_em'] = datetime.fromtimestamp(agora)
+        tarefa['pid'] = os.getpid()
+        tarefa['tentativas'] += 1
+        return tarefa
+
+    def concluir(self, tarefa_id, arquivo, tamanho):
+        with self._transacao() as conn:
+            conn.execute(
+                'UPDATE tarefas SET status = ?, arquivo = ?, tamanho = ?, concluido_em = ? WHERE id = ?',
+                (CONCLUIDO, arquivo, tamanho, time.time(), tarefa_id)
+            )
+
+    def falhar(self, tarefa_id, erro):
+        with self._transacao() as conn:
+            conn.execute(
+                'UPDATE tarefas SET status = ?, erro = ?, concluido_em = ? WHERE id = ?',
+                (ERRO, erro[:500], time.time(), tarefa_id)
+            )
+
+    def obter(self, tarefa_id, usuario_id=None):
+        """Tarefa pelo id; com usuario_id, só se pertencer ao usuário"""
+        sql = 'SELECT * FROM tarefas WHERE id = ?'
+        params = (tarefa_id,)
+        if usuario_id is not None:
+            sql += ' AND usuario_id = ?'
+            params += (usuario_id,)
+        return self._para_dict(self._conexao().execute(sql, params).fetchone())
+
+    def listar(self, usuario_id, limite=20):
+        linhas = self._conexao().execute(
+            'SELECT * FROM tarefas WHERE usuario_id = ? ORDER BY criado_em DESC LIMIT ?',
+            (usuario_id, limite)
+        ).fetchall()
+        return [self._para_dict(linha) for linha in linhas]
+
+    # ============== MANUTENÇÃO ==============
+
+    def limpar(self, agora=None):
+        """Apaga arquivos e registros finalizados há mais que a retenção"""
+        limite = (agora or time.time()) - self.retencao
+        with self._transacao() as conn:
+            expiradas = conn.execute(
+                'SELECT id, arquivo FROM tarefas WHERE status IN (?, ?) AND concluido_em < ?',
+                (CONCLUIDO, ERRO, limite)
+            ).fetchall()
+            conn.executemany('DELETE FROM tarefas WHERE id = ?', [(t['id'],) for t in expiradas])
+
+        for tarefa in expiradas:
+            if tarefa['arquivo']:
+                try:
+                    os.remove(os.path.join(self.diretorio, tarefa['arquivo']))
+                except FileNotFoundError:
+                    pass
+        return len(expiradas)
+
+    def recuperar_interrompidas(self):
+        """
+        Tarefas em 'processando' cujo trabalhador (pid) não existe mais voltam
+        para a fila; as que já tiveram max_tentativas ficam com erro.
+        Retorna (devolvidas, com erro).
+        """
+        with self._transacao() as conn:
+            interrompidas = [
+                tarefa for tarefa in conn.execute(
+                    'SELECT id, pid, tentativas FROM tarefas WHERE status = ?', (PROCESSANDO,)
+                ).fetchall()
+                if not processo_ativo(tarefa['pid'])
+            ]
+            devolvidas = [(PENDENTE, tarefa['id']) for tarefa in interrompidas
+                          if tarefa['tentativas'] < self.max_tentativas]
+            esgotadas = [(ERRO, f"Trabalhador encerrado durante a exportação ({tarefa['tentativas']} tentativas)",
+                          time.time(), tarefa['id'])
+                         for tarefa in interrompidas if tarefa['tentativas'] >= self.max_tentativas]
+            conn.executemany(
+                'UPDATE tarefas SET status = ?, iniciado_em = NULL, pid = NULL WHERE id = ?', devolvidas
+            )
+            conn.executemany(
+                'UPDATE tarefas SET status = ?, erro = ?, concluido_em = ?, pid = NULL WHERE id = ?', esgotadas
+            )
+        return len(devolvidas), len(esgotadas)
+
+
+def processo_ativo(pid):
+    """Se o processo `pid` ainda existe nesta máquina"""
+    if os.name == 'nt':
+        # No Windows, os.kill(pid, 0) encerraria o processo
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return kernel32.GetLastError() == 5  # ERROR_ACCESS_DENIED: existe, de outro usuário
+        codigo = ctypes.c_ulong()
+        try:
+            # 259: STILL_ACTIVE
+            return bool(kernel32.GetExitCodeProcess(handle, ctypes.byref(codigo))) and codigo.value == 259
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def criar_fila():
+    """Cria a fila a partir das variáveis de ambiente"""
+    diretorio = os.getenv('EXPORTACAO_DIR', 'exports')
+    return FilaExportacao(
+        os.getenv('EXPORTACAO_FILA', os.path.join(diretorio, 'fila.sqlite3')),
+        diretorio,
+        limite_usuario=int(os.getenv('EXPORTACAO_LIMITE_USUARIO', 2)),
+        retencao=float(os.getenv('EXPORTACAO_RETENCAO_HORAS', 24)) * 3600,
+        max_tentativas=int(os.getenv('EXPORTACAO_TENTATIVAS', 3))
+    )
+
+
+# ============== GERAÇÃO DOS ARQUIVOS ==============
+
+def gerar_conteudo(formato, linhas):
+    """Pedaços de bytes do arquivo no formato pedido"""
+    if formato == 'excel':
+        return exportacao.gerar_xlsx(exportacao.COLUNAS_TRANSACOES, linhas, nome_planilha='Transacoes')
+    return relatorio_pdf.gerar_pdf(relatorio_pdf.LAYOUT_TRANSACOES, linhas)
+
+
+def gerar_arquivo(tarefa, conn, diretorio):
+    """Gera o arquivo da tarefa em disco; devolve (nome do arquivo, tamanho)"""
+    nome = f"{tarefa['id']}.{FORMATOS[tarefa['formato']].extensao}"
+    destino = os.path.join(diretorio, nome)
+    parcial = destino + '.parcial'
+
+    where, params = consultas.filtro_transacoes(tarefa['usuario_id'], tarefa['filtros'])
+    cursor = exportacao.abrir_cursor_transacoes(conn, where, params)
+    try:
+        with open(parcial, 'wb') as arquivo:
+            for pedaco in gerar_conteudo(tarefa['formato'], exportacao.iterar_lotes(cursor)):
+                arquivo.write(pedaco)
+        # O arquivo só aparece com o nome final quando está completo
+        os.replace(parcial, destino)
+    except Exception:
+        if os.path.exists(parcial):
+            os.remove(parcial)
+        # Cursor não bufferizado com linhas não lidas: close() levantaria
+        # "Unread result found" no lugar do erro original (a conexão é descartada)
+        try:
+            cursor.close()
+        except Exception:
+            pass
+        raise
+    cursor.close()
+    return nome, os.path.getsize(destino)
+
+
+# ============== TRABALHADORES ==============
+
+def _conectar_mysql():
+    import mysql.connector
+    from config import DB_CONFIG
+    return mysql.connector.connect(**DB_CONFIG)
+
+
+def _encerrar_leitura(conn):
+    """
+    Encerra a transação de leitura da tarefa; sem isso o snapshot REPEATABLE
+    READ do primeiro SELECT continuaria aberto e as próximas exportações do
+    trabalhador leriam dados antigos. Retorna a conexão, ou None se ela não
+    aceitou o rollback (resultado não lido, conexão caída) e foi descartada.
+    """
+    if conn is None:
+        return None
+    try:
+        conn.rollback()
+        return conn
+    except Exception:
+        try:
+            conn.close()
+        except Exception:
+            pass
+        return None
+
+
+def processar_proxima(fila, conectar, conn=None):
+    """
+    Processa uma tarefa da fila, se houver.
+    Retorna (processou, conn) para reaproveitar a conexão entre tarefas.
+    """
+    tarefa = fila.reservar()
+    if tarefa is None:
+        return False, conn
+
+    try:
+        if conn is None or not conn.is_connected():
+            conn = conectar()
+        nome, tamanho = gerar_arquivo(tarefa, conn, fila.diretorio)
+        fila.concluir(tarefa['id'], nome, tamanho)
+    except Exception as e:
+        print(f"Erro na exportação {tarefa['id']}: {e}")
+        fila.falhar(tarefa['id'], str(e))
+    finally:
+        conn = _encerrar_leitura(conn)
+    return True, conn
+
+
+def executar_trabalhador(fila, parar, conectar=_conectar_mysql, intervalo=1.0):
+    """Laço de um processo trabalhador: consome a fila até `parar` ser sinalizado"""
+    conn = None
+    try:
+        while not parar.is_set():
+            processou, conn = processar_proxima(fila, conectar, conn)
+            if not processou:
+                parar.wait(intervalo)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+def _iniciar_trabalhador(fila, parar, conectar, numero):
+    processo = multiprocessing.Process(
+        target=executar_trabalhador, args=(fila, parar, conectar),
+        name=f'exportacao-{numero}', daemon=True
+    )
+    processo.start()
+    return processo
+
+
+def executar_manutencao(fila, parar, processos, conectar=_conectar_mysql, intervalo=300):
+    """
+    Laço de manutenção: a cada `intervalo` segundos substitui os
+    trabalhadores encerrados (em `processos`), recupera as tarefas
+    interrompidas e limpa as expiradas
+    """
+    while True:
+        try:
+            for i, processo in enumerate(processos):
+                # is_alive() também recolhe o processo zumbi, que ainda pareceria ativo pelo pid
+                if not processo.is_alive() and not parar.is_set():
+                    print(f"⚠️ Trabalhador {processo.name} encerrado (código {processo.exitcode}); reiniciando")
+                    processos[i] = _iniciar_trabalhador(fila, parar, conectar, i + 1)
+            devolvidas, esgotadas = fila.recuperar_interrompidas()
+            removidas = fila.limpar()
+            if devolvidas or esgotadas or removidas:
+                print(f"🧹 {removidas} exportação(ões) expirada(s) removida(s), "
+                      f"{devolvidas} devolvida(s) à fila, {esgotadas} sem novas tentativas")
+        except Exception as e:
+            print(f"Erro na manutenção da fila de exportações: {e}")
+        if parar.wait(intervalo):
+            break
+
+
+def iniciar_trabalhadores(fila, quantidade, conectar=_conectar_mysql, intervalo_limpeza=300):
+    """
+    Inicia `quantidade` processos trabalhadores e a thread de manutenção da
+    fila; devolve (processos, evento de parada). A manutenção troca os
+    processos encerrados na própria lista.
+    """
+    parar = multiprocessing.Event()
+    processos = [_iniciar_trabalhador(fila, parar, conectar, i + 1) for i in range(quantidade)]
+    threading.Thread(target=executar_manutencao, args=(fila, parar, processos, conectar, intervalo_limpeza),
+                     name='exportacao-manutencao', daemon=True).start()
+    return processos, parar
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description='Trabalhadores da fila de exportações')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('EXPORTACAO_WORKERS', 2)))
+    parser.add_argument('--intervalo-limpeza', type=float, default=300,
+                        help='Segundos entre as passadas de manutenção (trabalhadores, recuperação, limpeza)')
+    args = parser.parse_args()
+
+    fila = criar_fila()
+    processos, parar = iniciar_trabalhadores(fila, args.workers, intervalo_limpeza=args.intervalo_limpeza)
+    print(f"🚀 {args.workers} trabalhador(es) de exportação iniciados (fila: {fila.caminho})")
+
+    try:
+        # Trabalhadores e manutenção rodam em segundo plano até o Ctrl+C
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        print("Encerrando trabalhadores...")
+    finally:
+        parar.set()
+        for processo in processos:
+            processo.join(timeout=30)
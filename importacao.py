@@ -0,0 +1,327 @@
+"""
+Importação de Extratos (CSV e OFX)
+Projeto: Gestão Financeira - Simplifica Finanças
+
+O arquivo enviado é lido como stream (pedaços decodificados de forma
+incremental), cada lançamento é validado com as mesmas regras do cadastro
+manual (validacao.py) e os válidos são gravados em lotes: um executemany
+por lote, resumos atualizados com um upsert por mês e um commit por lote.
+Lançamentos que já existem para o usuário (mesma data, tipo, valor e
+descrição) são ignorados, então reimportar o mesmo extrato não duplica nada.
+
+CSV: separador ; , ou tab; colunas data, descricao, valor e, opcionalmente,
+tipo e categoria (sem coluna tipo, valores negativos são despesas).
+OFX: versões 1.x (SGML) e 2.x (XML); usa DTPOSTED, TRNAMT e MEMO/NAME.
+"""
+
+import codecs
+import csv
+import re
+import unicodedata
+from collections import Counter, namedtuple
+
+import resumo
+import validacao
+
+TAMANHO_LOTE = 2000
+TAMANHO_LEITURA = 64 * 1024
+MAX_ERROS_RELATORIO = 200
+
+Lancamento = namedtuple('Lancamento', ['tipo', 'valor', 'descricao', 'categoria', 'data'])
+
+
+class ErroImportacao(Exception):
+    """O arquivo como um todo não pode ser importado (formato, colunas)"""
+
+
+class RelatorioImportacao:
+    """Contadores e erros por linha de uma importação"""
+
+    def __init__(self):
+        self.lidas = 0
+        self.importadas = 0
+        self.duplicadas = 0
+        self.total_erros = 0
+        self.erros = []  # (linha, mensagem), limitado a MAX_ERROS_RELATORIO
+        self.falha = None
+
+    def erro(self, linha, mensagem):
+        self.total_erros += 1
+        if len(self.erros) < MAX_ERROS_RELATORIO:
+            self.erros.append((linha, mensagem))
+
+    def como_dict(self):
+        return {
+            'lidas': self.lidas,
+            'importadas': self.importadas,
+            'duplicadas': self.duplicadas,
+            'total_erros': self.total_erros,
+            'erros': self.erros,
+            'falha': self.falha,
+        }
+
+
+# ============== LEITURA EM STREAMING ==============
+
+def _pedacos_texto(stream):
+    """
+    Decodifica o arquivo em pedaços. Tenta UTF-8 e, no primeiro byte
+    inválido, passa a cp1252 (extratos de bancos brasileiros) dali em diante.
+    """
+    pedaco = stream.read(TAMANHO_LEITURA)
+    if isinstance(pedaco, str):
+        # Já é texto (ex.: io.StringIO nos testes)
+        yield pedaco
+        yield from iter(lambda: stream.read(TAMANHO_LEITURA), '')
+        return
+
+    decodificador = codecs.getincrementaldecoder('utf-8-sig')()
+    utf8 = True
+    while pedaco:
+        if utf8:
+            try:
+                texto = decodificador.decode(pedaco)
+            except UnicodeDecodeError:
+                # Bytes pendentes de um caractere incompleto também são cp1252
+                pendente = decodificador.getstate()[0]
+                texto = (pendente + pedaco).decode('cp1252', errors='replace')
+                utf8 = False
+        else:
+            texto = pedaco.decode('cp1252', errors='replace')
+        if texto:
+            yield texto
+        pedaco = stream.read(TAMANHO_LEITURA)
+    # Arquivo terminado no meio de um caractere UTF-8: sobra lida como cp1252
+    pendente = decodificador.getstate()[0] if utf8 else b''
+    if pendente:
+        yield pendente.decode('cp1252', errors='replace')
+
+
+def _linhas(pedacos):
+    """Quebra os pedaços de texto em linhas (mantendo o fim de linha)"""
+    resto = ''
+    for pedaco in pedacos:
+        linhas = (resto + pedaco).splitlines(keepends=True)
+        # A última linha pode continuar no próximo pedaço (inclusive um '\r\n' dividido)
+        resto = linhas.pop() if linhas and not linhas[-1].endswith('\n') else ''
+        yield from linhas
+    if resto:
+        yield resto
+
+
+def _sem_acentos(texto):
+    normalizado = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in normalizado if not unicodedata.combining(c))
+
+
+# ============== CSV ==============
+
+_ALIASES_CSV = {
+    'data': ('data', 'date', 'dt', 'data lancamento', 'data movimento'),
+    'descricao': ('descricao', 'historico', 'lancamento', 'description', 'memo'),
+    'valor': ('valor', 'valor (r$)', 'amount', 'value', 'quantia'),
+    'tipo': ('tipo', 'type', 'natureza'),
+    'categoria': ('categoria', 'category'),
+}
+
+_TIPOS_CSV = {
+    'receita': 'receita', 'credito': 'receita', 'c': 'receita', 'credit': 'receita', 'entrada': 'receita',
+    'despesa': 'despesa', 'debito': 'despesa', 'd': 'despesa', 'debit': 'despesa', 'saida': 'despesa',
+}
+
+
+def _mapear_colunas(cabecalho):
+    nomes = [_sem_acentos(nome).strip().lower() for nome in cabecalho]
+    mapa = {}
+    for campo, aliases in _ALIASES_CSV.items():
+        for indice, nome in enumerate(nomes):
+            if nome in aliases:
+                mapa[campo] = indice
+                break
+    faltando = [campo for campo in ('data', 'descricao', 'valor') if campo not in mapa]
+    if faltando:
+        raise ErroImportacao(f'Colunas obrigatórias ausentes no CSV: {", ".join(faltando)}')
+    return mapa
+
+
+def ler_csv(stream):
+    """Gera (número da linha, dict com os campos brutos) de um CSV"""
+    linhas = _linhas(_pedacos_texto(stream))
+    primeira = next(linhas, '')
+    if not primeira.strip():
+        raise ErroImportacao('Arquivo CSV vazio')
+
+    # O separador mais frequente no cabeçalho (bancos brasileiros usam ';')
+    separador = max(';,\t', key=primeira.count)
+    leitor = csv.reader(_encadear(primeira, linhas), delimiter=separador)
+    mapa = _mapear_colunas(next(leitor))
+
+    for numero, valores in enumerate(leitor, start=2):
+        if not any(v.strip() for v in valores):
+            continue
+        yield numero, {campo: valores[indice] if indice < len(valores) else ''
+                       for campo, indice in mapa.items()}
+
+
+def _encadear(primeira, linhas):
+    yield primeira
+    yield from linhas
+
+
+# ============== OFX ==============
+
+def _tokens_ofx(pedacos):
+    """Gera (TAG, valor) de um OFX SGML ou XML, sem depender de quebras de linha"""
+    resto = ''
+    for pedaco in pedacos:
+        partes = (resto + pedaco).split('<')
+        resto = partes.pop()
+        for parte in partes:
+            tag, fechou, valor = parte.partition('>')
+            if fechou:
+                yield tag.strip().upper(), valor.strip()
+    tag, fechou, valor = resto.partition('>')
+    if fechou:
+        yield tag.strip().upper(), valor.strip()
+
+
+_DATA_OFX = re.compile(r'^(\d{4})(\d{2})(\d{2})')
+
+
+def ler_ofx(stream):
+    """Gera (número do lançamento, dict com os campos brutos) de um OFX"""
+    numero = 0
+    atual = None
+    for tag, valor in _tokens_ofx(_pedacos_texto(stream)):
+        if tag == 'STMTTRN':
+            atual = {}
+        elif tag == '/STMTTRN' and atual is not None:
+            numero += 1
+            data = _DATA_OFX.match(atual.get('DTPOSTED', ''))
+            yield numero, {
+                'data': '-'.join(data.groups()) if data else atual.get('DTPOSTED', ''),
+                'descricao': atual.get('MEMO') or atual.get('NAME', ''),
+                'valor': atual.get('TRNAMT', ''),
+            }
+            atual = None
+        elif atual is not None and not tag.startswith('/'):
+            atual[tag] = valor
+
+
+def ler_extrato(stream, nome_arquivo=''):
+    """Escolhe o leitor pela extensão do arquivo"""
+    if nome_arquivo.lower().endswith(('.ofx', '.qfx')):
+        return ler_ofx(stream)
+    return ler_csv(stream)
+
+
+# ============== VALIDAÇÃO ==============
+
+def normalizar(bruto, hoje=None):
+    """Converte os campos brutos em Lancamento validado (ou ErroValidacao)"""
+    tipo = _TIPOS_CSV.get(_sem_acentos(bruto.get('tipo', '') or '').strip().lower())
+    valor = bruto.get('valor', '')
+    if tipo is None:
+        if (bruto.get('tipo') or '').strip():
+            raise validacao.ErroValidacao('Tipo de transação inválido!')
+        # Sem coluna de tipo: o sinal do valor define receita/despesa
+        valor = validacao.converter_valor(valor)
+        tipo = 'despesa' if valor < 0 else 'receita'
+        valor = abs(valor)
+
+    data = bruto.get('data')
+    if not data:
+        raise validacao.ErroValidacao('Data inválida!')
+
+    return Lancamento(*validacao.validar_transacao(
+        tipo, valor, bruto.get('descricao'), bruto.get('categoria'), data, hoje
+    ))
+
+
+# ============== GRAVAÇÃO EM LOTES ==============
+
+def _chave(lancamento):
+    return (lancamento.data, lancamento.tipo, lancamento.valor, lancamento.descricao)
+
+
+def _existentes(cursor, usuario_id, lote):
+    """Quantas vezes cada (data, tipo, valor, descricao) do lote já existe no banco"""
+    datas = sorted({l.data for l in lote})
+    marcadores = ', '.join(['%s'] * len(datas))
+    cursor.execute(f'''
+        SELECT data, tipo, valor, descricao
+        FROM transacoes
+        WHERE usuario_id = %s AND data IN ({marcadores})
+    ''', (usuario_id, *datas))
+    return Counter(tuple(linha) for linha in cursor.fetchall())
+
+
+def _gravar_lote(conn, usuario_id, lote, relatorio, vistos, inseridos):
+    """
+    Insere o lote em uma transação, ignorando o que já existe.
+    Lançamentos iguais dentro do próprio arquivo são mantidos: só são
+    descartadas as ocorrências que já estavam no banco antes da importação.
+    """
+    cursor = conn.cursor()
+    try:
+        existentes = _existentes(cursor, usuario_id, lote)
+        novos = []
+        novas_chaves = Counter()
+        for lancamento in lote:
+            chave = _chave(lancamento)
+            vistos[chave] += 1
+            if vistos[chave] <= existentes[chave] - inseridos[chave]:
+                relatorio.duplicadas += 1
+                continue
+            novos.append(lancamento)
+            novas_chaves[chave] += 1
+
+        if novos:
+            cursor.executemany('''
+                INSERT INTO transacoes (usuario_id, tipo, valor, descricao, categoria, data)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            ''', [(usuario_id, *l) for l in novos])
+            resumo.aplicar_lote(cursor, usuario_id, [(l.tipo, l.valor, l.data, l.categoria) for l in novos])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    inseridos.update(novas_chaves)
+    relatorio.importadas += len(novos)
+
+
+def importar(conn, usuario_id, linhas, tamanho_lote=TAMANHO_LOTE, hoje=None):
+    """
+    Valida e grava os lançamentos de `linhas` (pares (número, campos brutos)).
+    Lotes já gravados permanecem se um lote seguinte falhar; nesse caso o
+    relatório traz a falha em `falha`.
+    """
+    relatorio = RelatorioImportacao()
+    vistos = Counter()
+    inseridos = Counter()
+    lote = []
+
+    try:
+        for numero, bruto in linhas:
+            relatorio.lidas += 1
+            try:
+                lote.append(normalizar(bruto, hoje))
+            except validacao.ErroValidacao as e:
+                relatorio.erro(numero, str(e))
+                continue
+
+            if len(lote) >= tamanho_lote:
+                _gravar_lote(conn, usuario_id, lote, relatorio, vistos, inseridos)
+                lote = []
+
+        if lote:
+            _gravar_lote(conn, usuario_id, lote, relatorio, vistos, inseridos)
+    except ErroImportacao:
+        raise
+    except Exception as e:
+        relatorio.falha = str(e)
+
+    return relatorio
@@ -0,0 +1,178 @@
+"""
+Períodos e Intervalos de Datas para Consultas
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Todas as consultas agregadas filtram datas por intervalos semiabertos
+[inicio, fim) sobre a coluna original (ex.: `data >= %s AND data < %s`).
+Ao contrário de MONTH(data)/YEAR(data), esse formato permite ao MySQL
+usar os índices (usuario_id, data, ...) como range scan.
+"""
+
+from collections import namedtuple
+from datetime import date, timedelta
+
+
+def adicionar_meses(data, meses):
+    """Primeiro dia do mês deslocado `meses` a partir do mês de `data`"""
+    indice = data.year * 12 + (data.month - 1) + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+class Periodo(namedtuple('Periodo', ['inicio', 'fim'])):
+    """Intervalo semiaberto de datas: inicio <= data < fim"""
+
+    __slots__ = ()
+
+    def contem(self, data):
+        return self.inicio <= data < self.fim
+
+    def filtro(self, coluna='data'):
+        """Trecho SQL sargável e parâmetros para o intervalo"""
+        return f'{coluna} >= %s AND {coluna} < %s', (self.inicio, self.fim)
+
+    def meses(self):
+        """Lista com o primeiro dia de cada mês coberto pelo período"""
+        mes = date(self.inicio.year, self.inicio.month, 1)
+        resultado = []
+        while mes < self.fim:
+            resultado.append(mes)
+            mes = adicionar_meses(mes, 1)
+        return resultado
+
+
+# ============== CONSTRUTORES ==============
+
+def mes(ano, numero_mes):
+    """Período de um mês inteiro"""
+    inicio = date(ano, numero_mes, 1)
+    return Periodo(inicio, adicionar_meses(inicio, 1))
+
+
+def mes_atual(hoje=None):
+    hoje = hoje or date.today()
+    return mes(hoje.year, hoje.month)
+
+
+def ultimos_meses(quantidade, hoje=None):
+    """Os últimos `quantidade` meses, incluindo o mês atual"""
+    hoje = hoje or date.today()
+    fim = adicionar_meses(hoje, 1)
+    return Periodo(adicionar_meses(fim, -quantidade), fim)
+
+
+def entre_datas(inicio=None, fim=None):
+    """De `inicio` até `fim` (inclusive); qualquer um dos extremos pode faltar"""
+    if inicio is None and fim is None:
+        return None
+    if inicio and fim and fim < inicio:
+        raise ValueError('A data final é anterior à data inicial')
+    return Periodo(inicio or date.min, fim + timedelta(days=1) if fim and fim < date.max else date.max)
+
+
+def proximos_dias(dias, hoje=None):
+    """De hoje até daqui a `dias` dias (inclusive)"""
+    hoje = hoje or date.today()
+    return Periodo(hoje, hoje + timedelta(days=dias + 1))
+
+
+def trimestre(ano, numero_trimestre):
+    """Período de um trimestre (1 a 4)"""
+    inicio = date(ano, 3 * (numero_trimestre - 1) + 1, 1)
+    return Periodo(inicio, adicionar_meses(inicio, 3))
+
+
+def ano_civil(ano):
+    return Periodo(date(ano, 1, 1), date(ano + 1, 1, 1))
+
+
+def ler_mes(texto):
+    """'AAAA-MM' -> primeiro dia do mês; ValueError se for inválido"""
+    try:
+        ano, numero_mes = (int(parte) for parte in texto.strip().split('-'))
+        if not 1900 <= ano <= 2100:
+            raise ValueError
+        return date(ano, numero_mes, 1)
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError(f'Mês inválido: {texto}') from None
+
+
+# ============== PERÍODOS DE RELATÓRIO (MESES INTEIROS) ==============
+
+TIPOS_PERIODO = ('mes', 'trimestre', 'ano', 'personalizado')
+MAX_MESES_RELATORIO = 120
+
+
+def quantidade_meses(periodo):
+    return (periodo.fim.year - periodo.inicio.year) * 12 + periodo.fim.month - periodo.inicio.month
+
+
+def deslocar(periodo, meses):
+    """Mesmo período `meses` meses depois (negativo: antes)"""
+    return Periodo(adicionar_meses(periodo.inicio, meses), adicionar_meses(periodo.fim, meses))
+
+
+def anterior(periodo):
+    """Período de mesmo tamanho imediatamente antes"""
+    return deslocar(periodo, -quantidade_meses(periodo))
+
+
+def unir(lista):
+    """Junta períodos sobrepostos ou contíguos (menos intervalos no WHERE)"""
+    unidos = []
+    for periodo in sorted(lista):
+        if unidos and periodo.inicio <= unidos[-1].fim:
+            unidos[-1] = Periodo(unidos[-1].inicio, max(unidos[-1].fim, periodo.fim))
+        else:
+            unidos.append(periodo)
+    return unidos
+
+
+def periodo_relatorio(tipo='mes', referencia=None, de=None, ate=None, hoje=None):
+    """
+    Período dos relatórios a partir dos parâmetros da página: o mês, trimestre
+    ou ano que contém `referencia` ('AAAA-MM', padrão: mês atual), ou de `de`
+    até `ate` (meses inclusive) no personalizado. ValueError se for inválido.
+    """
+    hoje = hoje or date.today()
+    referencia = ler_mes(referencia) if referencia else date(hoje.year, hoje.month, 1)
+    if tipo == 'mes':
+        return mes(referencia.year, referencia.month)
+    if tipo == 'trimestre':
+        return trimestre(referencia.year, (referencia.month - 1) // 3 + 1)
+    if tipo == 'ano':
+        return ano_civil(referencia.year)
+    if tipo == 'personalizado':
+        if not de or not ate:
+            raise ValueError('Informe o mês inicial e o final')
+        periodo = Periodo(ler_mes(de), adicionar_meses(ler_mes(ate), 1))
+        if periodo.fim <= periodo.inicio:
+            raise ValueError('O mês final é anterior ao inicial')
+        if quantidade_meses(periodo) > MAX_MESES_RELATORIO:
+            raise ValueError(f'O período pode ter no máximo {MAX_MESES_RELATORIO} meses')
+        return periodo
+    raise ValueError(f'Tipo de período inválido: {tipo}')
+
+
+def rotulo(periodo):
+    """'05/2025' ou '03/2025 a 05/2025'"""
+    ultimo = adicionar_meses(periodo.fim, -1)
+    if ultimo == periodo.inicio:
+        return periodo.inicio.strftime('%m/%Y')
+    return f"{periodo.inicio.strftime('%m/%Y')} a {ultimo.strftime('%m/%Y')}"
+
+
+# ============== MONTAGEM DE CONSULTAS ==============
+
+def filtro_usuario(usuario_id, periodo=None, coluna='data', tabela=None):
+    """
+    Cláusula WHERE para (usuario_id, coluna de data), na ordem dos índices.
+    Retorna (sql, params), ex.: ('usuario_id = %s AND data >= %s AND data < %s', (...))
+    """
+    prefixo = f'{tabela}.' if tabela else ''
+    sql = f'{prefixo}usuario_id = %s'
+    params = (usuario_id,)
+    if periodo is not None:
+        trecho, extra = periodo.filtro(prefixo + coluna)
+        sql += ' AND ' + trecho
+        params += extra
+    return sql, params
@@ -0,0 +1,207 @@
+"""
+Previsão de Fluxo de Caixa
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Projeta o saldo diário dos próximos meses a partir de:
+
+- regras de recorrência ativas (recorrencias.py): ocorrências exatas nas
+  datas previstas, inclusive as vencidas que o agendador ainda não lançou;
+- médias por categoria dos lançamentos avulsos: nível dos últimos
+  `janela` meses, ajustado pela sazonalidade do mês do ano quando há pelo
+  menos dois anos de histórico (ex.: IPVA em janeiro, presentes em dezembro).
+
+O histórico é carregado como arrays NumPy (dias relativos a hoje, valores
+em centavos com sinal, códigos de categoria) e todo o cálculo é feito com
+operações vetorizadas (bincount, cumsum), sem laços por transação.
+"""
+
+from collections import namedtuple
+from datetime import timedelta
+
+import numpy as np
+
+import recorrencias
+
+JANELA_MESES = 6
+MAX_MESES = 24
+
+Historico = namedtuple('Historico', ['dias', 'centavos', 'categorias', 'recorrente', 'nomes_categorias'])
+
+
+# ============== CARGA ==============
+
+def carregar_historico(cursor, usuario_id, hoje):
+    """Transações do usuário até hoje como arrays (conversões feitas no SQL)"""
+    cursor.execute('''
+        SELECT DATEDIFF(data, %s),
+               CAST(IF(tipo = 'receita', valor, -valor) * 100 AS SIGNED),
+               recorrencia_id IS NOT NULL,
+               categoria
+        FROM transacoes
+        WHERE usuario_id = %s AND data <= %s
+    ''', (hoje, usuario_id, hoje))
+    return historico_de_linhas(cursor.fetchall())
+
+
+def historico_de_linhas(linhas):
+    """Linhas (dias, centavos, recorrente, categoria) -> Historico, coluna a coluna"""
+    if not linhas:
+        vazio = np.zeros(0, dtype=np.int64)
+        return Historico(vazio, vazio, vazio, np.zeros(0, dtype=bool), [])
+
+    dias, centavos, recorrente, categorias = zip(*linhas)
+    codigos = {}
+    categorias = np.fromiter((codigos.setdefault(c or 'Outros', len(codigos)) for c in categorias),
+                             dtype=np.int64, count=len(linhas))
+    return Historico(np.array(dias, dtype=np.int64), np.array(centavos, dtype=np.int64), categorias,
+                     np.array(recorrente, dtype=bool), list(codigos))
+
+
+def carregar_regras(cursor, usuario_id):
+    cursor.execute('''
+        SELECT id, usuario_id, tipo, valor, descricao, categoria,
+               frequencia, data_inicio, data_fim, proxima_execucao
+        FROM recorrencias
+        WHERE usuario_id = %s AND ativa = TRUE
+    ''', (usuario_id,))
+    return [recorrencias.Regra(*linha) for linha in cursor.fetchall()]
+
+
+# ============== DATAS ==============
+
+def _mes(datas):
+    """Meses desde 1970 (datetime64[D] -> int)"""
+    return datas.astype('datetime64[M]').astype(np.int64)
+
+
+def _dias_no_mes(meses):
+    inicio = meses.astype('datetime64[M]')
+    return ((inicio + 1).astype('datetime64[D]') - inicio.astype('datetime64[D]')).astype(np.int64)
+
+
+# ============== COMPONENTES ==============
+
+def fluxo_recorrente(regras, hoje, dias):
+    """Centavos por dia (índice 0 = amanhã) das ocorrências das regras até hoje + `dias`"""
+    fluxo = np.zeros(dias, dtype=np.int64)
+    if not regras:
+        return fluxo
+    fim = hoje + timedelta(days=dias)
+    origem = np.datetime64(hoje + timedelta(days=1), 'D')
+
+    for frequencia in recorrencias.FREQUENCIAS:
+        grupo = [r for r in regras if r.frequencia == frequencia]
+        if not grupo:
+            continue
+        inicio = np.array([r.data_inicio for r in grupo], dtype='datetime64[D]')
+        primeira = np.array([recorrencias.numero_ocorrencia(r.data_inicio, frequencia, r.proxima_execucao)
+                             for r in grupo], dtype=np.int64)
+        limite = np.array([min(fim, r.data_fim) if r.data_fim else fim for r in grupo], dtype='datetime64[D]')
+        valor = np.array([round(r.valor * 100) * (1 if r.tipo == 'receita' else -1) for r in grupo],
+                         dtype=np.int64)
+
+        # Matriz regras x ocorrências (quantidade suficiente para a pendência + horizonte)
+        if frequencia == 'semanal':
+            passos = (limite - inicio).astype(np.int64) // 7 - primeira + 1
+        else:
+            passo = 12 if frequencia == 'anual' else 1
+            passos = (_mes(limite) - _mes(inicio)) // passo - primeira + 1
+        numeros = primeira[:, None] + np.arange(max(int(passos.max()), 0))
+
+        if frequencia == 'semanal':
+            datas = inicio[:, None] + 7 * numeros
+        else:
+            meses = _mes(inicio)[:, None] + passo * numeros
+            dia = (inicio - inicio.astype('datetime64[M]').astype('datetime64[D]')).astype(np.int64)
+            # Dia do início ou o último dia dos meses mais curtos
+            deslocamento = np.minimum(dia[:, None], _dias_no_mes(meses) - 1)
+            datas = meses.astype('datetime64[M]').astype('datetime64[D]') + deslocamento
+
+        validas = datas <= limite[:, None]
+        # Ocorrências vencidas e ainda não lançadas entram no primeiro dia
+        indices = np.maximum((datas - origem).astype(np.int64), 0)[validas]
+        valores = np.broadcast_to(valor[:, None], datas.shape)[validas]
+        fluxo += np.bincount(indices, weights=valores, minlength=dias).astype(np.int64)
+    return fluxo
+
+
+def medias_por_categoria(historico, hoje, janela=JANELA_MESES):
+    """
+    Centavos por mês de cada categoria nos lançamentos avulsos: retorna
+    (nível dos últimos `janela` meses sem a sazonalidade, fatores categorias x 12).
+    A previsão do mês m da categoria c é nivel[c] * fatores[c, m % 12].
+    """
+    quantidade = len(historico.nomes_categorias)
+    fatores = np.ones((quantidade, 12))
+    avulsos = ~historico.recorrente
+    if quantidade == 0 or not avulsos.any():
+        return np.zeros(quantidade), fatores
+
+    meses = _mes(np.datetime64(hoje, 'D') + historico.dias[avulsos])
+    categorias = historico.categorias[avulsos]
+    centavos = historico.centavos[avulsos]
+    # Só meses completos: o mês atual ainda está em andamento
+    mes_atual = _mes(np.array([hoje], dtype='datetime64[D]'))[0]
+
+    # Sazonalidade: média da categoria em cada mês do ano / média mensal da categoria
+    completos = meses < mes_atual
+    primeiro = meses[completos].min() if completos.any() else mes_atual
+    total_meses = mes_atual - primeiro
+    if total_meses >= 24:
+        chave = categorias[completos] * 12 + meses[completos] % 12
+        por_mes = np.bincount(chave, weights=centavos[completos], minlength=quantidade * 12).reshape(quantidade, 12)
+        anos_por_mes = np.bincount(np.arange(primeiro, mes_atual) % 12, minlength=12)
+        media_mes = por_mes / np.maximum(anos_por_mes, 1)
+        media = por_mes.sum(axis=1, keepdims=True) / total_meses
+        fatores = np.divide(media_mes, media, out=np.ones_like(media_mes), where=media != 0)
+        # Categorias com receitas e despesas podem inverter o sinal; 12 = o ano todo em um mês
+        fatores = np.clip(fatores, 0.0, 12.0)
+
+    # Nível: total da janela dividido pela soma dos fatores dos seus meses
+    # (meses com fator 0 não dizem nada sobre o nível da categoria)
+    inicio_janela = mes_atual - janela
+    na_janela = (meses >= inicio_janela) & completos
+    totais = np.bincount(categorias[na_janela], weights=centavos[na_janela], minlength=quantidade)
+    pesos = fatores[:, np.arange(inicio_janela, mes_atual) % 12].sum(axis=1)
+    return np.divide(totais, pesos, out=np.zeros_like(totais), where=pesos != 0), fatores
+
+
+def fluxo_variavel(nivel, fatores, hoje, dias):
+    """Centavos por dia (índice 0 = amanhã) das médias por categoria, distribuídas no mês"""
+    datas = np.datetime64(hoje, 'D') + 1 + np.arange(dias)
+    meses = _mes(datas)
+    por_mes_do_ano = nivel @ fatores if len(nivel) else np.zeros(12)
+    return por_mes_do_ano[meses % 12] / _dias_no_mes(meses)
+
+
+# ============== PREVISÃO ==============
+
+def prever(historico, regras, hoje, meses=6, janela=JANELA_MESES):
+    """Saldo projetado dia a dia para os próximos `meses` meses"""
+    meses = max(1, min(int(meses), MAX_MESES))
+    dias = (recorrencias.data_ocorrencia(hoje, 'mensal', meses) - hoje).days
+
+    saldo_atual = int(historico.centavos.sum())
+    recorrente = fluxo_recorrente(regras, hoje, dias)
+    nivel, fatores = medias_por_categoria(historico, hoje, janela)
+    variavel = fluxo_variavel(nivel, fatores, hoje, dias)
+    saldo = saldo_atual + np.cumsum(recorrente + variavel)
+
+    menor = int(np.argmin(saldo))
+    ordem = np.argsort(nivel)
+    return {
+        'inicio': (hoje + timedelta(days=1)).isoformat(),
+        'saldo_atual': saldo_atual / 100,
+        'saldo': np.round(saldo / 100, 2).tolist(),
+        'saldo_final': round(float(saldo[-1]) / 100, 2),
+        'menor_saldo': round(float(saldo[menor]) / 100, 2),
+        'data_menor_saldo': (hoje + timedelta(days=menor + 1)).isoformat(),
+        'recorrente_mensal': round(float(recorrente.sum()) / meses / 100, 2),
+        'variavel_mensal': round(float(variavel.sum()) / meses / 100, 2),
+        'categorias': [{'categoria': historico.nomes_categorias[i], 'media_mensal': round(nivel[i] / 100, 2)}
+                       for i in ordem if nivel[i] != 0],
+    }
+
+
+def previsao_usuario(cursor, usuario_id, hoje, meses=6):
+    return prever(carregar_historico(cursor, usuario_id, hoje), carregar_regras(cursor, usuario_id), hoje, meses)
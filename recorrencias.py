@@ -0,0 +1,257 @@
+"""
+Transações Recorrentes
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Uma regra (tabela recorrencias) guarda os valores da transação, a
+frequência e a próxima data a lançar (proxima_execucao). O agendador
+lança as ocorrências vencidas de todos os usuários:
+
+- em lotes de regras, cada lote em uma transação limitada (SELECT ...
+  FOR UPDATE SKIP LOCKED, um executemany nas transações, resumos e avanço
+  das regras, um commit);
+- de forma idempotente: as ocorrências e o novo proxima_execucao são
+  gravados no mesmo commit, e a chave única (recorrencia_id, data) em
+  transacoes impede duplicatas mesmo com dois agendadores ao mesmo tempo;
+- recuperando atrasos: uma regra parada há meses lança todas as
+  ocorrências pendentes na mesma execução.
+
+As datas seguem o dia de data_inicio; em meses mais curtos, o último dia
+do mês (dia 31 cai em 28/29 de fevereiro e volta a 31 em março).
+
+Uso (agendado como o backup, ver agendar_recorrencias.bat):
+    python recorrencias.py --executar
+    python recorrencias.py --executar --data 2025-12-31
+"""
+
+import calendar
+import logging
+import os
+import sys
+from collections import namedtuple
+from datetime import date, timedelta
+
+import periodos
+import resumo
+
+FREQUENCIAS = ('semanal', 'mensal', 'anual')
+REGRAS_POR_LOTE = 500
+OCORRENCIAS_POR_LOTE = 5000
+
+Regra = namedtuple('Regra', ['id', 'usuario_id', 'tipo', 'valor', 'descricao', 'categoria',
+                             'frequencia', 'data_inicio', 'data_fim', 'proxima_execucao'])
+
+logger = logging.getLogger('recorrencias')
+
+
+# ============== DATAS DAS OCORRÊNCIAS ==============
+
+def data_ocorrencia(inicio, frequencia, numero):
+    """Data da `numero`-ésima ocorrência (0 é a própria data de início)"""
+    if frequencia == 'semanal':
+        return inicio + timedelta(weeks=numero)
+    meses = numero * 12 if frequencia == 'anual' else numero
+    mes = periodos.adicionar_meses(inicio, meses)
+    ultimo_dia = calendar.monthrange(mes.year, mes.month)[1]
+    return mes.replace(day=min(inicio.day, ultimo_dia))
+
+
+def numero_ocorrencia(inicio, frequencia, data):
+    """Número da primeira ocorrência em `data` ou depois dela"""
+    if frequencia == 'semanal':
+        numero = -(-(data - inicio).days // 7)
+    else:
+        numero = (data.year - inicio.year) * 12 + data.month - inicio.month
+        if frequencia == 'anual':
+            numero = -(-numero // 12)
+    numero = max(numero, 0)
+    while data_ocorrencia(inicio, frequencia, numero) < data:
+        numero += 1
+    return numero
+
+
+def ocorrencias_pendentes(regra, hoje, limite):
+    """
+    Datas a lançar para a regra até `hoje` (no máximo `limite`).
+    Retorna (datas, próxima execução, regra continua ativa).
+    """
+    fim = min(hoje, regra.data_fim) if regra.data_fim else hoje
+    numero = numero_ocorrencia(regra.data_inicio, regra.frequencia, regra.proxima_execucao)
+    datas = []
+    proxima = data_ocorrencia(regra.data_inicio, regra.frequencia, numero)
+    while proxima <= fim and len(datas) < limite:
+        datas.append(proxima)
+        numero += 1
+        proxima = data_ocorrencia(regra.data_inicio, regra.frequencia, numero)
+    ativa = regra.data_fim is None or proxima <= regra.data_fim
+    return datas, proxima, ativa
+
+
+# ============== REGRAS DO USUÁRIO ==============
+
+def criar_recorrencia(cursor, usuario_id, tipo, valor, descricao, categoria, frequencia,
+                      data_inicio, data_fim=None):
+    """
+    Cria a regra a partir da transação lançada em `data_inicio` (a ocorrência 0,
+    gravada por quem chama com recorrencia_id = id retornado).
+    """
+    if frequencia not in FREQUENCIAS:
+        raise ValueError(f'Frequência inválida: {frequencia}')
+    proxima = data_ocorrencia(data_inicio, frequencia, 1)
+    cursor.execute('''
+        INSERT INTO recorrencias (usuario_id, tipo, valor, descricao, categoria, frequencia,
+                                  data_inicio, data_fim, proxima_execucao, ativa)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ''', (usuario_id, tipo, valor, descricao, categoria, frequencia, data_inicio, data_fim,
+          proxima, data_fim is None or proxima <= data_fim))
+    return cursor.lastrowid
+
+
+def listar_recorrencias(cursor, usuario_id):
+    cursor.execute('''
+        SELECT id, tipo, valor, descricao, categoria, frequencia,
+               data_inicio, data_fim, proxima_execucao, ativa
+        FROM recorrencias
+        WHERE usuario_id = %s
+        ORDER BY ativa DESC, proxima_execucao ASC
+    ''', (usuario_id,))
+    return cursor.fetchall()
+
+
+def encerrar_recorrencia(cursor, usuario_id, recorrencia_id):
+    """Desativa a regra; as transações já lançadas continuam. Retorna se encontrou"""
+    cursor.execute('''
+        UPDATE recorrencias SET ativa = FALSE
+        WHERE id = %s AND usuario_id = %s AND ativa = TRUE
+    ''', (recorrencia_id, usuario_id))
+    return cursor.rowcount > 0
+
+
+# ============== AGENDADOR ==============
+
+def _regras_vencidas(cursor, hoje, quantidade):
+    """Trava as regras vencidas; as travadas por outro agendador são puladas"""
+    cursor.execute('''
+        SELECT id, usuario_id, tipo, valor, descricao, categoria,
+               frequencia, data_inicio, data_fim, proxima_execucao
+        FROM recorrencias
+        WHERE ativa = TRUE AND proxima_execucao <= %s
+        ORDER BY proxima_execucao, id
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    ''', (hoje, quantidade))
+    return [Regra(*linha) for linha in cursor.fetchall()]
+
+
+def _materializar_lote(cursor, regras, hoje, limite):
+    """Lança as ocorrências das regras até `limite` linhas; retorna (linhas, regras atualizadas)"""
+    transacoes = []
+    atualizacoes = []
+    for regra in regras:
+        restante = limite - len(transacoes)
+        if restante <= 0:
+            # Regras que sobraram ficam para o próximo lote (liberadas no commit)
+            break
+        datas, proxima, ativa = ocorrencias_pendentes(regra, hoje, restante)
+        transacoes.extend((regra.usuario_id, regra.tipo, regra.valor, regra.descricao,
+                           regra.categoria, data, regra.id) for data in datas)
+        atualizacoes.append((proxima, ativa, regra.id))
+
+    if transacoes:
+        cursor.executemany('''
+            INSERT INTO transacoes (usuario_id, tipo, valor, descricao, categoria, data, recorrencia_id)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ''', transacoes)
+        por_usuario = {}
+        for usuario_id, tipo, valor, _, categoria, data, _ in transacoes:
+            por_usuario.setdefault(usuario_id, []).append((tipo, valor, data, categoria))
+        for usuario_id, lancamentos in por_usuario.items():
+            resumo.aplicar_lote(cursor, usuario_id, lancamentos)
+
+    cursor.executemany('''
+        UPDATE recorrencias SET proxima_execucao = %s, ativa = %s WHERE id = %s
+    ''', atualizacoes)
+    return transacoes, atualizacoes
+
+
+def executar(conn, hoje=None, regras_por_lote=REGRAS_POR_LOTE, ocorrencias_por_lote=OCORRENCIAS_POR_LOTE):
+    """
+    Lança todas as ocorrências vencidas até `hoje`, lote a lote.
+    Retorna {'lotes', 'regras', 'ocorrencias', 'usuarios'} (usuarios: set de ids afetados).
+    """
+    hoje = hoje or date.today()
+    resultado = {'lotes': 0, 'regras': 0, 'ocorrencias': 0, 'usuarios': set()}
+    cursor = conn.cursor()
+    try:
+        while True:
+            regras = _regras_vencidas(cursor, hoje, regras_por_lote)
+            if not regras:
+                conn.commit()
+                break
+            try:
+                transacoes, atualizacoes = _materializar_lote(cursor, regras, hoje, ocorrencias_por_lote)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+            resultado['lotes'] += 1
+            resultado['regras'] += len(atualizacoes)
+            resultado['ocorrencias'] += len(transacoes)
+            resultado['usuarios'].update(t[0] for t in transacoes)
+            logger.info('Lote %d: %d regra(s), %d ocorrência(s)',
+                        resultado['lotes'], len(atualizacoes), len(transacoes))
+    finally:
+        cursor.close()
+    return resultado
+
+
+if __name__ == '__main__':
+    import argparse
+    import mysql.connector
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    from cache import criar_cache, VIEWS_TRANSACOES
+    from config import DB_CONFIG
+
+    parser = argparse.ArgumentParser(description='Agendador de transações recorrentes')
+    parser.add_argument('--executar', action='store_true', help='Lança as ocorrências vencidas')
+    parser.add_argument('--data', type=date.fromisoformat, help='Data de referência (padrão: hoje)')
+    args = parser.parse_args()
+    if not args.executar:
+        parser.print_help()
+        sys.exit(0)
+
+    os.makedirs('logs', exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(os.path.join('logs', 'recorrencias.log'), encoding='utf-8'),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    try:
+        resultado = executar(conn, args.data)
+    except Exception:
+        logger.exception('Erro ao lançar recorrências')
+        sys.exit(1)
+    finally:
+        conn.close()
+
+    # Com CACHE_BACKEND=redis, as páginas dos usuários afetados são atualizadas na hora;
+    # o cache em memória é do processo do app e não é alcançado daqui
+    cache = criar_cache()
+    if cache.compartilhado:
+        for usuario_id in resultado['usuarios']:
+            cache.invalidate(usuario_id, *VIEWS_TRANSACOES)
+    elif resultado['usuarios']:
+        logger.warning('Cache das páginas não compartilhado (CACHE_BACKEND=memoria): as novas transações '
+                       'aparecem para %d usuário(s) quando o cache expirar (CACHE_TTL=%ds)',
+                       len(resultado['usuarios']), cache.ttl)
+
+    logger.info('Concluído: %d ocorrência(s) de %d regra(s) para %d usuário(s) em %d lote(s)',
+                resultado['ocorrencias'], resultado['regras'], len(resultado['usuarios']),
+                resultado['lotes'])
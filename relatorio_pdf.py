@@ -0,0 +1,270 @@
+"""
+Relatórios PDF em Streaming
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Gerador de PDF mínimo (PDF 1.4, fontes Helvetica padrão) que escreve cada
+página assim que ela é preenchida: o layout da tabela é definido uma vez
+(LayoutRelatorio), as linhas vêm de um gerador e cada página é enviada
+para a resposta como um bloco de bytes. Só o índice de objetos (xref)
+fica em memória até o fim.
+"""
+
+import zlib
+from collections import namedtuple
+
+MM = 72 / 25.4  # pontos por milímetro
+
+# Larguras Helvetica (1/1000 em) dos caracteres 32..126
+_LARGURAS_HELVETICA = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+
+FONTES = {
+    'normal': ('F1', 'Helvetica'),
+    'negrito': ('F2', 'Helvetica-Bold'),
+    'italico': ('F3', 'Helvetica-Oblique'),
+}
+
+
+def largura_texto(texto, tamanho):
+    """Largura aproximada do texto em pontos (Helvetica)"""
+    total = 0
+    for caractere in texto:
+        codigo = ord(caractere)
+        total += _LARGURAS_HELVETICA[codigo - 32] if 32 <= codigo <= 126 else 556
+    return total * tamanho / 1000
+
+
+def _texto_pdf(texto):
+    """Codifica em WinAnsi (cp1252) e escapa para string literal do PDF"""
+    dados = str(texto).encode('cp1252', 'replace')
+    return dados.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+# ============== LAYOUT ==============
+
+Coluna = namedtuple('Coluna', ['titulo', 'largura', 'alinhamento', 'formatar'])
+
+
+class LayoutRelatorio:
+    """Definição única do relatório: título, colunas e dimensões (em mm)"""
+
+    def __init__(self, titulo, colunas, altura_linha=8, margem=10,
+                 largura_pagina=210, altura_pagina=297,
+                 cor_cabecalho=(200, 220, 255), cor_linha=None):
+        """
+        colunas: lista de Coluna(titulo, largura_mm, 'L'|'C'|'R', formatar(linha) -> str)
+        cor_linha: função opcional linha -> (r, g, b) para a cor do texto
+        """
+        self.titulo = titulo
+        self.colunas = colunas
+        self.altura_linha = altura_linha * MM
+        self.margem = margem * MM
+        self.largura_pagina = largura_pagina * MM
+        self.altura_pagina = altura_pagina * MM
+        self.cor_cabecalho = cor_cabecalho
+        self.cor_linha = cor_linha
+
+        # Área da tabela: abaixo do título e acima do rodapé
+        self.topo_tabela = self.altura_pagina - self.margem - 20 * MM
+        self.base_tabela = self.margem + 15 * MM
+        self.linhas_por_pagina = int((self.topo_tabela - self.base_tabela) / self.altura_linha) - 1
+
+
+# ============== DESENHO DE PÁGINAS ==============
+
+class _Pagina:
+    """Acumula os comandos de conteúdo de uma página"""
+
+    def __init__(self, layout):
+        self.layout = layout
+        self.comandos = []
+
+    def _cor(self, cor, operador):
+        r, g, b = cor
+        self.comandos.append(f'{r / 255:.3f} {g / 255:.3f} {b / 255:.3f} {operador}'.encode())
+
+    def texto(self, x, y, texto, fonte='normal', tamanho=9):
+        nome = FONTES[fonte][0]
+        self.comandos.append(
+            b'BT /' + nome.encode() + f' {tamanho} Tf {x:.2f} {y:.2f} Td ('.encode()
+            + _texto_pdf(texto) + b') Tj ET'
+        )
+
+    def celula(self, x, y, largura, texto, alinhamento='L', fonte='normal', tamanho=9, fundo=None):
+        altura = self.layout.altura_linha
+        if fundo:
+            self._cor(fundo, 'rg')
+            self.comandos.append(f'{x:.2f} {y:.2f} {largura:.2f} {altura:.2f} re B'.encode())
+            self.comandos.append(b'0 0 0 rg')
+        else:
+            self.comandos.append(f'{x:.2f} {y:.2f} {largura:.2f} {altura:.2f} re S'.encode())
+
+        largura_txt = largura_texto(texto, tamanho)
+        if alinhamento == 'R':
+            tx = x + largura - largura_txt - 2
+        elif alinhamento == 'C':
+            tx = x + (largura - largura_txt) / 2
+        else:
+            tx = x + 2
+        self.texto(tx, y + (altura - tamanho * 0.7) / 2, texto, fonte, tamanho)
+
+    def conteudo(self):
+        return b'\n'.join(self.comandos)
+
+
+def _iniciar_pagina(layout, numero):
+    pagina = _Pagina(layout)
+    pagina.comandos.append(b'0.2 w 0 0 0 RG 0 0 0 rg')
+
+    # Título centralizado
+    tamanho = 15
+    x = (layout.largura_pagina - largura_texto(layout.titulo, tamanho)) / 2
+    pagina.texto(x, layout.altura_pagina - layout.margem - 12 * MM, layout.titulo, 'negrito', tamanho)
+
+    # Rodapé
+    rodape = f'Página {numero}'
+    x = (layout.largura_pagina - largura_texto(rodape, 8)) / 2
+    pagina.texto(x, layout.margem, rodape, 'italico', 8)
+
+    # Cabeçalho da tabela
+    x = layout.margem
+    y = layout.topo_tabela - layout.altura_linha
+    for coluna in layout.colunas:
+        largura = coluna.largura * MM
+        pagina.celula(x, y, largura, coluna.titulo, 'C', 'negrito', 10, fundo=layout.cor_cabecalho)
+        x += largura
+    return pagina
+
+
+def _desenhar_linha(pagina, layout, indice, linha):
+    y = layout.topo_tabela - layout.altura_linha * (indice + 2)
+    cor = layout.cor_linha(linha) if layout.cor_linha else None
+    if cor:
+        pagina._cor(cor, 'rg')
+    x = layout.margem
+    for coluna in layout.colunas:
+        largura = coluna.largura * MM
+        pagina.celula(x, y, largura, coluna.formatar(linha), coluna.alinhamento)
+        x += largura
+    if cor:
+        pagina.comandos.append(b'0 0 0 rg')
+
+
+# ============== ESCRITA DO ARQUIVO ==============
+
+class _EscritorPDF:
+    """Numera objetos e registra os offsets para a tabela xref"""
+
+    def __init__(self):
+        self.offsets = {}
+        self.posicao = 0
+
+    def emitir(self, dados):
+        self.posicao += len(dados)
+        return dados
+
+    def objeto(self, numero, corpo):
+        self.offsets[numero] = self.posicao
+        return self.emitir(f'{numero} 0 obj\n'.encode() + corpo + b'\nendobj\n')
+
+    def stream(self, numero, dados):
+        comprimido = zlib.compress(dados, 6)
+        corpo = (f'<< /Length {len(comprimido)} /Filter /FlateDecode >>\nstream\n'.encode()
+                 + comprimido + b'\nendstream')
+        return self.objeto(numero, corpo)
+
+
+# Objetos fixos
+_OBJ_CATALOGO = 1
+_OBJ_PAGINAS = 2
+_OBJ_FONTES = {'F1': 3, 'F2': 4, 'F3': 5}
+_PRIMEIRO_OBJ_PAGINA = 6
+
+
+def gerar_pdf(layout, linhas):
+    """
+    Gera o PDF página a página, consumindo `linhas` sob demanda.
+    Cada bloco de bytes emitido contém uma página completa.
+    """
+    escritor = _EscritorPDF()
+    yield escritor.emitir(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    recursos = ' '.join(f'/{nome} {numero} 0 R' for nome, numero in _OBJ_FONTES.items())
+    inicio = escritor.objeto(_OBJ_CATALOGO, f'<< /Type /Catalog /Pages {_OBJ_PAGINAS} 0 R >>'.encode())
+    for nome, base in FONTES.values():
+        inicio += escritor.objeto(
+            _OBJ_FONTES[nome],
+            f'<< /Type /Font /Subtype /Type1 /BaseFont /{base} /Encoding /WinAnsiEncoding >>'.encode()
+        )
+    yield inicio
+
+    paginas = []
+    proximo_obj = _PRIMEIRO_OBJ_PAGINA
+
+    def fechar_pagina(pagina):
+        nonlocal proximo_obj
+        conteudo_obj, pagina_obj = proximo_obj, proximo_obj + 1
+        proximo_obj += 2
+        paginas.append(pagina_obj)
+        dados = escritor.stream(conteudo_obj, pagina.conteudo())
+        dados += escritor.objeto(pagina_obj, (
+            f'<< /Type /Page /Parent {_OBJ_PAGINAS} 0 R '
+            f'/MediaBox [0 0 {layout.largura_pagina:.2f} {layout.altura_pagina:.2f}] '
+            f'/Resources << /Font << {recursos} >> >> /Contents {conteudo_obj} 0 R >>'
+        ).encode())
+        return dados
+
+    pagina = _iniciar_pagina(layout, 1)
+    indice = 0
+    for linha in linhas:
+        if indice == layout.linhas_por_pagina:
+            yield fechar_pagina(pagina)
+            pagina = _iniciar_pagina(layout, len(paginas) + 1)
+            indice = 0
+        _desenhar_linha(pagina, layout, indice, linha)
+        indice += 1
+    final = fechar_pagina(pagina)
+
+    # Árvore de páginas, xref e trailer
+    kids = ' '.join(f'{numero} 0 R' for numero in paginas)
+    final += escritor.objeto(_OBJ_PAGINAS, f'<< /Type /Pages /Kids [{kids}] /Count {len(paginas)} >>'.encode())
+
+    inicio_xref = escritor.posicao
+    total_objetos = max(escritor.offsets) + 1
+    xref = [f'xref\n0 {total_objetos}\n0000000000 65535 f \n']
+    for numero in range(1, total_objetos):
+        xref.append(f'{escritor.offsets[numero]:010d} 00000 n \n')
+    xref.append(f'trailer\n<< /Size {total_objetos} /Root {_OBJ_CATALOGO} 0 R >>\n'
+                f'startxref\n{inicio_xref}\n%%EOF\n')
+    final += ''.join(xref).encode()
+    yield final
+
+
+# ============== RELATÓRIO DE TRANSAÇÕES ==============
+
+def _cor_tipo(linha):
+    if linha[0] == 'despesa':
+        return (180, 0, 0)  # Vermelho escuro
+    if linha[0] == 'receita':
+        return (0, 100, 0)  # Verde escuro
+    return None
+
+
+# Linhas no formato de exportacao.COLUNAS_TRANSACOES: (tipo, categoria, descricao, valor, data)
+LAYOUT_TRANSACOES = LayoutRelatorio(
+    'Relatório Financeiro',
+    [
+        Coluna('Data', 30, 'C', lambda t: t[4].strftime('%d/%m/%Y')),
+        Coluna('Tipo', 30, 'C', lambda t: t[0].capitalize()),
+        Coluna('Categoria', 40, 'L', lambda t: (t[1] or '')[:20]),
+        Coluna('Descrição', 60, 'L', lambda t: t[2][:30]),
+        Coluna('Valor', 30, 'R', lambda t: f'R$ {t[3]:.2f}'),
+    ],
+    cor_linha=_cor_tipo,
+)
@@ -0,0 +1,334 @@
+"""
+Repositório de Backups Deduplicado (BACKUP_REPOSITORIO=true)
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Em vez de um ZIP independente por backup, o conteúdo de cada membro (dump,
+partes do dump paralelo, arquivos do projeto, manifesto) é cortado em
+pedaços guardados uma única vez, pelo SHA-256, em <BACKUP_DIR>/pedacos/.
+Cada backup vira um snapshot (backup_<data>.snap): um JSON com a lista de
+pedaços de cada membro.
+
+- Cortes definidos pelo conteúdo: o fim de um pedaço é onde o hash
+  "gear" dos últimos 32 bytes tem os 16 bits altos zerados (pedaços de 16 KB
+  a 256 KB, ~80 KB em média). Uma inclusão no meio do dump só muda os
+  pedaços em volta; os seguintes voltam a coincidir com os do backup
+  anterior. O hash é calculado para o bloco inteiro com NumPy.
+- Pedaços novos são comprimidos (zstd, se instalado, senão gzip) e gravados
+  com nome temporário + rename; pedaços já existentes só têm o mtime
+  atualizado.
+- Coleta de lixo por contagem de referências: as referências de cada pedaço
+  são contadas nos snapshots existentes (a fonte da verdade, sem índice
+  separado para ficar inconsistente). Depois da rotação, pedaços sem
+  referência e sem uso há mais de CARENCIA_SEGUNDOS são apagados, o que
+  também limpa os de backups interrompidos.
+
+GravadorSnapshot e LeitorSnapshot têm a parte da interface de ZipFile
+usada pelo backup (open/write/writestr/getinfo/namelist/read), então
+BackupManager, o dump paralelo, os incrementais e a restauração funcionam
+igual com os dois formatos (ver abrir_backup).
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import time
+import zipfile
+from collections import Counter, namedtuple
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+import dump_paralelo
+
+PASTA_PEDACOS = 'pedacos'
+EXTENSAO = '.snap'
+VERSAO_SNAPSHOT = 1
+
+TAMANHO_MINIMO = 16 * 1024
+TAMANHO_MAXIMO = 256 * 1024
+BITS_CORTE = 16
+JANELA = 32
+BLOCO = 4 * 1024 * 1024
+CARENCIA_SEGUNDOS = 3600
+
+# Tabela do hash gear: 256 valores fixos (mudá-los muda todos os cortes)
+GEAR = np.random.default_rng(20251201).integers(0, 2 ** 32, 256, dtype=np.uint64).astype(np.uint32)
+
+MAGICO_ZSTD = b'\x28\xb5\x2f\xfd'
+
+InfoMembro = namedtuple('InfoMembro', 'filename file_size pedacos')
+
+
+# ============== CORTES ==============
+
+def fins_candidatos(dados):
+    """Posições (exclusivas) em que um pedaço pode terminar: hash dos últimos JANELA bytes < 2^(32-BITS_CORTE)"""
+    h = np.take(GEAR, np.frombuffer(dados, dtype=np.uint8))
+    # h[i] = soma de GEAR[b[i-k]] << k, k < JANELA, em log2(JANELA) passos
+    passo = 1
+    while passo < JANELA:
+        h[passo:] += h[:-passo] << np.uint32(passo)
+        passo *= 2
+    return np.flatnonzero(h < np.uint32(1 << (32 - BITS_CORTE))) + 1
+
+
+class Fragmentador:
+    """Corta um fluxo de bytes em pedaços definidos pelo conteúdo"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def adicionar(self, dados):
+        """Acrescenta `dados`; retorna os pedaços completos"""
+        self.buffer += dados
+        if len(self.buffer) < BLOCO:
+            return []
+        return self.cortar(final=False)
+
+    def finalizar(self):
+        return self.cortar(final=True)
+
+    def cortar(self, final):
+        buffer = self.buffer
+        fins = fins_candidatos(buffer)
+        pedacos = []
+        inicio = 0
+        while True:
+            # Primeiro fim candidato a partir do tamanho mínimo
+            i = np.searchsorted(fins, inicio + TAMANHO_MINIMO)
+            fim = int(fins[i]) if i < len(fins) else None
+            if fim is None or fim - inicio > TAMANHO_MAXIMO:
+                fim = inicio + TAMANHO_MAXIMO
+            if fim > len(buffer):
+                break
+            pedacos.append(bytes(buffer[inicio:fim]))
+            inicio = fim
+        if final and inicio < len(buffer):
+            pedacos.append(bytes(buffer[inicio:]))
+            inicio = len(buffer)
+        self.buffer = buffer[inicio:]
+        return pedacos
+
+
+# ============== REPOSITÓRIO ==============
+
+def descomprimir(dados):
+    if dados[:4] == MAGICO_ZSTD:
+        if dump_paralelo.zstandard is None:
+            raise RuntimeError('instale o pacote zstandard para ler este repositório')
+        return dump_paralelo.zstandard.ZstdDecompressor().decompress(dados)
+    return gzip.decompress(dados)
+
+
+class Repositorio:
+    """Pedaços comprimidos endereçados pelo SHA-256 do conteúdo"""
+
+    def __init__(self, pasta):
+        self.pasta = Path(pasta)
+
+    def caminho(self, hash_pedaco):
+        return self.pasta / hash_pedaco[:2] / hash_pedaco
+
+    def guardar(self, dados):
+        """Guarda um pedaço; retorna (hash, bytes gravados: 0 se já existia)"""
+        hash_pedaco = hashlib.sha256(dados).hexdigest()
+        destino = self.caminho(hash_pedaco)
+        if destino.exists():
+            # Marca o uso: a coleta não apaga um pedaço que um backup em andamento reaproveitou
+            os.utime(destino)
+            return hash_pedaco, 0
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        comprimido = dump_paralelo.comprimir(dados)
+        temporario = destino.with_name(f'{hash_pedaco}.{os.getpid()}.tmp')
+        temporario.write_bytes(comprimido)
+        os.replace(temporario, destino)
+        return hash_pedaco, len(comprimido)
+
+    def ler(self, hash_pedaco):
+        dados = descomprimir(self.caminho(hash_pedaco).read_bytes())
+        if hashlib.sha256(dados).hexdigest() != hash_pedaco:
+            raise ValueError(f'Pedaço corrompido: {hash_pedaco}')
+        return dados
+
+    def pedacos(self):
+        """Caminhos de todos os pedaços guardados"""
+        if not self.pasta.exists():
+            return []
+        return [caminho for caminho in self.pasta.glob('??/*') if not caminho.name.endswith('.tmp')]
+
+    def coletar(self, snapshots, carencia=CARENCIA_SEGUNDOS):
+        """
+        Apaga os pedaços sem referência em `snapshots` (caminhos .snap) e sem
+        uso há mais de `carencia` segundos; retorna (pedaços, bytes) liberados.
+        """
+        referencias = contar_referencias(snapshots)
+        limite = time.time() - carencia
+        removidos, liberados = 0, 0
+        for caminho in self.pedacos():
+            if referencias[caminho.name]:
+                continue
+            estado = caminho.stat()
+            if estado.st_mtime > limite:
+                continue
+            caminho.unlink()
+            removidos += 1
+            liberados += estado.st_size
+        return removidos, liberados
+
+    def tamanho(self):
+        return sum(caminho.stat().st_size for caminho in self.pedacos())
+
+
+def ler_snapshot(caminho):
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def contar_referencias(snapshots):
+    """Referências de cada pedaço nos snapshots"""
+    referencias = Counter()
+    for caminho in snapshots:
+        for membro in ler_snapshot(caminho)['membros']:
+            referencias.update(membro['pedacos'])
+    return referencias
+
+
+def repositorio_de(caminho):
+    """Repositório dos pedaços de um snapshot (na mesma pasta)"""
+    return Repositorio(Path(caminho).parent / PASTA_PEDACOS)
+
+
+# ============== GRAVAÇÃO E LEITURA ==============
+
+class MembroGravacao(io.RawIOBase):
+    """Membro de um snapshot aberto para escrita: cada pedaço pronto vai para o repositório"""
+
+    def __init__(self, gravador, nome):
+        self.gravador = gravador
+        self.nome = nome
+        self.fragmentador = Fragmentador()
+        self.pedacos = []
+        self.tamanho = 0
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self.tamanho += len(dados)
+        self.guardar(self.fragmentador.adicionar(dados))
+        return len(dados)
+
+    def guardar(self, pedacos):
+        for pedaco in pedacos:
+            hash_pedaco, gravados = self.gravador.repositorio.guardar(pedaco)
+            self.pedacos.append(hash_pedaco)
+            self.gravador.estatisticas['pedacos'] += 1
+            if gravados:
+                self.gravador.estatisticas['pedacos_novos'] += 1
+                self.gravador.estatisticas['bytes_novos'] += gravados
+
+    def close(self):
+        if not self.closed:
+            self.guardar(self.fragmentador.finalizar())
+            self.gravador.registrar(InfoMembro(self.nome, self.tamanho, self.pedacos))
+        super().close()
+
+
+class GravadorSnapshot:
+    """Substituto de ZipFile(caminho, 'w') que grava um snapshot no repositório"""
+
+    def __init__(self, caminho, repositorio):
+        self.caminho = Path(caminho)
+        self.repositorio = repositorio
+        self.membros = {}
+        self.estatisticas = {'bytes_logicos': 0, 'bytes_novos': 0, 'pedacos': 0, 'pedacos_novos': 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.close()
+
+    def registrar(self, info):
+        self.membros[info.filename] = info
+        self.estatisticas['bytes_logicos'] += info.file_size
+
+    def open(self, nome, mode='w', force_zip64=False):
+        return MembroGravacao(self, nome)
+
+    def writestr(self, nome, dados):
+        if isinstance(nome, zipfile.ZipInfo):
+            nome = nome.filename
+        if isinstance(dados, str):
+            dados = dados.encode('utf-8')
+        with self.open(nome) as destino:
+            destino.write(dados)
+
+    def write(self, arquivo, nome):
+        with open(arquivo, 'rb') as origem, self.open(nome) as destino:
+            while True:
+                dados = origem.read(BLOCO)
+                if not dados:
+                    break
+                destino.write(dados)
+
+    def getinfo(self, nome):
+        return self.membros[nome]
+
+    def namelist(self):
+        return list(self.membros)
+
+    def close(self):
+        conteudo = {
+            'versao': VERSAO_SNAPSHOT,
+            'backup': self.caminho.name.split(EXTENSAO)[0] + EXTENSAO,
+            'criado_em': datetime.now().isoformat(timespec='seconds'),
+            **self.estatisticas,
+            'membros': [{'nome': info.filename, 'tamanho': info.file_size, 'pedacos': info.pedacos}
+                        for info in self.membros.values()],
+        }
+        with open(self.caminho, 'w', encoding='utf-8') as f:
+            json.dump(conteudo, f, separators=(',', ':'))
+
+
+class LeitorSnapshot:
+    """Substituto de ZipFile(caminho) para ler um snapshot; membros lidos pedaço a pedaço"""
+
+    def __init__(self, caminho, repositorio=None):
+        self.repositorio = repositorio or repositorio_de(caminho)
+        self.conteudo = ler_snapshot(caminho)
+        self.membros = {membro['nome']: InfoMembro(membro['nome'], membro['tamanho'], membro['pedacos'])
+                        for membro in self.conteudo['membros']}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.close()
+
+    def namelist(self):
+        return list(self.membros)
+
+    def getinfo(self, nome):
+        return self.membros[nome]
+
+    def open(self, nome, mode='r'):
+        pedacos = self.membros[nome].pedacos
+        return dump_paralelo.LeituraEncadeada(io.BytesIO(self.repositorio.ler(h)) for h in pedacos)
+
+    def read(self, nome):
+        with self.open(nome) as entrada:
+            return entrada.read()
+
+    def close(self):
+        pass
+
+
+def abrir_backup(caminho):
+    """Backup para leitura: ZipFile para .zip, LeitorSnapshot para .snap"""
+    if str(caminho).endswith(EXTENSAO):
+        return LeitorSnapshot(caminho)
+    return zipfile.ZipFile(caminho)
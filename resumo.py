@@ -0,0 +1,301 @@
+"""
+Resumos Financeiros Materializados
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Mantém, por usuário, o saldo acumulado (resumo_usuario), os totais de
+receitas/despesas de cada mês (resumo_mensal) e a soma e a quantidade de
+transações por mês, tipo e categoria (resumo_categoria). As tabelas são
+atualizadas na mesma transação que insere ou exclui a transação, de modo
+que o dashboard e os relatórios leem um número de linhas que depende dos
+meses exibidos, não do número de transações.
+
+Uso (manutenção):
+    python resumo.py --verificar            # aponta divergências
+    python resumo.py --reconciliar          # reconstrói só os usuários divergentes
+    python resumo.py --reconstruir          # recalcula tudo, em lotes de usuários
+    python resumo.py --reconstruir --usuario 2
+"""
+
+from datetime import date
+from decimal import Decimal
+
+# Mesmo DEFAULT de transacoes.categoria (a importação pode gravar NULL)
+CATEGORIA_PADRAO = 'Outros'
+USUARIOS_POR_LOTE = 200
+
+
+def inicio_do_mes(data):
+    """Primeiro dia do mês de `data` (chave de resumo_mensal)"""
+    return date(data.year, data.month, 1)
+
+
+# ============== ATUALIZAÇÃO INCREMENTAL ==============
+
+def aplicar_transacao(cursor, usuario_id, tipo, valor, data, categoria=None, sinal=1):
+    """
+    Aplica uma transação aos resumos do usuário.
+    Use sinal=1 ao inserir e sinal=-1 ao excluir. Não faz commit: deve rodar
+    na mesma transação do INSERT/DELETE em transacoes.
+    """
+    aplicar_lote(cursor, usuario_id, [(tipo, valor, data, categoria)], sinal)
+
+
+def aplicar_lote(cursor, usuario_id, transacoes, sinal=1):
+    """
+    Aplica várias transações (tipo, valor, data, categoria) de uma vez: os
+    valores são somados por mês e por (mês, tipo, categoria) em Python e
+    gravados com um upsert por linha de resumo afetada (em vez de upserts
+    por transação).
+    """
+    saldo = Decimal('0')
+    meses = {}
+    categorias = {}
+    for tipo, valor, data, categoria in transacoes:
+        valor = Decimal(str(valor)) * sinal
+        mes = meses.setdefault(inicio_do_mes(data), [Decimal('0'), Decimal('0')])
+        chave = (inicio_do_mes(data), tipo, CATEGORIA_PADRAO if categoria is None else categoria)
+        grupo = categorias.setdefault(chave, [Decimal('0'), 0])
+        grupo[0] += valor
+        grupo[1] += sinal
+        if tipo == 'receita':
+            mes[0] += valor
+            saldo += valor
+        else:
+            mes[1] += valor
+            saldo -= valor
+
+    if not meses:
+        return
+
+    cursor.execute('''
+        INSERT INTO resumo_usuario (usuario_id, saldo)
+        VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE saldo = saldo + VALUES(saldo)
+    ''', (usuario_id, saldo))
+
+    for mes, (receitas, despesas) in sorted(meses.items()):
+        cursor.execute('''
+            INSERT INTO resumo_mensal (usuario_id, mes, receitas, despesas)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                receitas = receitas + VALUES(receitas),
+                despesas = despesas + VALUES(despesas)
+        ''', (usuario_id, mes, receitas, despesas))
+
+    cursor.executemany('''
+        INSERT INTO resumo_categoria (usuario_id, mes, tipo, categoria, total, quantidade)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            total = total + VALUES(total),
+            quantidade = quantidade + VALUES(quantidade)
+    ''', [(usuario_id, mes, tipo, categoria, total, quantidade)
+          for (mes, tipo, categoria), (total, quantidade) in sorted(categorias.items())])
+
+    if sinal < 0:
+        # Categoria sem transações no mês deixa de aparecer nos relatórios
+        cursor.execute('''
+            DELETE FROM resumo_categoria
+            WHERE usuario_id = %s AND mes >= %s AND mes <= %s AND quantidade <= 0
+        ''', (usuario_id, min(meses), max(meses)))
+
+
+# ============== LEITURA ==============
+
+def obter_resumo_dashboard(cursor, usuario_id, hoje=None):
+    """
+    Retorna (saldo, mes_atual) lendo apenas as linhas materializadas.
+    mes_atual = {'receitas': ..., 'despesas': ...}
+    """
+    hoje = hoje or date.today()
+    cursor.execute('''
+        SELECT
+            COALESCE(r.saldo, 0) AS saldo,
+            COALESCE(m.receitas, 0) AS receitas,
+            COALESCE(m.despesas, 0) AS despesas
+        FROM usuarios u
+        LEFT JOIN resumo_usuario r ON r.usuario_id = u.id
+        LEFT JOIN resumo_mensal m ON m.usuario_id = u.id AND m.mes = %s
+        WHERE u.id = %s
+    ''', (inicio_do_mes(hoje), usuario_id))
+    row = cursor.fetchone()
+
+    if not row:
+        return 0, {'receitas': 0, 'despesas': 0}
+    return row['saldo'], {'receitas': row['receitas'], 'despesas': row['despesas']}
+
+
+# ============== RECONSTRUÇÃO / VERIFICAÇÃO ==============
+
+# Agregações de referência, calculadas direto de transacoes
+_SQL_SALDO = '''
+    SELECT usuario_id, SUM(CASE WHEN tipo = 'receita' THEN valor ELSE -valor END)
+    FROM transacoes{filtro}
+    GROUP BY usuario_id
+'''
+
+_SQL_MENSAL = '''
+    SELECT usuario_id,
+           DATE_SUB(data, INTERVAL DAYOFMONTH(data) - 1 DAY) AS mes,
+           SUM(CASE WHEN tipo = 'receita' THEN valor ELSE 0 END),
+           SUM(CASE WHEN tipo = 'despesa' THEN valor ELSE 0 END)
+    FROM transacoes{filtro}
+    GROUP BY usuario_id, mes
+'''
+
+_SQL_CATEGORIA = f'''
+    SELECT usuario_id,
+           DATE_SUB(data, INTERVAL DAYOFMONTH(data) - 1 DAY) AS mes,
+           tipo,
+           COALESCE(categoria, '{CATEGORIA_PADRAO}') AS cat,
+           SUM(valor),
+           COUNT(*)
+    FROM transacoes{{filtro}}
+    GROUP BY usuario_id, mes, tipo, cat
+'''
+
+
+def _filtro_usuario(usuario_id, coluna='usuario_id'):
+    if usuario_id is None:
+        return '', ()
+    return f' WHERE {coluna} = %s', (usuario_id,)
+
+
+def reconstruir_resumos(cursor, usuario_id=None):
+    """Recalcula os resumos a partir de transacoes (todos ou de um usuário)"""
+    filtro, params = _filtro_usuario(usuario_id)
+
+    cursor.execute('DELETE FROM resumo_usuario' + filtro, params)
+    cursor.execute('DELETE FROM resumo_mensal' + filtro, params)
+    cursor.execute('DELETE FROM resumo_categoria' + filtro, params)
+
+    cursor.execute('INSERT INTO resumo_usuario (usuario_id, saldo)'
+                   + _SQL_SALDO.format(filtro=filtro), params)
+    cursor.execute('INSERT INTO resumo_mensal (usuario_id, mes, receitas, despesas)'
+                   + _SQL_MENSAL.format(filtro=filtro), params)
+    cursor.execute('INSERT INTO resumo_categoria (usuario_id, mes, tipo, categoria, total, quantidade)'
+                   + _SQL_CATEGORIA.format(filtro=filtro), params)
+
+
+def reconstruir_em_lotes(conn, usuarios=None, tamanho=USUARIOS_POR_LOTE):
+    """
+    Backfill: reconstrói os resumos usuário a usuário (todos, se `usuarios`
+    for None), com um commit a cada `tamanho` usuários para não manter uma
+    única transação longa sobre a tabela inteira. Retorna os usuários processados.
+    """
+    cursor = conn.cursor()
+    try:
+        if usuarios is None:
+            cursor.execute('SELECT id FROM usuarios ORDER BY id')
+            usuarios = [linha[0] for linha in cursor.fetchall()]
+        for inicio in range(0, len(usuarios), tamanho):
+            for usuario_id in usuarios[inicio:inicio + tamanho]:
+                reconstruir_resumos(cursor, usuario_id)
+            conn.commit()
+        return list(usuarios)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def comparar_resumos(armazenados, calculados):
+    """
+    Compara dois dicionários {chave: valor} e retorna a lista de divergências
+    no formato (chave, armazenado, calculado). Ausência conta como zero.
+    """
+    divergencias = []
+    for chave in sorted(set(armazenados) | set(calculados), key=str):
+        atual = armazenados.get(chave, Decimal('0'))
+        esperado = calculados.get(chave, Decimal('0'))
+        if atual != esperado:
+            divergencias.append((chave, atual, esperado))
+    return divergencias
+
+
+def _por_categoria(linhas):
+    resultado = {}
+    for u, mes, tipo, categoria, total, quantidade in linhas:
+        resultado[('categoria', u, mes, tipo, categoria)] = total
+        resultado[('quantidade', u, mes, tipo, categoria)] = quantidade
+    return resultado
+
+
+def verificar_resumos(cursor, usuario_id=None):
+    """
+    Retorna as divergências entre os resumos e a tabela transacoes. O segundo
+    item de cada chave é sempre o usuario_id.
+    """
+    filtro, params = _filtro_usuario(usuario_id)
+
+    cursor.execute('SELECT usuario_id, saldo FROM resumo_usuario' + filtro, params)
+    saldo_armazenado = {('saldo', u): s for u, s in cursor.fetchall()}
+
+    cursor.execute(_SQL_SALDO.format(filtro=filtro), params)
+    saldo_calculado = {('saldo', u): s for u, s in cursor.fetchall()}
+
+    cursor.execute('SELECT usuario_id, mes, receitas, despesas FROM resumo_mensal' + filtro, params)
+    mensal_armazenado = {}
+    for u, mes, receitas, despesas in cursor.fetchall():
+        mensal_armazenado[('receitas', u, mes)] = receitas
+        mensal_armazenado[('despesas', u, mes)] = despesas
+
+    cursor.execute(_SQL_MENSAL.format(filtro=filtro), params)
+    mensal_calculado = {}
+    for u, mes, receitas, despesas in cursor.fetchall():
+        mensal_calculado[('receitas', u, mes)] = receitas
+        mensal_calculado[('despesas', u, mes)] = despesas
+
+    cursor.execute('SELECT usuario_id, mes, tipo, categoria, total, quantidade FROM resumo_categoria'
+                   + filtro, params)
+    categoria_armazenada = _por_categoria(cursor.fetchall())
+    cursor.execute(_SQL_CATEGORIA.format(filtro=filtro), params)
+    categoria_calculada = _por_categoria(cursor.fetchall())
+
+    return (comparar_resumos(saldo_armazenado, saldo_calculado)
+            + comparar_resumos(mensal_armazenado, mensal_calculado)
+            + comparar_resumos(categoria_armazenada, categoria_calculada))
+
+
+def reconciliar_resumos(conn, usuario_id=None):
+    """Reconstrói apenas os usuários com divergências; retorna a lista deles"""
+    cursor = conn.cursor()
+    try:
+        divergentes = sorted({chave[1] for chave, _, _ in verificar_resumos(cursor, usuario_id)})
+    finally:
+        cursor.close()
+    return reconstruir_em_lotes(conn, divergentes)
+
+
+# ============== EXECUÇÃO ==============
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+    import mysql.connector
+    from config import DB_CONFIG
+
+    parser = argparse.ArgumentParser(description='Manutenção dos resumos financeiros')
+    parser.add_argument('--verificar', action='store_true', help='Lista divergências')
+    parser.add_argument('--reconciliar', action='store_true', help='Reconstrói os usuários divergentes')
+    parser.add_argument('--reconstruir', action='store_true', help='Recalcula os resumos')
+    parser.add_argument('--usuario', type=int, help='Restringe a um usuário')
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    try:
+        if args.reconstruir:
+            usuarios = reconstruir_em_lotes(conn, [args.usuario] if args.usuario else None)
+            print(f"✅ Resumos reconstruídos ({len(usuarios)} usuário(s))")
+        elif args.reconciliar:
+            usuarios = reconciliar_resumos(conn, args.usuario)
+            print(f"✅ {len(usuarios)} usuário(s) reconciliado(s): {usuarios}")
+
+        cursor = conn.cursor()
+        divergencias = verificar_resumos(cursor, args.usuario)
+        for chave, atual, esperado in divergencias:
+            print(f"⚠ {chave}: armazenado={atual} calculado={esperado}")
+        print(f"{len(divergencias)} divergência(s) encontrada(s)")
+        sys.exit(1 if divergencias else 0)
+    finally:
+        conn.close()
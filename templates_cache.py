@@ -0,0 +1,101 @@
+"""
+Templates Pré-compilados e Cache de Fragmentos
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Duas camadas em cima do Jinja:
+
+1. Bytecode em disco: os templates compilados ficam em JINJA_CACHE_DIR
+   (FileSystemBytecodeCache do Jinja), uma pasta compartilhada pelos workers
+   do gunicorn. `python templates_cache.py` compila todos os templates antes
+   de subir os workers, que passam a carregar o bytecode pronto em vez de
+   compilar cada template no primeiro acesso. Um template alterado tem outro
+   checksum e é recompilado sozinho.
+
+2. Fragmentos por usuário: o trecho entre
+       {% cache_usuario 'metas', today %} ... {% endcache_usuario %}
+   é guardado como HTML no ViewCache (cache.py), na versão atual da view do
+   usuário ('metas'). As rotas de escrita já invalidam essa view, então o
+   fragmento é descartado junto com os dados. Os argumentos depois da view
+   entram na chave (ex.: a data, quando o trecho mostra dias restantes), assim
+   como o template, a linha e o endpoint. Fora de uma requisição com usuário
+   logado, o trecho é renderizado normalmente.
+
+Configuração (.env):
+    JINJA_CACHE_DIR=cache_templates   (vazio desliga o bytecode em disco)
+    CACHE_FRAGMENTOS=1                (0 desliga o cache de fragmentos)
+"""
+
+import os
+
+from flask import current_app, has_request_context, request, session
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+JINJA_CACHE_DIR = os.getenv('JINJA_CACHE_DIR', 'cache_templates')
+CACHE_FRAGMENTOS = os.getenv('CACHE_FRAGMENTOS', '1') != '0'
+
+
+def configurar(app, pasta=JINJA_CACHE_DIR, fragmentos=CACHE_FRAGMENTOS):
+    """Liga o bytecode em disco e a tag {% cache_usuario %} no Jinja do app"""
+    if pasta:
+        pasta = os.path.join(app.root_path, pasta)
+        os.makedirs(pasta, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(pasta)
+    app.jinja_env.add_extension(FragmentoUsuario)
+    app.jinja_env.fragmentos_ativos = fragmentos
+
+
+def compilar(app):
+    """
+    Compila todos os templates do app (e grava o bytecode, se configurado).
+    Retorna os nomes compilados; um erro de sintaxe interrompe com TemplateSyntaxError.
+    """
+    nomes = sorted(app.jinja_env.list_templates(extensions=['html']))
+    for nome in nomes:
+        app.jinja_env.get_template(nome)
+    return nomes
+
+
+# ============== CACHE DE FRAGMENTOS ==============
+
+class FragmentoUsuario(Extension):
+    """{% cache_usuario view[, chave...] %} ... {% endcache_usuario %}"""
+
+    tags = {'cache_usuario'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragmentos_ativos=True)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        argumentos = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            argumentos.append(parser.parse_expression())
+        corpo = parser.parse_statements(('name:endcache_usuario',), drop_needle=True)
+
+        local = nodes.Const(f'{parser.name}:{lineno}')
+        chamada = self.call_method('_renderizar', [local, nodes.List(argumentos)])
+        return nodes.CallBlock(chamada, [], [], corpo).set_lineno(lineno)
+
+    def _renderizar(self, local, argumentos, caller):
+        view_cache = None
+        if self.environment.fragmentos_ativos and has_request_context():
+            view_cache = current_app.extensions.get('view_cache')
+        usuario_id = session.get('user_id') if view_cache is not None else None
+        if usuario_id is None:
+            return caller()
+
+        view, *chaves = argumentos
+        variante = ':'.join(['fragmento', local, request.endpoint or '', *map(str, chaves)])
+        return Markup(view_cache.get_or_load(usuario_id, view, lambda: str(caller()), variante=variante))
+
+
+if __name__ == '__main__':
+    # Passo de build: compila os templates para JINJA_CACHE_DIR antes do gunicorn
+    from app import app
+
+    nomes = compilar(app)
+    destino = app.jinja_env.bytecode_cache.directory if app.jinja_env.bytecode_cache else 'desligado'
+    print(f'{len(nomes)} templates compilados (bytecode: {destino})')
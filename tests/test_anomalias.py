@@ -0,0 +1,194 @@
+"""
+Testes Automatizados - Gastos Fora do Padrão
+Projeto A3 - Gestão e Qualidade de Software
+
+O teste do processamento incremental precisa do MySQL com o
+database_schema.sql aplicado; sem banco disponível ele é ignorado.
+"""
+
+import unittest
+import sys
+import os
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import mysql.connector
+import anomalias
+from config import DB_CONFIG
+
+
+def conectar_banco():
+    """Retorna uma conexão ou None se o MySQL não estiver disponível"""
+    try:
+        return mysql.connector.connect(connection_timeout=3, **DB_CONFIG)
+    except mysql.connector.Error:
+        return None
+
+
+class CursorTransacoes:
+    """Devolve as linhas da consulta de analisar_usuario e guarda os parâmetros"""
+
+    def __init__(self, linhas):
+        self.linhas = linhas
+
+    def execute(self, sql, params):
+        self.params = params
+
+    def fetchall(self):
+        return self.linhas
+
+
+class TestAnomalias(unittest.TestCase):
+    """
+    TESTES DOS GASTOS FORA DO PADRÃO
+    """
+
+    def test_47_estatisticas_robustas(self):
+        """
+        TA-47: Mediana por grupo e marcação de meses e transações
+        Tipo: Unitário
+        Objetivo: Medianas iguais às do NumPy e só os valores atípicos marcados
+        """
+        print("\n🧪 Executando TA-47: Estatísticas Robustas...")
+
+        aleatorio = np.random.default_rng(7)
+        grupos = aleatorio.integers(0, 6, 500)
+        valores = aleatorio.normal(100, 20, 500)
+        mediana, contagem = anomalias.mediana_por_grupo(grupos, valores, 7)
+        for g in range(6):
+            self.assertAlmostEqual(mediana[g], np.median(valores[grupos == g]))
+        self.assertTrue(np.isnan(mediana[6]))
+        self.assertEqual(contagem.sum(), 500)
+        # Centavos (inteiros) usam a ordenação por chave única: mesmo resultado
+        centavos = aleatorio.integers(0, 10 ** 9, 500)
+        mediana, _ = anomalias.mediana_por_grupo(grupos, centavos, 7)
+        for g in range(6):
+            self.assertEqual(mediana[g], np.median(centavos[grupos == g]))
+
+        # Categoria 0: 6 compras/mês de R$ 150-200 por 14 meses; no mês 12 uma de R$ 3.000
+        # Categoria 1: um único gasto (sem histórico suficiente)
+        meses, categorias, centavos = [], [], []
+        for mes in range(14):
+            for _ in range(6):
+                meses.append(mes)
+                categorias.append(0)
+                centavos.append(int(aleatorio.integers(15000, 20000)))
+        meses += [12, 13]
+        categorias += [0, 1]
+        centavos += [300000, 500]
+        meses, categorias, centavos = np.array(meses), np.array(categorias), np.array(centavos)
+
+        categoria, mes, total, mediana, limite, pontuacao = anomalias.meses_fora_do_padrao(
+            meses, categorias, centavos, 2, 2)
+        self.assertEqual((categoria.tolist(), mes.tolist()), ([0], [0]))
+        self.assertGreater(total[0], limite[0])
+        self.assertGreater(pontuacao[0], anomalias.LIMIAR)
+
+        posicoes, mes, mediana, limite, pontuacao = anomalias.transacoes_fora_do_padrao(
+            meses, categorias, centavos, 2, 2)
+        self.assertEqual(posicoes.tolist(), [len(centavos) - 2])
+        self.assertEqual(mes.tolist(), [0])
+        self.assertTrue(15000 <= mediana[0] <= 20000)
+
+        print("✅ TA-47: PASSOU - Só os valores atípicos foram marcados")
+
+    def test_48_analise_do_usuario(self):
+        """
+        TA-48: Linhas de anomalias_gastos montadas para os meses avaliados
+        Tipo: Unitário
+        Objetivo: Mês, categoria, transação e valores em reais corretos
+        """
+        print("\n🧪 Executando TA-48: Análise do Usuário...")
+
+        # Dados a partir de 12 meses antes de maio/2025 (mês 0 = maio/2024)
+        linhas = []
+        for mes in range(12):
+            for i in range(5):
+                linhas.append((mes * 10 + i, mes, 'Mercado', 20000 + i * 500))
+        linhas.append((999, 12, 'Mercado', 250000))
+        linhas.append((1000, 13, 'Mercado', 21000))
+        cursor = CursorTransacoes(linhas)
+
+        resultado = anomalias.analisar_usuario(cursor, 7, date(2025, 5, 1), date(2025, 6, 15))
+        self.assertEqual(cursor.params[0], date(2024, 5, 1))
+        self.assertEqual(cursor.params[-1], date(2025, 7, 1))
+
+        por_tipo = {linha[3]: linha for linha in resultado}
+        self.assertEqual(set(por_tipo), {None, 999})
+        mes_linha = por_tipo[None]
+        self.assertEqual(mes_linha[:4], (7, date(2025, 5, 1), 'Mercado', None))
+        self.assertEqual(mes_linha[4], Decimal('2500.00'))
+        self.assertEqual(mes_linha[5], Decimal('1050.00'))
+        transacao = por_tipo[999]
+        self.assertEqual(transacao[4:6], (Decimal('2500.00'), Decimal('210.00')))
+
+        print("✅ TA-48: PASSOU - Anomalias do usuário montadas")
+
+
+@unittest.skipIf(conectar_banco() is None, "MySQL indisponível")
+class TestAnomaliasBanco(unittest.TestCase):
+    """
+    TESTES DO PROCESSAMENTO INCREMENTAL (MYSQL)
+    """
+
+    def test_49_processamento_incremental(self):
+        """
+        TA-49: Só usuários com meses alterados são reprocessados
+        Tipo: Banco de Dados
+        Objetivo: Segunda execução sem alterações não reprocessa; exclusão remove a anomalia
+        """
+        print("\n🧪 Executando TA-49: Processamento Incremental...")
+
+        import resumo
+        conn = conectar_banco()
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO usuarios (nome, email, senha) VALUES (%s, %s, %s)",
+                       ('Usuario Anomalias', f'anomalias{id(self)}@teste.com', 'x'))
+        usuario_id = cursor.lastrowid
+        hoje = date(2025, 6, 15)
+        # Junho/2024 a maio/2025: 5 compras de R$ 200-204 por mês
+        transacoes = [('despesa', Decimal(200 + i), f'Mercado {i}', 'Mercado',
+                       date(2024 + (5 + m) // 12, (5 + m) % 12 + 1, 5 + i))
+                      for m in range(12) for i in range(5)]
+        transacoes.append(('despesa', Decimal('3000.00'), 'Compra grande', 'Mercado', date(2025, 6, 10)))
+        cursor.executemany("INSERT INTO transacoes (usuario_id, tipo, valor, descricao, categoria, data) "
+                           "VALUES (%s, %s, %s, %s, %s, %s)", [(usuario_id,) + t for t in transacoes])
+        resumo.reconstruir_resumos(cursor, usuario_id)
+        conn.commit()
+
+        try:
+            primeira = anomalias.executar(conn, hoje)
+            self.assertIn(usuario_id, primeira['usuarios'])
+            cursor.execute('SELECT COUNT(*) FROM anomalias_gastos WHERE usuario_id = %s AND transacao_id IS NOT NULL',
+                           (usuario_id,))
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+            segunda = anomalias.executar(conn, hoje)
+            self.assertNotIn(usuario_id, segunda['usuarios'])
+
+            # Exclusão da compra: o mês muda em resumo_mensal e a anomalia some
+            cursor.execute("SELECT id, tipo, valor, data, categoria FROM transacoes "
+                           "WHERE usuario_id = %s AND descricao = %s", (usuario_id, 'Compra grande'))
+            transacao_id, tipo, valor, data, categoria = cursor.fetchone()
+            cursor.execute('DELETE FROM transacoes WHERE id = %s', (transacao_id,))
+            resumo.aplicar_transacao(cursor, usuario_id, tipo, valor, data, categoria, sinal=-1)
+            conn.commit()
+            terceira = anomalias.executar(conn, hoje)
+            self.assertIn(usuario_id, terceira['usuarios'])
+            cursor.execute('SELECT COUNT(*) FROM anomalias_gastos WHERE usuario_id = %s', (usuario_id,))
+            self.assertEqual(cursor.fetchone()[0], 0)
+        finally:
+            cursor.execute('DELETE FROM usuarios WHERE id = %s', (usuario_id,))
+            conn.commit()
+            cursor.close()
+            conn.close()
+
+        print("✅ TA-49: PASSOU - Processamento incremental")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+"""
+Testes Automatizados - API JSON (v1)
+Projeto A3 - Gestão e Qualidade de Software
+
+Os endpoints são testados com o cliente de testes do Flask e um banco
+falso (api.get_db substituído), sem precisar do MySQL.
+"""
+
+import unittest
+import sys
+import os
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+import api
+import periodos
+from app import app, view_cache
+
+
+class CursorFalso:
+    """Devolve linhas de resumo_categoria e conta as consultas"""
+
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.consultas = 0
+        self.sql = ''
+
+    def execute(self, sql, params=()):
+        self.sql = sql
+        self.consultas += 1
+
+    def fetchall(self):
+        return self.linhas if 'resumo_categoria' in self.sql else []
+
+
+class BancoFalso:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self, **kwargs):
+        return self._cursor
+
+
+class TestRespostaJson(unittest.TestCase):
+    """
+    TESTES DAS RESPOSTAS DA API (ETAG)
+    """
+
+    def setUp(self):
+        self.app = Flask(__name__)
+
+    def test_54_etag_da_api(self):
+        """
+        TA-54: ETag pelo conteúdo e 304 com If-None-Match (inclusive da versão comprimida)
+        Tipo: Unitário
+        Objetivo: Revalidação sem corpo
+        """
+        print("\n🧪 Executando TA-54: ETag da API...")
+
+        dados = {'saldo': Decimal('10.50'), 'data': date(2025, 3, 1)}
+
+        with self.app.test_request_context('/'):
+            resposta = api.resposta_json(dados)
+            etag = resposta.get_etag()[0]
+            self.assertEqual(resposta.get_json(), {'saldo': '10.50', 'data': '2025-03-01'})
+            self.assertEqual(resposta.headers['Cache-Control'], 'private, no-cache')
+            self.assertEqual(etag, api.resposta_json(dict(dados)).get_etag()[0], "ETag deve ser estável")
+
+        for tag in (f'"{etag}"', f'W/"{etag}"', f'"outro", "{etag}-gzip"'):
+            with self.app.test_request_context('/', headers={'If-None-Match': tag}):
+                resposta = api.resposta_json(dados)
+                self.assertEqual(resposta.status_code, 304, tag)
+                self.assertEqual(resposta.get_data(), b'')
+
+        with self.app.test_request_context('/', headers={'If-None-Match': f'"{etag}"'}):
+            self.assertEqual(api.resposta_json({'saldo': Decimal('11.00')}).status_code, 200)
+
+        print("✅ TA-54: PASSOU - ETag e 304 corretos")
+
+
+class TestEndpoints(unittest.TestCase):
+    """
+    TESTES DOS ENDPOINTS /api/v1 (BANCO FALSO)
+    """
+
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        self.usuario_id = 900000 + os.getpid() % 1000
+        view_cache.invalidate(self.usuario_id, 'relatorios')
+        hoje = date.today()
+        self.cursor = CursorFalso([
+            {'mes': periodos.adicionar_meses(hoje, -i), 'tipo': tipo, 'categoria': categoria,
+             'total': Decimal(total), 'quantidade': 1}
+            for i in range(14)
+            for tipo, categoria, total in (('despesa', 'Mercado', '100.00'), ('receita', 'Salário', '3000.00'))
+        ])
+
+    def test_55_relatorios_e_autenticacao(self):
+        """
+        TA-55: Relatório em JSON com série pivotada, 401 sem sessão e 400 em período inválido
+        Tipo: Funcional
+        Objetivo: API usa as mesmas consultas e o mesmo cache das páginas
+        """
+        print("\n🧪 Executando TA-55: Endpoints da API...")
+
+        resposta = self.client.get('/api/v1/relatorios')
+        self.assertEqual(resposta.status_code, 401)
+        self.assertEqual(resposta.get_json(), {'erro': 'Autenticação necessária'})
+
+        with self.client.session_transaction() as sessao:
+            sessao['user_id'] = self.usuario_id
+
+        with mock.patch.object(api, 'get_db', lambda: BancoFalso(self.cursor)):
+            resposta = self.client.get('/api/v1/relatorios?periodo=trimestre')
+            self.assertEqual(resposta.status_code, 200)
+            dados = resposta.get_json()
+            serie = dados['serie_mensal']
+            self.assertEqual(len(serie['meses']), 12)
+            self.assertEqual(len(serie['receita']), 12)
+            self.assertEqual(serie['meses'], sorted(serie['meses']))
+            self.assertEqual(dados['por_categoria'][0]['categoria'], 'Mercado')
+            self.assertEqual(dados['filtros']['tipo'], 'despesa')
+            consultas_feitas = self.cursor.consultas
+
+            # Mesma URL com o ETag recebido: 304 sem corpo e sem consultar o banco
+            revalidacao = self.client.get('/api/v1/relatorios?periodo=trimestre',
+                                          headers={'If-None-Match': resposta.headers['ETag']})
+            self.assertEqual(revalidacao.status_code, 304)
+            self.assertEqual(self.cursor.consultas, consultas_feitas)
+
+            invalido = self.client.get('/api/v1/relatorios?periodo=personalizado&de=2025-05&ate=2025-01')
+            self.assertEqual(invalido.status_code, 400)
+            self.assertIn('erro', invalido.get_json())
+
+        print("✅ TA-55: PASSOU - Endpoints da API respondendo corretamente")
+
+
+if __name__ == '__main__':
+    unittest.main()
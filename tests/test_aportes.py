@@ -0,0 +1,173 @@
+"""
+Testes Automatizados - Aportes em Metas
+Projeto A3 - Gestão e Qualidade de Software
+
+O teste de concorrência precisa do MySQL com o database_schema.sql
+aplicado; sem banco disponível ele é ignorado.
+"""
+
+import unittest
+import sys
+import os
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import mysql.connector
+import aportes
+from aportes import Aporte
+from config import DB_CONFIG
+
+
+def conectar_banco():
+    """Retorna uma conexão ou None se o MySQL não estiver disponível"""
+    try:
+        return mysql.connector.connect(connection_timeout=3, **DB_CONFIG)
+    except mysql.connector.Error:
+        return None
+
+
+class CursorMetas:
+    """Simula as metas no banco, com a semântica do UPDATE do MySQL (SET da esquerda para a direita)"""
+
+    def __init__(self, metas):
+        self.metas = metas
+        self.extrato = []
+        self.comandos = []
+        self.rowcount = 0
+
+    def execute(self, sql, params):
+        self.comandos.append(sql.split()[0])
+        if sql.strip().startswith('UPDATE'):
+            total, meta_id, usuario_id = params
+            meta = self.metas.get(meta_id)
+            self.rowcount = 0
+            if meta and meta['usuario_id'] == usuario_id and meta['status'] == 'ativa':
+                meta['valor_atual'] += total
+                if meta['valor_atual'] >= meta['valor_alvo']:
+                    meta['status'] = 'concluida'
+                self.rowcount = 1
+        else:
+            self.linhas = [(i, self.metas[i]['valor_atual'], self.metas[i]['valor_alvo'], self.metas[i]['status'])
+                           for i in params]
+
+    def fetchall(self):
+        return self.linhas
+
+    def executemany(self, sql, linhas):
+        self.comandos.append('INSERT')
+        self.extrato.extend(linhas)
+
+
+class TestAportes(unittest.TestCase):
+    """
+    TESTES DOS APORTES EM METAS
+    """
+
+    def test_39_aporte_unico_comando_e_extrato(self):
+        """
+        TA-39: Aporte soma e conclui a meta no mesmo UPDATE e registra o extrato
+        Tipo: Unitário
+        Objetivo: Sem leitura antes da escrita e sem segundo UPDATE/commit
+        """
+        print("\n🧪 Executando TA-39: Aportes em Metas...")
+
+        def meta(usuario_id, alvo, atual, status='ativa'):
+            return {'usuario_id': usuario_id, 'valor_alvo': Decimal(alvo),
+                    'valor_atual': Decimal(atual), 'status': status}
+
+        cursor = CursorMetas({1: meta(7, '100.00', '90.00'), 2: meta(7, '500.00', '0.00'),
+                              3: meta(8, '100.00', '0.00'), 4: meta(7, '10.00', '10.00', 'concluida')})
+
+        resultado = aportes.registrar_aporte(cursor, 7, '2', '25.50')
+        self.assertEqual(resultado, (2, Decimal('25.50'), Decimal('25.50'), False))
+        self.assertEqual(cursor.comandos, ['UPDATE', 'SELECT', 'INSERT'])
+
+        # Meta de outro usuário ou já concluída: nada é gravado
+        self.assertIsNone(aportes.registrar_aporte(cursor, 7, 3, 10))
+        self.assertIsNone(aportes.registrar_aporte(cursor, 7, 4, 10))
+        self.assertEqual(len(cursor.extrato), 1)
+
+        # Lote de arredondamentos: um UPDATE por meta, extrato por aporte
+        cursor.comandos = []
+        lote = [Aporte(1, Decimal('0.40'), 'arredondamento'), Aporte(2, Decimal('0.10'), 'arredondamento'),
+                Aporte(1, Decimal('9.60'), 'arredondamento'), Aporte(1, Decimal('0.50'), 'arredondamento'),
+                Aporte(3, Decimal('1.00'), 'arredondamento')]
+        resultados = aportes.registrar_aportes(cursor, 7, lote)
+        self.assertEqual(cursor.comandos, ['UPDATE', 'UPDATE', 'UPDATE', 'SELECT', 'INSERT'])
+        self.assertEqual(set(resultados), {1, 2})
+        self.assertEqual(resultados[1], (1, Decimal('10.50'), Decimal('100.50'), True))
+        self.assertEqual(cursor.metas[1]['status'], 'concluida')
+
+        extrato_meta1 = [(valor, saldo, concluiu) for m, _, valor, _, saldo, concluiu in cursor.extrato if m == 1]
+        self.assertEqual(extrato_meta1, [(Decimal('0.40'), Decimal('90.40'), False),
+                                         (Decimal('9.60'), Decimal('100.00'), True),
+                                         (Decimal('0.50'), Decimal('100.50'), False)])
+        self.assertIn('valor_atual = valor_atual + %s', aportes.SQL_APLICAR)
+
+        print("✅ TA-39: PASSOU - Aporte atômico com extrato")
+
+
+@unittest.skipIf(conectar_banco() is None, "MySQL indisponível")
+class TestAportesConcorrentes(unittest.TestCase):
+    """
+    TESTES DE CONCORRÊNCIA DOS APORTES (MYSQL)
+    """
+
+    def test_40_aportes_simultaneos_sem_perda(self):
+        """
+        TA-40: Aportes simultâneos na mesma meta não se perdem
+        Tipo: Banco de Dados / Concorrência
+        Objetivo: valor_atual igual à soma do extrato e uma única conclusão
+        """
+        print("\n🧪 Executando TA-40: Aportes Simultâneos...")
+
+        conn = conectar_banco()
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO usuarios (nome, email, senha) VALUES (%s, %s, %s)",
+                       ('Usuario Aportes', f'aportes{id(self)}@teste.com', 'x'))
+        usuario_id = cursor.lastrowid
+        cursor.execute("INSERT INTO metas (usuario_id, titulo, valor_alvo, data_inicio, data_limite) "
+                       "VALUES (%s, %s, %s, %s, %s)",
+                       (usuario_id, 'Meta concorrente', Decimal('150.00'), date.today(),
+                        date.today() + timedelta(days=30)))
+        meta_id = cursor.lastrowid
+        conn.commit()
+
+        def depositar():
+            c = conectar_banco()
+            for _ in range(20):
+                aportes.registrar_aporte(c.cursor(), usuario_id, meta_id, Decimal('1.00'), 'arredondamento')
+                c.commit()
+            c.close()
+
+        try:
+            threads = [threading.Thread(target=depositar) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            cursor.execute('SELECT valor_atual, status FROM metas WHERE id = %s', (meta_id,))
+            valor_atual, status = cursor.fetchone()
+            cursor.execute('SELECT COUNT(*), SUM(valor), SUM(concluiu) FROM aportes_meta WHERE meta_id = %s',
+                           (meta_id,))
+            quantidade, soma, conclusoes = cursor.fetchone()
+
+            # Após a conclusão os aportes seguintes são recusados
+            self.assertEqual(status, 'concluida')
+            self.assertEqual(valor_atual, Decimal('150.00'))
+            self.assertEqual((quantidade, soma, conclusoes), (150, Decimal('150.00'), 1))
+        finally:
+            cursor.execute('DELETE FROM usuarios WHERE id = %s', (usuario_id,))
+            conn.commit()
+            cursor.close()
+            conn.close()
+
+        print("✅ TA-40: PASSOU - Nenhum aporte perdido")
+
+
+if __name__ == '__main__':
+    unittest.main()
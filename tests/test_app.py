@@ -18,7 +18,7 @@ from werkzeug.security import generate_password_hash, check_password_hash
 # Adiciona o diretório raiz ao path para importar app
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app import app, get_db_connection, get_cor_clara
+from app import app, db_pool, get_cor_clara
 import mysql.connector
 
 
@@ -152,7 +152,7 @@ class TestBancoDados(unittest.TestCase):
         print("\n🧪 Executando TA-06: Conexão com Banco...")
         
         try:
-            conn = get_db_connection()
+            conn = db_pool.acquire()
             self.assertTrue(conn.is_connected(), "Não conectou ao banco")
             
             cursor = conn.cursor()
@@ -180,7 +180,7 @@ class TestBancoDados(unittest.TestCase):
         tabelas_esperadas = ['usuarios', 'transacoes', 'metas', 'categorias_personalizadas']
         
         try:
-            conn = get_db_connection()
+            conn = db_pool.acquire()
             cursor = conn.cursor()
             
             cursor.execute("SHOW TABLES")
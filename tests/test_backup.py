@@ -0,0 +1,664 @@
+"""
+Testes Automatizados - Backup (streaming, dump paralelo, incrementais, repositório e verificação)
+Projeto A3 - Gestão e Qualidade de Software
+
+O mysqldump e o mysql são substituídos por processos Python que geram ou
+consomem SQL, as conexões do dump paralelo por um banco em memória e o
+projeto por um diretório temporário; não precisa do MySQL.
+"""
+
+import unittest
+import functools
+import hashlib
+import io
+import operator
+import sys
+import os
+import random
+import shutil
+import tempfile
+import zipfile
+from pathlib import Path
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import backup_automatico
+import backup_incremental
+import dump_paralelo
+import repositorio_backup
+import verificacao_backup
+from backup_automatico import BackupManager, BACKUP_CONFIG
+
+# Gera ~2 MB de INSERTs, mais que um bloco de cópia
+DUMP_FALSO = ("import sys\n"
+              "for i in range(40000):\n"
+              "    sys.stdout.write(f'INSERT INTO transacoes VALUES ({i}, \\'despesa\\', 49.90);\\n')\n")
+
+
+def comando_falso(codigo):
+    return lambda self, *opcoes: [sys.executable, '-c', codigo]
+
+
+class BancoFalso:
+    """Tabelas em memória com as consultas usadas por dump_paralelo; cada connect() abre uma conexão"""
+
+    def __init__(self, tabelas, sem_lock=False, falhar_em=None):
+        self.tabelas = tabelas  # nome: (colunas, linhas, chave)
+        self.sem_lock = sem_lock
+        self.falhar_em = falhar_em
+        self.comandos = []
+        self.abertas = 0
+
+    def connect(self):
+        self.abertas += 1
+        return self
+
+    def close(self):
+        self.abertas -= 1
+
+    def cursor(self):
+        return CursorFalso(self)
+
+
+class CursorFalso:
+    def __init__(self, banco):
+        self.banco = banco
+        self.linhas = []
+        self.description = None
+
+    def execute(self, sql, params=()):
+        banco = self.banco
+        banco.comandos.append(sql.split()[0])
+        if sql.startswith('FLUSH') and banco.sem_lock:
+            raise RuntimeError('Access denied; you need the RELOAD privilege')
+        if 'COLUMN_NAME = %s' in sql:
+            self.linhas = [(nome, colunas.index(params[0]) + 1) for nome, (colunas, _, _) in banco.tabelas.items()
+                           if nome in params[1:] and params[0] in colunas]
+        elif 'information_schema' in sql:
+            self.linhas = [(nome, chave, 1 if chave else 0, 'int' if chave else None)
+                           for nome, (_, _, chave) in sorted(banco.tabelas.items())]
+        elif sql.startswith('SHOW'):
+            self.linhas = [('binlog.000003', 4567, '', '', '')]
+        elif sql.startswith('SELECT COUNT'):
+            nome = sql.split('FROM `')[1].split('`')[0]
+            ids = [linha[0] for linha in banco.tabelas[nome][1] if not params or linha[0] <= params[0]]
+            if 'BIT_XOR' in sql:
+                md5 = [int(hashlib.md5(str(i).encode()).hexdigest()[:16], 16) for i in ids]
+                self.linhas = [(len(ids), Decimal(sum(ids)) if ids else None, functools.reduce(operator.xor, md5, 0))]
+            else:
+                self.linhas = [(len(ids),)]
+        elif sql.startswith('SELECT COALESCE(SUM'):
+            colunas, linhas, _ = banco.tabelas[sql.split('FROM `')[1].split('`')[0]]
+            indice = colunas.index(sql.split('`')[1])
+            self.linhas = [(sum((linha[indice] for linha in linhas if not params or params[0] <= linha[0] < params[1]),
+                                Decimal(0)),)]
+        elif sql.startswith('SELECT `'):
+            nome = sql.split('`')[3]
+            self.linhas = [(linha[0],) for linha in banco.tabelas[nome][1] if params[0] <= linha[0] < params[1]]
+        elif sql.startswith('SELECT MIN'):
+            nome = sql.split('`')[-2]
+            ids = [linha[0] for linha in banco.tabelas[nome][1]]
+            self.linhas = [(min(ids), max(ids)) if ids else (None, None)]
+        elif sql.startswith('SELECT *'):
+            nome = sql.split('`')[1]
+            if nome == banco.falhar_em:
+                raise RuntimeError('Lost connection to MySQL server')
+            colunas, linhas, _ = banco.tabelas[nome]
+            if params:
+                linhas = [linha for linha in linhas if params[0] <= linha[0] < params[1]]
+            self.linhas = list(linhas)
+            self.description = [(coluna,) for coluna in colunas]
+
+    def fetchone(self):
+        return self.linhas[0]
+
+    def fetchall(self):
+        return self.linhas
+
+    def fetchmany(self, quantidade):
+        lote, self.linhas = self.linhas[:quantidade], self.linhas[quantidade:]
+        return lote
+
+    def close(self):
+        pass
+
+
+def tabelas_falsas(transacoes=2500):
+    return {
+        'usuarios': (['id', 'nome'], [(1, "Ana D'Ávila"), (2, 'Bruno')], 'id'),
+        'transacoes': (['id', 'usuario_id', 'valor', 'descricao'],
+                       [(i, 1 + i % 2, Decimal('49.90'), f'Compra {i}') for i in range(1, transacoes + 1)
+                        if i % 7], 'id'),
+        'metas': (['id', 'titulo'], [], 'id'),
+        'resumo_mensal': (['usuario_id', 'mes', 'saldo'], [(1, date(2025, 6, 1), None)], None),
+    }
+
+
+class TestBackup(unittest.TestCase):
+    """
+    TESTES DO BACKUP EM STREAMING E DO DUMP PARALELO
+    """
+
+    def setUp(self):
+        self.pasta = Path(tempfile.mkdtemp())
+        projeto = self.pasta / 'projeto'
+        (projeto / 'templates' / '__pycache__').mkdir(parents=True)
+        (projeto / 'app.py').write_text('app = None\n', encoding='utf-8')
+        (projeto / 'templates' / 'base.html').write_text('<html></html>', encoding='utf-8')
+        (projeto / 'templates' / '__pycache__' / 'x.pyc').write_bytes(b'\0')
+
+        self.cwd = os.getcwd()
+        os.chdir(projeto)
+        self.config = mock.patch.dict(BACKUP_CONFIG, {'BACKUP_DIR': str(self.pasta / 'backups'),
+                                                      'BACKUP_FILES': True})
+        self.config.start()
+        backup_automatico.logger.disabled = True
+
+    def tearDown(self):
+        backup_automatico.logger.disabled = False
+        self.config.stop()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.pasta)
+
+    def test_61_backup_streaming(self):
+        """
+        TA-61: Dump e arquivos do projeto gravados direto no ZIP, sem diretório temporário
+        Tipo: Integração
+        Objetivo: Uma única cópia (compactada) em disco; ZIP incompleto nunca publicado
+        """
+        print("\n🧪 Executando TA-61: Backup em Streaming...")
+
+        with mock.patch.object(BackupManager, 'comando_mysqldump', comando_falso(DUMP_FALSO)):
+            manager = BackupManager()
+            self.assertTrue(manager.executar_backup_completo())
+
+        self.assertEqual(sorted(p.name for p in manager.backup_dir.iterdir()), [manager.zip_path.name],
+                         "Sobrou diretório temporário ou ZIP parcial")
+        with zipfile.ZipFile(manager.zip_path) as zipf:
+            nomes = set(zipf.namelist())
+            dump = zipf.read(f"{BACKUP_CONFIG['DB_NAME']}.sql")
+        self.assertEqual(nomes, {f"{BACKUP_CONFIG['DB_NAME']}.sql", 'manifesto.json',
+                                 'projeto/app.py', 'projeto/templates/base.html'})
+        self.assertEqual(dump.count(b'\n'), 40000)
+        self.assertTrue(dump.endswith(b"(39999, 'despesa', 49.90);\n"))
+
+        # mysqldump com erro: nenhum ZIP publicado
+        with mock.patch.object(BackupManager, 'comando_mysqldump',
+                               comando_falso("import sys; print('parcial'); sys.exit(2)")):
+            manager = BackupManager()
+            manager.zip_path = manager.backup_dir / 'backup_falhou.zip'
+            manager.partial_path = manager.backup_dir / 'backup_falhou.zip.parcial'
+            self.assertFalse(manager.executar_backup_completo())
+        self.assertFalse(manager.zip_path.exists())
+        self.assertFalse(manager.partial_path.exists())
+
+        print("✅ TA-61: PASSOU - Backup gravado direto no ZIP")
+
+    def test_62_restauracao_streaming(self):
+        """
+        TA-62: Restauração envia o dump do ZIP ao mysql sem extrair
+        Tipo: Integração
+        Objetivo: Restaurar sem ocupar disco com o dump descompactado
+        """
+        print("\n🧪 Executando TA-62: Restauração em Streaming...")
+
+        with mock.patch.object(BackupManager, 'comando_mysqldump', comando_falso(DUMP_FALSO)):
+            manager = BackupManager()
+            manager.executar_backup_completo()
+
+        # Processo que conta os bytes recebidos no stdin
+        contador = [sys.executable, '-c', 'import sys; print(len(sys.stdin.buffer.read()), file=sys.stderr)']
+        with zipfile.ZipFile(manager.zip_path) as zipf:
+            esperado = zipf.getinfo(f"{BACKUP_CONFIG['DB_NAME']}.sql").file_size
+            returncode, stderr = backup_automatico.executar_com_entrada(
+                contador, zipf.open(f"{BACKUP_CONFIG['DB_NAME']}.sql"))
+        self.assertEqual((returncode, int(stderr)), (0, esperado))
+
+        # Processo que sai sem ler tudo não trava a restauração
+        returncode, _ = backup_automatico.executar_com_entrada(
+            [sys.executable, '-c', 'import sys; sys.exit(1)'], open(manager.zip_path, 'rb'))
+        self.assertEqual(returncode, 1)
+
+        recebido = []
+        with mock.patch.object(backup_automatico, 'executar_com_entrada',
+                               lambda cmd, entrada: (recebido.append(entrada.read()), (0, ''))[1]):
+            self.assertTrue(backup_automatico.restaurar_backup(manager.zip_path.name))
+        self.assertEqual(len(recebido[0]), esperado)
+        self.assertFalse(Path('restore_temp').exists(), "Restauração extraiu para o disco")
+
+        print("✅ TA-62: PASSOU - Dump restaurado direto do ZIP")
+
+    def test_63_dump_paralelo(self):
+        """
+        TA-63: Dump paralelo por tabela e faixa de ids, restaurável em sequência
+        Tipo: Integração
+        Objetivo: Backup de transacoes grandes em várias conexões no mesmo snapshot
+        """
+        print("\n🧪 Executando TA-63: Dump Paralelo...")
+
+        banco = BancoFalso(tabelas_falsas())
+        esquema = "print('CREATE TABLE transacoes (id INT);')"
+        with mock.patch.object(BackupManager, 'comando_mysqldump', comando_falso(esquema)), \
+                mock.patch.object(backup_automatico, 'conectar_banco', banco.connect), \
+                mock.patch.dict(BACKUP_CONFIG, {'LINHAS_POR_PARTE': 1000}):
+            manager = BackupManager(jobs=3)
+            self.assertTrue(manager.executar_backup_completo())
+
+        self.assertEqual(banco.abertas, 0, "Conexões do dump ficaram abertas")
+        self.assertLess(banco.comandos.index('FLUSH'), banco.comandos.index('START'))
+        self.assertLess(banco.comandos.index('START'), banco.comandos.index('UNLOCK'))
+        self.assertEqual(banco.comandos.count('START'), 1 + 3, "Snapshot do estado + 3 conexões do dump")
+
+        with zipfile.ZipFile(manager.zip_path) as zipf:
+            partes = [nome for nome in zipf.namelist() if nome.startswith('banco/transacoes/')]
+            self.assertEqual(len(partes), 3, "transacoes deveria ter 3 faixas de 1000 ids")
+            self.assertTrue(partes[0].endswith(dump_paralelo.extensao()))
+            self.assertEqual(zipf.getinfo(partes[0]).compress_type, zipfile.ZIP_STORED)
+            sql = dump_paralelo.ler_banco(zipf).read()
+
+        self.assertTrue(sql.startswith(b'CREATE TABLE transacoes'), "Esquema deve vir antes dos dados")
+        for i in (1, 999, 1000, 2500):
+            self.assertIn(f"({i}, {1 + i % 2}, '49.90', 'Compra {i}')".encode(), sql)
+        self.assertNotIn(b"'Compra 7'", sql)
+        self.assertEqual(sql.count(b"'Compra "), len(tabelas_falsas()['transacoes'][1]), "Linha faltando ou repetida")
+        self.assertIn(b"(1, 'Ana D\\'\xc3\x81vila')", sql)
+        self.assertIn(b"(1, '2025-06-01', NULL)", sql)
+
+        print("✅ TA-63: PASSOU - Partes comprimidas em paralelo e restauráveis")
+
+    def test_64_dump_paralelo_falhas(self):
+        """
+        TA-64: Sem RELOAD o dump segue com aviso; erro em uma parte cancela o backup
+        Tipo: Integração
+        Objetivo: Nunca publicar um backup paralelo incompleto
+        """
+        print("\n🧪 Executando TA-64: Falhas no Dump Paralelo...")
+
+        esquema = "print('CREATE TABLE t (id INT);')"
+        banco = BancoFalso(tabelas_falsas(), sem_lock=True)
+        conexoes, travado = dump_paralelo.abrir_snapshots(banco.connect, 2)
+        self.assertFalse(travado)
+        self.assertNotIn('UNLOCK', banco.comandos)
+        self.assertEqual(len(conexoes), 2)
+
+        banco = BancoFalso(tabelas_falsas(transacoes=20000), falhar_em='usuarios')
+        with mock.patch.object(BackupManager, 'comando_mysqldump', comando_falso(esquema)), \
+                mock.patch.object(backup_automatico, 'conectar_banco', banco.connect), \
+                mock.patch.dict(BACKUP_CONFIG, {'LINHAS_POR_PARTE': 100}):
+            manager = BackupManager(jobs=2)
+            self.assertFalse(manager.executar_backup_completo())
+        self.assertEqual(list(manager.backup_dir.iterdir()), [], "Backup incompleto foi publicado")
+        self.assertEqual(banco.abertas, 0)
+
+        print("✅ TA-64: PASSOU - Falhas do dump paralelo tratadas")
+
+    def backup(self, banco, nome, tipo, repositorio=False, dump=DUMP_FALSO, jobs=None):
+        """Backup `tipo` com nome fixo (vários no mesmo segundo) usando `banco`"""
+        extensao = repositorio_backup.EXTENSAO if repositorio else '.zip'
+        with mock.patch.object(BackupManager, 'comando_mysqldump', comando_falso(dump)), \
+                mock.patch.object(backup_automatico, 'conectar_banco', banco.connect):
+            manager = BackupManager(jobs=jobs, tipo=tipo, repositorio=repositorio)
+            manager.zip_path = manager.backup_dir / f'backup_{nome}{extensao}'
+            manager.partial_path = manager.backup_dir / f'backup_{nome}{extensao}.parcial'
+            self.assertTrue(manager.executar_backup_completo())
+        return manager
+
+    def incremental(self, tabelas, estado_pai):
+        """(estado, SQL, estatísticas) do incremental de `tabelas` sobre `estado_pai`"""
+        destino = io.BytesIO()
+        estado, stats = backup_incremental.gravar_incremental(BancoFalso(tabelas).cursor(), destino, estado_pai)
+        return estado, destino.getvalue(), stats
+
+    def test_65_backup_incremental(self):
+        """
+        TA-65: Incremental só com as linhas novas e excluídas desde o backup anterior
+        Tipo: Integração
+        Objetivo: Backup noturno proporcional às mudanças do dia
+        """
+        print("\n🧪 Executando TA-65: Backup Incremental...")
+
+        self.assertEqual(backup_incremental.faixas_de_ids([1, 2, 3, 5, 8, 9]), [[1, 3], [5, 5], [8, 9]])
+        self.assertEqual(backup_incremental.ids_removidos([[1, 10], [20, 22]], [[1, 3], [6, 10], [22, 22]]),
+                         [4, 5, 20, 21])
+
+        banco = BancoFalso(tabelas_falsas())
+        # Sem backup anterior com estado: o incremental vira completo
+        completo = self.backup(banco, '1', 'incremental')
+        self.assertEqual(completo.tipo, 'completo')
+        manifesto = backup_incremental.ler_manifesto(completo.zip_path)
+        self.assertEqual(manifesto['binlog'], {'arquivo': 'binlog.000003', 'posicao': 4567})
+        estado = backup_incremental.ler_estado(completo.zip_path)
+        self.assertEqual(estado['transacoes']['max_id'], 2500)
+        self.assertEqual(len(estado['transacoes']['faixas']), 2500 // 7 + 1)
+
+        # Dia seguinte: 3 transações novas, 2 excluídas, usuário alterado
+        colunas, linhas, chave = banco.tabelas['transacoes']
+        linhas = [linha for linha in linhas if linha[0] not in (10, 2000)]
+        linhas += [(i, 1, Decimal('12.00'), f'Nova {i}') for i in (2501, 2502, 2503)]
+        banco.tabelas['transacoes'] = (colunas, linhas, chave)
+        banco.tabelas['usuarios'][1][1] = (2, 'Bruno Lima')
+
+        incremental = self.backup(banco, '2', 'incremental')
+        manifesto = backup_incremental.ler_manifesto(incremental.zip_path)
+        self.assertEqual((manifesto['tipo'], manifesto['pai'], manifesto['base']),
+                         ('incremental', 'backup_1.zip', 'backup_1.zip'))
+        with zipfile.ZipFile(incremental.zip_path) as zipf:
+            sql = zipf.read(f"{BACKUP_CONFIG['DB_NAME']}.incremental.sql")
+        self.assertIn(b'DELETE FROM `transacoes` WHERE `id` IN (10, 2000);', sql)
+        self.assertEqual(sql.count(b"'Nova "), 3)
+        self.assertNotIn(b"'Compra ", sql, "Linhas do backup anterior repetidas no incremental")
+        self.assertIn(b"REPLACE INTO `usuarios`", sql)
+        self.assertIn(b"(2, 'Bruno Lima')", sql)
+        self.assertLess(len(sql), 2000)
+
+        # Sem mudanças nas tabelas grandes: nenhum id lido
+        with mock.patch.object(backup_incremental, 'ler_ids', wraps=backup_incremental.ler_ids) as ler_ids:
+            self.backup(banco, '3', 'incremental')
+        self.assertEqual(ler_ids.call_count, 0)
+        diferencial = self.backup(banco, '4', 'diferencial')
+        self.assertEqual(backup_incremental.ler_manifesto(diferencial.zip_path)['pai'], 'backup_1.zip')
+        self.assertEqual(backup_incremental.cadeia(self.pasta / 'backups' / 'backup_3.zip'),
+                         [self.pasta / 'backups' / f'backup_{n}.zip' for n in (1, 2, 3)])
+
+        # Linhas tardias: id abaixo do maior id do pai, visível só depois do
+        # snapshot dele (transação longa aberta durante o backup pai)
+        def transacoes(ids):
+            return {'transacoes': (colunas, [(i, 1, Decimal('10.00'), f'Tardia {i}') for i in ids], 'id')}
+
+        estado_pai = backup_incremental.estado_tabelas(BancoFalso(transacoes([1, 2, 4, 6, 7, 8])).cursor())
+        estado, sql, stats = self.incremental(transacoes([1, 2, 3, 4, 6, 7, 8]), estado_pai)
+        self.assertIn(b"(3, 1, '10.00', 'Tardia 3')", sql)
+        self.assertEqual(sql.count(b"'Tardia "), 1, "Só a linha tardia deve ir para o incremental")
+        self.assertEqual(estado['transacoes']['faixas'], [[1, 4], [6, 8]])
+        self.assertEqual((stats['tardias'], stats['excluidas']), (1, 0))
+
+        # Exclusões (1 e 7) e tardias (3 e 5) que mantêm quantidade e soma dos ids
+        estado, sql, stats = self.incremental(transacoes([2, 3, 4, 5, 6, 8]), estado_pai)
+        self.assertIn(b'DELETE FROM `transacoes` WHERE `id` IN (1, 7);', sql)
+        self.assertIn(b"'Tardia 3'", sql)
+        self.assertIn(b"'Tardia 5'", sql)
+        self.assertEqual(estado['transacoes']['faixas'], [[2, 6], [8, 8]])
+        self.assertEqual((stats['tardias'], stats['excluidas']), (2, 2))
+
+        # Rotação: o completo fica enquanto houver incremental que dependa dele
+        with mock.patch.dict(BACKUP_CONFIG, {'MAX_BACKUPS': 1}):
+            diferencial.cleanup_old_backups()
+        self.assertEqual(sorted(p.name for p in (self.pasta / 'backups').iterdir()),
+                         ['backup_1.zip', 'backup_4.zip'])
+
+        print("✅ TA-65: PASSOU - Incrementais com as mudanças do dia")
+
+    def test_66_restauracao_cadeia(self):
+        """
+        TA-66: Restauração de um incremental aplica o completo e a cadeia em ordem
+        Tipo: Integração
+        Objetivo: Restaurar qualquer ponto da cadeia; parar no primeiro erro
+        """
+        print("\n🧪 Executando TA-66: Restauração da Cadeia...")
+
+        banco = BancoFalso(tabelas_falsas())
+        self.backup(banco, '1', 'completo')
+        banco.tabelas['transacoes'][1].append((2600, 1, Decimal('1.00'), 'Nova 2600'))
+        self.backup(banco, '2', 'incremental')
+        banco.tabelas['transacoes'][1].append((2601, 1, Decimal('1.00'), 'Nova 2601'))
+        self.backup(banco, '3', 'incremental')
+
+        recebido = []
+        with mock.patch.object(backup_automatico, 'executar_com_entrada',
+                               lambda cmd, entrada: (recebido.append(entrada.read()), (0, ''))[1]):
+            self.assertTrue(backup_automatico.restaurar_backup('backup_3.zip'))
+        self.assertEqual(len(recebido), 3)
+        self.assertTrue(recebido[0].endswith(b"(39999, 'despesa', 49.90);\n"), "Completo deve vir primeiro")
+        self.assertIn(b"'Nova 2600'", recebido[1])
+        self.assertNotIn(b"'Nova 2601'", recebido[1])
+        self.assertIn(b"'Nova 2601'", recebido[2])
+
+        recebido.clear()
+        with mock.patch.object(backup_automatico, 'executar_com_entrada',
+                               lambda cmd, entrada: (recebido.append(entrada.read()), (1, 'ERROR 1062'))[1]):
+            self.assertFalse(backup_automatico.restaurar_backup('backup_3.zip'))
+        self.assertEqual(len(recebido), 1, "Incremental aplicado sobre base com erro")
+
+        # Base apagada: restauração recusada
+        (self.pasta / 'backups' / 'backup_1.zip').unlink()
+        self.assertFalse(backup_automatico.restaurar_backup('backup_3.zip'))
+
+        print("✅ TA-66: PASSOU - Cadeia restaurada em ordem")
+
+
+    def test_67_repositorio_deduplicado(self):
+        """
+        TA-67: Snapshots em repositório de pedaços endereçados pelo conteúdo
+        Tipo: Integração
+        Objetivo: Dados repetidos entre backups guardados uma única vez
+        """
+        print("\n🧪 Executando TA-67: Repositório Deduplicado...")
+
+        # Cortes definidos pelo conteúdo: inserir bytes no início só muda o primeiro pedaço
+        dados = random.Random(7).randbytes(3 * 1024 * 1024)
+        fragmentador = repositorio_backup.Fragmentador()
+        pedacos = fragmentador.adicionar(dados) + fragmentador.finalizar()
+        self.assertEqual(b''.join(pedacos), dados)
+        self.assertTrue(all(len(p) <= repositorio_backup.TAMANHO_MAXIMO for p in pedacos))
+        self.assertTrue(all(len(p) >= repositorio_backup.TAMANHO_MINIMO for p in pedacos[:-1]))
+        fragmentador = repositorio_backup.Fragmentador()
+        deslocados = fragmentador.adicionar(b'novo' + dados) + fragmentador.finalizar()
+        self.assertEqual(deslocados[1:], pedacos[1:])
+
+        banco = BancoFalso(tabelas_falsas())
+        primeiro = self.backup(banco, '1', 'completo', repositorio=True)
+        dump_alterado = DUMP_FALSO.replace('range(40000)', 'range(40100)')
+        segundo = self.backup(banco, '2', 'completo', repositorio=True, dump=dump_alterado)
+
+        snapshot = repositorio_backup.ler_snapshot(primeiro.zip_path)
+        alterado = repositorio_backup.ler_snapshot(segundo.zip_path)
+        self.assertEqual(sorted(p.suffix for p in primeiro.backup_dir.iterdir() if p.is_file()), ['.snap', '.snap'])
+        self.assertLess(alterado['bytes_novos'], snapshot['bytes_novos'] / 5,
+                        "Segundo backup regravou dados que já estavam no repositório")
+        self.assertGreater(alterado['pedacos'] - alterado['pedacos_novos'], 0)
+
+        # Leitura e restauração pelo snapshot, como de um ZIP
+        with repositorio_backup.abrir_backup(segundo.zip_path) as leitor:
+            dump = leitor.read(f"{BACKUP_CONFIG['DB_NAME']}.sql")
+            self.assertEqual(leitor.read('projeto/app.py'), b'app = None\n')
+        self.assertEqual(dump.count(b'\n'), 40100)
+        recebido = []
+        with mock.patch.object(backup_automatico, 'executar_com_entrada',
+                               lambda cmd, entrada: (recebido.append(entrada.read()), (0, ''))[1]):
+            self.assertTrue(backup_automatico.restaurar_backup(segundo.zip_path.name))
+        self.assertEqual(recebido, [dump])
+
+        # Incremental sobre um snapshot
+        banco.tabelas['transacoes'][1].append((2600, 1, Decimal('1.00'), 'Nova 2600'))
+        incremental = self.backup(banco, '3', 'incremental', repositorio=True)
+        self.assertEqual(backup_incremental.ler_manifesto(incremental.zip_path)['pai'], 'backup_2.snap')
+
+        # Dump paralelo no repositório: partes em .sql puro, comprimidas só nos pedaços,
+        # então uma linha excluída no meio da parte não muda os pedaços em volta
+        banco = BancoFalso(tabelas_falsas(transacoes=30000))
+        antes = self.backup(banco, '4', 'completo', repositorio=True, jobs=2)
+        del banco.tabelas['transacoes'][1][12000]
+        depois = self.backup(banco, '5', 'completo', repositorio=True, jobs=2)
+
+        membros = [{membro['nome']: membro['pedacos'] for membro in repositorio_backup.ler_snapshot(b.zip_path)['membros']}
+                   for b in (antes, depois)]
+        partes = [nome for nome in membros[1] if nome.startswith('banco/transacoes/')]
+        self.assertEqual(partes, ['banco/transacoes/000001.sql'])
+        pedacos = membros[1][partes[0]]
+        self.assertGreater(len(pedacos), 5)
+        self.assertLessEqual(len(set(pedacos) - set(membros[0][partes[0]])), 2,
+                             "Parte alterada deveria reaproveitar os pedaços sem mudança")
+        with repositorio_backup.abrir_backup(depois.zip_path) as leitor:
+            self.assertTrue(leitor.read(partes[0]).startswith(dump_paralelo.CABECALHO))
+            sql = dump_paralelo.ler_banco(leitor).read()
+        self.assertEqual(sql.count(b"'Compra "), len(banco.tabelas['transacoes'][1]))
+
+        print("✅ TA-67: PASSOU - Backups deduplicados e restauráveis")
+
+    def test_68_coleta_pedacos(self):
+        """
+        TA-68: Rotação apaga snapshots e os pedaços que ficaram sem referência
+        Tipo: Integração
+        Objetivo: Retenção por snapshot sem apagar pedaços compartilhados; corrupção detectada
+        """
+        print("\n🧪 Executando TA-68: Coleta de Pedaços...")
+
+        banco = BancoFalso(tabelas_falsas())
+        primeiro = self.backup(banco, '1', 'completo', repositorio=True)
+        segundo = self.backup(banco, '2', 'completo', repositorio=True,
+                              dump=DUMP_FALSO.replace('despesa', 'receita'))
+        repositorio = repositorio_backup.repositorio_de(primeiro.zip_path)
+        referencias = repositorio_backup.contar_referencias([primeiro.zip_path, segundo.zip_path])
+        compartilhados = [h for h, n in referencias.items() if n > 1]
+        so_primeiro = set(referencias) - set(repositorio_backup.contar_referencias([segundo.zip_path]))
+        self.assertTrue(compartilhados and so_primeiro)
+
+        # Dentro da carência nada é apagado (pode ser de um backup em andamento)
+        with mock.patch.dict(BACKUP_CONFIG, {'MAX_BACKUPS': 1}):
+            segundo.cleanup_old_backups()
+        self.assertFalse(primeiro.zip_path.exists())
+        self.assertTrue(all(repositorio.caminho(h).exists() for h in so_primeiro))
+
+        removidos, _ = repositorio.coletar([segundo.zip_path], carencia=0)
+        self.assertEqual(removidos, len(so_primeiro))
+        self.assertEqual({p.name for p in repositorio.pedacos()},
+                         set(repositorio_backup.contar_referencias([segundo.zip_path])))
+        with repositorio_backup.abrir_backup(segundo.zip_path) as leitor:
+            self.assertEqual(leitor.read(f"{BACKUP_CONFIG['DB_NAME']}.sql").count(b"'receita'"), 40000)
+
+        # Pedaço alterado no disco: leitura falha em vez de restaurar dados errados
+        caminho = repositorio.caminho(compartilhados[0])
+        caminho.write_bytes(repositorio_backup.dump_paralelo.comprimir(b'corrompido'))
+        with self.assertRaises(ValueError):
+            repositorio.ler(compartilhados[0])
+
+        print("✅ TA-68: PASSOU - Pedaços sem referência coletados")
+
+    def test_69_manifesto_integridade(self):
+        """
+        TA-69: Manifesto com SHA-256 e linhas por tabela; --verify detecta membro alterado
+        Tipo: Integração
+        Objetivo: Conferir backups sem extrair, em paralelo, antes de precisar deles
+        """
+        print("\n🧪 Executando TA-69: Manifesto de Integridade...")
+
+        linhas = verificacao_backup.Counter()
+        contador = verificacao_backup.ContadorInserts(linhas)
+        contador.alimentar(b"INSERT INTO `t` VALUES (1,'a),(b'),(2,'it\\'s),('")
+        contador.alimentar(b"),(3,NULL);\nINSERT INTO `u` VALUES (1);\n")
+        contador.finalizar()
+        self.assertEqual(linhas, {'t': 3, 'u': 1})
+
+        # Soma da coluna: vírgulas e "),(" dentro dos textos não separam campos nem linhas
+        linhas, somas = verificacao_backup.Counter(), verificacao_backup.Counter()
+        contador = verificacao_backup.ContadorInserts(linhas, somas, {'t': 2})
+        contador.alimentar(b"INSERT INTO `t` VALUES (1,'a, b',10.50),(2,'),(',-0.25);\n")
+        contador.alimentar(b"INSERT INTO `u` VALUES (1,'x',99.00);\nINSERT INTO `t` VALUES (3,NULL,1.00);\n")
+        contador.finalizar()
+        self.assertEqual(linhas, {'t': 3, 'u': 1})
+        self.assertEqual(somas, {'t': Decimal('11.25')})
+
+        banco = BancoFalso(tabelas_falsas())
+        zip_simples = self.backup(banco, '1', 'completo').zip_path
+        snapshot = self.backup(banco, '2', 'completo', repositorio=True).zip_path
+
+        manifesto = backup_incremental.ler_manifesto(zip_simples)
+        membro = f"{BACKUP_CONFIG['DB_NAME']}.sql"
+        with zipfile.ZipFile(zip_simples) as zipf:
+            dump = zipf.read(membro)
+            self.assertEqual(zipf.namelist()[-1], backup_incremental.MANIFESTO)
+        self.assertEqual(manifesto['membros'][membro], {'tamanho': len(dump), 'sha256': hashlib.sha256(dump).hexdigest()})
+        self.assertIn(backup_incremental.ESTADO, manifesto['membros'])
+        self.assertIn('projeto/app.py', manifesto['membros'])
+        self.assertEqual(manifesto['linhas'], {'transacoes': 40000})
+        self.assertEqual(manifesto['somas'], {'transacoes': '1996000.00'}, "Soma de valor nos INSERTs do mysqldump")
+        self.assertEqual(manifesto['mysqldump']['codigo_saida'], 0)
+        self.assertEqual(manifesto['esquema']['tabelas'], 4)
+
+        # Backup anterior ao manifesto: só o CRC do ZIP
+        antigo = self.pasta / 'backups' / 'backup_0.zip'
+        with zipfile.ZipFile(antigo, 'w') as zipf:
+            zipf.writestr(membro, dump)
+
+        resultados = verificacao_backup.verificar_backups([zip_simples, snapshot, antigo], jobs=3)
+        self.assertEqual([r['erros'] for r in resultados], [[], [], []])
+        self.assertEqual(resultados[0]['bytes'], sum(m['tamanho'] for m in manifesto['membros'].values()))
+        self.assertIsNone(resultados[2]['manifesto'])
+
+        # Membro trocado (ZIP regravado com CRC válido) e pedaço do repositório corrompido
+        alterado = self.pasta / 'backups' / 'backup_3.zip'
+        with zipfile.ZipFile(zip_simples) as origem, zipfile.ZipFile(alterado, 'w') as destino:
+            for nome in origem.namelist():
+                destino.writestr(nome, b'app = 1\n' if nome == 'projeto/app.py' else origem.read(nome))
+        pedaco = repositorio_backup.ler_snapshot(snapshot)['membros'][0]['pedacos'][0]
+        repositorio_backup.repositorio_de(snapshot).caminho(pedaco).write_bytes(
+            dump_paralelo.comprimir(b'corrompido'))
+
+        resultados = verificacao_backup.verificar_backups([alterado, snapshot], jobs=2)
+        self.assertEqual(resultados[0]['erros'], ['projeto/app.py: 8 bytes, manifesto diz 11'])
+        self.assertIn('Pedaço corrompido', resultados[1]['erros'][0])
+        self.assertFalse(backup_automatico.verificar_backups([alterado.name], jobs=1))
+        self.assertTrue(backup_automatico.verificar_backups([zip_simples.name, antigo.name]))
+
+        print("✅ TA-69: PASSOU - Backups conferidos com o manifesto")
+
+    def test_70_verificacao_profunda(self):
+        """
+        TA-70: Verificação profunda restaura em banco de rascunho e compara linhas e somas por tabela
+        Tipo: Integração
+        Objetivo: Provar que o backup restaura o que o manifesto promete
+        """
+        print("\n🧪 Executando TA-70: Verificação Profunda...")
+
+        banco = BancoFalso(tabelas_falsas())
+        esquema = "print('CREATE TABLE transacoes (id INT);')"
+        with mock.patch.dict(BACKUP_CONFIG, {'LINHAS_POR_PARTE': 1000}):
+            manager = self.backup(banco, '1', 'completo', dump=esquema, jobs=2)
+        manifesto = backup_incremental.ler_manifesto(manager.zip_path)
+        self.assertEqual(manifesto['linhas'], {'metas': 0, 'resumo_mensal': 1, 'transacoes': 2143, 'usuarios': 2})
+        self.assertEqual(manifesto['somas'], {'transacoes': '106935.70'}, "Soma das partes do dump paralelo")
+
+        restaurados = []
+        with mock.patch.object(backup_automatico, 'conectar_banco', banco.connect), \
+                mock.patch.object(backup_automatico, 'executar_com_entrada',
+                                  lambda cmd, entrada: (restaurados.append(cmd[-1]), (0, ''))[1]):
+            banco.comandos.clear()
+            self.assertEqual(backup_automatico.verificar_profundo(manager.zip_path), [])
+            self.assertEqual(restaurados, [BACKUP_CONFIG['DB_VERIFICACAO']])
+            self.assertEqual(banco.comandos[-1], 'DROP', "Banco de rascunho não foi apagado")
+
+            # Restauração com um valor trocado: mesma quantidade de linhas, soma diferente
+            linhas = banco.tabelas['transacoes'][1]
+            originais = list(linhas)
+            linhas[0] = linhas[0][:2] + (Decimal('0.01'),) + linhas[0][3:]
+            self.assertEqual(backup_automatico.verificar_profundo(manager.zip_path),
+                             ['transacoes: soma de valor restaurada 106885.81, manifesto diz 106935.70'])
+
+            # Restauração que perdeu linhas
+            linhas.pop()
+            self.assertEqual(backup_automatico.verificar_profundo(manager.zip_path),
+                             ['transacoes: 2142 linhas restauradas, manifesto diz 2143',
+                              'transacoes: soma de valor restaurada 106835.91, manifesto diz 106935.70'])
+            linhas[:] = originais
+
+            with mock.patch.dict(BACKUP_CONFIG, {'DB_VERIFICACAO': BACKUP_CONFIG['DB_NAME']}):
+                with self.assertRaises(ValueError):
+                    backup_automatico.verificar_profundo(manager.zip_path)
+        self.assertEqual(banco.abertas, 0)
+
+        # Incremental: soma lida no snapshot dele, a da cadeia restaurada
+        banco.tabelas['transacoes'][1].append((2600, 1, Decimal('1.00'), 'Nova 2600'))
+        incremental = self.backup(banco, '2', 'incremental').zip_path
+        self.assertEqual(backup_incremental.ler_manifesto(incremental)['somas'], {'transacoes': '106936.70'})
+        with mock.patch.object(backup_automatico, 'conectar_banco', banco.connect), \
+                mock.patch.object(backup_automatico, 'executar_com_entrada', lambda cmd, entrada: (0, '')):
+            self.assertEqual(backup_automatico.verificar_profundo(incremental), [])
+
+        print("✅ TA-70: PASSOU - Backup restaurado e comparado com o manifesto")
+
+
+if __name__ == '__main__':
+    unittest.main()
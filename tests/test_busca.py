@@ -0,0 +1,150 @@
+"""
+Testes Automatizados - Busca Textual
+Projeto A3 - Gestão e Qualidade de Software
+
+O teste do índice FULLTEXT precisa do MySQL com o database_schema.sql
+aplicado; sem banco disponível ele é ignorado.
+"""
+
+import unittest
+import sys
+import os
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import mysql.connector
+import busca
+from config import DB_CONFIG
+
+
+def conectar_banco():
+    """Retorna uma conexão ou None se o MySQL não estiver disponível"""
+    try:
+        return mysql.connector.connect(connection_timeout=3, **DB_CONFIG)
+    except mysql.connector.Error:
+        return None
+
+
+def transacao(id, descricao, categoria='Outros', tipo='despesa', data=date(2025, 11, 1)):
+    return {'id': id, 'tipo': tipo, 'valor': Decimal('10.00'), 'descricao': descricao,
+            'categoria': categoria, 'data': data}
+
+
+class TestIndiceInvertido(unittest.TestCase):
+    """
+    TESTES DO ÍNDICE DE BUSCA EM MEMÓRIA
+    """
+
+    def test_35_busca_sem_acentos_por_relevancia(self):
+        """
+        TA-35: Busca ignora acentos, aceita prefixos e ordena por relevância e data
+        Tipo: Unitário
+        Objetivo: Encontrar transações pelo texto digitado em português
+        """
+        print("\n🧪 Executando TA-35: Busca no Índice em Memória...")
+
+        self.assertEqual(busca.termos_consulta('Farmácia  de  SÃO joão, com desconto'),
+                         ['farmacia', 'sao', 'joao', 'desconto'])
+        with self.assertRaises(ValueError):
+            busca.termos_consulta('de a ?')
+
+        indice = busca.IndiceInvertido([
+            transacao(1, 'Farmácia Centro', 'Saúde', data=date(2025, 11, 3)),
+            transacao(2, 'Drogaria', 'Farmácia', data=date(2025, 11, 5)),
+            transacao(3, 'Farmacia farmacia popular', 'Saúde', data=date(2025, 10, 1)),
+            transacao(4, 'Mercado Livre', 'Compras'),
+            transacao(5, 'Supermercado', 'Alimentação'),
+            transacao(6, 'Salário', 'Salário', tipo='receita'),
+        ] + [transacao(100 + i, f'Café {i}', 'Alimentação', data=date(2025, 1, 1) + timedelta(days=i))
+             for i in range(30)])
+
+        def ids(consulta, filtros=None, pagina=1, limite=50):
+            resultado = busca.buscar_transacoes(None, 1, consulta, filtros, pagina, limite, indice)
+            return [t['id'] for t in resultado['transacoes']], resultado
+
+        # Mais ocorrências primeiro; empate desfeito pela data mais recente
+        self.assertEqual(ids('FARMACIA')[0], [3, 2, 1])
+        self.assertEqual(ids('saude farm')[0], [3, 1])
+        self.assertEqual(ids('merc')[0], [4], "Prefixo não deve casar no meio da palavra")
+        self.assertEqual(ids('mercado inexistente')[0], [])
+        self.assertEqual(ids('salario', {'tipo': 'despesa'})[0], [])
+        self.assertEqual(ids('farmacia', {'inicio': '2025-11-01', 'fim': '2025-11-04'})[0], [1])
+
+        # Paginação por número de página
+        pagina1, resultado = ids('cafe', limite=20)
+        self.assertEqual(pagina1, [100 + i for i in range(29, 9, -1)])
+        self.assertEqual((resultado['anterior'], resultado['proxima']), (None, 2))
+        pagina2, resultado = ids('cafe', pagina=2, limite=20)
+        self.assertEqual(pagina2, [100 + i for i in range(9, -1, -1)])
+        self.assertEqual((resultado['anterior'], resultado['proxima']), (1, None))
+
+        # Remoção e atualização
+        indice.remover(3)
+        indice.adicionar(transacao(2, 'Drogaria', 'Saúde'))
+        self.assertEqual(ids('farmacia')[0], [1])
+        self.assertEqual(len(indice), 35)
+
+        print("✅ TA-35: PASSOU - Busca sem acentos, por prefixo e relevância")
+
+
+@unittest.skipIf(conectar_banco() is None, "MySQL indisponível")
+class TestBuscaFulltext(unittest.TestCase):
+    """
+    TESTES DA BUSCA PELO ÍNDICE FULLTEXT (MYSQL)
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = conectar_banco()
+        cursor = cls.conn.cursor()
+        cursor.execute(
+            "INSERT INTO usuarios (nome, email, senha) VALUES (%s, %s, %s)",
+            ('Usuario Busca', f'busca{id(cls)}@teste.com', 'x')
+        )
+        cls.usuario_id = cursor.lastrowid
+        cursor.executemany(
+            'INSERT INTO transacoes (usuario_id, tipo, valor, descricao, categoria, data) '
+            'VALUES (%s, %s, %s, %s, %s, %s)',
+            [(cls.usuario_id, 'despesa', 10, 'Farmácia Centro', 'Saúde', date(2025, 11, 3)),
+             (cls.usuario_id, 'despesa', 10, 'Drogaria', 'Farmácia', date(2025, 11, 5)),
+             (cls.usuario_id, 'despesa', 10, 'Mercado Livre', 'Compras', date(2025, 11, 1))]
+        )
+        cls.conn.commit()
+        cursor.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        cursor = cls.conn.cursor()
+        cursor.execute('DELETE FROM usuarios WHERE id = %s', (cls.usuario_id,))
+        cls.conn.commit()
+        cursor.close()
+        cls.conn.close()
+
+    def test_36_fulltext_sem_acentos(self):
+        """
+        TA-36: Busca no MySQL usa o índice FULLTEXT e ignora acentos
+        Tipo: Banco de Dados / Regressão
+        Objetivo: Mesmo resultado do índice em memória, sem varrer a tabela
+        """
+        print("\n🧪 Executando TA-36: Busca FULLTEXT...")
+
+        cursor = self.conn.cursor(dictionary=True)
+        resultado = busca.buscar_transacoes(cursor, self.usuario_id, 'farmacia')
+        self.assertEqual({t['descricao'] for t in resultado['transacoes']}, {'Farmácia Centro', 'Drogaria'})
+        resultado = busca.buscar_transacoes(cursor, self.usuario_id, 'merc livre')
+        self.assertEqual([t['descricao'] for t in resultado['transacoes']], ['Mercado Livre'])
+
+        sql, params = busca.sql_busca_transacoes(self.usuario_id, ['farmacia'])
+        cursor.execute('EXPLAIN ' + sql, params)
+        plano = cursor.fetchall()
+        cursor.close()
+        self.assertEqual(plano[0]['key'], 'ft_descricao_categoria')
+        self.assertEqual(plano[0]['type'], 'fulltext')
+
+        print("✅ TA-36: PASSOU - FULLTEXT insensível a acentos")
+
+
+if __name__ == '__main__':
+    unittest.main()
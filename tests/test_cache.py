@@ -0,0 +1,143 @@
+"""
+Testes Automatizados - Cache de Leitura por Usuário
+Projeto A3 - Gestão e Qualidade de Software
+"""
+
+import unittest
+import sys
+import os
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cache import MemoryBackend, RedisBackend, NullBackend, ViewCache
+
+
+class FakeRedis:
+    """Substituto local de um cliente redis-py (bytes em memória)"""
+
+    def __init__(self):
+        self.dados = {}
+
+    def get(self, key):
+        return self.dados.get(key)
+
+    def set(self, key, value, ex=None):
+        self.dados[key] = value
+
+    def delete(self, key):
+        self.dados.pop(key, None)
+
+    def incr(self, key):
+        valor = int(self.dados.get(key, b'0')) + 1
+        self.dados[key] = str(valor).encode()
+        return valor
+
+
+class TestCache(unittest.TestCase):
+    """
+    TESTES DO CACHE DE VIEWS
+    """
+
+    def test_24_lru_com_ttl(self):
+        """
+        TA-24: Backend em memória respeita limite de itens e TTL
+        Tipo: Unitário
+        Objetivo: Limitar memória e expirar dados antigos
+        """
+        print("\n🧪 Executando TA-24: LRU com TTL...")
+
+        backend = MemoryBackend(max_items=2)
+        backend.set('a', 1)
+        backend.set('b', 2)
+        backend.get('a')
+        backend.set('c', 3)
+
+        self.assertEqual(backend.get('a'), 1)
+        self.assertIsNone(backend.get('b'), "Item menos usado não foi removido")
+
+        backend.set('d', 4, ttl=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(backend.get('d'), "Item expirado foi retornado")
+
+        print("✅ TA-24: PASSOU - LRU e TTL funcionando")
+
+    def test_25_read_through_e_invalidacao(self):
+        """
+        TA-25: Leitura usa o cache até a view ser invalidada
+        Tipo: Unitário
+        Objetivo: Evitar consultas repetidas sem servir dados velhos
+        """
+        print("\n🧪 Executando TA-25: Read-through e Invalidação...")
+
+        for backend in (MemoryBackend(), RedisBackend(FakeRedis())):
+            cache = ViewCache(backend, ttl=60)
+            chamadas = []
+
+            def loader():
+                chamadas.append(1)
+                return {'saldo': Decimal('10.50')}
+
+            self.assertEqual(cache.get_or_load(1, 'dashboard', loader)['saldo'], Decimal('10.50'))
+            cache.get_or_load(1, 'dashboard', loader)
+            cache.get_or_load(2, 'dashboard', loader)
+            self.assertEqual(len(chamadas), 2, "Cache não foi usado")
+
+            cache.invalidate(1, 'dashboard', 'relatorios')
+            cache.get_or_load(1, 'dashboard', loader)
+            cache.get_or_load(2, 'dashboard', loader)
+            self.assertEqual(len(chamadas), 3, "Invalidação afetou a view errada")
+
+            self.assertEqual(cache.stats()['dashboard'],
+                             {'hits': 2, 'misses': 3, 'invalidations': 1})
+
+        # Dois processos (workers, agendador): só o Redis leva a invalidação ao outro
+        redis = FakeRedis()
+        for backends, compartilhado in (((MemoryBackend(), MemoryBackend()), False),
+                                        ((RedisBackend(redis), RedisBackend(redis)), True)):
+            escrita, leitura = (ViewCache(backend, ttl=60) for backend in backends)
+            leitura.get_or_load(1, 'dashboard', lambda: 'antigo')
+            escrita.invalidate(1, 'dashboard')
+            self.assertEqual(leitura.get_or_load(1, 'dashboard', lambda: 'novo') == 'novo', compartilhado)
+            self.assertEqual(escrita.compartilhado, compartilhado)
+
+        print("✅ TA-25: PASSOU - Cache invalidado por usuário e view")
+
+    def test_56_marca_de_alteracao(self):
+        """
+        TA-56: Marca de alteração cresce a cada escrita e nunca repete um valor já entregue
+        Tipo: Unitário
+        Objetivo: Versão dos dados segura para ETag/Last-Modified, mesmo após o LRU descartar a chave
+        """
+        print("\n🧪 Executando TA-56: Marca de Alteração...")
+
+        for backend in (MemoryBackend(), RedisBackend(FakeRedis())):
+            cache = ViewCache(backend, ttl=60)
+            marca = cache.marca(1)
+            self.assertEqual(cache.marca(1), marca, "Marca mudou sem escrita")
+
+            cache.invalidate(1, 'dashboard')
+            cache.invalidate(1)
+            nova = cache.marca(1)
+            self.assertEqual(nova[0], marca[0] + 2, "Escritas no mesmo segundo devem avançar o instante")
+            self.assertNotEqual(nova[1], marca[1])
+            self.assertEqual(cache.marca(2), cache.marca(2), "Usuário sem escrita mantém a marca")
+
+        # Chave descartada pelo LRU: a versão volta a zero, a marca não repete a entregue
+        backend = MemoryBackend(max_items=2)
+        cache = ViewCache(backend, ttl=60)
+        cache.invalidate(1, 'dashboard')
+        entregue = cache.marca(1)
+        backend.set('outra', 1)
+        backend.set('mais_uma', 2)
+        self.assertEqual(cache.version(1, 'dashboard'), 0)
+        self.assertNotEqual(cache.marca(1), entregue)
+
+        self.assertIsNone(ViewCache(NullBackend()).marca(1), "Sem cache não há marca")
+
+        print("✅ TA-56: PASSOU - Marca de alteração monotônica")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+"""
+Testes Automatizados - Cache HTTP Condicional e Compressão
+Projeto A3 - Gestão e Qualidade de Software
+
+Usa uma aplicação Flask mínima com o middleware de cache_http.py, sem
+banco de dados: a "página" conta quantas vezes foi renderizada.
+"""
+
+import unittest
+import sys
+import os
+import gzip
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask, Response, flash, session
+import cache_http
+from cache import MemoryBackend, NullBackend, RedisBackend, ViewCache
+from test_cache import FakeRedis
+
+
+def criar_app(backend):
+    app = Flask(__name__)
+    app.secret_key = 'teste'
+    app.config['TESTING'] = True
+    view_cache = ViewCache(backend, ttl=60)
+    renderizacoes = []
+
+    @app.route('/dashboard')
+    def dashboard():
+        renderizacoes.append(1)
+        return '<html>' + 'saldo ' * 500 + '</html>'
+
+    @app.route('/avisos')
+    def avisos():
+        flash('Transação adicionada!')
+        return dashboard()
+
+    @app.route('/pequena')
+    def pequena():
+        return 'ok'
+
+    @app.route('/arquivo')
+    def arquivo():
+        return Response((parte for parte in ['a' * 2000]), mimetype='text/csv')
+
+    cache_http.init_app(app, view_cache, paginas=('dashboard', 'avisos'))
+    return app, view_cache, renderizacoes
+
+
+def logar(cliente, usuario_id=1):
+    with cliente.session_transaction() as sessao:
+        sessao['user_id'] = usuario_id
+        sessao['user_modo'] = 'simples'
+
+
+class TestCacheHttp(unittest.TestCase):
+    """
+    TESTES DO MIDDLEWARE DE CACHE HTTP
+    """
+
+    def test_57_compressao(self):
+        """
+        TA-57: Gzip só acima do limite, com ETag próprio e Vary: Accept-Encoding
+        Tipo: Unitário
+        Objetivo: Menos bytes na rede sem afetar respostas pequenas ou em streaming
+        """
+        print("\n🧪 Executando TA-57: Compressão...")
+
+        app, _, _ = criar_app(RedisBackend(FakeRedis()))
+        cliente = app.test_client()
+        logar(cliente)
+        cabecalhos = {'Accept-Encoding': 'gzip'}
+
+        resposta = cliente.get('/dashboard', headers=cabecalhos)
+        self.assertEqual(resposta.headers['Content-Encoding'], 'gzip')
+        self.assertTrue(resposta.get_etag()[0].endswith('-gzip'))
+        self.assertIn('Accept-Encoding', resposta.vary)
+        self.assertTrue(gzip.decompress(resposta.data).startswith(b'<html>saldo'))
+        self.assertEqual(int(resposta.headers['Content-Length']), len(resposta.data))
+
+        self.assertNotIn('Content-Encoding', cliente.get('/dashboard').headers, "Cliente sem gzip")
+        self.assertNotIn('Content-Encoding', cliente.get('/pequena', headers=cabecalhos).headers)
+        self.assertNotIn('Content-Encoding', cliente.get('/arquivo', headers=cabecalhos).headers,
+                         "Respostas em streaming não devem ser comprimidas")
+
+        print("✅ TA-57: PASSOU - Compressão com limite e ETag por codificação")
+
+    def test_58_pagina_condicional(self):
+        """
+        TA-58: 304 sem renderizar até uma escrita renovar a marca do usuário
+        Tipo: Funcional
+        Objetivo: Revalidação barata das páginas sem servir dados velhos
+        """
+        print("\n🧪 Executando TA-58: Página Condicional...")
+
+        app, view_cache, renderizacoes = criar_app(RedisBackend(FakeRedis()))
+        cliente = app.test_client()
+        logar(cliente)
+
+        primeira = cliente.get('/dashboard', headers={'Accept-Encoding': 'gzip'})
+        etag = primeira.headers['ETag']
+        self.assertEqual(primeira.headers['Cache-Control'], 'private, no-cache')
+        self.assertIn('Last-Modified', primeira.headers)
+
+        for cabecalhos in ({'If-None-Match': etag},
+                           {'If-None-Match': etag.replace('-gzip', '')},
+                           {'If-Modified-Since': primeira.headers['Last-Modified']}):
+            resposta = cliente.get('/dashboard', headers=cabecalhos)
+            self.assertEqual(resposta.status_code, 304, cabecalhos)
+        self.assertEqual(len(renderizacoes), 1, "Página foi renderizada para responder 304")
+
+        # Outro usuário no mesmo navegador não reaproveita a página
+        logar(cliente, 2)
+        self.assertEqual(cliente.get('/dashboard', headers={'If-None-Match': etag}).status_code, 200)
+        logar(cliente, 1)
+
+        view_cache.invalidate(1, 'dashboard')
+        resposta = cliente.get('/dashboard', headers={'If-None-Match': etag})
+        self.assertEqual(resposta.status_code, 200, "Escrita não invalidou o ETag")
+        self.assertNotEqual(resposta.headers['ETag'], etag)
+
+        # Página que exibe flash não recebe validadores
+        self.assertIsNone(cliente.get('/avisos').headers.get('ETag'))
+
+        # Sem cache (CACHE_BACKEND=nenhum) não há marca: sempre 200
+        app, _, _ = criar_app(NullBackend())
+        cliente = app.test_client()
+        logar(cliente)
+        self.assertIsNone(cliente.get('/dashboard').headers.get('ETag'))
+
+        print("✅ TA-58: PASSOU - 304 sem renderizar e invalidação por escrita")
+
+    def test_71_workers_com_backend_compartilhado(self):
+        """
+        TA-71: Escrita atendida por um worker invalida o 304 dos outros
+        Tipo: Funcional
+        Objetivo: Nenhum worker responde 304 com a página de antes da escrita
+        """
+        print("\n🧪 Executando TA-71: Página Condicional com Dois Workers...")
+
+        # Dois workers do gunicorn: apps com o mesmo Redis
+        redis = FakeRedis()
+        (app_a, _, renderizacoes), (app_b, cache_b, _) = (criar_app(RedisBackend(redis)) for _ in range(2))
+        cliente_a, cliente_b = app_a.test_client(), app_b.test_client()
+        logar(cliente_a)
+        logar(cliente_b)
+
+        etag = cliente_a.get('/dashboard').headers['ETag']
+        self.assertEqual(cliente_b.get('/dashboard', headers={'If-None-Match': etag}).status_code, 304)
+        cache_b.invalidate(1, 'dashboard')
+        resposta = cliente_a.get('/dashboard', headers={'If-None-Match': etag})
+        self.assertEqual(resposta.status_code, 200, "Worker A não viu a escrita feita no worker B")
+        self.assertEqual(len(renderizacoes), 2)
+
+        # Cache em memória: cada worker tem a própria marca, então nenhum é condicional
+        (app_a, _, renderizacoes), (app_b, cache_b, _) = (criar_app(MemoryBackend()) for _ in range(2))
+        cliente_a, cliente_b = app_a.test_client(), app_b.test_client()
+        logar(cliente_a)
+        logar(cliente_b)
+
+        primeira = cliente_a.get('/dashboard', headers={'Accept-Encoding': 'gzip'})
+        self.assertIsNone(primeira.headers.get('ETag'))
+        self.assertIsNone(primeira.headers.get('Last-Modified'))
+        self.assertEqual(primeira.headers['Content-Encoding'], 'gzip', "Compressão continua sem o 304")
+        cache_b.invalidate(1, 'dashboard')
+        for cabecalhos in ({'If-None-Match': '*'},
+                           {'If-Modified-Since': 'Thu, 01 Jan 2099 00:00:00 GMT'}):
+            self.assertEqual(cliente_a.get('/dashboard', headers=cabecalhos).status_code, 200, cabecalhos)
+        self.assertEqual(len(renderizacoes), 3)
+
+        print("✅ TA-71: PASSOU - 304 só com a marca compartilhada entre os workers")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,443 @@
+"""
+Testes Automatizados - Consultas Agregadas e Planos de Execução
+Projeto A3 - Gestão e Qualidade de Software
+
+Os testes de plano (EXPLAIN) precisam do MySQL com o database_schema.sql
+aplicado; sem banco disponível eles são ignorados.
+"""
+
+import unittest
+import sys
+import os
+import sqlite3
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import mysql.connector
+import consultas
+import periodos
+import resumo
+from config import DB_CONFIG
+
+
+def conectar_banco():
+    """Retorna uma conexão ou None se o MySQL não estiver disponível"""
+    try:
+        return mysql.connector.connect(connection_timeout=3, **DB_CONFIG)
+    except mysql.connector.Error:
+        return None
+
+
+class TestPeriodos(unittest.TestCase):
+    """
+    TESTES DO CONSTRUTOR DE PERÍODOS
+    """
+
+    def test_21_intervalos_semiabertos(self):
+        """
+        TA-21: Períodos geram intervalos [inicio, fim) corretos
+        Tipo: Unitário
+        Objetivo: Validar viradas de mês e de ano
+        """
+        print("\n🧪 Executando TA-21: Intervalos Semiabertos...")
+
+        hoje = date(2025, 1, 15)
+        self.assertEqual(periodos.mes_atual(hoje), (date(2025, 1, 1), date(2025, 2, 1)))
+        self.assertEqual(periodos.mes(2024, 12), (date(2024, 12, 1), date(2025, 1, 1)))
+        self.assertEqual(periodos.ultimos_meses(12, hoje), (date(2024, 2, 1), date(2025, 2, 1)))
+        self.assertEqual(len(periodos.ultimos_meses(12, hoje).meses()), 12)
+
+        proximos = periodos.proximos_dias(7, hoje)
+        self.assertTrue(proximos.contem(hoje + timedelta(days=7)))
+        self.assertFalse(proximos.contem(hoje + timedelta(days=8)))
+
+        print("✅ TA-21: PASSOU - Intervalos corretos")
+
+    def test_22_consultas_sargaveis(self):
+        """
+        TA-22: Consultas agregadas filtram a coluna de data sem funções
+        Tipo: Unitário
+        Objetivo: Garantir filtros compatíveis com índices
+        """
+        print("\n🧪 Executando TA-22: Consultas Sargáveis...")
+
+        intervalos = [periodos.mes(2024, 3), periodos.ultimos_meses(12, date(2025, 1, 15))]
+        sql, params = consultas.sql_resumo_categoria(1, intervalos)
+        self.assertIn('usuario_id = %s AND ((mes >= %s AND mes < %s) OR (mes >= %s AND mes < %s))', sql)
+        self.assertEqual(sql.count('%s'), len(params))
+
+        sql, _ = consultas.sql_resumo_categoria(1, [periodos.mes_atual()])
+        self.assertNotIn('MONTH(', sql)
+        self.assertNotIn('YEAR(', sql)
+        self.assertNotIn('CURRENT_DATE', sql)
+
+        print("✅ TA-22: PASSOU - Filtros de data sargáveis")
+
+    def test_52_periodos_de_relatorio(self):
+        """
+        TA-52: Mês, trimestre, ano e personalizado com as comparações
+        Tipo: Unitário
+        Objetivo: Períodos de meses inteiros, anterior e ano anterior corretos
+        """
+        print("\n🧪 Executando TA-52: Períodos de Relatório...")
+
+        hoje = date(2025, 5, 20)
+        self.assertEqual(periodos.periodo_relatorio(hoje=hoje), periodos.mes(2025, 5))
+        trimestre = periodos.periodo_relatorio('trimestre', '2025-02', hoje=hoje)
+        self.assertEqual(trimestre, (date(2025, 1, 1), date(2025, 4, 1)))
+        self.assertEqual(periodos.anterior(trimestre), (date(2024, 10, 1), date(2025, 1, 1)))
+        self.assertEqual(periodos.deslocar(trimestre, -12), (date(2024, 1, 1), date(2024, 4, 1)))
+        self.assertEqual(periodos.periodo_relatorio('ano', '2024-07', hoje=hoje), periodos.ano_civil(2024))
+
+        personalizado = periodos.periodo_relatorio('personalizado', de='2024-11', ate='2025-02', hoje=hoje)
+        self.assertEqual(personalizado, (date(2024, 11, 1), date(2025, 3, 1)))
+        self.assertEqual(periodos.quantidade_meses(personalizado), 4)
+        self.assertEqual(periodos.rotulo(personalizado), '11/2024 a 02/2025')
+        self.assertEqual(periodos.rotulo(periodos.mes(2025, 5)), '05/2025')
+
+        for args in (('semana',), ('mes', '2025-13'), ('personalizado', None, '2025-03', '2025-01'),
+                     ('personalizado', None, '2000-01', '2025-01'), ('personalizado', None, '2025-01', None)):
+            with self.assertRaises(ValueError):
+                periodos.periodo_relatorio(*args, hoje=hoje)
+
+        # No relatório anual o anterior é o próprio ano anterior: um intervalo só no WHERE
+        faixas = consultas.periodos_relatorio(periodos.ano_civil(2024))
+        self.assertEqual(faixas['anterior'], faixas['ano_anterior'])
+        self.assertEqual(periodos.unir(faixas.values()), [(date(2023, 1, 1), date(2025, 1, 1))])
+        self.assertEqual(periodos.unir([periodos.mes(2025, 1), periodos.mes(2025, 3)]),
+                         [periodos.mes(2025, 1), periodos.mes(2025, 3)])
+
+        print("✅ TA-52: PASSOU - Períodos e comparações corretos")
+
+
+class TestRelatorios(unittest.TestCase):
+    """
+    TESTES DA PÁGINA DE RELATÓRIOS CALCULADA EM PYTHON
+    """
+
+    def test_53_comparacoes_por_categoria(self):
+        """
+        TA-53: Totais, comparações e evolução saem das mesmas linhas do resumo
+        Tipo: Unitário
+        Objetivo: Variação contra o período anterior e o ano anterior, com filtros
+        """
+        print("\n🧪 Executando TA-53: Comparações por Categoria...")
+
+        def linha(ano, mes, tipo, categoria, total, quantidade=1):
+            return {'mes': date(ano, mes, 1), 'tipo': tipo, 'categoria': categoria,
+                    'total': Decimal(total), 'quantidade': quantidade}
+
+        linhas = [
+            linha(2025, 4, 'despesa', 'Mercado', '600.00', 6),
+            linha(2025, 5, 'despesa', 'Mercado', '300.00', 3),
+            linha(2025, 6, 'despesa', 'Mercado', '400.00', 4),
+            linha(2025, 6, 'despesa', 'Lazer', '100.00', 2),
+            linha(2025, 6, 'receita', 'Salário', '3000.00'),
+            linha(2024, 6, 'despesa', 'Mercado', '500.00', 5),
+            linha(2024, 6, 'receita', 'Salário', '2500.00'),
+            linha(2024, 5, 'despesa', 'Viagem', '900.00'),   # fora de todas as faixas do mês
+        ]
+        relatorio = consultas.montar_relatorio(linhas, periodos.mes(2025, 6))
+
+        mercado, lazer = relatorio['por_categoria']
+        self.assertEqual((mercado['categoria'], mercado['total'], mercado['quantidade']),
+                         ('Mercado', Decimal('400.00'), 4))
+        self.assertEqual((mercado['anterior'], mercado['ano_anterior']), (Decimal('300.00'), Decimal('500.00')))
+        self.assertEqual((mercado['variacao_anterior'], mercado['variacao_ano']), (33.3, -20.0))
+        self.assertEqual((lazer['variacao_anterior'], lazer['variacao_ano']), (None, None))
+        self.assertEqual(relatorio['totais']['receita']['variacao_ano'], 20.0)
+        self.assertEqual(relatorio['totais']['despesa']['atual'], Decimal('500.00'))
+        self.assertEqual(relatorio['rotulos']['evolucao'], '07/2024 a 06/2025')
+        self.assertEqual(relatorio['evolucao_mensal'][:2], [
+            {'mes': '2025-06', 'tipo': 'receita', 'total': Decimal('3000.00')},
+            {'mes': '2025-06', 'tipo': 'despesa', 'total': Decimal('500.00')},
+        ])
+        self.assertEqual(relatorio['categorias'], ['Lazer', 'Mercado', 'Salário', 'Viagem'])
+        serie = relatorio['serie_mensal']
+        self.assertEqual((serie['meses'][0], serie['meses'][-1], len(serie['meses'])), ('2024-07', '2025-06', 12))
+        self.assertEqual((serie['despesa'][-3:], serie['receita'][-1]),
+                         ([Decimal('600.00'), Decimal('300.00'), Decimal('500.00')], Decimal('3000.00')))
+        self.assertEqual(serie['despesa'][0], 0)
+
+        # Trimestre abr-jun com filtro de categoria
+        filtrado = consultas.montar_relatorio(linhas, periodos.trimestre(2025, 2), categoria='Mercado')
+        self.assertEqual([i['categoria'] for i in filtrado['por_categoria']], ['Mercado'])
+        self.assertEqual(filtrado['por_categoria'][0]['total'], Decimal('1300.00'))
+        self.assertEqual(filtrado['totais']['receita']['atual'], 0)
+        self.assertEqual({e['mes'] for e in filtrado['evolucao_mensal']}, {'2025-04', '2025-05', '2025-06'})
+        self.assertEqual(filtrado['por_categoria'][0]['ano_anterior'], Decimal('500.00'))
+
+        receitas = consultas.montar_relatorio(linhas, periodos.mes(2025, 6), tipo='receita')
+        self.assertEqual([i['categoria'] for i in receitas['por_categoria']], ['Salário'])
+
+        print("✅ TA-53: PASSOU - Comparações calculadas em uma passada")
+
+
+class CursorSQLite:
+    """Executa as consultas (placeholders %s) em um SQLite em memória"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params):
+        params = [p.isoformat() if isinstance(p, date) else p for p in params]
+        self.linhas = self.conn.execute(sql.replace('%s', '?'), params).fetchall()
+
+    def fetchall(self):
+        return [dict(linha, data=date.fromisoformat(linha['data'])) for linha in self.linhas]
+
+
+class TestHistoricoPaginado(unittest.TestCase):
+    """
+    TESTES DA PAGINAÇÃO POR KEYSET
+    """
+
+    def test_31_keyset_percorre_historico(self):
+        """
+        TA-31: Páginas por keyset cobrem todo o histórico sem repetir linhas
+        Tipo: Unitário
+        Objetivo: Navegar para frente e para trás com filtros, sem OFFSET
+        """
+        print("\n🧪 Executando TA-31: Paginação por Keyset...")
+
+        conn = sqlite3.connect(':memory:')
+        conn.row_factory = sqlite3.Row
+        conn.execute('CREATE TABLE transacoes (id INTEGER PRIMARY KEY, usuario_id INT, tipo TEXT, '
+                     'valor REAL, descricao TEXT, categoria TEXT, data TEXT)')
+        # Várias transações no mesmo dia: o desempate é pelo id
+        inicio = date(2025, 1, 1)
+        conn.executemany(
+            'INSERT INTO transacoes (usuario_id, tipo, valor, descricao, categoria, data) VALUES (?, ?, ?, ?, ?, ?)',
+            [(1 if i % 7 else 2, 'despesa' if i % 3 else 'receita', i, f'T{i}', 'Lazer',
+              (inicio + timedelta(days=i // 4)).isoformat()) for i in range(300)]
+        )
+        cursor = CursorSQLite(conn)
+        filtros = consultas.normalizar_filtros(inicio='2025-01-05', fim='2025-02-20', tipo='despesa')
+
+        esperado = [dict(l) for l in conn.execute(
+            "SELECT id FROM transacoes WHERE usuario_id = 1 AND tipo = 'despesa' "
+            "AND data >= '2025-01-05' AND data <= '2025-02-20' ORDER BY data DESC, id DESC")]
+        esperado = [l['id'] for l in esperado]
+
+        paginas = []
+        pagina = consultas.pagina_transacoes(cursor, 1, filtros, limite=25)
+        self.assertIsNone(pagina['anterior'])
+        while True:
+            paginas.append([t['id'] for t in pagina['transacoes']])
+            if not pagina['proxima']:
+                break
+            pagina = consultas.pagina_transacoes(
+                cursor, 1, filtros, apos=consultas.ler_chave(pagina['proxima']), limite=25)
+
+        self.assertEqual([i for p in paginas for i in p], esperado)
+        self.assertGreater(len(paginas), 2)
+
+        # Voltando a partir da última página chega-se às mesmas páginas
+        anterior = consultas.pagina_transacoes(
+            cursor, 1, filtros, antes=consultas.ler_chave(pagina['anterior']), limite=25)
+        self.assertEqual([t['id'] for t in anterior['transacoes']], paginas[-2])
+
+        sql, params = consultas.sql_pagina_transacoes(1, filtros, apos=(date(2025, 1, 9), 40))
+        self.assertNotIn('OFFSET', sql)
+        self.assertEqual(sql.count('%s'), len(params))
+        with self.assertRaises(ValueError):
+            consultas.ler_chave('abc')
+
+        print("✅ TA-31: PASSOU - Histórico percorrido por keyset")
+
+
+class TestMetasUmaConsulta(unittest.TestCase):
+    """
+    TESTES DA PÁGINA DE METAS CALCULADA EM PYTHON
+    """
+
+    def test_37_metas_em_uma_passada(self):
+        """
+        TA-37: Lista, estatísticas e prazos próximos saem de uma única leitura
+        Tipo: Unitário
+        Objetivo: Mesmos campos e ordem que as três consultas antigas
+        """
+        print("\n🧪 Executando TA-37: Metas em uma Consulta...")
+
+        hoje = date(2025, 1, 15)
+
+        def meta(id, status, alvo, atual, limite):
+            return {'id': id, 'titulo': f'Meta {id}', 'descricao': None, 'categoria': 'Outros',
+                    'valor_alvo': Decimal(alvo), 'valor_atual': Decimal(atual), 'status': status,
+                    'data_inicio': date(2024, 1, 1), 'data_limite': limite,
+                    'data_conclusao': None, 'cor': '#6366F1'}
+
+        linhas = [
+            meta(1, 'concluida', '100.00', '150.00', date(2025, 1, 1)),
+            meta(2, 'ativa', '1000.00', '250.00', None),
+            meta(3, 'ativa', '300.00', '100.00', date(2025, 1, 22)),   # daqui a 7 dias
+            meta(4, 'cancelada', '50.00', '0.00', date(2025, 1, 16)),
+            meta(5, 'ativa', '0.00', '10.00', date(2025, 1, 10)),      # atrasada
+            meta(6, 'ativa', '200.00', '-20.00', date(2025, 1, 23)),   # daqui a 8 dias
+            meta(7, 'ativa', '100.00', '50.00', hoje),
+        ]
+        dados = consultas.montar_metas(linhas, hoje)
+
+        self.assertEqual([m['id'] for m in dados['metas']], [5, 7, 3, 6, 2, 1, 4])
+        por_id = {m['id']: m for m in dados['metas']}
+        self.assertEqual(por_id[3]['progresso'], Decimal('33.3333'))
+        self.assertEqual(por_id[1]['progresso'], Decimal('100.0000'))
+        self.assertEqual(por_id[6]['progresso'], Decimal('0.0000'))
+        self.assertEqual(por_id[5]['progresso'], Decimal('0.0000'))
+        self.assertEqual(por_id[3]['valor_faltante'], Decimal('200.00'))
+        self.assertEqual([m['id'] for m in dados['metas'] if m['atrasada']], [5])
+        self.assertEqual((por_id[5]['dias_restantes'], por_id[2]['dias_restantes']), (-5, None))
+
+        self.assertEqual(dados['metas_proximas'], [
+            {'id': 7, 'titulo': 'Meta 7', 'data_limite': hoje, 'dias_restantes': 0},
+            {'id': 3, 'titulo': 'Meta 3', 'data_limite': date(2025, 1, 22), 'dias_restantes': 7},
+        ])
+        self.assertEqual(dados['estatisticas'], {
+            'total_metas': 7, 'metas_ativas': 5, 'metas_concluidas': 1,
+            'total_economizado': 540.0, 'total_objetivo': 1600.0,
+            'progresso_geral': 540.0 / 1600.0 * 100,
+        })
+        self.assertEqual(consultas.montar_metas([], hoje)['estatisticas']['progresso_geral'], 0.0)
+
+        print("✅ TA-37: PASSOU - Página de metas calculada em uma passada")
+
+
+@unittest.skipIf(conectar_banco() is None, "MySQL indisponível")
+class TestPlanosConsulta(unittest.TestCase):
+    """
+    TESTES DE REGRESSÃO DOS PLANOS DE EXECUÇÃO (EXPLAIN)
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.conn = conectar_banco()
+        cursor = cls.conn.cursor()
+        cursor.execute(
+            "INSERT INTO usuarios (nome, email, senha) VALUES (%s, %s, %s)",
+            ('Usuario Explain', f'explain{id(cls)}@teste.com', 'x')
+        )
+        cls.usuario_id = cursor.lastrowid
+
+        hoje = date.today()
+        categorias = ['Moradia', 'Alimentação', 'Saúde', 'Lazer', 'Transporte']
+        transacoes = [
+            (cls.usuario_id, 'receita' if i % 5 == 0 else 'despesa', 10 + i % 90,
+             f'Transação {i}', categorias[i % len(categorias)], hoje - timedelta(days=i % 1500))
+            for i in range(3000)
+        ]
+        cursor.executemany(
+            'INSERT INTO transacoes (usuario_id, tipo, valor, descricao, categoria, data) '
+            'VALUES (%s, %s, %s, %s, %s, %s)', transacoes
+        )
+        metas = [
+            (cls.usuario_id, f'Meta {i}', 1000, hoje - timedelta(days=30),
+             hoje + timedelta(days=i), 'ativa' if i % 2 else 'concluida')
+            for i in range(200)
+        ]
+        cursor.executemany(
+            'INSERT INTO metas (usuario_id, titulo, valor_alvo, data_inicio, data_limite, status) '
+            'VALUES (%s, %s, %s, %s, %s, %s)', metas
+        )
+        resumo.reconstruir_resumos(cursor, cls.usuario_id)
+        cls.conn.commit()
+        cursor.execute('ANALYZE TABLE transacoes, metas, resumo_categoria')
+        cursor.fetchall()
+        cursor.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        cursor = cls.conn.cursor()
+        cursor.execute('DELETE FROM usuarios WHERE id = %s', (cls.usuario_id,))
+        cls.conn.commit()
+        cursor.close()
+        cls.conn.close()
+
+    def explicar(self, sql, params):
+        cursor = self.conn.cursor(dictionary=True)
+        cursor.execute('EXPLAIN ' + sql, params)
+        plano = cursor.fetchall()
+        cursor.close()
+        self.assertEqual(len(plano), 1, f"Plano inesperado: {plano}")
+        return plano[0]
+
+    def test_23_planos_usam_indices(self):
+        """
+        TA-23: EXPLAIN das consultas agregadas usa os índices esperados
+        Tipo: Banco de Dados / Regressão
+        Objetivo: Range/ref scans index-only, sem varrer a tabela
+        """
+        print("\n🧪 Executando TA-23: Planos de Execução...")
+
+        # Relatórios leem resumo_categoria por ranges na chave primária (usuario_id, mes, ...)
+        for periodo in (periodos.mes_atual(), periodos.ano_civil(date.today().year)):
+            intervalos = periodos.unir(consultas.periodos_relatorio(periodo).values())
+            plano = self.explicar(*consultas.sql_resumo_categoria(self.usuario_id, intervalos))
+            self.assertEqual(plano['table'], 'resumo_categoria')
+            self.assertEqual(plano['key'], 'PRIMARY')
+            self.assertEqual(plano['type'], 'range')
+
+        print("✅ TA-23: PASSOU - Consultas usam os índices de cobertura")
+
+    def test_32_plano_keyset_sem_filesort(self):
+        """
+        TA-32: Página profunda do histórico é um range scan ordenado pelo índice
+        Tipo: Banco de Dados / Regressão
+        Objetivo: Custo da página N igual ao da primeira (sem OFFSET e sem filesort)
+        """
+        print("\n🧪 Executando TA-32: Plano da Paginação por Keyset...")
+
+        apos = (date.today() - timedelta(days=1000), 10 ** 9)
+        for sql, params in (consultas.sql_pagina_transacoes(self.usuario_id),
+                            consultas.sql_pagina_transacoes(self.usuario_id, apos=apos),
+                            consultas.sql_pagina_transacoes(self.usuario_id, {'tipo': 'despesa'}, apos=apos)):
+            plano = self.explicar(sql, params)
+            self.assertEqual(plano['key'], 'idx_usuario_data_cobertura')
+            self.assertNotIn('filesort', plano['Extra'] or '')
+
+        print("✅ TA-32: PASSOU - Keyset usa o índice (usuario_id, data)")
+
+
+    def test_38_metas_uma_consulta_equivale_as_antigas(self):
+        """
+        TA-38: dados_metas (uma consulta) bate com as consultas SQL separadas
+        Tipo: Banco de Dados / Regressão
+        Objetivo: Mesmas estatísticas e prazos próximos, com um único acesso ao banco
+        """
+        print("\n🧪 Executando TA-38: Metas em uma Consulta (MySQL)...")
+
+        cursor = self.conn.cursor(dictionary=True)
+        dados = consultas.dados_metas(cursor, self.usuario_id, date.today())
+
+        cursor.execute('''
+            SELECT COUNT(*) AS total_metas,
+                   SUM(CASE WHEN status = 'ativa' THEN 1 ELSE 0 END) AS metas_ativas,
+                   SUM(CASE WHEN status = 'concluida' THEN 1 ELSE 0 END) AS metas_concluidas,
+                   COALESCE(SUM(valor_atual), 0) AS total_economizado,
+                   COALESCE(SUM(CASE WHEN status = 'ativa' THEN valor_alvo ELSE 0 END), 0) AS total_objetivo
+            FROM metas WHERE usuario_id = %s
+        ''', (self.usuario_id,))
+        esperado = cursor.fetchone()
+        for campo, valor in esperado.items():
+            self.assertEqual(dados['estatisticas'][campo], float(valor), campo)
+
+        cursor.execute('''
+            SELECT id, titulo, data_limite, DATEDIFF(data_limite, CURRENT_DATE) AS dias_restantes
+            FROM metas
+            WHERE usuario_id = %s AND status = 'ativa'
+              AND data_limite >= CURRENT_DATE AND data_limite <= CURRENT_DATE + INTERVAL 7 DAY
+            ORDER BY data_limite ASC
+        ''', (self.usuario_id,))
+        self.assertEqual(dados['metas_proximas'], cursor.fetchall())
+
+        plano = self.explicar(*consultas.sql_metas_usuario(self.usuario_id))
+        self.assertEqual(plano['key'], 'idx_usuario_status')
+        self.assertEqual(plano['type'], 'ref')
+        cursor.close()
+
+        print("✅ TA-38: PASSOU - Uma consulta com o mesmo resultado das três")
+
+
+if __name__ == '__main__':
+    unittest.main()
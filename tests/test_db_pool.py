@@ -0,0 +1,157 @@
+"""
+Testes Automatizados - Pool de Conexões
+Projeto A3 - Gestão e Qualidade de Software
+
+Usa uma conexão falsa em memória no lugar do MySQL, então pode ser
+executado sem banco de dados.
+"""
+
+import unittest
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from db_pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeCursor:
+    """Cursor falso que apenas registra se foi fechado"""
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    """Conexão falsa com a mesma interface usada pelo pool"""
+
+    def __init__(self):
+        self.closed = False
+        self.rollbacks = 0
+        self.pings = 0
+        self.ping_ok = True
+        self.in_transaction = False
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor()
+
+    def is_connected(self):
+        return not self.closed
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+        if not self.ping_ok:
+            raise ConnectionError('servidor indisponível')
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestPoolConexoes(unittest.TestCase):
+    """
+    TESTES DO POOL DE CONEXÕES
+    """
+
+    def setUp(self):
+        self.criadas = []
+
+        def factory():
+            conn = FakeConnection()
+            self.criadas.append(conn)
+            return conn
+
+        self.factory = factory
+
+    def test_16_reutiliza_conexao(self):
+        """
+        TA-16: Conexão devolvida ao pool é reutilizada
+        Tipo: Unitário
+        Objetivo: Evitar uma conexão nova por requisição
+        """
+        print("\n🧪 Executando TA-16: Reutilização de Conexão...")
+
+        pool = ConnectionPool(self.factory, max_size=2)
+
+        with pool.connection() as conn:
+            cursor = conn.cursor()
+            conn._raw.in_transaction = True
+
+        self.assertTrue(cursor.closed, "Cursor não foi fechado na devolução")
+        self.assertEqual(self.criadas[0].rollbacks, 1, "Transação pendente não foi desfeita")
+
+        with pool.connection():
+            pass
+
+        stats = pool.stats()
+        self.assertEqual(len(self.criadas), 1, "Pool abriu conexões desnecessárias")
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['idle'], 1)
+        self.assertEqual(stats['active'], 0)
+
+        print("✅ TA-16: PASSOU - Conexão reutilizada")
+
+    def test_17_espera_e_timeout(self):
+        """
+        TA-17: Pool cheio espera por devolução e respeita o timeout
+        Tipo: Unitário / Concorrência
+        Objetivo: Limitar o número de conexões abertas
+        """
+        print("\n🧪 Executando TA-17: Espera e Timeout...")
+
+        pool = ConnectionPool(self.factory, max_size=1, timeout=0.05)
+        conn = pool.acquire()
+
+        with self.assertRaises(PoolTimeoutError):
+            pool.acquire()
+
+        threading.Timer(0.05, conn.close).start()
+        outra = pool.acquire(timeout=2)
+        outra.close()
+
+        stats = pool.stats()
+        self.assertEqual(len(self.criadas), 1, "Pool ultrapassou o limite")
+        self.assertEqual(stats['waits'], 2)
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertGreater(stats['wait_time'], 0)
+
+        print("✅ TA-17: PASSOU - Espera limitada pelo timeout")
+
+    def test_18_health_check_e_tempo_de_vida(self):
+        """
+        TA-18: Conexões quebradas ou expiradas são substituídas
+        Tipo: Unitário
+        Objetivo: Nunca entregar conexão inválida
+        """
+        print("\n🧪 Executando TA-18: Health Check e Tempo de Vida...")
+
+        pool = ConnectionPool(self.factory, max_size=1, ping_interval=0)
+        with pool.connection():
+            pass
+        self.criadas[0].ping_ok = False
+
+        with pool.connection() as conn:
+            self.assertIs(conn._raw, self.criadas[1], "Conexão quebrada foi entregue")
+        self.assertTrue(self.criadas[0].closed)
+
+        pool = ConnectionPool(self.factory, max_size=1, max_lifetime=0.01)
+        with pool.connection():
+            pass
+        time.sleep(0.02)
+        with pool.connection() as conn:
+            self.assertIs(conn._raw, self.criadas[-1])
+        self.assertEqual(pool.stats()['discarded'], 1)
+
+        print("✅ TA-18: PASSOU - Conexões inválidas descartadas")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Testes Automatizados - Exportação em Streaming
+Projeto A3 - Gestão e Qualidade de Software
+"""
+
+import unittest
+import sys
+import os
+import io
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import exportacao
+
+NS = {'x': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+
+
+class CursorLotes:
+    """Cursor falso que registra cada fetchmany"""
+
+    def __init__(self, linhas):
+        self.linhas = list(linhas)
+        self.chamadas = []
+
+    def fetchmany(self, tamanho):
+        self.chamadas.append(tamanho)
+        lote, self.linhas = self.linhas[:tamanho], self.linhas[tamanho:]
+        return lote
+
+
+class TestExportacaoExcel(unittest.TestCase):
+    """
+    TESTES DA EXPORTAÇÃO EXCEL EM STREAMING
+    """
+
+    def test_26_xlsx_valido_em_pedacos(self):
+        """
+        TA-26: Planilha gerada em pedaços é um .xlsx válido
+        Tipo: Unitário
+        Objetivo: Garantir conteúdo correto sem montar o arquivo em memória
+        """
+        print("\n🧪 Executando TA-26: XLSX em Streaming...")
+
+        linhas = [('despesa', 'Moradia', 'Luz & "água" <casa>', Decimal('150.75'), date(2025, 11, 2))] * 1200
+        cursor = CursorLotes(linhas)
+
+        pedacos = list(exportacao.gerar_xlsx(
+            exportacao.COLUNAS_TRANSACOES,
+            exportacao.iterar_lotes(cursor, tamanho_lote=500),
+            linhas_por_envio=100
+        ))
+
+        self.assertGreater(len(pedacos), 1, "Arquivo não foi enviado em partes")
+        self.assertEqual(cursor.chamadas, [500, 500, 500, 500], "Leitura não foi feita em lotes")
+
+        with zipfile.ZipFile(io.BytesIO(b''.join(pedacos))) as zf:
+            self.assertIsNone(zf.testzip(), "ZIP corrompido")
+            planilha = ET.fromstring(zf.read('xl/worksheets/sheet1.xml'))
+
+        rows = planilha.findall('.//x:row', NS)
+        self.assertEqual(len(rows), 1201)
+        textos = [c.findtext('.//x:t', namespaces=NS) or c.findtext('x:v', namespaces=NS)
+                  for c in rows[1]]
+        self.assertEqual(textos, ['despesa', 'Moradia', 'Luz & "água" <casa>', '150.75', '02/11/2025'])
+
+        print("✅ TA-26: PASSOU - XLSX válido gerado em streaming")
+
+
+if __name__ == '__main__':
+    unittest.main()
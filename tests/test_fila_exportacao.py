@@ -0,0 +1,236 @@
+"""
+Testes Automatizados - Fila de Exportações
+Projeto A3 - Gestão e Qualidade de Software
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import fila_exportacao
+from fila_exportacao import (FilaExportacao, LimiteExportacoesError, processar_proxima,
+                             PENDENTE, PROCESSANDO, CONCLUIDO, ERRO)
+
+
+class FakeCursor:
+    def __init__(self, linhas, falhar_apos=None):
+        self.linhas = list(linhas)
+        self.falhar_apos = falhar_apos
+        self.lidas = 0
+        self.executado = None
+
+    def execute(self, sql, params):
+        self.executado = (sql, params)
+
+    def fetchmany(self, tamanho):
+        if self.falhar_apos is not None and self.lidas >= self.falhar_apos:
+            raise RuntimeError('Lost connection to MySQL server during query')
+        lote, self.linhas = self.linhas[:tamanho], self.linhas[tamanho:]
+        self.lidas += len(lote)
+        return lote
+
+    def close(self):
+        # Como o cursor não bufferizado do mysql-connector
+        if self.linhas:
+            raise RuntimeError('Unread result found')
+
+
+class FakeConnection:
+    def __init__(self, linhas, falhar_apos=None):
+        self.linhas = linhas
+        self.falhar_apos = falhar_apos
+        self.cursor_criado = None
+        self.rollbacks = 0
+        self.fechada = False
+
+    def cursor(self, buffered=True):
+        self.cursor_criado = FakeCursor(self.linhas, self.falhar_apos)
+        return self.cursor_criado
+
+    def rollback(self):
+        if self.cursor_criado is not None and self.cursor_criado.linhas:
+            raise RuntimeError('Unread result found')
+        self.rollbacks += 1
+
+    def is_connected(self):
+        return not self.fechada
+
+    def close(self):
+        self.fechada = True
+
+
+class FakeProcesso:
+    def __init__(self, vivo):
+        self.vivo = vivo
+        self.name = 'exportacao-x'
+        self.exitcode = None if vivo else -9
+
+    def is_alive(self):
+        return self.vivo
+
+
+class TestFilaExportacao(unittest.TestCase):
+    """
+    TESTES DA FILA DE EXPORTAÇÕES
+    """
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.fila = FilaExportacao(os.path.join(self.diretorio, 'fila.sqlite3'), self.diretorio,
+                                   limite_usuario=2, retencao=60)
+
+    def tearDown(self):
+        shutil.rmtree(self.diretorio)
+
+    def test_29_limite_por_usuario_e_ordem(self):
+        """
+        TA-29: Fila respeita o limite por usuário e a ordem de chegada
+        Tipo: Unitário
+        Objetivo: Evitar que um usuário ocupe todos os trabalhadores; recuperar tarefas interrompidas
+        """
+        print("\n🧪 Executando TA-29: Limite e Ordem da Fila...")
+
+        primeira = self.fila.enfileirar(1, 'excel', {'inicio': '2025-01-01'})
+        self.fila.enfileirar(1, 'pdf')
+        with self.assertRaises(LimiteExportacoesError):
+            self.fila.enfileirar(1, 'pdf')
+        outra = self.fila.enfileirar(2, 'pdf')
+
+        tarefa = self.fila.reservar()
+        self.assertEqual(tarefa['id'], primeira)
+        self.assertEqual(tarefa['status'], PROCESSANDO)
+        self.assertEqual(tarefa['filtros'], {'inicio': '2025-01-01'})
+
+        # Trabalhador ativo: a tarefa continua em processamento (não é feita duas vezes)
+        self.assertEqual(self.fila.recuperar_interrompidas(), (0, 0))
+        self.assertEqual(self.fila.obter(primeira)['status'], PROCESSANDO)
+
+        # Trabalhador encerrado: pid de um processo que já terminou
+        encerrado = subprocess.Popen([sys.executable, '-c', 'pass'])
+        encerrado.wait()
+        self.assertFalse(fila_exportacao.processo_ativo(encerrado.pid))
+        self.assertTrue(fila_exportacao.processo_ativo(os.getpid()))
+        conn = self.fila._conexao()
+        conn.execute('UPDATE tarefas SET pid = ? WHERE id = ?', (encerrado.pid, primeira))
+        self.assertEqual(self.fila.recuperar_interrompidas(), (1, 0))
+        tarefa = self.fila.reservar()
+        self.assertEqual((tarefa['id'], tarefa['tentativas']), (primeira, 2))
+
+        # Exportação que derruba o trabalhador a cada tentativa: desiste no limite
+        self.fila.max_tentativas = 2
+        conn.execute('UPDATE tarefas SET pid = ? WHERE id = ?', (encerrado.pid, primeira))
+        self.assertEqual(self.fila.recuperar_interrompidas(), (0, 1))
+        tarefa = self.fila.obter(primeira)
+        self.assertEqual(tarefa['status'], ERRO)
+        self.assertIn('2 tentativas', tarefa['erro'])
+
+        self.assertIsNone(self.fila.obter(outra, usuario_id=1), "Tarefa de outro usuário visível")
+
+        print("✅ TA-29: PASSOU - Limite por usuário, ordem e recuperação respeitados")
+
+    def test_30_trabalhador_gera_arquivo_e_limpeza(self):
+        """
+        TA-30: Trabalhador gera o arquivo e a limpeza remove os expirados
+        Tipo: Unitário
+        Objetivo: Garantir o ciclo completo da tarefa (fila, arquivo, conexão, retenção, manutenção)
+        """
+        print("\n🧪 Executando TA-30: Ciclo da Exportação...")
+
+        linhas = [('receita', 'Salário', 'Pagamento', Decimal('3500.00'), date(2025, 11, 5))] * 50
+        conn = FakeConnection(linhas)
+        tarefa_id = self.fila.enfileirar(7, 'excel', {'categoria': 'Salário'})
+
+        processou, _ = processar_proxima(self.fila, lambda: conn)
+        self.assertTrue(processou)
+        sql, params = conn.cursor_criado.executado
+        self.assertIn('categoria = %s', sql)
+        self.assertEqual(params, (7, 'Salário'))
+
+        tarefa = self.fila.obter(tarefa_id, usuario_id=7)
+        self.assertEqual(tarefa['status'], CONCLUIDO)
+        caminho = os.path.join(self.diretorio, tarefa['arquivo'])
+        self.assertEqual(os.path.getsize(caminho), tarefa['tamanho'])
+        with zipfile.ZipFile(caminho) as zf:
+            self.assertIsNone(zf.testzip())
+
+        # Falha na conexão marca a tarefa como erro
+        falha_id = self.fila.enfileirar(7, 'pdf')
+
+        def conectar_falhando():
+            raise RuntimeError('banco indisponível')
+
+        processar_proxima(self.fila, conectar_falhando)
+        self.assertEqual(self.fila.obter(falha_id)['status'], ERRO)
+        self.assertEqual(processar_proxima(self.fila, conectar_falhando)[0], False)
+
+        # A mesma conexão serve as tarefas seguintes, com a leitura encerrada a cada uma
+        # (sem o rollback, o snapshot REPEATABLE READ da primeira continuaria aberto)
+        self.assertEqual(conn.rollbacks, 1)
+        segunda = self.fila.enfileirar(8, 'pdf')
+        _, reaproveitada = processar_proxima(self.fila, lambda: self.fail('nova conexão'), conn)
+        self.assertIs(reaproveitada, conn)
+        self.assertEqual(conn.rollbacks, 2)
+
+        # Falha no meio da leitura: o erro registrado é o original e a conexão é descartada
+        quebrada = FakeConnection(linhas * 60, falhar_apos=1000)
+        quebrada_id = self.fila.enfileirar(9, 'excel')
+        _, reaproveitada = processar_proxima(self.fila, lambda: quebrada)
+        self.assertIsNone(reaproveitada)
+        self.assertTrue(quebrada.fechada)
+        self.assertIn('Lost connection', self.fila.obter(quebrada_id)['erro'])
+        self.assertFalse([nome for nome in os.listdir(self.diretorio) if nome.endswith('.parcial')])
+
+        # Depois da retenção, arquivos e registros são removidos
+        self.assertEqual(self.fila.limpar(agora=time.time() + 120), 4)
+        self.assertFalse(os.path.exists(caminho))
+        self.assertEqual(self.fila.listar(7), [])
+        self.assertIsNone(self.fila.obter(segunda))
+
+        # Manutenção: trabalhador encerrado é substituído e a limpeza roda sem o script
+        processos = [FakeProcesso(vivo=True), FakeProcesso(vivo=False)]
+        expirada = self.fila.enfileirar(7, 'pdf')
+        self.fila.falhar(expirada, 'erro')
+        self.fila._conexao().execute('UPDATE tarefas SET concluido_em = ? WHERE id = ?',
+                                     (time.time() - 120, expirada))
+        parar = threading.Event()
+        parar.set()  # Uma única passada
+        with mock.patch.object(fila_exportacao, '_iniciar_trabalhador',
+                               side_effect=lambda *args: FakeProcesso(vivo=True)) as iniciar:
+            fila_exportacao.executar_manutencao(self.fila, parar, processos)
+        self.assertIsNone(self.fila.obter(expirada))
+        # Com parar sinalizado, nenhum trabalhador é reiniciado
+        iniciar.assert_not_called()
+        parar.clear()
+        with mock.patch.object(fila_exportacao, '_iniciar_trabalhador',
+                               side_effect=lambda *args: FakeProcesso(vivo=True)) as iniciar, \
+                mock.patch.object(parar, 'wait', return_value=True):
+            fila_exportacao.executar_manutencao(self.fila, parar, processos)
+        iniciar.assert_called_once()
+        self.assertTrue(all(processo.is_alive() for processo in processos))
+
+        # A manutenção sobe junto com os trabalhadores (também pelo app.py)
+        iniciada = threading.Event()
+        with mock.patch.object(fila_exportacao, '_iniciar_trabalhador', return_value=FakeProcesso(vivo=True)), \
+                mock.patch.object(fila_exportacao, 'executar_manutencao',
+                                  side_effect=lambda *args: iniciada.set()):
+            processos, parar = fila_exportacao.iniciar_trabalhadores(self.fila, 2, intervalo_limpeza=5)
+            self.assertTrue(iniciada.wait(5), "Manutenção não iniciada com os trabalhadores")
+        self.assertEqual(len(processos), 2)
+
+        print("✅ TA-30: PASSOU - Arquivo gerado, baixável e removido após a retenção")
+
+
+
+if __name__ == '__main__':
+    unittest.main()
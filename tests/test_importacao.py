@@ -0,0 +1,150 @@
+"""
+Testes Automatizados - Importação de Extratos
+Projeto A3 - Gestão e Qualidade de Software
+"""
+
+import unittest
+import sys
+import os
+import io
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import importacao
+import validacao
+
+
+class BancoFalso:
+    """Conexão falsa: guarda as transações inseridas e responde à busca de duplicadas"""
+
+    def __init__(self, existentes=()):
+        self.transacoes = list(existentes)
+        self.commits = 0
+        self.lotes = []
+        self.resumos = 0
+
+    def cursor(self):
+        return CursorFalso(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+class CursorFalso:
+    def __init__(self, banco):
+        self.banco = banco
+        self.resultado = []
+
+    def execute(self, sql, params=()):
+        if sql.strip().startswith('SELECT'):
+            usuario_id, *datas = params
+            self.resultado = [(d, t, v, desc) for (u, t, v, desc, c, d) in self.banco.transacoes
+                              if u == usuario_id and d in datas]
+        else:
+            self.banco.resumos += 1
+
+    def executemany(self, sql, linhas):
+        if 'INSERT INTO transacoes' in sql:
+            self.banco.lotes.append(len(linhas))
+            self.banco.transacoes.extend(linhas)
+
+    def fetchall(self):
+        return self.resultado
+
+    def close(self):
+        pass
+
+
+class TestImportacao(unittest.TestCase):
+    """
+    TESTES DA IMPORTAÇÃO DE EXTRATOS
+    """
+
+    def test_33_leitura_csv_e_ofx(self):
+        """
+        TA-33: CSV e OFX são lidos em streaming e validados como no cadastro
+        Tipo: Unitário
+        Objetivo: Aceitar formatos de bancos brasileiros e apontar erros por linha
+        """
+        print("\n🧪 Executando TA-33: Leitura de CSV e OFX...")
+
+        csv_texto = ('Data;Histórico;Valor;Categoria\r\n'
+                     '05/11/2025;Salário Empresa;"3.500,00";Salário\r\n'
+                     '06/11/2025;Padaria São João;-12,50;\r\n'
+                     '07/11/2025;ab;-1,00;\r\n'
+                     '31/12/2999;Compra futura;-5,00;\r\n')
+        importacao.TAMANHO_LEITURA, original = 7, importacao.TAMANHO_LEITURA
+        try:
+            linhas = list(importacao.ler_csv(io.BytesIO(csv_texto.encode('cp1252'))))
+        finally:
+            importacao.TAMANHO_LEITURA = original
+
+        self.assertEqual([n for n, _ in linhas], [2, 3, 4, 5])
+        self.assertEqual(importacao.normalizar(linhas[0][1]),
+                         ('receita', Decimal('3500.00'), 'Salário Empresa', 'Salário', date(2025, 11, 5)))
+        self.assertEqual(importacao.normalizar(linhas[1][1]),
+                         ('despesa', Decimal('12.50'), 'Padaria São João', 'Outros', date(2025, 11, 6)))
+        for indice, mensagem in ((2, 'Descrição deve ter pelo menos 3 caracteres!'),
+                                 (3, 'Data não pode ser futura!')):
+            with self.assertRaises(validacao.ErroValidacao) as ctx:
+                importacao.normalizar(linhas[indice][1])
+            self.assertEqual(str(ctx.exception), mensagem)
+
+        with self.assertRaises(importacao.ErroImportacao):
+            list(importacao.ler_csv(io.BytesIO(b'foo,bar\n1,2\n')))
+
+        # OFX 1.x (SGML, sem tags de fechamento) em uma única linha
+        ofx = ('OFXHEADER:100\nDATA:OFXSGML\nCHARSET:1252\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS>'
+               '<BANKTRANLIST><STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20251103120000[-3:BRT]'
+               '<TRNAMT>-45.90<FITID>1<MEMO>Farmácia Centro</STMTTRN>'
+               '<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20251104<TRNAMT>100.00<FITID>2<NAME>PIX Recebido'
+               '</STMTTRN></BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>')
+        lancamentos = [importacao.normalizar(b) for _, b in
+                       importacao.ler_extrato(io.BytesIO(ofx.encode('cp1252')), 'extrato.OFX')]
+        self.assertEqual(lancamentos, [
+            ('despesa', Decimal('45.90'), 'Farmácia Centro', 'Outros', date(2025, 11, 3)),
+            ('receita', Decimal('100.00'), 'PIX Recebido', 'Outros', date(2025, 11, 4)),
+        ])
+
+        print("✅ TA-33: PASSOU - Extratos lidos e validados")
+
+    def test_34_lotes_e_duplicadas(self):
+        """
+        TA-34: Importação grava em lotes e não duplica lançamentos existentes
+        Tipo: Unitário
+        Objetivo: Reimportar o mesmo extrato não altera os dados
+        """
+        print("\n🧪 Executando TA-34: Lotes e Duplicadas...")
+
+        # Dois lançamentos idênticos no mesmo dia, um deles já cadastrado
+        cafe = (1, 'despesa', Decimal('5.00'), 'Café', 'Outros', date(2025, 11, 1))
+        banco = BancoFalso([cafe])
+        linhas = [(1, {'data': '2025-11-01', 'descricao': 'Café', 'valor': '-5'}),
+                  (2, {'data': '2025-11-01', 'descricao': 'Café', 'valor': '-5'}),
+                  (3, {'data': 'ontem', 'descricao': 'Mercado', 'valor': '-5'})]
+        linhas += [(i, {'data': '2025-10-%02d' % (i % 28 + 1), 'descricao': f'Compra {i}', 'valor': '-1'})
+                   for i in range(4, 14)]
+
+        relatorio = importacao.importar(banco, 1, iter(linhas), tamanho_lote=4)
+        self.assertEqual((relatorio.lidas, relatorio.importadas, relatorio.duplicadas, relatorio.total_erros),
+                         (13, 11, 1, 1))
+        self.assertEqual(relatorio.erros, [(3, 'Data inválida!')])
+        self.assertEqual(banco.lotes, [3, 4, 4])
+        self.assertEqual(banco.commits, 3)
+        self.assertIsNone(relatorio.falha)
+
+        # Reimportar o mesmo arquivo não insere nada
+        repetido = importacao.importar(banco, 1, iter(linhas), tamanho_lote=4)
+        self.assertEqual((repetido.importadas, repetido.duplicadas), (0, 12))
+        self.assertEqual(len(banco.transacoes), 12)
+
+        print("✅ TA-34: PASSOU - Lotes gravados sem duplicar")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+"""
+Testes Automatizados - Previsão de Fluxo de Caixa
+Projeto A3 - Gestão e Qualidade de Software
+
+O teste de carga do histórico precisa do MySQL com o database_schema.sql
+aplicado; sem banco disponível ele é ignorado.
+"""
+
+import unittest
+import sys
+import os
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import mysql.connector
+import previsao
+from previsao import Historico
+from recorrencias import Regra
+from config import DB_CONFIG
+
+
+def conectar_banco():
+    """Retorna uma conexão ou None se o MySQL não estiver disponível"""
+    try:
+        return mysql.connector.connect(connection_timeout=3, **DB_CONFIG)
+    except mysql.connector.Error:
+        return None
+
+
+def historico(lancamentos, hoje, categorias):
+    """Monta o Historico a partir de (data, centavos, categoria, recorrente)"""
+    return Historico(np.array([(d - hoje).days for d, _, _, _ in lancamentos], dtype=np.int64),
+                     np.array([c for _, c, _, _ in lancamentos], dtype=np.int64),
+                     np.array([categorias.index(cat) for _, _, cat, _ in lancamentos], dtype=np.int64),
+                     np.array([r for _, _, _, r in lancamentos], dtype=bool),
+                     categorias)
+
+
+class TestPrevisao(unittest.TestCase):
+    """
+    TESTES DA PREVISÃO DE SALDO
+    """
+
+    def test_44_fluxo_das_recorrencias(self):
+        """
+        TA-44: Ocorrências das regras recorrentes caem nos dias previstos
+        Tipo: Unitário
+        Objetivo: Fim de mês, data_fim e ocorrências vencidas ainda não lançadas
+        """
+        print("\n🧪 Executando TA-44: Fluxo das Recorrências...")
+
+        hoje = date(2025, 6, 15)
+        regras = [
+            # Vencida em 05/06 e ainda não lançada: entra amanhã (índice 0)
+            Regra(1, 1, 'receita', Decimal('5000.00'), 'Salário', 'Salário', 'mensal',
+                  date(2020, 1, 5), None, date(2025, 6, 5)),
+            Regra(2, 1, 'despesa', Decimal('1500.00'), 'Aluguel', 'Moradia', 'mensal',
+                  date(2020, 1, 31), None, date(2025, 6, 30)),
+            Regra(3, 1, 'despesa', Decimal('100.00'), 'Feira', 'Alimentação', 'semanal',
+                  date(2025, 1, 4), date(2025, 7, 20), date(2025, 6, 21)),
+            Regra(4, 1, 'despesa', Decimal('899.90'), 'IPVA', 'Transporte', 'anual',
+                  date(2021, 7, 10), None, date(2025, 7, 10)),
+        ]
+        fluxo = previsao.fluxo_recorrente(regras, hoje, 60)
+
+        def dia(data):
+            return (data - hoje).days - 1
+
+        esperado = {0: 500000, dia(date(2025, 6, 30)): -150000, dia(date(2025, 7, 31)): -150000,
+                    dia(date(2025, 7, 5)): 500000 - 10000, dia(date(2025, 8, 5)): 500000,
+                    dia(date(2025, 6, 21)): -10000, dia(date(2025, 6, 28)): -10000,
+                    dia(date(2025, 7, 12)): -10000, dia(date(2025, 7, 19)): -10000,
+                    dia(date(2025, 7, 10)): -89990}
+        self.assertEqual({int(i): int(fluxo[i]) for i in np.nonzero(fluxo)[0]}, esperado)
+
+        print("✅ TA-44: PASSOU - Recorrências nos dias certos")
+
+    def test_45_medias_e_sazonalidade(self):
+        """
+        TA-45: Médias por categoria com sazonalidade e saldo projetado
+        Tipo: Unitário
+        Objetivo: Lançamentos recorrentes fora da média e pico anual só no seu mês
+        """
+        print("\n🧪 Executando TA-45: Médias por Categoria...")
+
+        hoje = date(2025, 6, 15)
+        categorias = ['Mercado', 'Presentes', 'Moradia']
+        lancamentos = [(date(2025, 6, 1), 10000000, 'Moradia', False)]   # saldo inicial
+        for ano in (2022, 2023, 2024):
+            lancamentos.append((date(ano, 12, 20), -300000, 'Presentes', False))
+        for mes in range(36):
+            ano, m = divmod(5 * 12 + 4 - mes, 12)       # maio/2025 para trás
+            lancamentos.append((date(2020 + ano, m + 1, 10), -100000, 'Mercado', False))
+            lancamentos.append((date(2020 + ano, m + 1, 5), -150000, 'Moradia', True))
+        h = historico(lancamentos, hoje, categorias)
+
+        nivel, fatores = previsao.medias_por_categoria(h, hoje)
+        self.assertAlmostEqual(nivel[0], -100000)
+        self.assertTrue(np.allclose(fatores[0], 1))
+        self.assertAlmostEqual(fatores[1, 11], 12)
+        self.assertAlmostEqual(fatores[1, 5], 0)
+        self.assertAlmostEqual(nivel[1], -300000 / 12)
+        # Recorrentes ficam fora da média (entram pelas regras)
+        self.assertEqual(nivel[2], 0)
+
+        resultado = previsao.prever(h, [], hoje, meses=12)
+        self.assertEqual(len(resultado['saldo']), 365)
+        self.assertEqual(resultado['saldo_atual'], float(h.centavos.sum()) / 100)
+        self.assertAlmostEqual(resultado['saldo_final'], resultado['saldo_atual'] - 12 * 1000 - 3000, places=2)
+        self.assertEqual([c['categoria'] for c in resultado['categorias']], ['Mercado', 'Presentes'])
+
+        print("✅ TA-45: PASSOU - Médias e sazonalidade aplicadas")
+
+
+@unittest.skipIf(conectar_banco() is None, "MySQL indisponível")
+class TestPrevisaoBanco(unittest.TestCase):
+    """
+    TESTES DA CARGA DO HISTÓRICO (MYSQL)
+    """
+
+    def test_46_carga_do_historico(self):
+        """
+        TA-46: Histórico carregado em dias relativos e centavos com sinal
+        Tipo: Banco de Dados
+        Objetivo: Conversões feitas no SQL batem com os valores gravados
+        """
+        print("\n🧪 Executando TA-46: Carga do Histórico...")
+
+        conn = conectar_banco()
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO usuarios (nome, email, senha) VALUES (%s, %s, %s)",
+                       ('Usuario Previsao', f'previsao{id(self)}@teste.com', 'x'))
+        usuario_id = cursor.lastrowid
+        cursor.executemany("INSERT INTO transacoes (usuario_id, tipo, valor, descricao, categoria, data) "
+                           "VALUES (%s, %s, %s, %s, %s, %s)",
+                           [(usuario_id, 'receita', Decimal('1234.56'), 'Salário', 'Salário', date(2025, 6, 5)),
+                            (usuario_id, 'despesa', Decimal('0.99'), 'Café', 'Alimentação', date(2025, 6, 14))])
+        conn.commit()
+
+        try:
+            h = previsao.carregar_historico(cursor, usuario_id, date(2025, 6, 15))
+            ordem = np.argsort(h.dias)
+            self.assertEqual(h.dias[ordem].tolist(), [-10, -1])
+            self.assertEqual(h.centavos[ordem].tolist(), [123456, -99])
+            self.assertEqual(sorted(h.nomes_categorias), ['Alimentação', 'Salário'])
+            self.assertFalse(h.recorrente.any())
+        finally:
+            cursor.execute('DELETE FROM usuarios WHERE id = %s', (usuario_id,))
+            conn.commit()
+            cursor.close()
+            conn.close()
+
+        print("✅ TA-46: PASSOU - Histórico em arrays")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+"""
+Testes Automatizados - Transações Recorrentes
+Projeto A3 - Gestão e Qualidade de Software
+
+O teste de integração precisa do MySQL com o database_schema.sql
+aplicado; sem banco disponível ele é ignorado.
+"""
+
+import unittest
+import sys
+import os
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import mysql.connector
+import recorrencias
+from recorrencias import Regra
+from config import DB_CONFIG
+
+
+def conectar_banco():
+    """Retorna uma conexão ou None se o MySQL não estiver disponível"""
+    try:
+        return mysql.connector.connect(connection_timeout=3, **DB_CONFIG)
+    except mysql.connector.Error:
+        return None
+
+
+class BancoRecorrencias:
+    """Simula recorrencias, transacoes (com a chave única) e resumo_usuario"""
+
+    def __init__(self, regras):
+        self.regras = {r.id: dict(r._asdict(), ativa=True) for r in regras}
+        self.transacoes = {}
+        self.saldos = {}
+        self.commits = 0
+        self.maior_lote = 0
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params):
+        if 'FROM recorrencias' in sql:
+            hoje, quantidade = params
+            vencidas = sorted((r for r in self.regras.values()
+                               if r['ativa'] and r['proxima_execucao'] <= hoje),
+                              key=lambda r: (r['proxima_execucao'], r['id']))
+            self.linhas = [tuple(r[campo] for campo in Regra._fields) for r in vencidas[:quantidade]]
+        elif 'resumo_usuario' in sql:
+            usuario_id, saldo = params
+            self.saldos[usuario_id] = self.saldos.get(usuario_id, Decimal(0)) + saldo
+
+    def fetchall(self):
+        return self.linhas
+
+    def executemany(self, sql, linhas):
+        if 'INSERT INTO transacoes' in sql:
+            self.maior_lote = max(self.maior_lote, len(linhas))
+            for usuario_id, tipo, valor, _, _, data, recorrencia_id in linhas:
+                chave = (recorrencia_id, data)
+                if chave in self.transacoes:
+                    raise AssertionError(f'Duplicata: {chave}')
+                self.transacoes[chave] = (usuario_id, tipo, valor)
+        elif 'UPDATE recorrencias' in sql:
+            for proxima, ativa, regra_id in linhas:
+                self.regras[regra_id].update(proxima_execucao=proxima, ativa=ativa)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class TestRecorrencias(unittest.TestCase):
+    """
+    TESTES DAS TRANSAÇÕES RECORRENTES
+    """
+
+    def test_41_datas_das_ocorrencias(self):
+        """
+        TA-41: Datas das ocorrências semanais, mensais e anuais
+        Tipo: Unitário
+        Objetivo: Dia 31 e 29/02 caem no último dia do mês sem deslocar as seguintes
+        """
+        print("\n🧪 Executando TA-41: Datas das Ocorrências...")
+
+        inicio = date(2024, 1, 31)
+        mensais = [recorrencias.data_ocorrencia(inicio, 'mensal', n) for n in range(4)]
+        self.assertEqual(mensais, [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)])
+
+        anuais = [recorrencias.data_ocorrencia(date(2024, 2, 29), 'anual', n) for n in range(5)]
+        self.assertEqual(anuais[1], date(2025, 2, 28))
+        self.assertEqual(anuais[4], date(2028, 2, 29))
+
+        self.assertEqual(recorrencias.data_ocorrencia(date(2024, 12, 30), 'semanal', 1), date(2025, 1, 6))
+
+        # Primeira ocorrência em uma data ou depois dela
+        for frequencia in recorrencias.FREQUENCIAS:
+            for dia in range(0, 800, 7):
+                data = date.fromordinal(inicio.toordinal() + dia)
+                numero = recorrencias.numero_ocorrencia(inicio, frequencia, data)
+                self.assertGreaterEqual(recorrencias.data_ocorrencia(inicio, frequencia, numero), data)
+                if numero:
+                    self.assertLess(recorrencias.data_ocorrencia(inicio, frequencia, numero - 1), data)
+
+        print("✅ TA-41: PASSOU - Datas calculadas a partir do início")
+
+    def test_42_agendador_em_lotes_idempotente(self):
+        """
+        TA-42: Agendador recupera atrasos em lotes limitados e não duplica
+        Tipo: Unitário
+        Objetivo: Todas as ocorrências pendentes, lotes com no máximo N linhas e reexecução vazia
+        """
+        print("\n🧪 Executando TA-42: Agendador de Recorrências...")
+
+        def regra(id, usuario_id, tipo, valor, frequencia, inicio, fim=None):
+            proxima = recorrencias.data_ocorrencia(inicio, frequencia, 1)
+            return Regra(id, usuario_id, tipo, Decimal(valor), 'Regra', 'Outros',
+                         frequencia, inicio, fim, proxima)
+
+        hoje = date(2025, 6, 15)
+        banco = BancoRecorrencias([
+            regra(1, 7, 'despesa', '1200.00', 'mensal', date(2024, 1, 31)),   # 16 meses atrasada
+            regra(2, 7, 'receita', '300.00', 'semanal', date(2025, 1, 6)),
+            regra(3, 8, 'despesa', '99.90', 'anual', date(2020, 3, 1)),
+            regra(4, 8, 'receita', '50.00', 'mensal', date(2025, 1, 10), date(2025, 3, 10)),
+            regra(5, 9, 'despesa', '10.00', 'mensal', date(2025, 6, 1)),      # próxima em julho
+        ])
+
+        resultado = recorrencias.executar(banco, hoje, regras_por_lote=2, ocorrencias_por_lote=10)
+        datas = {r: sorted(d for (rid, d) in banco.transacoes if rid == r) for r in range(1, 6)}
+
+        self.assertEqual(len(datas[1]), 16)
+        self.assertEqual(datas[1][0], date(2024, 2, 29))
+        self.assertEqual(datas[1][-1], date(2025, 5, 31))
+        self.assertEqual(len(datas[2]), 22)
+        self.assertEqual(datas[3], [date(a, 3, 1) for a in range(2021, 2026)])
+        self.assertEqual(datas[4], [date(2025, 2, 10), date(2025, 3, 10)])
+        self.assertEqual(datas[5], [])
+        self.assertEqual(resultado['ocorrencias'], 45)
+        self.assertEqual(resultado['usuarios'], {7, 8})
+        self.assertLessEqual(banco.maior_lote, 10)
+
+        self.assertEqual(banco.regras[1]['proxima_execucao'], date(2025, 6, 30))
+        self.assertFalse(banco.regras[4]['ativa'])
+        self.assertTrue(banco.regras[5]['ativa'])
+        self.assertEqual(banco.saldos[8], Decimal('100.00') - 5 * Decimal('99.90'))
+
+        # Reexecução no mesmo dia não lança nada
+        commits = banco.commits
+        resultado = recorrencias.executar(banco, hoje)
+        self.assertEqual(resultado['ocorrencias'], 0)
+        self.assertEqual(len(banco.transacoes), 45)
+        self.assertEqual(banco.commits, commits + 1)
+
+        print("✅ TA-42: PASSOU - Atrasos lançados uma única vez")
+
+
+@unittest.skipIf(conectar_banco() is None, "MySQL indisponível")
+class TestRecorrenciasBanco(unittest.TestCase):
+    """
+    TESTES DO AGENDADOR NO MYSQL
+    """
+
+    def test_43_agendador_no_mysql(self):
+        """
+        TA-43: Agendador lança as ocorrências no MySQL sem duplicatas
+        Tipo: Banco de Dados
+        Objetivo: Reexecução não duplica e a chave (recorrencia_id, data) recusa duplicatas
+        """
+        print("\n🧪 Executando TA-43: Recorrências no MySQL...")
+
+        conn = conectar_banco()
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO usuarios (nome, email, senha) VALUES (%s, %s, %s)",
+                       ('Usuario Recorrencias', f'recorrencias{id(self)}@teste.com', 'x'))
+        usuario_id = cursor.lastrowid
+        inicio = date(2025, 1, 5)
+        regra_id = recorrencias.criar_recorrencia(cursor, usuario_id, 'despesa', Decimal('100.00'),
+                                                  'Aluguel', 'Moradia', 'mensal', inicio)
+        cursor.execute("INSERT INTO transacoes (usuario_id, tipo, valor, descricao, categoria, data, recorrencia_id) "
+                       "VALUES (%s, 'despesa', 100, 'Aluguel', 'Moradia', %s, %s)", (usuario_id, inicio, regra_id))
+        conn.commit()
+
+        try:
+            hoje = date(2025, 6, 20)
+            primeira = recorrencias.executar(conn, hoje)
+            segunda = recorrencias.executar(conn, hoje)
+            self.assertEqual(primeira['ocorrencias'], 5)
+            self.assertEqual(segunda['ocorrencias'], 0)
+
+            cursor.execute('SELECT COUNT(*), SUM(valor) FROM transacoes WHERE recorrencia_id = %s', (regra_id,))
+            self.assertEqual(cursor.fetchone(), (6, Decimal('600.00')))
+            cursor.execute('SELECT proxima_execucao FROM recorrencias WHERE id = %s', (regra_id,))
+            self.assertEqual(cursor.fetchone()[0], date(2025, 7, 5))
+
+            with self.assertRaises(mysql.connector.IntegrityError):
+                cursor.execute("INSERT INTO transacoes (usuario_id, tipo, valor, descricao, data, recorrencia_id) "
+                               "VALUES (%s, 'despesa', 100, 'Aluguel', %s, %s)",
+                               (usuario_id, date(2025, 3, 5), regra_id))
+            conn.rollback()
+        finally:
+            cursor.execute('DELETE FROM usuarios WHERE id = %s', (usuario_id,))
+            conn.commit()
+            cursor.close()
+            conn.close()
+
+        print("✅ TA-43: PASSOU - Ocorrências sem duplicatas no banco")
+
+
+if __name__ == '__main__':
+    unittest.main()
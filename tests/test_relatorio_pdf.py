@@ -0,0 +1,97 @@
+"""
+Testes Automatizados - Relatório PDF em Streaming
+Projeto A3 - Gestão e Qualidade de Software
+"""
+
+import unittest
+import sys
+import os
+import re
+import zlib
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import relatorio_pdf
+import periodos
+
+
+class TestRelatorioPDF(unittest.TestCase):
+    """
+    TESTES DO RELATÓRIO PDF
+    """
+
+    def test_27_pdf_paginado_em_streaming(self):
+        """
+        TA-27: PDF é enviado página a página com xref consistente
+        Tipo: Unitário
+        Objetivo: Garantir relatório válido sem montar o arquivo em memória
+        """
+        print("\n🧪 Executando TA-27: PDF em Streaming...")
+
+        layout = relatorio_pdf.LAYOUT_TRANSACOES
+        total = layout.linhas_por_pagina * 2 + 5
+        consumidas = []
+
+        def linhas():
+            for i in range(total):
+                consumidas.append(i)
+                yield ('despesa' if i % 2 else 'receita', 'Saúde', f'Consulta (retorno) nº {i}',
+                       Decimal('89.90'), date(2025, 11, 2))
+
+        gerador = relatorio_pdf.gerar_pdf(layout, linhas())
+        next(gerador)
+        next(gerador)
+        primeira_pagina = next(gerador)
+        self.assertLessEqual(len(consumidas), layout.linhas_por_pagina + 1,
+                             "Linhas lidas antes da hora")
+        pedacos = [primeira_pagina] + list(gerador)
+        self.assertEqual(len(consumidas), total)
+
+        # Remonta o arquivo completo a partir de uma nova geração
+        pdf = b''.join(relatorio_pdf.gerar_pdf(layout, linhas()))
+        self.assertTrue(pdf.startswith(b'%PDF-1.4'))
+        self.assertTrue(pdf.endswith(b'%%EOF\n'))
+        self.assertGreaterEqual(len(pedacos), 3)
+
+        # Cada offset da xref aponta para o objeto correspondente
+        inicio_xref = int(re.search(rb'startxref\n(\d+)', pdf).group(1))
+        self.assertTrue(pdf[inicio_xref:].startswith(b'xref'))
+        entradas = re.findall(rb'(\d{10}) 00000 n', pdf[inicio_xref:])
+        for numero, offset in enumerate(entradas, start=1):
+            self.assertTrue(pdf[int(offset):].startswith(f'{numero} 0 obj'.encode()),
+                            f"Offset errado para o objeto {numero}")
+
+        self.assertIn(b'/Count 3', pdf)
+
+        # Texto acentuado em WinAnsi e parênteses escapados
+        stream = re.search(rb'stream\n(.*?)\nendstream', pdf, re.S).group(1)
+        conteudo = zlib.decompress(stream)
+        self.assertIn('(Saúde)'.encode('cp1252'), conteudo)
+        self.assertIn(b'Consulta \\(retorno\\)', conteudo)
+        self.assertIn('(R$ 89.90)'.encode('cp1252'), conteudo)
+
+        print("✅ TA-27: PASSOU - PDF válido gerado página a página")
+
+    def test_28_periodo_entre_datas(self):
+        """
+        TA-28: Filtro de exportação por datas inclusivas
+        Tipo: Unitário
+        Objetivo: Converter início/fim do formulário em intervalo semiaberto
+        """
+        print("\n🧪 Executando TA-28: Período entre Datas...")
+
+        self.assertIsNone(periodos.entre_datas())
+        periodo = periodos.entre_datas(date(2025, 1, 1), date(2025, 1, 31))
+        self.assertEqual(periodo, (date(2025, 1, 1), date(2025, 2, 1)))
+        self.assertTrue(periodos.entre_datas(fim=date(2025, 1, 31)).contem(date(2000, 5, 5)))
+        self.assertTrue(periodos.entre_datas(inicio=date(2025, 1, 1)).contem(date(2030, 1, 1)))
+        with self.assertRaises(ValueError):
+            periodos.entre_datas(date(2025, 2, 1), date(2025, 1, 1))
+
+        print("✅ TA-28: PASSOU - Período convertido corretamente")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+"""
+Testes Automatizados - Resumos Financeiros Materializados
+Projeto A3 - Gestão e Qualidade de Software
+
+O teste de reconciliação precisa do MySQL com o database_schema.sql
+aplicado; sem banco disponível ele é ignorado.
+"""
+
+import unittest
+import sys
+import os
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import mysql.connector
+import resumo
+from config import DB_CONFIG
+
+
+def conectar_banco():
+    """Retorna uma conexão ou None se o MySQL não estiver disponível"""
+    try:
+        return mysql.connector.connect(connection_timeout=3, **DB_CONFIG)
+    except mysql.connector.Error:
+        return None
+
+
+class CursorGravador:
+    """Cursor falso que guarda os comandos executados"""
+
+    def __init__(self):
+        self.comandos = []
+
+    def execute(self, sql, params=()):
+        self.comandos.append((' '.join(sql.split()), params))
+
+    def executemany(self, sql, lista):
+        self.comandos.append((' '.join(sql.split()), lista))
+
+
+class TestResumos(unittest.TestCase):
+    """
+    TESTES DOS RESUMOS MATERIALIZADOS
+    """
+
+    def test_19_aplicar_transacao(self):
+        """
+        TA-19: Inclusão e exclusão geram deltas opostos nos resumos
+        Tipo: Unitário
+        Objetivo: Manter saldo e totais mensais consistentes
+        """
+        print("\n🧪 Executando TA-19: Aplicar Transação...")
+
+        cursor = CursorGravador()
+        resumo.aplicar_transacao(cursor, 7, 'despesa', 49.9, date(2025, 11, 20), 'Lazer')
+        resumo.aplicar_transacao(cursor, 7, 'despesa', Decimal('49.90'), date(2025, 11, 20), 'Lazer', sinal=-1)
+
+        (_, saldo_inc), (_, mes_inc), (_, cat_inc), (_, saldo_exc), (_, mes_exc), (_, cat_exc), \
+            (sql_limpeza, limpeza) = cursor.comandos
+        self.assertEqual(saldo_inc, (7, Decimal('-49.9')))
+        self.assertEqual(mes_inc, (7, date(2025, 11, 1), Decimal('0'), Decimal('49.9')))
+        self.assertEqual(cat_inc, [(7, date(2025, 11, 1), 'despesa', 'Lazer', Decimal('49.9'), 1)])
+        self.assertEqual(saldo_exc[1] + saldo_inc[1], 0, "Exclusão não desfez o saldo")
+        self.assertEqual(mes_exc[3] + mes_inc[3], 0, "Exclusão não desfez o mês")
+        self.assertEqual(cat_exc[0][4:], (Decimal('-49.90'), -1), "Exclusão não desfez a categoria")
+        self.assertIn('DELETE FROM resumo_categoria', sql_limpeza)
+        self.assertEqual(limpeza, (7, date(2025, 11, 1), date(2025, 11, 1)))
+
+        print("✅ TA-19: PASSOU - Deltas aplicados corretamente")
+
+    def test_20_comparar_resumos(self):
+        """
+        TA-20: Verificação aponta divergências (inclusive linhas ausentes)
+        Tipo: Unitário
+        Objetivo: Detectar drift entre resumos e transações
+        """
+        print("\n🧪 Executando TA-20: Comparação de Resumos...")
+
+        armazenados = {('saldo', 1): Decimal('100.00'), ('saldo', 2): Decimal('5.00')}
+        calculados = {('saldo', 1): Decimal('100.00'), ('saldo', 3): Decimal('7.50')}
+
+        divergencias = resumo.comparar_resumos(armazenados, calculados)
+
+        self.assertEqual(divergencias, [
+            (('saldo', 2), Decimal('5.00'), Decimal('0')),
+            (('saldo', 3), Decimal('0'), Decimal('7.50')),
+        ])
+
+        print("✅ TA-20: PASSOU - Divergências detectadas")
+
+    def test_50_lote_por_categoria(self):
+        """
+        TA-50: Lote agrupado por mês, tipo e categoria em um único executemany
+        Tipo: Unitário
+        Objetivo: Uma linha de resumo_categoria por grupo, com soma e quantidade
+        """
+        print("\n🧪 Executando TA-50: Resumo por Categoria em Lote...")
+
+        cursor = CursorGravador()
+        resumo.aplicar_lote(cursor, 3, [
+            ('despesa', Decimal('10.00'), date(2025, 1, 5), 'Mercado'),
+            ('despesa', Decimal('15.50'), date(2025, 1, 20), 'Mercado'),
+            ('despesa', Decimal('7.00'), date(2025, 1, 20), None),
+            ('receita', Decimal('100.00'), date(2025, 2, 1), 'Salário'),
+            ('despesa', Decimal('3.00'), date(2025, 2, 9), 'Mercado'),
+        ])
+
+        sql, linhas = cursor.comandos[-1]
+        self.assertIn('INSERT INTO resumo_categoria', sql)
+        self.assertEqual(linhas, [
+            (3, date(2025, 1, 1), 'despesa', 'Mercado', Decimal('25.50'), 2),
+            (3, date(2025, 1, 1), 'despesa', 'Outros', Decimal('7.00'), 1),
+            (3, date(2025, 2, 1), 'despesa', 'Mercado', Decimal('3.00'), 1),
+            (3, date(2025, 2, 1), 'receita', 'Salário', Decimal('100.00'), 1),
+        ])
+        # Inclusão não precisa limpar categorias zeradas
+        self.assertFalse(any('DELETE' in sql for sql, _ in cursor.comandos))
+
+        print("✅ TA-50: PASSOU - Uma linha por mês, tipo e categoria")
+
+
+@unittest.skipIf(conectar_banco() is None, "MySQL indisponível")
+class TestResumosBanco(unittest.TestCase):
+    """
+    TESTES DA RECONCILIAÇÃO DOS RESUMOS (MYSQL)
+    """
+
+    def test_51_incremental_igual_reconstrucao(self):
+        """
+        TA-51: Resumo incremental bate com transacoes e a reconciliação corrige drift
+        Tipo: Banco de Dados
+        Objetivo: Inclusões/exclusões mantêm resumo_categoria sem divergências
+        """
+        print("\n🧪 Executando TA-51: Reconciliação dos Resumos...")
+
+        conn = conectar_banco()
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO usuarios (nome, email, senha) VALUES (%s, %s, %s)",
+                       ('Usuario Resumo', f'resumo{id(self)}@teste.com', 'x'))
+        usuario_id = cursor.lastrowid
+        transacoes = [('despesa', Decimal(10 + i), f'T{i}', ('Mercado', 'Lazer', None)[i % 3],
+                       date(2025, 1 + i % 4, 1 + i)) for i in range(20)]
+        try:
+            ids = []
+            for tipo, valor, descricao, categoria, data in transacoes:
+                cursor.execute("INSERT INTO transacoes (usuario_id, tipo, valor, descricao, categoria, data) "
+                               "VALUES (%s, %s, %s, %s, %s, %s)", (usuario_id, tipo, valor, descricao, categoria, data))
+                ids.append(cursor.lastrowid)
+                resumo.aplicar_transacao(cursor, usuario_id, tipo, valor, data, categoria)
+            # Exclui todas as transações de Lazer de janeiro: a linha some do resumo
+            for transacao_id, (tipo, valor, _, categoria, data) in zip(ids, transacoes):
+                if categoria == 'Lazer' and data.month == 1:
+                    cursor.execute('DELETE FROM transacoes WHERE id = %s', (transacao_id,))
+                    resumo.aplicar_transacao(cursor, usuario_id, tipo, valor, data, categoria, sinal=-1)
+            conn.commit()
+
+            self.assertEqual(resumo.verificar_resumos(cursor, usuario_id), [])
+            cursor.execute("SELECT COUNT(*) FROM resumo_categoria WHERE usuario_id = %s AND categoria = 'Lazer' "
+                           "AND mes = '2025-01-01'", (usuario_id,))
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+            # Drift proposital: só o usuário divergente é reconstruído
+            cursor.execute("UPDATE resumo_categoria SET total = total + 1 WHERE usuario_id = %s LIMIT 1",
+                           (usuario_id,))
+            conn.commit()
+            self.assertEqual(resumo.reconciliar_resumos(conn, usuario_id), [usuario_id])
+            self.assertEqual(resumo.verificar_resumos(cursor, usuario_id), [])
+        finally:
+            cursor.execute('DELETE FROM usuarios WHERE id = %s', (usuario_id,))
+            conn.commit()
+            cursor.close()
+            conn.close()
+
+        print("✅ TA-51: PASSOU - Resumos consistentes e reconciliados")
+
+
+if __name__ == '__main__':
+    unittest.main()
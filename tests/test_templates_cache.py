@@ -0,0 +1,107 @@
+"""
+Testes Automatizados - Templates Pré-compilados e Cache de Fragmentos
+Projeto A3 - Gestão e Qualidade de Software
+
+Usa aplicações Flask mínimas com templates temporários, sem banco de dados.
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask, render_template, session
+import templates_cache
+from cache import MemoryBackend, ViewCache
+
+PASTA_TEMPLATES = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'Templates'))
+
+LISTA = """<ul>
+{% cache_usuario 'metas', dia %}{% for meta in metas %}<li>{{ meta }}</li>{% endfor %}{% endcache_usuario %}
+</ul>"""
+
+
+def criar_app(pasta_templates, pasta_cache=None):
+    app = Flask(__name__, template_folder=pasta_templates)
+    app.secret_key = 'teste'
+    app.config['TESTING'] = True
+    view_cache = ViewCache(MemoryBackend(), ttl=60)
+    app.extensions['view_cache'] = view_cache
+    templates_cache.configurar(app, pasta=pasta_cache)
+    return app, view_cache
+
+
+class TestTemplatesCache(unittest.TestCase):
+    """
+    TESTES DO BYTECODE EM DISCO E DOS FRAGMENTOS POR USUÁRIO
+    """
+
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp()
+        with open(os.path.join(self.pasta, 'lista.html'), 'w', encoding='utf-8') as arquivo:
+            arquivo.write(LISTA)
+
+    def tearDown(self):
+        shutil.rmtree(self.pasta)
+
+    def test_59_compilacao(self):
+        """
+        TA-59: Build compila todos os templates do projeto para o bytecode em disco
+        Tipo: Unitário
+        Objetivo: Workers carregam templates prontos em vez de compilar no primeiro acesso
+        """
+        print("\n🧪 Executando TA-59: Compilação dos Templates...")
+
+        pasta_cache = os.path.join(self.pasta, 'bytecode')
+        app, _ = criar_app(PASTA_TEMPLATES, pasta_cache)
+        nomes = templates_cache.compilar(app)
+
+        self.assertIn('metas.html', nomes)
+        self.assertIn('metas_macros.html', nomes)
+        self.assertNotIn('metas_simples.html', nomes, "Template duplicado não foi removido")
+        self.assertEqual(len(os.listdir(pasta_cache)), len(nomes), "Bytecode não foi gravado")
+
+        # Outro "worker" com a mesma pasta carrega o bytecode sem compilar
+        app, _ = criar_app(PASTA_TEMPLATES, pasta_cache)
+        app.jinja_env.compile = None
+        app.jinja_env.get_template('metas.html')
+
+        print("✅ TA-59: PASSOU - Templates compilados e bytecode reaproveitado")
+
+    def test_60_fragmentos(self):
+        """
+        TA-60: Fragmento reaproveitado até a view do usuário ser invalidada
+        Tipo: Funcional
+        Objetivo: Não renderizar de novo os cartões e tabelas sem mudança nos dados
+        """
+        print("\n🧪 Executando TA-60: Cache de Fragmentos...")
+
+        app, view_cache = criar_app(self.pasta)
+
+        def renderizar(usuario_id, metas, dia='2025-06-15'):
+            with app.test_request_context('/metas'):
+                if usuario_id is not None:
+                    session['user_id'] = usuario_id
+                return render_template('lista.html', metas=metas, dia=dia)
+
+        self.assertIn('<li>Viagem</li>', renderizar(1, ['Viagem']))
+        self.assertIn('<li>Viagem</li>', renderizar(1, ['Carro']), "Fragmento não veio do cache")
+        self.assertIn('<li>Carro</li>', renderizar(1, ['Carro'], dia='2025-06-16'), "Chave ignorou a data")
+        self.assertIn('<li>Carro</li>', renderizar(2, ['Carro']), "Fragmento vazou entre usuários")
+        self.assertIn('<li>Carro</li>', renderizar(None, ['Carro']), "Sem login deve renderizar direto")
+
+        view_cache.invalidate(1, 'metas')
+        self.assertIn('<li>Carro</li>', renderizar(1, ['Carro']), "Invalidação não descartou o fragmento")
+        self.assertIn('&lt;b&gt;', renderizar(3, ['<b>']), "Fragmento perdeu o autoescape")
+
+        app.jinja_env.fragmentos_ativos = False
+        self.assertIn('<li>Casa</li>', renderizar(1, ['Casa']))
+
+        print("✅ TA-60: PASSOU - Fragmentos por usuário invalidados com a view")
+
+
+if __name__ == '__main__':
+    unittest.main()
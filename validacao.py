@@ -0,0 +1,94 @@
+"""
+Validação de Transações
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Regras únicas para o cadastro manual (adicionar_transacao) e para a
+importação de extratos (importacao.py).
+"""
+
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+TIPOS = ('receita', 'despesa')
+DESCRICAO_MIN = 3
+DESCRICAO_MAX = 200
+CATEGORIA_MAX = 50
+VALOR_MAX = Decimal('99999999.99')  # DECIMAL(10, 2)
+
+
+class ErroValidacao(ValueError):
+    """Dado de transação inválido (a mensagem é exibida ao usuário)"""
+
+
+def converter_valor(valor):
+    """Converte para Decimal com 2 casas (com sinal); aceita '1234.56', '1.234,56' e 'R$ 10'"""
+    if isinstance(valor, str):
+        texto = valor.strip().replace('R$', '').replace(' ', '')
+        # O último separador é o decimal: '1.234,56' (BR) ou '1,234.56'
+        if texto.rfind(',') > texto.rfind('.'):
+            texto = texto.replace('.', '').replace(',', '.')
+        else:
+            texto = texto.replace(',', '')
+        valor = texto
+    try:
+        valor = Decimal(str(valor)).quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError):
+        raise ErroValidacao('Valor inválido!')
+    if not valor.is_finite():
+        raise ErroValidacao('Valor inválido!')
+    return valor
+
+
+def validar_valor(valor):
+    """Valor convertido, maior que zero e dentro do limite da coluna"""
+    valor = converter_valor(valor)
+    if valor <= 0:
+        raise ErroValidacao('Valor deve ser maior que zero!')
+    if valor > VALOR_MAX:
+        raise ErroValidacao('Valor muito alto!')
+    return valor
+
+
+def ler_data(data):
+    """Converte texto AAAA-MM-DD ou DD/MM/AAAA (ou date/datetime) em date"""
+    if isinstance(data, datetime):
+        return data.date()
+    if isinstance(data, date):
+        return data
+    texto = (data or '').strip()
+    for formato in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    raise ErroValidacao('Data inválida!')
+
+
+def validar_data(data, hoje=None):
+    """Data válida e não futura"""
+    data = ler_data(data)
+    if data > (hoje or date.today()):
+        raise ErroValidacao('Data não pode ser futura!')
+    return data
+
+
+def validar_transacao(tipo, valor, descricao, categoria=None, data=None, hoje=None):
+    """
+    Valida e normaliza os campos de uma transação.
+    Retorna (tipo, valor, descricao, categoria, data) ou levanta ErroValidacao.
+    """
+    if tipo not in TIPOS:
+        raise ErroValidacao('Tipo de transação inválido!')
+
+    valor = validar_valor(valor)
+
+    descricao = (descricao or '').strip()
+    if len(descricao) < DESCRICAO_MIN:
+        raise ErroValidacao('Descrição deve ter pelo menos 3 caracteres!')
+    if len(descricao) > DESCRICAO_MAX:
+        raise ErroValidacao('Descrição muito longa (máximo 200 caracteres)!')
+
+    categoria = (categoria or '').strip()[:CATEGORIA_MAX] or 'Outros'
+
+    data = validar_data(data, hoje) if data else (hoje or date.today())
+    return tipo, valor, descricao, categoria, data
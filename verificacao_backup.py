@@ -0,0 +1,265 @@
+"""
+Manifesto de Integridade e Verificação de Backups
+Projeto: Gestão Financeira - Simplifica Finanças
+
+Durante o backup, RegistroIntegridade fica entre o BackupManager e o ZIP
+(ou snapshot) e calcula, enquanto os dados passam, o tamanho e o SHA-256 de
+cada membro e as linhas de cada tabela nos INSERTs do mysqldump. Vão para o
+manifesto.json junto com o código de saída do mysqldump e a versão do
+esquema (SHA-256 das colunas em information_schema; o banco não tem tabela
+de versão).
+
+Nas tabelas incrementais o manifesto guarda também a soma de `valor`, do que
+foi de fato para o backup: somada nos INSERTs do mysqldump, na mesma conexão
+(e snapshot) de cada parte do dump paralelo e no snapshot do incremental.
+Com a contagem, pega linhas trocadas ou valores corrompidos que mantêm o
+número de linhas.
+
+A verificação (python backup_automatico.py --verify) relê cada membro do
+arquivo em blocos, sem extrair, e compara tamanho e SHA-256 com o
+manifesto. Os backups são verificados em paralelo (threads: zlib, gzip e
+hashlib liberam o GIL). Backups anteriores ao manifesto de integridade só
+têm o CRC do ZIP conferido.
+
+A verificação profunda (--profundo, em backup_automatico.py) restaura a
+cadeia em um banco de rascunho e compara as linhas e as somas por tabela e a
+versão do esquema com o manifesto.
+"""
+
+import hashlib
+import io
+import re
+import time
+import zipfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import backup_incremental
+import repositorio_backup
+
+TAMANHO_BLOCO = 1024 * 1024
+
+# INSERT de uma tabela do mysqldump (início de linha, extended insert)
+INSERT = re.compile(rb'^INSERT INTO `?([^`\s]+)`? VALUES ', re.MULTILINE)
+
+# Coluna somada nas tabelas incrementais (todas têm `valor`)
+COLUNA_SOMA = 'valor'
+
+
+# ============== GRAVAÇÃO ==============
+
+def sem_textos(trecho):
+    """
+    `trecho` (linhas completas do dump) com o conteúdo dos literais de texto
+    apagado: tirados os escapes (barra invertida + caractere), as aspas que
+    sobram abrem e fecham os textos.
+    """
+    trecho = trecho.replace(b'\\\\', b'').replace(b"\\'", b'')
+    return b"''".join(trecho.split(b"'")[::2])
+
+
+class ContadorInserts:
+    """
+    Conta as linhas por tabela nos INSERTs de um dump recebido em blocos e,
+    nas tabelas de `colunas` ({tabela: posição da coluna}), soma a coluna em `somas`
+    """
+
+    def __init__(self, linhas, somas=None, colunas=None):
+        self.linhas = linhas
+        self.somas = somas
+        # Sem os textos, nenhum campo tem vírgula ou parêntese: cada "(" abre uma
+        # linha e o campo de posição i é o que vem depois de i vírgulas
+        self.campos = {tabela: re.compile(rb'\((?:[^,]*,){%d}([^,)]*)' % indice)
+                       for tabela, indice in (colunas or {}).items()}
+        self.resto = b''
+
+    def alimentar(self, dados):
+        dados = self.resto + dados
+        fim = dados.rfind(b'\n') + 1
+        self.resto = dados[fim:]
+        self.contar(dados[:fim])
+
+    def finalizar(self):
+        self.contar(self.resto)
+        self.resto = b''
+
+    def contar(self, trecho):
+        primeiro = INSERT.search(trecho)
+        if primeiro is None:
+            return
+        # Sem os textos, cada "),(" separa duas linhas de um INSERT e cada vírgula, dois campos
+        if b'),(' in trecho or self.campos:
+            trecho = sem_textos(trecho)
+        # O mysqldump escapa quebras de linha nos textos: "\nINSERT" só aparece no início de um comando
+        trecho = b'\n' + trecho
+        inserts = trecho.count(b'\n' + primeiro.group(0))
+        if inserts == trecho.count(b'\nINSERT INTO '):
+            # Caso comum: o bloco só tem INSERTs de uma tabela
+            tabela = primeiro.group(1).decode('utf-8')
+            self.linhas[tabela] += inserts + trecho.count(b'),(')
+            self.somar(tabela, trecho)
+            return
+        for insert in INSERT.finditer(trecho):
+            tabela = insert.group(1).decode('utf-8')
+            fim = trecho.find(b'\n', insert.end())
+            fim = fim if fim >= 0 else len(trecho)
+            self.linhas[tabela] += trecho.count(b'),(', insert.end(), fim) + 1
+            self.somar(tabela, trecho[insert.start():fim])
+
+    def somar(self, tabela, trecho):
+        """Soma a coluna de `tabela` nos INSERTs do trecho (só dessa tabela, já sem textos)"""
+        campo = self.campos.get(tabela)
+        if campo is not None:
+            valores = b' '.join(campo.findall(trecho)).decode('ascii')
+            self.somas[tabela] += sum(map(Decimal, valores.split()))
+
+
+class MembroVerificado(io.RawIOBase):
+    """Membro aberto para escrita: calcula tamanho, SHA-256 e linhas do que passa"""
+
+    def __init__(self, registro, nome, destino):
+        self.registro = registro
+        self.nome = nome
+        self.destino = destino
+        self.sha256 = hashlib.sha256()
+        self.tamanho = 0
+        self.contador = (ContadorInserts(registro.linhas, registro.somas, registro.colunas_soma)
+                         if nome.endswith('.sql') else None)
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self.destino.write(dados)
+        self.sha256.update(dados)
+        self.tamanho += len(dados)
+        if self.contador is not None:
+            self.contador.alimentar(bytes(dados))
+        return len(dados)
+
+    def close(self):
+        if not self.closed:
+            self.destino.close()
+            if self.contador is not None:
+                self.contador.finalizar()
+            self.registro.membros[self.nome] = {'tamanho': self.tamanho, 'sha256': self.sha256.hexdigest()}
+        super().close()
+
+
+class RegistroIntegridade:
+    """Envolve o ZIP/snapshot de destino registrando tamanho e SHA-256 de cada membro gravado"""
+
+    def __init__(self, zipf):
+        self.zipf = zipf
+        self.membros = {}
+        self.linhas = Counter()
+        # Somas de COLUNA_SOMA; colunas_soma (ver colunas_soma()) é preenchido antes do dump
+        self.somas = Counter()
+        self.colunas_soma = {}
+
+    def __getattr__(self, nome):
+        return getattr(self.zipf, nome)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.zipf.close()
+
+    def open(self, nome, mode='w', force_zip64=False):
+        return MembroVerificado(self, nome, self.zipf.open(nome, 'w', force_zip64=force_zip64))
+
+    def writestr(self, nome, dados):
+        if isinstance(dados, str):
+            dados = dados.encode('utf-8')
+        filename = nome.filename if isinstance(nome, zipfile.ZipInfo) else nome
+        self.membros[filename] = {'tamanho': len(dados), 'sha256': hashlib.sha256(dados).hexdigest()}
+        self.zipf.writestr(nome, dados)
+
+    def write(self, arquivo, nome):
+        sha256, tamanho = hashlib.sha256(), 0
+        with open(arquivo, 'rb') as origem:
+            for bloco in iter(lambda: origem.read(TAMANHO_BLOCO), b''):
+                sha256.update(bloco)
+                tamanho += len(bloco)
+        self.membros[nome] = {'tamanho': tamanho, 'sha256': sha256.hexdigest()}
+        self.zipf.write(arquivo, nome)
+
+    def integridade(self, **extras):
+        """Campos de integridade do manifesto"""
+        return {'membros': self.membros, 'linhas': dict(sorted(self.linhas.items())),
+                'somas': {tabela: str(self.somas[tabela]) for tabela in sorted(self.colunas_soma)},
+                **extras}
+
+
+def versao_esquema(cursor):
+    """Versão do esquema: SHA-256 das colunas de todas as tabelas e quantidade de tabelas"""
+    cursor.execute('SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_KEY '
+                   'FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() '
+                   'ORDER BY TABLE_NAME, ORDINAL_POSITION')
+    colunas = cursor.fetchall()
+    texto = '\n'.join('|'.join(str(campo) for campo in coluna) for coluna in colunas)
+    return {'sha256': hashlib.sha256(texto.encode('utf-8')).hexdigest(),
+            'tabelas': len({coluna[0] for coluna in colunas})}
+
+
+def colunas_soma(cursor):
+    """{tabela: posição (a partir de 0) de COLUNA_SOMA} nas tabelas incrementais que a têm"""
+    tabelas = backup_incremental.TABELAS_INCREMENTAIS
+    cursor.execute('SELECT TABLE_NAME, ORDINAL_POSITION FROM information_schema.COLUMNS '
+                   'WHERE TABLE_SCHEMA = DATABASE() AND COLUMN_NAME = %s '
+                   f'AND TABLE_NAME IN ({", ".join(["%s"] * len(tabelas))})', (COLUNA_SOMA, *tabelas))
+    return {tabela: posicao - 1 for tabela, posicao in cursor.fetchall()}
+
+
+# ============== VERIFICAÇÃO ==============
+
+def verificar_backup(caminho):
+    """
+    Confere os membros de um backup com o manifesto, lendo em blocos.
+    Retorna {'backup', 'erros', 'bytes', 'segundos', 'manifesto'}.
+    """
+    inicio = time.perf_counter()
+    erros, lidos = [], 0
+    manifesto = backup_incremental.ler_manifesto(caminho)
+    try:
+        with repositorio_backup.abrir_backup(caminho) as zipf:
+            if manifesto is None or 'membros' not in manifesto:
+                # Sem manifesto de integridade: só o CRC de cada membro do ZIP
+                nomes = {nome: None for nome in zipf.namelist()}
+            else:
+                nomes = manifesto['membros']
+                extras = set(zipf.namelist()) - set(nomes) - {backup_incremental.MANIFESTO}
+                erros += [f'{nome}: fora do manifesto' for nome in sorted(extras)]
+
+            for nome, esperado in nomes.items():
+                sha256, tamanho = hashlib.sha256(), 0
+                try:
+                    with zipf.open(nome) as entrada:
+                        for bloco in iter(lambda: entrada.read(TAMANHO_BLOCO), b''):
+                            sha256.update(bloco)
+                            tamanho += len(bloco)
+                except KeyError:
+                    erros.append(f'{nome}: ausente')
+                    continue
+                except (zipfile.BadZipFile, ValueError, OSError) as e:
+                    erros.append(f'{nome}: {e}')
+                    continue
+                lidos += tamanho
+                if esperado is None:
+                    continue
+                if tamanho != esperado['tamanho']:
+                    erros.append(f"{nome}: {tamanho} bytes, manifesto diz {esperado['tamanho']}")
+                elif sha256.hexdigest() != esperado['sha256']:
+                    erros.append(f'{nome}: SHA-256 diferente do manifesto')
+    except (zipfile.BadZipFile, ValueError, OSError) as e:
+        erros.append(str(e))
+    return {'backup': caminho.name, 'erros': erros, 'bytes': lidos,
+            'segundos': time.perf_counter() - inicio, 'manifesto': manifesto}
+
+
+def verificar_backups(caminhos, jobs):
+    """Verifica os backups em `jobs` threads; resultados na ordem de `caminhos`"""
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        return list(executor.map(verificar_backup, caminhos))